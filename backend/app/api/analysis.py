@@ -2,12 +2,17 @@
 Analysis management endpoints
 """
 
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import AnalysisRequest, AnalysisResult
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from app.models.schemas import AnalysisRequest, AnalysisResult, CommitAnalysisRequest
 from app.engine.orchestrator import AnalysisOrchestrator
-from typing import List, Dict
+from typing import List, Dict, Optional
 import asyncio
+import uuid
+import json
 from app.utils.cache import cache
+from app.utils.graph_cache import graph_cache
+from app.utils.progress import progress_broker, TERMINAL_EVENTS
 
 router = APIRouter()
 
@@ -51,12 +56,51 @@ async def trigger_analysis(request: AnalysisRequest):
         if not commit_message:
             commit_message = ""
         
+        # Registered up front so commit streams wait for this analysis too
+        analysis_id = str(uuid.uuid4())
+        progress_broker.publish(analysis_id, "queued", {
+            "type": "code_change", "files": [request.file_path], "repository": request.repository
+        }, commit_sha=commit_sha)
+        
         result = await orchestrator.analyze_change(
             file_path=request.file_path,
             code_diff=request.diff or "",
             commit_sha=commit_sha,
             repository=request.repository,
-            commit_message=commit_message
+            commit_message=commit_message,
+            bypass_ai_cache=request.bypass_ai_cache,
+            analysis_id=analysis_id
+        )
+        
+        # Store result
+        analysis_results[result["id"]] = result
+        
+        return result
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/analyze/commit", response_model=Dict)
+async def trigger_commit_analysis(request: CommitAnalysisRequest):
+    """
+    Manually trigger one shared analysis of every file in a commit
+    """
+    print(f"🔍 Manual commit analysis requested for {len(request.files)} files")
+    
+    try:
+        commit_sha = request.commit_sha or "manual"
+        analysis_id = str(uuid.uuid4())
+        progress_broker.publish(analysis_id, "queued", {
+            "type": "commit_change", "files": [f.file_path for f in request.files], "repository": request.repository
+        }, commit_sha=commit_sha)
+        
+        result = await orchestrator.analyze_commit(
+            files=[{"file_path": f.file_path, "code_diff": f.diff or ""} for f in request.files],
+            commit_sha=commit_sha,
+            repository=request.repository,
+            commit_message=request.commit_message or "",
+            bypass_ai_cache=request.bypass_ai_cache,
+            analysis_id=analysis_id
         )
         
         # Store result
@@ -89,16 +133,137 @@ async def get_analysis(analysis_id: str):
     return result
 
 
+# Seconds between keep-alive comments on idle event streams
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def _format_sse(message: Dict) -> str:
+    """Encode a progress event in the text/event-stream wire format"""
+    payload = json.dumps(message, default=str)
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {payload}\n\n"
+
+
+async def _stream_events(request: Request, queue: asyncio.Queue, finished):
+    """
+    Yield queued events until finished(event) says the stream is over
+
+    Args:
+        request: Incoming request (to stop when the client disconnects)
+        queue: Subscription from progress_broker.subscribe
+        finished: Called with each sent event; True ends the stream
+    """
+    try:
+        # Tell EventSource to wait 3s before reconnecting
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield _format_sse(message)
+            # Replayed events still queued are sent before the stream ends
+            if finished(message) and queue.empty():
+                break
+    finally:
+        progress_broker.unsubscribe(queue)
+
+
+def _event_stream_response(generator) -> StreamingResponse:
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _last_event_id(last_event_id: Optional[str]) -> int:
+    try:
+        return int(last_event_id) if last_event_id else 0
+    except ValueError:
+        return 0
+
+
+@router.get("/analysis/{analysis_id}/events")
+async def stream_analysis_events(
+    analysis_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Stream progress of an analysis as Server-Sent Events
+
+    Events: queued, started, stage (one per finished pipeline stage, e.g. dependencies,
+    store, ai, risk), ai_token (AI output as it is generated), complete, failed.
+    Reconnecting clients send Last-Event-ID and only get the events they missed;
+    once the analysis has finished and nothing was missed the response is
+    204 No Content, which stops EventSource from reconnecting.
+    """
+    if not progress_broker.knows(analysis_id=analysis_id):
+        if analysis_id not in analysis_results:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        if last_event_id is not None:
+            # Reconnect after the result below was sent
+            return Response(status_code=204)
+
+        # Finished before progress tracking (or evicted from it): send the result only
+        result = analysis_results[analysis_id]
+
+        async def single_result():
+            yield _format_sse({"id": 0, "event": "complete", "analysis_id": analysis_id, "data": result})
+        return _event_stream_response(single_result())
+
+    queue = progress_broker.subscribe(analysis_id=analysis_id, after_id=_last_event_id(last_event_id))
+    if queue.empty() and progress_broker.is_done(analysis_id):
+        progress_broker.unsubscribe(queue)
+        return Response(status_code=204)
+    return _event_stream_response(
+        _stream_events(request, queue, lambda message: message["event"] in TERMINAL_EVENTS)
+    )
+
+
+@router.get("/commits/{commit_sha}/events")
+async def stream_commit_events(
+    commit_sha: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Stream progress of every analysis triggered by a commit as Server-Sent Events
+
+    The stream ends once every analysis seen for the commit has completed or failed;
+    reconnecting after that gets 204 No Content.
+    """
+    if not progress_broker.knows(commit_sha=commit_sha):
+        raise HTTPException(status_code=404, detail="No analyses for this commit")
+
+    queue = progress_broker.subscribe(commit_sha=commit_sha, after_id=_last_event_id(last_event_id))
+    if queue.empty() and progress_broker.commit_done(commit_sha):
+        progress_broker.unsubscribe(queue)
+        return Response(status_code=204)
+    return _event_stream_response(
+        _stream_events(
+            request, queue,
+            lambda message: message["event"] in TERMINAL_EVENTS and progress_broker.commit_done(commit_sha)
+        )
+    )
+
+
 @router.get("/cache/stats")
 async def get_cache_stats():
     """Get cache statistics (for monitoring)"""
-    return cache.get_stats()
+    stats = cache.get_stats()
+    stats["graph_cache"] = graph_cache.get_stats()
+    return stats
 
 
 @router.post("/cache/clear")
 async def clear_cache():
     """Clear cache (admin function)"""
     cache.clear()
+    graph_cache.clear()
     return {"status": "cache cleared"}
 
 
@@ -118,8 +283,17 @@ async def list_analyses(limit: int = 10):
     return sorted_analyses[:limit]
 
 @router.get("/graph/{file_name}")
-async def get_dependency_graph(file_name: str):
-    """Get dependency graph for a file (forward and reverse dependencies)"""
+async def get_dependency_graph(
+    file_name: str,
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    max_depth: int = Query(3, ge=1, le=5)
+):
+    """
+    Get dependency graph for a file (forward and reverse dependencies)
+
+    Neighbours are paged: pass the returned next_cursor to fetch the next page.
+    """
     from app.utils.neo4j_client import neo4j_client
     from urllib.parse import unquote
     
@@ -128,8 +302,17 @@ async def get_dependency_graph(file_name: str):
     
     try:
         # Try to get dependencies from Neo4j
+        next_cursor = None
+        truncated = {"forward": False, "reverse": False}
         try:
-            dependencies = await neo4j_client.get_dependencies(file_name)
+            page = await neo4j_client.get_dependencies_page(
+                file_name, max_depth=max_depth, limit=limit, cursor=cursor
+            )
+            dependencies = page["dependencies"]
+            next_cursor = page["next_cursor"]
+            truncated = page["truncated"]
+        except ValueError as cursor_error:
+            raise HTTPException(status_code=400, detail=str(cursor_error))
         except Exception as neo4j_error:
             print(f"⚠️ Neo4j query failed: {neo4j_error}")
             # Fallback: Try to get from analysis results
@@ -248,9 +431,13 @@ async def get_dependency_graph(file_name: str):
         # If no dependencies found, return empty graph with just source node
         return {
             "nodes": nodes,
-            "links": links
+            "links": links,
+            "next_cursor": next_cursor,
+            "truncated": truncated
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error getting dependency graph: {e}")
         import traceback
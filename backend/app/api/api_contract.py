@@ -38,7 +38,8 @@ async def analyze_api_contract_change(
             code_diff=request.diff or "",
             commit_sha=request.commit_sha or "manual",
             repository=request.repository,
-            commit_message=request.commit_message or ""
+            commit_message=request.commit_message or "",
+            bypass_ai_cache=request.bypass_ai_cache
         )
         
         # Store result
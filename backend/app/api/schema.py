@@ -39,7 +39,8 @@ async def analyze_schema_change(
             repository=request.repository,
             database_type=request.database_type,
             github_repo_url=request.github_repo_url,
-            github_branch=request.github_branch or "main"
+            github_branch=request.github_branch or "main",
+            bypass_ai_cache=request.bypass_ai_cache
         )
         
         # Store result
@@ -186,8 +187,10 @@ async def get_table_dependency_graph(
             database_type = "postgresql"
     
     try:
-        # Get code dependencies (code files that use this table/collection)
-        code_deps = await neo4j_client.get_table_code_dependencies(table_name, database_name)
+        # Code files using this table/collection, their transitive dependants and
+        # the table's database relationships, in one round-trip
+        table_graph = await neo4j_client.get_table_graph(table_name, database_name, max_depth=2)
+        code_deps = table_graph["code_dependencies"]
         
         # Get database relationships (other tables/collections related to this one)
         # Try to get from analysis result first (more complete), then fallback to Neo4j
@@ -201,7 +204,7 @@ async def get_table_dependency_graph(
         
         # Fallback to Neo4j if no analysis result available
         if not db_rels:
-            db_rels = await neo4j_client.get_table_relationships(table_name, database_name)
+            db_rels = table_graph["relationships"]
             print(f"   ✅ Using relationships from Neo4j")
         
         # Ensure we have forward and reverse arrays
@@ -258,44 +261,36 @@ async def get_table_dependency_graph(
                 "usage_count": code_dep.get("usage_count", 1)
             })
             
-            # Find transitive dependencies: files that depend on this file
+            # Transitive dependencies: files that depend on this file
             if file_name not in processed_files:
                 processed_files.add(file_name)
-                try:
-                    # Get reverse dependencies (files that depend on this file)
-                    transitive_deps = await neo4j_client.get_dependencies(file_name, max_depth=2)
-                    
-                    for trans_dep in transitive_deps:
-                        if trans_dep.get("direction") == "reverse":  # Others depend on this file
-                            dep_module = trans_dep.get("module")
-                            if dep_module and dep_module != file_name:
-                                # Filter out SQL files for MongoDB in transitive dependencies
-                                if database_type == "mongodb" and dep_module.endswith('.sql'):
-                                    continue
-                                
-                                dep_file_id = f"file:{dep_module}"
-                                
-                                # Add the dependent file node
-                                if dep_file_id not in nodes_map:
-                                    dep_file_node = {
-                                        "id": dep_file_id,
-                                        "name": dep_module,
-                                        "type": "code",
-                                        "risk": "low"
-                                    }
-                                    nodes.append(dep_file_node)
-                                    nodes_map[dep_file_id] = dep_file_node
-                                
-                                # Create link: dependent file -> file using table/collection
-                                links.append({
-                                    "source": dep_file_id,
-                                    "target": file_id,
-                                    "type": trans_dep.get("relationships", ["DEPENDS_ON"])[0] if trans_dep.get("relationships") else "DEPENDS_ON",
-                                    "distance": trans_dep.get("distance", 1)
-                                })
-                except Exception as e:
-                    print(f"⚠️ Error getting transitive dependencies for {file_name}: {e}")
-                    # Continue with other files
+                for trans_dep in code_dep.get("dependants", []):
+                    dep_module = trans_dep.get("module")
+                    if dep_module and dep_module != file_name:
+                        # Filter out SQL files for MongoDB in transitive dependencies
+                        if database_type == "mongodb" and dep_module.endswith('.sql'):
+                            continue
+                        
+                        dep_file_id = f"file:{dep_module}"
+                        
+                        # Add the dependent file node
+                        if dep_file_id not in nodes_map:
+                            dep_file_node = {
+                                "id": dep_file_id,
+                                "name": dep_module,
+                                "type": "code",
+                                "risk": "low"
+                            }
+                            nodes.append(dep_file_node)
+                            nodes_map[dep_file_id] = dep_file_node
+                        
+                        # Create link: dependent file -> file using table/collection
+                        links.append({
+                            "source": dep_file_id,
+                            "target": file_id,
+                            "type": trans_dep.get("rel_type") or "DEPENDS_ON",
+                            "distance": trans_dep.get("distance", 1)
+                        })
         
         # Add related table/collection nodes (database relationships)
         # Forward relationships: collections/tables this collection references
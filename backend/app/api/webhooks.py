@@ -6,8 +6,10 @@ from fastapi import APIRouter, HTTPException, BackgroundTasks
 from app.models.schemas import GitHubWebhook, AnalysisResult
 from app.engine.orchestrator import AnalysisOrchestrator
 from app.engine.api_contract_orchestrator import APIContractOrchestrator
-from typing import Dict
+from app.utils.progress import progress_broker
+from typing import Dict, List
 import asyncio
+import uuid
 import re
 
 router = APIRouter()
@@ -26,7 +28,8 @@ async def handle_github_webhook(
 ):
     """
     Handle GitHub webhook events
-    Triggers background analysis (code change or API contract change)
+    Triggers background analysis for every changed file: API-related files go
+    to API contract analysis, the other files to one shared commit analysis
     """
     print(f"📨 Received GitHub webhook: {payload.commit_sha[:8]}")
     
@@ -34,42 +37,110 @@ async def handle_github_webhook(
     if not payload.files_changed:
         raise HTTPException(status_code=400, detail="No files changed")
     
-    # For demo, analyze first changed file
-    first_file = payload.files_changed[0]
-    file_path = first_file.path
+    file_diffs = _split_diff_by_file(payload.diff or "", [f.path for f in payload.files_changed])
+    commit_message = getattr(payload, 'commit_message', '')
     
-    # Detect if file contains API definitions
-    is_api_file = _is_api_related_file(file_path, payload.diff or "")
+    api_files = []
+    code_files = []
+    for changed_file in payload.files_changed:
+        # Detect if file contains API definitions
+        if _is_api_related_file(changed_file.path, file_diffs[changed_file.path]):
+            api_files.append(changed_file.path)
+        else:
+            code_files.append(changed_file.path)
     
-    if is_api_file:
-        # Route to API contract analysis
-        print(f"   🔌 Detected API-related file, routing to API contract analysis")
-        background_tasks.add_task(
-            run_api_contract_analysis_background,
-            file_path=file_path,
-            code_diff=payload.diff or "",
-            commit_sha=payload.commit_sha,
-            repository=payload.repository,
-            commit_message=getattr(payload, 'commit_message', '')
-        )
-    else:
+    # IDs are assigned up front so clients can subscribe to progress events right away
+    analyses = []
+    runs = []
+    
+    for file_path in api_files:
+        print(f"   🔌 Detected API-related file {file_path}, routing to API contract analysis")
+        analysis_id = str(uuid.uuid4())
+        runs.append((run_api_contract_analysis_background, {
+            "file_path": file_path,
+            "code_diff": file_diffs[file_path],
+            "commit_sha": payload.commit_sha,
+            "repository": payload.repository,
+            "commit_message": commit_message,
+            "analysis_id": analysis_id
+        }))
+        analyses.append({"analysis_id": analysis_id, "analysis_type": "api_contract", "files": [file_path]})
+    
+    if len(code_files) == 1:
         # Route to regular code analysis
-        background_tasks.add_task(
-            run_analysis_background,
-            file_path=file_path,
-            code_diff=payload.diff or "",
-            commit_sha=payload.commit_sha,
-            repository=payload.repository
-        )
+        analysis_id = str(uuid.uuid4())
+        runs.append((run_analysis_background, {
+            "file_path": code_files[0],
+            "code_diff": file_diffs[code_files[0]],
+            "commit_sha": payload.commit_sha,
+            "repository": payload.repository,
+            "analysis_id": analysis_id
+        }))
+        analyses.append({"analysis_id": analysis_id, "analysis_type": "code_change", "files": code_files})
+    elif code_files:
+        # One shared analysis for all code files (one DEPENDS pass per root, one AI call)
+        print(f"   📦 Routing {len(code_files)} code files to commit analysis")
+        analysis_id = str(uuid.uuid4())
+        runs.append((run_commit_analysis_background, {
+            "files": [{"file_path": path, "code_diff": file_diffs[path]} for path in code_files],
+            "commit_sha": payload.commit_sha,
+            "repository": payload.repository,
+            "commit_message": commit_message,
+            "analysis_id": analysis_id
+        }))
+        analyses.append({"analysis_id": analysis_id, "analysis_type": "commit_change", "files": code_files})
+    
+    # Background tasks run one after another; a single task runs the analyses concurrently
+    background_tasks.add_task(run_analyses_background, runs)
+    
+    for analysis in analyses:
+        analysis["events_url"] = f"/api/v1/analysis/{analysis['analysis_id']}/events"
+        # Registered before returning so the stream URLs work before the task starts
+        progress_broker.publish(analysis["analysis_id"], "queued", {
+            "type": analysis["analysis_type"], "files": analysis["files"], "repository": payload.repository
+        }, commit_sha=payload.commit_sha)
     
     return {
         "status": "accepted",
         "message": "Analysis triggered",
         "commit": payload.commit_sha[:8],
-        "analysis_type": "api_contract" if is_api_file else "code_change"
+        "analysis_type": analyses[0]["analysis_type"],
+        "analysis_id": analyses[0]["analysis_id"],
+        "events_url": analyses[0]["events_url"],
+        "analyses": analyses,
+        "commit_events_url": f"/api/v1/commits/{payload.commit_sha}/events"
     }
 
 
+def _split_diff_by_file(diff: str, file_paths: List[str]) -> Dict[str, str]:
+    """
+    Split a combined git diff into per-file diffs
+
+    Files whose section cannot be found get the whole diff when it is the
+    only file (webhooks that send a bare hunk) and an empty diff otherwise.
+    """
+    sections = {}
+    for section in re.split(r"(?m)^(?=diff --git )", diff):
+        match = re.match(r"diff --git a/(\S+) b/(\S+)", section)
+        if match:
+            sections[match.group(2)] = section
+    
+    file_diffs = {}
+    for file_path in file_paths:
+        section = sections.get(file_path)
+        if section is None:
+            # Payload paths and diff paths may differ by a leading directory
+            section = next(
+                (text for path, text in sections.items()
+                 if path.endswith("/" + file_path) or file_path.endswith("/" + path)),
+                None
+            )
+        if section is None:
+            section = diff if len(file_paths) == 1 else ""
+        file_diffs[file_path] = section
+    return file_diffs
+
+
 def _is_api_related_file(file_path: str, code_diff: str) -> bool:
     """Detect if a file contains API endpoint definitions"""
     file_lower = file_path.lower()
@@ -100,11 +171,18 @@ def _is_api_related_file(file_path: str, code_diff: str) -> bool:
     
     return False
 
+async def run_analyses_background(runs: List):
+    """Background task running several analyses of one commit concurrently"""
+    # Each runner handles its own errors, so one failure does not cancel the others
+    await asyncio.gather(*(run(**kwargs) for run, kwargs in runs))
+
+
 async def run_analysis_background(
     file_path: str,
     code_diff: str,
     commit_sha: str,
-    repository: str
+    repository: str,
+    analysis_id: str = None
 ):
     """Background task for code change analysis"""
     try:
@@ -112,7 +190,8 @@ async def run_analysis_background(
             file_path=file_path,
             code_diff=code_diff,
             commit_sha=commit_sha,
-            repository=repository
+            repository=repository,
+            analysis_id=analysis_id
         )
         
         # Store result
@@ -129,7 +208,8 @@ async def run_api_contract_analysis_background(
     code_diff: str,
     commit_sha: str,
     repository: str,
-    commit_message: str = ""
+    commit_message: str = "",
+    analysis_id: str = None
 ):
     """Background task for API contract change analysis"""
     try:
@@ -138,7 +218,8 @@ async def run_api_contract_analysis_background(
             code_diff=code_diff,
             commit_sha=commit_sha,
             repository=repository,
-            commit_message=commit_message
+            commit_message=commit_message,
+            analysis_id=analysis_id
         )
         
         # Store result
@@ -147,4 +228,30 @@ async def run_api_contract_analysis_background(
         print(f"✅ API Contract Analysis {result['id']} completed and stored")
         
     except Exception as e:
-        print(f"❌ API Contract background analysis failed: {e}")
\ No newline at end of file
+        print(f"❌ API Contract background analysis failed: {e}")
+
+
+async def run_commit_analysis_background(
+    files: List[Dict],
+    commit_sha: str,
+    repository: str,
+    commit_message: str = "",
+    analysis_id: str = None
+):
+    """Background task for whole-commit analysis"""
+    try:
+        result = await orchestrator.analyze_commit(
+            files=files,
+            commit_sha=commit_sha,
+            repository=repository,
+            commit_message=commit_message,
+            analysis_id=analysis_id
+        )
+        
+        # Store result
+        analysis_results[result["id"]] = result
+        
+        print(f"✅ Commit Analysis {result['id']} completed and stored ({len(files)} files)")
+        
+    except Exception as e:
+        print(f"❌ Commit background analysis failed: {e}")
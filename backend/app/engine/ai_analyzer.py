@@ -6,9 +6,15 @@ import google.generativeai as genai
 import os
 import json
 import re
-from typing import Dict, List
+import asyncio
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv 
 
+from app.utils.disk_cache import DiskCache
+from app.utils.file_store import file_store
+from app.services.llm_dispatcher import llm_dispatcher, LANE_NAMES, PRIORITY_SCHEMA, PRIORITY_API_CONTRACT, PRIORITY_CODE
+from app.engine.prompt_budget import prompt_budgeter, ContextPiece, estimate_tokens, relevance_score
+
 # 1. Load variables from the .env file into os.environ
 load_dotenv() 
 
@@ -23,18 +29,145 @@ else:
 # --------------------
 
 
+MODEL_NAME = 'gemini-2.5-flash'
+
+SAFETY_SETTINGS = {
+    'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
+    'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
+    'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
+    'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
+}
+
+GENERATION_CONFIG = {
+    'temperature': 0.2,
+    'top_p': 0.8,
+    'top_k': 40,
+    'max_output_tokens': 8192,
+}
+
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "60"))
+
+# Files read for code snippets per prompt; the prompt budget decides which are kept
+MAX_SNIPPET_FILES = int(os.getenv("PROMPT_MAX_SNIPPET_FILES", "10"))
+
+# Parsed Gemini responses keyed by hash(model, generation settings, prompt)
+AI_CACHE_ENABLED = os.getenv("AI_RESPONSE_CACHE", "true").lower() == "true"
+ai_response_cache = DiskCache(
+    "ai_responses",
+    max_bytes=int(os.getenv("AI_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.getenv("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+)
+
+
 class AIAnalyzer:
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.5-flash') 
+        self.model = genai.GenerativeModel(MODEL_NAME) 
         print("✅ Gemini AI initialized")
 
+    async def _generate_insights(self, prompt: str, label: str, bypass_cache: bool = False,
+                                 priority: int = PRIORITY_CODE,
+                                 on_token: Optional[Callable[[str], None]] = None) -> Optional[Dict]:
+        """
+        Run a prompt through Gemini and parse the JSON insights
+
+        Byte-identical prompts are answered from the persistent response cache.
+
+        Args:
+            prompt: Full prompt text
+            label: Analysis name used in log messages
+            bypass_cache: Skip the cache lookup (the fresh response is still stored)
+            priority: LLM dispatcher lane
+            on_token: If set, the response is streamed and each text chunk is passed
+                to it as it arrives (called from the worker thread)
+
+        Returns:
+            Parsed insights, or None if the model timed out, failed or returned nothing
+        """
+        prompt_budgeter.record(LANE_NAMES.get(priority, str(priority)), prompt)
+
+        cache_key = DiskCache.make_key(MODEL_NAME, GENERATION_CONFIG, SAFETY_SETTINGS, prompt)
+        if AI_CACHE_ENABLED and not bypass_cache:
+            cached = ai_response_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ {label}: using cached Gemini response")
+                return cached
+
+        try:
+            # Rate-limited, retried on quota errors; the timeout covers each attempt, not queueing
+            if on_token is not None:
+                response_text = await llm_dispatcher.submit(
+                    self._stream_content, prompt, on_token, priority=priority, timeout=AI_TIMEOUT_SECONDS
+                )
+            else:
+                response = await llm_dispatcher.submit(
+                    self.model.generate_content,
+                    prompt,
+                    generation_config=GENERATION_CONFIG,
+                    safety_settings=SAFETY_SETTINGS,
+                    priority=priority,
+                    timeout=AI_TIMEOUT_SECONDS
+                )
+
+                # --- More robust check for empty/blocked content ---
+                if not response.parts or not response.parts[0].text:
+                    raise Exception(f"AI response was empty or blocked. Block reason: {self._block_reason(response)}")
+
+                response_text = response.parts[0].text
+        except asyncio.TimeoutError:
+            print(f"⚠️ {label} timed out after {AI_TIMEOUT_SECONDS:.0f} seconds")
+            return None
+        except Exception as e:
+            print(f"❌ {label} error: {e}")
+            return None
+
+        try:
+            insights = self._parse_json_response(response_text)
+        except json.JSONDecodeError:
+            # Text-derived insights are still returned, but not cached
+            return self._parse_ai_response(response_text)
+
+        if AI_CACHE_ENABLED:
+            ai_response_cache.set(cache_key, insights)
+        return insights
+
+    def _stream_content(self, prompt: str, on_token: Callable[[str], None]) -> str:
+        """Blocking streamed generate_content; forwards chunks and returns the full text"""
+        response = self.model.generate_content(
+            prompt,
+            generation_config=GENERATION_CONFIG,
+            safety_settings=SAFETY_SETTINGS,
+            stream=True
+        )
+        chunks = []
+        for chunk in response:
+            text = "".join(part.text for part in chunk.parts if getattr(part, "text", None)) if chunk.parts else ""
+            if text:
+                chunks.append(text)
+                on_token(text)
+
+        if not chunks:
+            raise Exception(f"AI response was empty or blocked. Block reason: {self._block_reason(response)}")
+        return "".join(chunks)
+
+    @staticmethod
+    def _block_reason(response) -> str:
+        block_reason = "Unknown"
+        try:
+            if response.prompt_feedback and response.prompt_feedback.block_reason:
+                block_reason = response.prompt_feedback.block_reason
+        except Exception:
+            pass # Silently fail if feedback object is weird
+        return block_reason
+
     async def analyze_impact(
         self,
         file_path: str,
         code_diff: str,
         dependencies: Dict,
         database_dependencies: Dict = None,
-        repository_path: str = None
+        repository_path: str = None,
+        bypass_cache: bool = False,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> Dict:
         """
         Main AI analysis function
@@ -45,6 +178,8 @@ class AIAnalyzer:
             dependencies: Dependencies from DEPENDS
             database_dependencies: Database table usage in the file
             repository_path: Path to repository root (for reading related files)
+            bypass_cache: Call Gemini even if an identical prompt was answered before
+            on_token: Receives response text chunks as they stream in
 
         Returns:
             AI-generated insights
@@ -55,63 +190,13 @@ class AIAnalyzer:
         prompt = self._build_analysis_prompt(
             file_path, code_diff, dependencies, database_dependencies, repository_path)
 
-        try:
-            import asyncio
-            
-            # --- AI FIX: Add safety settings to prevent blocking ---
-            safety_settings = {
-                'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-            }
-
-            # --- FINAL FIX: Increase max_output_tokens and add timeout ---
-            config = {
-                'temperature': 0.2,
-                'top_p': 0.8,
-                'top_k': 40,
-                'max_output_tokens': 8192, # Reduced from 8192 to prevent timeout
-            }
-            # ---------------------------------------------
-            
-            # Run with timeout (30 seconds)
-            try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self.model.generate_content,
-                        prompt,
-                        generation_config=config,
-                        safety_settings=safety_settings
-                    ),
-                    timeout=60.0
-                )
-            except asyncio.TimeoutError:
-                print("⚠️ AI analysis timed out after 60 seconds")
-                return self._fallback_analysis()
-
-            # --- More robust check for empty/blocked content ---
-            if not response.parts or not response.parts[0].text:
-                block_reason = "Unknown"
-                try:
-                    if response.prompt_feedback and response.prompt_feedback.block_reason:
-                        block_reason = response.prompt_feedback.block_reason
-                except Exception:
-                    pass # Silently fail if feedback object is weird
-                raise Exception(f"AI response was empty or blocked. Block reason: {block_reason}")
-            
-            response_text = response.parts[0].text
-            # ------------------------------------
-
-            insights = self._parse_ai_response(response_text) # <-- Use the safe variable
-
-            print(f"✅ AI analysis complete")
-            return insights
-
-        except Exception as e:
-            print(f"❌ AI analysis error: {e}")
+        insights = await self._generate_insights(prompt, "AI analysis", bypass_cache=bypass_cache, on_token=on_token)
+        if insights is None:
             return self._fallback_analysis()
 
+        print(f"✅ AI analysis complete")
+        return insights
+
     def _build_analysis_prompt(
         self,
         file_path: str,
@@ -120,18 +205,36 @@ class AIAnalyzer:
         database_dependencies: Dict = None,
         repository_path: str = None
     ) -> str:
-        """Build comprehensive analysis prompt with code snippets from related files"""
+        """
+        Build comprehensive analysis prompt with code snippets from related files
+
+        The diff, dependency lists, table usages and snippets are packed into
+        the prompt token budget, most relevant first.
+        """
 
         # Extract key info
         direct_deps = dependencies.get("direct_dependencies", [])
         indirect_deps = dependencies.get("indirect_dependencies", [])
-        
+        tables = (database_dependencies or {}).get("tables", [])
+
+        pieces = []
+        for dep in direct_deps:
+            pieces.append(ContextPiece("direct", self._format_dependency(dep), relevance_score(
+                1, len(dep.get("line_numbers") or []), dep.get("target", ""))))
+        for dep in indirect_deps:
+            pieces.append(ContextPiece("indirect", self._format_dependency(dep), relevance_score(
+                2, len(dep.get("line_numbers") or []), dep.get("target", ""))))
+        for table_info in tables:
+            pieces.append(ContextPiece("tables", self._format_table_usage(table_info), relevance_score(
+                1, table_info.get("usage_count", 1), table_info.get("table_name", ""))))
+
         # Extract code snippets from related files and database usage
-        related_code_section = self._extract_related_code_snippets(
+        pieces.extend(self._extract_related_code_snippets(
             file_path, dependencies, database_dependencies, repository_path
-        )
+        ))
 
-        prompt = f"""
+        def render(diff: str, sections: Dict[str, List[str]]) -> str:
+            return f"""
 You are an expert software architect analyzing code changes in a banking application.
 ## CODE CHANGE DETAILS
 
@@ -140,21 +243,21 @@ Type: Banking/Financial System
 Criticality: HIGH (handles financial transactions)
 
 ## CHANGES MADE
-{code_diff}
+{diff}
 
 ## DETECTED DEPENDENCIES
 
 Direct Dependencies ({len(direct_deps)}):
-{self._format_dependencies(direct_deps[:10])}  # Top 10
+{self._format_section(sections.get("direct"), len(direct_deps))}
 
 Indirect Dependencies ({len(indirect_deps)}):
-{self._format_dependencies(indirect_deps[:5])}  # Top 5
+{self._format_section(sections.get("indirect"), len(indirect_deps))}
 
 ## DATABASE DEPENDENCIES
-{database_dependencies.get("tables", []) and f"Database Tables Used ({len(database_dependencies.get('tables', []))}):" or "Database Tables Used: None"}
-{self._format_database_dependencies(database_dependencies) if database_dependencies else "   None"}
+{tables and f"Database Tables Used ({len(tables)}):" or "Database Tables Used: None"}
+{self._format_section(sections.get("tables"), len(tables))}
 
-{related_code_section}
+{self._format_related_code(sections, repository_path)}
 
 ## ANALYSIS REQUIRED
 
@@ -213,15 +316,223 @@ IMPORTANT WRITING GUIDELINES:
 Provide specific, actionable insights focused on banking domain risks with appropriate technical context.
 Use the code snippets above to understand how this change affects related files and database operations.
 """
-        return prompt
-    
+
+        available = prompt_budgeter.available(render("", {}))
+        diff_reserved = prompt_budgeter.split_budget(available, code_diff)
+        sections, used = prompt_budgeter.pack(pieces, available - diff_reserved, kind="code")
+        # Context budget the pieces didn't need goes back to the diff
+        diff = prompt_budgeter.fit_diff(code_diff, available - used, kind="code")
+        return render(diff, sections)
+
+    async def analyze_commit_impact(
+        self,
+        files: List[Dict],
+        commit_message: str = "",
+        repository_path: str = None,
+        bypass_cache: bool = False,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        Analyze every changed file of a commit with a single AI call
+
+        Args:
+            files: One dict per file with file_path, code_diff, dependencies
+                and database_dependencies
+            commit_message: Commit message
+            repository_path: Path to repository root (for reading related files)
+            bypass_cache: Call Gemini even if an identical prompt was answered before
+            on_token: Receives response text chunks as they stream in
+
+        Returns:
+            {"commit": commit-wide insights, "files": file path -> insights}
+            (each insights dict has the same shape as analyze_impact's)
+        """
+        print(f"🤖 Running AI analysis for {len(files)} files in one call...")
+
+        prompt = self._build_commit_analysis_prompt(files, commit_message, repository_path)
+
+        insights = await self._generate_insights(prompt, "Commit AI analysis", bypass_cache=bypass_cache, on_token=on_token)
+        if insights is None:
+            fallback = self._fallback_analysis()
+            return {"commit": fallback, "files": {f["file_path"]: fallback for f in files}}
+
+        print(f"✅ Commit AI analysis complete")
+        return self._split_commit_insights(insights, [f["file_path"] for f in files])
+
+    def _split_commit_insights(self, insights: Dict, file_paths: List[str]) -> Dict:
+        """Turn the batched response into commit-wide and per-file insights"""
+        by_path = {}
+        by_name = {}
+        for entry in insights.get("files") or []:
+            if isinstance(entry, dict) and entry.get("file_path"):
+                by_path[entry["file_path"]] = entry
+                by_name[entry["file_path"].split("/")[-1]] = entry
+
+        commit = {key: value for key, value in insights.items() if key != "files"}
+        per_file = {}
+        for file_path in file_paths:
+            entry = by_path.get(file_path) or by_name.get(file_path.split("/")[-1])
+            if entry is None:
+                # The model skipped this file: fall back to the commit-wide view
+                per_file[file_path] = commit
+                continue
+            per_file[file_path] = {
+                "summary": entry.get("summary", commit.get("summary", "")),
+                "risks": entry.get("risks", []),
+                "regulatory_concerns": entry.get("regulatory_concerns", commit.get("regulatory_concerns", "")),
+                "affected_business_flows": entry.get("affected_business_flows", commit.get("affected_business_flows", [])),
+                "recommendations": entry.get("recommendations", []),
+                "deployment_advice": commit.get("deployment_advice", "")
+            }
+        return {"commit": commit, "files": per_file}
+
+    def _build_commit_analysis_prompt(
+        self,
+        files: List[Dict],
+        commit_message: str = "",
+        repository_path: str = None
+    ) -> str:
+        """
+        Build one prompt covering every file of a commit
+
+        Context pieces of all files compete for the same budget (most relevant
+        first); the diff budget is shared in proportion to each file's diff.
+        """
+        pieces = []
+        for index, f in enumerate(files):
+            dependencies = f["dependencies"]
+            tables = (f.get("database_dependencies") or {}).get("tables", [])
+            for dep in dependencies.get("direct_dependencies", []):
+                pieces.append(ContextPiece(f"{index}:direct", self._format_dependency(dep), relevance_score(
+                    1, len(dep.get("line_numbers") or []), dep.get("target", ""))))
+            for dep in dependencies.get("indirect_dependencies", []):
+                pieces.append(ContextPiece(f"{index}:indirect", self._format_dependency(dep), relevance_score(
+                    2, len(dep.get("line_numbers") or []), dep.get("target", ""))))
+            for table_info in tables:
+                pieces.append(ContextPiece(f"{index}:tables", self._format_table_usage(table_info), relevance_score(
+                    1, table_info.get("usage_count", 1), table_info.get("table_name", ""))))
+            for piece in self._extract_related_code_snippets(
+                f["file_path"], dependencies, f.get("database_dependencies"), repository_path
+            ):
+                pieces.append(ContextPiece(f"{index}:{piece.section}", piece.text, piece.relevance))
+
+        def render_file(index: int, f: Dict, diff: str, sections: Dict[str, List[str]]) -> str:
+            dependencies = f["dependencies"]
+            direct_deps = dependencies.get("direct_dependencies", [])
+            indirect_deps = dependencies.get("indirect_dependencies", [])
+            tables = (f.get("database_dependencies") or {}).get("tables", [])
+            file_sections = {
+                name.split(":", 1)[1]: lines for name, lines in sections.items()
+                if name.startswith(f"{index}:")
+            }
+            return f"""
+### FILE {index + 1}/{len(files)}: {f["file_path"]}
+
+Changes:
+{diff or "   (no diff provided)"}
+
+Direct Dependencies ({len(direct_deps)}):
+{self._format_section(file_sections.get("direct"), len(direct_deps))}
+
+Indirect Dependencies ({len(indirect_deps)}):
+{self._format_section(file_sections.get("indirect"), len(indirect_deps))}
+
+{tables and f"Database Tables Used ({len(tables)}):" or "Database Tables Used: None"}
+{self._format_section(file_sections.get("tables"), len(tables))}
+
+{self._format_related_code(file_sections, repository_path)}
+"""
+
+        def render(diffs: List[str], sections: Dict[str, List[str]]) -> str:
+            file_blocks = "".join(render_file(i, f, diffs[i], sections) for i, f in enumerate(files))
+            return f"""
+You are an expert software architect analyzing a commit to a banking application.
+The commit changes {len(files)} files; analyze them together, paying attention to how
+the changes interact with each other.
+
+## COMMIT DETAILS
+
+Commit message: {commit_message or "(none)"}
+Type: Banking/Financial System
+Criticality: HIGH (handles financial transactions)
+
+## CHANGED FILES
+{file_blocks}
+
+## ANALYSIS REQUIRED
+
+IMPORTANT: Write in clear, professional language that is easily understandable. Include relevant technical details (method names, class names, table names, query types) where appropriate.
+
+Analyze this commit and provide insights in JSON format:
+
+{{
+  "summary": "2-3 sentence summary of what the whole commit does, which components are affected, and the main business/technical impact",
+  "risks": [
+    {{
+      "risk": "Risk title/name spanning the commit (e.g., interactions between the changed files)",
+      "technical_context": "Technical details with specific file names, method names or database operations",
+      "business_impact": "Business consequences and impact on operations, customers, or revenue",
+      "cascading_effects": "Potential downstream effects on other systems or processes"
+    }}
+  ],
+  "regulatory_concerns": "Any compliance issues across the commit, with technical context",
+  "affected_business_flows": ["Business processes affected by the commit, with the files involved"],
+  "recommendations": ["Actionable commit-wide recommendations; recommendation[i] addresses risk[i]"],
+  "deployment_advice": "Technical deployment guidance for the commit as a whole",
+  "files": [
+    {{
+      "file_path": "Exact path of the changed file as listed above (one entry per changed file)",
+      "summary": "1-2 sentence summary of this file's change and its impact",
+      "risks": [
+        {{
+          "risk": "Risk title",
+          "technical_context": "Technical details for this file",
+          "business_impact": "Business consequences",
+          "cascading_effects": "Downstream effects"
+        }}
+      ],
+      "regulatory_concerns": "Compliance issues specific to this file, or 'None'",
+      "affected_business_flows": ["Business processes this file's change affects"],
+      "recommendations": ["Recommendations for this file; recommendation[i] addresses risk[i]"]
+    }}
+  ]
+}}
+
+## CONTEXT
+
+Banking Domain Keywords to Consider:
+- Payment processing: High criticality
+- Fraud detection: Critical security
+- Account balance: Data consistency critical
+- Regulatory reporting: Compliance requirement
+- Transaction data: Audit trail required
+
+Provide specific, actionable insights focused on banking domain risks with appropriate technical context.
+Use the code snippets above to understand how the changes affect related files and database operations.
+"""
+
+        diffs = [f.get("code_diff") or "" for f in files]
+        available = prompt_budgeter.available(render([""] * len(files), {}))
+        diff_reserved = prompt_budgeter.split_budget(available, "".join(diffs))
+        sections, used = prompt_budgeter.pack(pieces, available - diff_reserved, kind="code")
+
+        # Share what the context didn't use between the diffs, by diff size
+        diff_budget = available - used
+        diff_tokens = [estimate_tokens(diff) for diff in diffs]
+        total_diff_tokens = sum(diff_tokens) or 1
+        fitted = [
+            prompt_budgeter.fit_diff(diff, int(diff_budget * tokens / total_diff_tokens), kind="code")
+            for diff, tokens in zip(diffs, diff_tokens)
+        ]
+        return render(fitted, sections)
+
     def _extract_related_code_snippets(
         self,
         file_path: str,
         dependencies: Dict,
         database_dependencies: Dict = None,
         repository_path: str = None
-    ) -> str:
+    ) -> List[ContextPiece]:
         """
         Extract code snippets from related files (dependencies and reverse dependencies)
         to show how the changed file is used in the codebase
@@ -233,78 +544,66 @@ Use the code snippets above to understand how this change affects related files
             repository_path: Path to repository root
         
         Returns:
-            Formatted string with code snippets from related files
+            Ranked snippet pieces ("related" and "db_usage" sections)
         """
+        pieces = []
         if not repository_path:
-            return "## RELATED CODE CONTEXT\n\n   Code snippets from related files not available (repository path not provided)."
+            return pieces
         
-        snippets = []
-        max_files = 3  # Limit to top 3 related files to avoid token limits
-        
-        # Get reverse dependencies (files that depend on this file)
-        reverse_deps = dependencies.get("reverse_direct_dependencies", [])[:max_files]
+        # Get reverse dependencies (files that depend on this file), most relevant
+        # first; only the top few are read, the budget decides which are kept
+        reverse_deps = sorted(
+            (dep for dep in dependencies.get("reverse_direct_dependencies", []) if dep.get("source")),
+            key=lambda dep: relevance_score(1, len(dep.get("line_numbers") or []), dep["source"]),
+            reverse=True
+        )[:MAX_SNIPPET_FILES]
         
-        if reverse_deps:
-            snippets.append("## RELATED CODE CONTEXT (Files that use this changed file)")
-            snippets.append("")
+        for dep in reverse_deps:
+            source_file = dep["source"]
             
-            for dep in reverse_deps:
-                source_file = dep.get("source", "")
-                if not source_file:
-                    continue
-                
-                # Try to find the file
-                full_path = None
-                possible_paths = [
-                    os.path.join(repository_path, source_file),
-                    source_file,
-                    os.path.join(os.getcwd(), "sample-repo", source_file),
-                    os.path.join("/sample-repo", source_file),
-                ]
-                
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        full_path = path
-                        break
-                
-                if full_path:
-                    try:
-                        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            file_lines = f.readlines()
-                        
-                        # Get line numbers where this file is used
-                        line_nums = dep.get("line_numbers", [])
-                        if not line_nums:
-                            line_nums = [dep.get("line", 0)] if dep.get("line", 0) > 0 else []
+            # Try to find the file (read once per analysis through the shared file store)
+            source = file_store.find([
+                os.path.join(repository_path, source_file),
+                source_file,
+                os.path.join(os.getcwd(), "sample-repo", source_file),
+                os.path.join("/sample-repo", source_file),
+            ])
+            
+            if source is not None:
+                try:
+                    # Get line numbers where this file is used
+                    line_nums = dep.get("line_numbers", [])
+                    if not line_nums:
+                        line_nums = [dep.get("line", 0)] if dep.get("line", 0) > 0 else []
+                    
+                    if line_nums:
+                        line_num = line_nums[0]  # Use first line number
+                        # Extract code around usage (5 lines before, 10 lines after)
+                        start_line = max(0, line_num - 6)
+                        end_line = min(source.line_count, line_num + 10)
                         
-                        if line_nums:
-                            line_num = line_nums[0]  # Use first line number
-                            # Extract code around usage (5 lines before, 10 lines after)
-                            start_line = max(0, line_num - 6)
-                            end_line = min(len(file_lines), line_num + 10)
-                            
-                            code_context = file_lines[start_line:end_line]
-                            if code_context:
-                                snippets.append(f"   File: {source_file} (uses {file_path.split('/')[-1]})")
-                                snippets.append(f"      Line {line_num}:")
-                                snippets.append(f"      ```")
-                                for i, line in enumerate(code_context):
-                                    if i == min(5, len(code_context) - 1):  # Highlight usage line
-                                        snippets.append(f"      >>> {line.rstrip()}")
-                                    else:
-                                        snippets.append(f"         {line.rstrip()}")
-                                snippets.append(f"      ```")
-                                snippets.append("")
-                    except Exception as e:
-                        # Skip if file can't be read
-                        pass
+                        code_context = source.window(start_line, end_line)
+                        if code_context:
+                            snippet = []
+                            snippet.append(f"   File: {source_file} (uses {file_path.split('/')[-1]})")
+                            snippet.append(f"      Line {line_num}:")
+                            snippet.append(f"      ```")
+                            for i, line in enumerate(code_context):
+                                if i == min(5, len(code_context) - 1):  # Highlight usage line
+                                    snippet.append(f"      >>> {line.rstrip()}")
+                                else:
+                                    snippet.append(f"         {line.rstrip()}")
+                            snippet.append(f"      ```")
+                            snippet.append("")
+                            pieces.append(ContextPiece("related", "\n".join(snippet), relevance_score(
+                                1, len(dep.get("line_numbers") or []), source_file)))
+                except Exception as e:
+                    # Skip if file can't be read
+                    pass
         
         # Also show database usage snippets if available
         if database_dependencies and database_dependencies.get("tables"):
-            snippets.append("## DATABASE USAGE IN THIS FILE")
-            snippets.append("")
-            
-            for table_info in database_dependencies.get("tables", [])[:2]:  # Top 2 tables
+            for table_info in database_dependencies.get("tables", []):
                 table_name = table_info["table_name"]
                 usages = table_info.get("usages", [])
                 
@@ -314,108 +613,121 @@ Use the code snippets above to understand how this change affects related files
                     query_type = usage.get("query_type", "")
                     
                     if context:
-                        snippets.append(f"   Table: {table_name} ({query_type})")
-                        snippets.append(f"      {context[:200]}")
-                        snippets.append("")
+                        snippet = f"   Table: {table_name} ({query_type})\n      {context[:200]}\n"
+                        pieces.append(ContextPiece("db_usage", snippet, relevance_score(
+                            1, table_info.get("usage_count", 1), table_name)))
         
-        if not snippets or len(snippets) <= 2:
+        return pieces
+
+    def _format_related_code(self, sections: Dict[str, List[str]], repository_path: str = None) -> str:
+        """Render the packed related-code and database-usage snippets"""
+        if not repository_path:
+            return "## RELATED CODE CONTEXT\n\n   Code snippets from related files not available (repository path not provided)."
+
+        snippets = []
+        if sections.get("related"):
+            snippets.append("## RELATED CODE CONTEXT (Files that use this changed file)")
+            snippets.append("")
+            snippets.extend(sections["related"])
+        if sections.get("db_usage"):
+            snippets.append("## DATABASE USAGE IN THIS FILE")
+            snippets.append("")
+            snippets.extend(sections["db_usage"])
+
+        if not snippets:
             return "## RELATED CODE CONTEXT\n\n   Code snippets from related files not available."
-        
+
         return "\n".join(snippets)
 
-    def _format_dependencies(self, deps: List[Dict]) -> str:
-        """Format dependencies for prompt"""
-        if not deps:
-            return "   None"
-
-        formatted = []
-        for dep in deps:
-            formatted.append(
-                f"   - {dep['source']} {dep['type']} {dep['target']}"
-            )
-        return "\n".join(formatted)
-    
-    def _format_database_dependencies(self, database_dependencies: Dict) -> str:
-        """Format database dependencies for prompt"""
-        if not database_dependencies or not database_dependencies.get("tables"):
-            return "   None"
+    def _format_section(self, lines: Optional[List[str]], total: int, empty: str = "   None") -> str:
+        """Join packed prompt lines, noting how many were left out"""
+        if not lines:
+            return empty if not total else f"   ... {total} entries omitted to fit the prompt budget"
+        formatted = "\n".join(lines)
+        if total > len(lines):
+            formatted += f"\n   ... and {total - len(lines)} more (omitted to fit the prompt budget)"
+        return formatted
+
+    def _format_dependency(self, dep: Dict) -> str:
+        """Format one dependency for the prompt"""
+        return f"   - {dep['source']} {dep['type']} {dep['target']}"
+
+    def _format_table_usage(self, table_info: Dict) -> str:
+        """Format one database table usage for the prompt"""
+        table_name = table_info["table_name"]
+        usage_count = table_info["usage_count"]
+        columns = table_info.get("columns", [])
+        return f"   - {table_name} ({usage_count} usages, columns: {', '.join(columns[:5]) if columns else 'N/A'})"
+
+    def _parse_json_response(self, response_text: str) -> Dict:
+        """Extract the JSON object from an AI response (raises json.JSONDecodeError)"""
+        # Remove markdown code blocks if present
+        # Handle ```json ... ``` or ``` ... ```
+        json_str = response_text.strip()
         
-        formatted = []
-        for table_info in database_dependencies.get("tables", [])[:10]:  # Top 10
-            table_name = table_info["table_name"]
-            usage_count = table_info["usage_count"]
-            columns = table_info.get("columns", [])
-            formatted.append(
-                f"   - {table_name} ({usage_count} usages, columns: {', '.join(columns[:5]) if columns else 'N/A'})"
-            )
-        return "\n".join(formatted)
+        # Remove markdown code block markers
+        if json_str.startswith("```"):
+            # Find the first newline after ```
+            first_newline = json_str.find("\n")
+            if first_newline != -1:
+                json_str = json_str[first_newline+1:]
+        
+        if json_str.endswith("```"):
+            # Find the last ``` before the end
+            last_marker = json_str.rfind("```")
+            if last_marker != -1:
+                json_str = json_str[:last_marker]
+        
+        json_str = json_str.strip()
+        
+        # Find the start of the JSON (first {)
+        start = json_str.find("{")
+        if start == -1:
+            raise json.JSONDecodeError("No '{' found in response", json_str, 0)
+
+        # Find the end of the JSON (last matching })
+        # Count braces to find the matching closing brace
+        brace_count = 0
+        end = start
+        for i in range(start, len(json_str)):
+            if json_str[i] == '{':
+                brace_count += 1
+            elif json_str[i] == '}':
+                brace_count -= 1
+                if brace_count == 0:
+                    end = i
+                    break
+        
+        if brace_count != 0:
+            # Fallback to rfind if brace matching fails
+            end = json_str.rfind("}")
+            if end == -1:
+                raise json.JSONDecodeError("No matching '}' found in response", json_str, 0)
+        
+        json_str = json_str[start:end+1]
+        
+        # Clean up known bad characters and fix encoding issues
+        json_str = json_str.replace(r'\"', '"')  # Fix escaped quotes
+        json_str = json_str.replace(r"G", " ")  # Fix non-breaking spaces
+        # Fix "ET" -> "GET" and "GGGET" -> "GET" encoding issues (multiple G's)
+        json_str = re.sub(r'\bG+ET\b', 'GET', json_str)  # GGET, GGGET, etc. -> GET
+        json_str = json_str.replace(" ET ", " GET ")  # Fix "ET" -> "GET"
+        json_str = json_str.replace(" ET/", " GET/")  # Fix "ET/" -> "GET/"
+        json_str = json_str.replace("ET ", "GET ")  # Fix "ET " -> "GET "
+        json_str = json_str.replace("\"ET ", "\"GET ")  # Fix in quotes
+        json_str = json_str.replace(" ET\"", " GET\"")  # Fix in quotes
+        
+        parsed = json.loads(json_str)
+        
+        # Fix "ET" in the parsed data recursively
+        parsed = self._fix_encoding_in_dict(parsed)
+        
+        return parsed
 
     def _parse_ai_response(self, response_text: str) -> Dict:
         """Parse AI response text to structured data"""
         try:
-            # Remove markdown code blocks if present
-            # Handle ```json ... ``` or ``` ... ```
-            json_str = response_text.strip()
-            
-            # Remove markdown code block markers
-            if json_str.startswith("```"):
-                # Find the first newline after ```
-                first_newline = json_str.find("\n")
-                if first_newline != -1:
-                    json_str = json_str[first_newline+1:]
-            
-            if json_str.endswith("```"):
-                # Find the last ``` before the end
-                last_marker = json_str.rfind("```")
-                if last_marker != -1:
-                    json_str = json_str[:last_marker]
-            
-            json_str = json_str.strip()
-            
-            # Find the start of the JSON (first {)
-            start = json_str.find("{")
-            if start == -1:
-                raise json.JSONDecodeError("No '{' found in response", json_str, 0)
-
-            # Find the end of the JSON (last matching })
-            # Count braces to find the matching closing brace
-            brace_count = 0
-            end = start
-            for i in range(start, len(json_str)):
-                if json_str[i] == '{':
-                    brace_count += 1
-                elif json_str[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end = i
-                        break
-            
-            if brace_count != 0:
-                # Fallback to rfind if brace matching fails
-                end = json_str.rfind("}")
-                if end == -1:
-                    raise json.JSONDecodeError("No matching '}' found in response", json_str, 0)
-            
-            json_str = json_str[start:end+1]
-            
-            # Clean up known bad characters and fix encoding issues
-            json_str = json_str.replace(r'\"', '"')  # Fix escaped quotes
-            json_str = json_str.replace(r"G", " ")  # Fix non-breaking spaces
-            # Fix "ET" -> "GET" and "GGGET" -> "GET" encoding issues (multiple G's)
-            json_str = re.sub(r'\bG+ET\b', 'GET', json_str)  # GGET, GGGET, etc. -> GET
-            json_str = json_str.replace(" ET ", " GET ")  # Fix "ET" -> "GET"
-            json_str = json_str.replace(" ET/", " GET/")  # Fix "ET/" -> "GET/"
-            json_str = json_str.replace("ET ", "GET ")  # Fix "ET " -> "GET "
-            json_str = json_str.replace("\"ET ", "\"GET ")  # Fix in quotes
-            json_str = json_str.replace(" ET\"", " GET\"")  # Fix in quotes
-            
-            parsed = json.loads(json_str)
-            
-            # Fix "ET" in the parsed data recursively
-            parsed = self._fix_encoding_in_dict(parsed)
-            
-            return parsed
-
+            return self._parse_json_response(response_text)
         except json.JSONDecodeError as e:
             print(f"❌ AI response parsing failed: {e}")
             print(f"Response text (first 500 chars): {response_text[:500]}")
@@ -504,7 +816,7 @@ Return as JSON array:
 
         try:
             # Removed the unsupported 'response_mime_type' here as well
-            response = self.model.generate_content(prompt)
+            response = await llm_dispatcher.submit(self.model.generate_content, prompt, priority=PRIORITY_CODE)
             scenarios = self._parse_ai_response(response.text)
 
             if isinstance(scenarios, list):
@@ -519,7 +831,9 @@ Return as JSON array:
         schema_change,
         code_dependencies: List[Dict],
         db_relationships: Dict,
-        repository_path: str = None
+        repository_path: str = None,
+        bypass_cache: bool = False,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> Dict:
         """
         Analyze impact of database schema change
@@ -529,6 +843,8 @@ Return as JSON array:
             code_dependencies: List of code files that use the table
             db_relationships: Database relationships (foreign keys, etc.)
             repository_path: Path to repository root (for reading code files)
+            bypass_cache: Call Gemini even if an identical prompt was answered before
+            on_token: Receives response text chunks as they stream in
         
         Returns:
             AI-generated insights for schema change
@@ -539,49 +855,14 @@ Return as JSON array:
             schema_change, code_dependencies, db_relationships, repository_path
         )
         
-        try:
-            import asyncio
-            
-            safety_settings = {
-                'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-            }
-            
-            config = {
-                'temperature': 0.2,
-                'top_p': 0.8,
-                'top_k': 40,
-                'max_output_tokens': 8192,
-            }
-            
-            try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self.model.generate_content,
-                        prompt,
-                        generation_config=config,
-                        safety_settings=safety_settings
-                    ),
-                    timeout=60.0
-                )
-            except asyncio.TimeoutError:
-                print("⚠️ AI schema analysis timed out after 60 seconds")
-                return self._fallback_schema_analysis()
-            
-            if not response.parts or not response.parts[0].text:
-                return self._fallback_schema_analysis()
-            
-            response_text = response.parts[0].text
-            insights = self._parse_ai_response(response_text)
-            
-            print(f"✅ AI schema analysis complete")
-            return insights
-            
-        except Exception as e:
-            print(f"❌ AI schema analysis error: {e}")
+        insights = await self._generate_insights(
+            prompt, "AI schema analysis", bypass_cache=bypass_cache, priority=PRIORITY_SCHEMA, on_token=on_token
+        )
+        if insights is None:
             return self._fallback_schema_analysis()
+        
+        print(f"✅ AI schema analysis complete")
+        return insights
     
     def _build_schema_analysis_prompt(
         self,
@@ -590,24 +871,36 @@ Return as JSON array:
         db_relationships: Dict,
         repository_path: str = None
     ) -> str:
-        """Build prompt for schema change analysis - includes actual code snippets"""
-        
+        """
+        Build prompt for schema change analysis - includes actual code snippets
+
+        Affected files, relationships and snippets are packed into the prompt
+        token budget, most relevant first.
+        """
+
         affected_files = [dep["file_path"] for dep in code_dependencies]
         forward_tables = [rel.get("target_table") or rel.get("table_name") for rel in db_relationships.get("forward", [])]
         reverse_tables = [rel.get("source_table") or rel.get("table_name") for rel in db_relationships.get("reverse", [])]
-        
+
+        pieces = []
+        for dep in code_dependencies:
+            pieces.append(ContextPiece(
+                "files",
+                f"   - {dep['file_path']} ({dep.get('usage_count', 1)} usages)",
+                relevance_score(1, dep.get("usage_count", 1), dep["file_path"])
+            ))
+
         # Build relationship details
-        relationship_details = []
-        for rel in db_relationships.get("forward", [])[:5]:
+        for rel in db_relationships.get("forward", []):
             rel_type = rel.get("type", "RELATIONSHIP")
             target = rel.get("target_table") or rel.get("table_name", "unknown")
-            relationship_details.append(f"   - {rel_type}: References {target}")
-        
-        for rel in db_relationships.get("reverse", [])[:5]:
+            pieces.append(ContextPiece("relationships", f"   - {rel_type}: References {target}", relevance_score(1, 1, target)))
+
+        for rel in db_relationships.get("reverse", []):
             rel_type = rel.get("type", "RELATIONSHIP")
             source = rel.get("source_table") or rel.get("table_name", "unknown")
-            relationship_details.append(f"   - {rel_type}: Referenced by {source}")
-        
+            pieces.append(ContextPiece("relationships", f"   - {rel_type}: Referenced by {source}", relevance_score(1, 1, source)))
+
         # Determine table criticality based on name and relationships
         table_name_lower = schema_change.table_name.lower()
         is_critical = any(keyword in table_name_lower for keyword in [
@@ -620,14 +913,15 @@ Return as JSON array:
         total_relationships = len(forward_tables) + len(reverse_tables)
         
         # Extract code snippets from affected files
-        code_snippets_section = self._extract_code_snippets(
-            code_dependencies, 
+        pieces.extend(self._extract_code_snippets(
+            code_dependencies,
             schema_change.table_name,
             schema_change.column_name,
             repository_path
-        )
-        
-        prompt = f"""
+        ))
+
+        def render(sections: Dict[str, List[str]]) -> str:
+            return f"""
 You are an expert database architect analyzing schema changes in a banking application.
 
 ## SCHEMA CHANGE CONTEXT
@@ -640,10 +934,10 @@ SQL Statement: {schema_change.sql_statement or "Not available - detected via dat
 ## IMPACT ANALYSIS
 
 Affected Code Files ({affected_file_count}):
-{chr(10).join(f"   - {f} ({code_dependencies[i].get('usage_count', 1)} usages)" for i, f in enumerate(affected_files[:10])) if affected_files else "   None detected"}
+{self._format_section(sections.get("files"), affected_file_count, "   None detected")}
 
 Database Relationships ({total_relationships} total):
-{chr(10).join(relationship_details) if relationship_details else "   No explicit relationships detected"}
+{self._format_section(sections.get("relationships"), total_relationships, "   No explicit relationships detected")}
 
 Forward Relationships (tables this table references): {len(forward_tables)}
 {chr(10).join(f"   - {t}" for t in forward_tables[:5]) if forward_tables else "   None"}
@@ -651,7 +945,7 @@ Forward Relationships (tables this table references): {len(forward_tables)}
 Reverse Relationships (tables that reference this): {reverse_table_count}
 {chr(10).join(f"   - {t}" for t in reverse_tables[:5]) if reverse_tables else "   None"}
 
-{code_snippets_section}
+{self._format_code_snippets(sections, code_dependencies, repository_path)}
 
 ## ANALYSIS REQUIRED
 
@@ -716,7 +1010,10 @@ IMPORTANT WRITING GUIDELINES:
 Provide specific, actionable insights focused on database schema change risks in banking domain with appropriate technical context.
 Use the actual code snippets above to identify specific risks and provide code-aware recommendations with technical details.
 """
-        return prompt
+
+        available = prompt_budgeter.available(render({}))
+        sections, _ = prompt_budgeter.pack(pieces, available, kind="schema")
+        return render(sections)
     
     def _extract_code_snippets(
         self,
@@ -724,7 +1021,7 @@ Use the actual code snippets above to identify specific risks and provide code-a
         table_name: str,
         column_name: str = None,
         repository_path: str = None
-    ) -> str:
+    ) -> List[ContextPiece]:
         """
         Extract code snippets from affected files showing how the table/collection is used
         
@@ -735,37 +1032,41 @@ Use the actual code snippets above to identify specific risks and provide code-a
             repository_path: Path to repository root
         
         Returns:
-            Formatted string with code snippets
+            Ranked snippet pieces (one per file, "snippets" section)
         """
+        pieces = []
         if not code_dependencies or not repository_path:
-            return "## CODE SNIPPETS\n\n   Code snippets not available (repository path not provided)."
+            return pieces
         
-        snippets = []
-        max_files = 5  # Limit to top 5 files to avoid token limits
         max_snippets_per_file = 2  # Limit snippets per file
         
-        for dep in code_dependencies[:max_files]:
+        # Most used / most critical files first; only the top few are read,
+        # the budget decides which are kept
+        ranked_dependencies = sorted(
+            code_dependencies,
+            key=lambda dep: relevance_score(1, dep.get("usage_count", 1), dep.get("file_path", "")),
+            reverse=True
+        )[:MAX_SNIPPET_FILES]
+        
+        for dep in ranked_dependencies:
             file_path = dep.get("file_path", "")
             usages = dep.get("usages", [])
             
             if not file_path or not usages:
                 continue
             
-            # Try to read the actual file
-            full_path = None
-            possible_paths = [
+            relevance = relevance_score(1, dep.get("usage_count", 1), file_path)
+            snippets = []
+            
+            # Try to read the actual file (shared with the extractors through the file store)
+            source = file_store.find([
                 os.path.join(repository_path, file_path),
                 file_path,  # Already absolute
                 os.path.join(os.getcwd(), "sample-repo", file_path),
                 os.path.join("/sample-repo", file_path),
-            ]
+            ])
             
-            for path in possible_paths:
-                if os.path.exists(path):
-                    full_path = path
-                    break
-            
-            if not full_path:
+            if source is None:
                 # File not found, use context from usages
                 file_snippets = []
                 for usage in usages[:max_snippets_per_file]:
@@ -779,13 +1080,11 @@ Use the actual code snippets above to identify specific risks and provide code-a
                 if file_snippets:
                     snippets.append(f"   File: {file_path}")
                     snippets.extend(file_snippets)
+                    pieces.append(ContextPiece("snippets", "\n".join(snippets), relevance))
                 continue
             
             # Read file and extract code around usage lines
             try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    file_lines = f.readlines()
-                
                 file_snippets = []
                 processed_lines = set()  # Avoid duplicate snippets for same line
                 
@@ -800,9 +1099,9 @@ Use the actual code snippets above to identify specific risks and provide code-a
                     
                     # Extract code around the usage line (5 lines before, 10 lines after)
                     start_line = max(0, line_num - 6)  # 0-indexed, so -6 for 5 lines before
-                    end_line = min(len(file_lines), line_num + 10)  # 10 lines after
+                    end_line = min(source.line_count, line_num + 10)  # 10 lines after
                     
-                    code_context = file_lines[start_line:end_line]
+                    code_context = source.window(start_line, end_line)
                     code_snippet = "".join(code_context).strip()
                     
                     if code_snippet:
@@ -834,11 +1133,21 @@ Use the actual code snippets above to identify specific risks and provide code-a
                     snippets.append(f"   File: {file_path}")
                     snippets.append(f"      Context: {context[:200]}")
                     snippets.append("")
+            
+            if snippets:
+                pieces.append(ContextPiece("snippets", "\n".join(snippets), relevance))
         
-        if not snippets:
+        return pieces
+    
+    def _format_code_snippets(self, sections: Dict[str, List[str]], code_dependencies: List[Dict], repository_path: str = None) -> str:
+        """Render the packed schema code snippets"""
+        if not code_dependencies or not repository_path:
+            return "## CODE SNIPPETS\n\n   Code snippets not available (repository path not provided)."
+        
+        if not sections.get("snippets"):
             return "## CODE SNIPPETS\n\n   Code snippets not available (files could not be read)."
         
-        return "## CODE SNIPPETS (How the table/collection is used in code)\n\n" + "\n".join(snippets)
+        return "## CODE SNIPPETS (How the table/collection is used in code)\n\n" + "\n".join(sections["snippets"])
     
     def _fallback_schema_analysis(self) -> Dict:
         """Fallback analysis for schema changes"""
@@ -867,7 +1176,9 @@ Use the actual code snippets above to identify specific risks and provide code-a
         code_diff: str,
         api_changes: List,
         consumers: Dict,
-        repository_path: str = None
+        repository_path: str = None,
+        bypass_cache: bool = False,
+        on_token: Optional[Callable[[str], None]] = None
     ) -> Dict:
         """
         Analyze impact of API contract changes
@@ -878,6 +1189,8 @@ Use the actual code snippets above to identify specific risks and provide code-a
             api_changes: List of API contract changes
             consumers: Dictionary mapping API endpoints to consumer files
             repository_path: Path to repository root
+            bypass_cache: Call Gemini even if an identical prompt was answered before
+            on_token: Receives response text chunks as they stream in
         
         Returns:
             AI-generated insights for API contract changes
@@ -888,49 +1201,15 @@ Use the actual code snippets above to identify specific risks and provide code-a
             file_path, code_diff, api_changes, consumers, repository_path
         )
         
-        try:
-            import asyncio
-            
-            safety_settings = {
-                'HARM_CATEGORY_HARASSMENT': 'BLOCK_NONE',
-                'HARM_CATEGORY_HATE_SPEECH': 'BLOCK_NONE',
-                'HARM_CATEGORY_SEXUALLY_EXPLICIT': 'BLOCK_NONE',
-                'HARM_CATEGORY_DANGEROUS_CONTENT': 'BLOCK_NONE',
-            }
-            
-            config = {
-                'temperature': 0.2,
-                'top_p': 0.8,
-                'top_k': 40,
-                'max_output_tokens': 8192,
-            }
-            
-            try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self.model.generate_content,
-                        prompt,
-                        generation_config=config,
-                        safety_settings=safety_settings
-                    ),
-                    timeout=60.0
-                )
-            except asyncio.TimeoutError:
-                print("⚠️ AI API contract analysis timed out after 60 seconds")
-                return self._fallback_api_contract_analysis(api_changes, consumers)
-            
-            if not response.parts or not response.parts[0].text:
-                return self._fallback_api_contract_analysis(api_changes, consumers)
-            
-            response_text = response.parts[0].text
-            insights = self._parse_ai_response(response_text)
-            
-            print(f"✅ AI API contract analysis complete")
-            return insights
-            
-        except Exception as e:
-            print(f"❌ AI API contract analysis error: {e}")
+        insights = await self._generate_insights(
+            prompt, "AI API contract analysis", bypass_cache=bypass_cache, priority=PRIORITY_API_CONTRACT,
+            on_token=on_token
+        )
+        if insights is None:
             return self._fallback_api_contract_analysis(api_changes, consumers)
+        
+        print(f"✅ AI API contract analysis complete")
+        return insights
     
     def _build_api_contract_analysis_prompt(
         self,
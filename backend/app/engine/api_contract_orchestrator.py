@@ -13,7 +13,9 @@ from app.services.api_extractor import APIContractExtractor
 from app.services.api_contract_analyzer import APIContractAnalyzer, APIContractChange
 from app.engine.ai_analyzer import AIAnalyzer
 from app.engine.risk_scorer import RiskScorer
+from app.engine.stage_pipeline import StagePipeline
 from app.utils.neo4j_client import neo4j_client
+from app.utils.progress import progress_broker
 from app.utils.github_fetcher import GitHubFetcher
 from app.config import get_consumer_repositories, CONSUMER_SEARCH_METHOD, GITHUB_TOKEN
 
@@ -36,7 +38,9 @@ class APIContractOrchestrator:
         repository: str,
         github_repo_url: Optional[str] = None,
         github_branch: str = "main",
-        commit_message: str = ""
+        commit_message: str = "",
+        bypass_ai_cache: bool = False,
+        analysis_id: Optional[str] = None
     ) -> Dict:
         """
         Analyze API contract changes in a code file
@@ -49,11 +53,13 @@ class APIContractOrchestrator:
             github_repo_url: Optional GitHub repository URL
             github_branch: GitHub branch name
             commit_message: Commit message
+            bypass_ai_cache: Call the AI model even if an identical prompt was cached
+            analysis_id: Pre-assigned ID (so clients can subscribe to progress events first)
         
         Returns:
             Complete analysis result
         """
-        analysis_id = str(uuid.uuid4())
+        analysis_id = analysis_id or str(uuid.uuid4())
         start_time = datetime.now()
         
         print(f"\n{'='*60}")
@@ -62,112 +68,57 @@ class APIContractOrchestrator:
         print(f"   Commit: {commit_sha[:8]}")
         print(f"{'='*60}\n")
         
+        progress_broker.publish(analysis_id, "started", {
+            "type": "api_contract_change", "file_path": file_path, "repository": repository
+        }, commit_sha=commit_sha)
+        
         try:
-            # Step 1: Get repository path
-            repo_path = await self._get_repository_path(repository, github_repo_url, github_branch)
-            
-            # Step 2: Extract API contracts from current version
-            print("Step 1/7: Extracting API contracts from current code...")
-            after_contracts = await self._extract_contracts_from_file(file_path, repo_path)
-            
-            # Step 2.5: Identify which endpoints are actually in the diff
-            endpoints_in_diff = self._identify_endpoints_in_diff(code_diff, after_contracts) if code_diff else set()
-            if endpoints_in_diff:
-                print(f"   🔍 Endpoints found in diff: {endpoints_in_diff}")
-            
-            # Step 3: Extract API contracts from previous version
-            # Try to get from Neo4j first
-            print("Step 2/7: Extracting API contracts from previous version...")
-            before_contracts = await self._get_existing_contracts_from_neo4j(file_path)
-            
-            # If no Neo4j data, try to extract from code diff
-            if not before_contracts and code_diff:
-                print("   🔍 Attempting to extract 'before' contracts from code diff...")
-                before_contracts = await self._extract_contracts_from_diff(code_diff, file_path)
-                if before_contracts:
-                    print(f"   ✅ Successfully extracted {len(before_contracts)} 'before' contracts from diff")
-            
-            # If still no data, use empty list (all will be marked as ADDED)
-            # But only show warning if we couldn't extract from diff AND endpoints_in_diff is empty
-            if not before_contracts:
-                before_contracts = []
-                # Only show warning if we don't know which endpoints changed
-                if not endpoints_in_diff:
-                    print("   ⚠️ No previous contracts found - all changes will be marked as ADDED")
-                    print("   Note: For breaking change detection, provide 'before' contracts via Neo4j or git")
-            
-            # Step 4: Compare contracts to detect changes
-            print("Step 3/7: Comparing API contracts...")
-            changes = self.api_analyzer.compare_contracts(before_contracts, after_contracts)
-            
-            # Step 4.5: Filter changes to only include endpoints that were actually changed (in diff)
-            # This prevents showing all endpoints when only one was modified
-            if endpoints_in_diff:
-                print(f"   🔍 Filtering to {len(endpoints_in_diff)} endpoints found in diff...")
-                filtered_changes = []
-                for change in changes:
-                    api_key = f"{change.method} {change.endpoint}"
-                    # Include if it's in the diff, has consumers, or is breaking
-                    if api_key in endpoints_in_diff:
-                        filtered_changes.append(change)
-                    elif change.change_type == 'BREAKING':
-                        # Include breaking changes even if not explicitly in diff (might be path changes)
-                        # But check if endpoint path is mentioned in diff
-                        endpoint_mentioned = (
-                            change.endpoint.lower() in code_diff.lower() or 
-                            change.endpoint.split('/')[-1] in code_diff.lower() or
-                            change.method.lower() in code_diff.lower()
-                        ) if code_diff else True
-                        if endpoint_mentioned:
-                            filtered_changes.append(change)
-                    else:
-                        # Check if any endpoint path matches (for path changes)
-                        endpoint_in_diff = any(
-                            ep.split()[-1] in change.endpoint or change.endpoint in ep.split()[-1]
-                            for ep in endpoints_in_diff
-                        )
-                        if endpoint_in_diff:
-                            filtered_changes.append(change)
-                
-                if filtered_changes:
-                    changes = filtered_changes
-                    print(f"   ✅ Filtered to {len(changes)} relevant changes")
-            
-            # Step 5: Find API consumers
-            print("Step 4/7: Finding API consumers...")
-            consumers = await self._find_all_consumers(after_contracts, repo_path)
-            
-            # Step 4.5: Enhance based on diff analysis to detect breaking changes
-            # This helps detect breaking changes even when before state is unknown
-            # We analyze the diff directly, not relying on commit message keywords
-            if not before_contracts and code_diff:
-                print("   🔍 Analyzing diff for breaking change indicators...")
-                changes = self._enhance_breaking_changes_from_diff(changes, code_diff, endpoints_in_diff, commit_message)
-            
-            # Also check if endpoints with consumers have response type changes (even if before contracts exist)
-            # This catches cases where response type changed but before/after comparison didn't catch it
-            if code_diff:
-                changes = self._enhance_breaking_changes_from_response_type(changes, code_diff, consumers, endpoints_in_diff)
+            # repository ─> after_contracts ─┬─> changes ────┬─> classify ─> ai ─> risk
+            # previous (Neo4j) ──────────────┤               │
+            #                                └─> consumers ──┴─> store
+            # The store waits for the previous-contract read so it cannot
+            # overwrite the "before" state it is compared against.
+            pipeline = StagePipeline("api_contract_change", on_stage_complete=progress_broker.stage_reporter(analysis_id, commit_sha))
+            pipeline.add("repository", lambda r: self._get_repository_path(repository, github_repo_url, github_branch))
+            pipeline.add("previous", lambda r: self._run_step(
+                "Step 2/7: Extracting API contracts from previous version...",
+                self._get_existing_contracts_from_neo4j(file_path)
+            ))
+            pipeline.add("after_contracts", lambda r: self._run_step(
+                "Step 1/7: Extracting API contracts from current code...",
+                self._extract_contracts_from_file(file_path, r["repository"])
+            ), after=("repository",))
+            pipeline.add("changes", lambda r: self._detect_changes(
+                file_path, code_diff, r["after_contracts"], r["previous"]
+            ), after=("after_contracts", "previous"))
+            pipeline.add("consumers", lambda r: self._run_step(
+                "Step 4/7: Finding API consumers...",
+                self._find_all_consumers(r["after_contracts"], r["repository"])
+            ), after=("after_contracts",))
+            pipeline.add("classify", lambda r: self._classify_changes(
+                code_diff, commit_message, r["changes"], r["consumers"]
+            ), after=("changes", "consumers"))
+            pipeline.add("store", lambda r: self._run_step(
+                "Step 5/7: Storing API contracts in Neo4j...",
+                self._store_api_contracts_in_neo4j(r["after_contracts"], file_path, r["consumers"])
+            ), after=("consumers", "previous"))
+            pipeline.add("ai", lambda r: self._run_ai_analysis(
+                file_path, code_diff, r["classify"], r["consumers"], r["repository"], bypass_ai_cache,
+                on_token=progress_broker.token_reporter(analysis_id, commit_sha)
+            ), after=("classify",))
+            pipeline.add("risk", lambda r: self._run_step(
+                "Step 7/7: Calculating risk score...",
+                self._score_risk(r["classify"], r["consumers"], r["ai"])
+            ), after=("ai",))
             
-            # Step 6: Store in Neo4j
-            print("Step 5/7: Storing API contracts in Neo4j...")
-            await self._store_api_contracts_in_neo4j(after_contracts, file_path, consumers)
-            
-            # Step 7: AI Analysis
-            print("Step 6/7: Running AI analysis...")
-            try:
-                ai_insights = await self.ai_analyzer.analyze_api_contract_impact(
-                    file_path, code_diff, changes, consumers, repository_path=repo_path
-                )
-            except Exception as ai_error:
-                print(f"⚠️ AI analysis failed (non-blocking): {ai_error}")
-                ai_insights = self._fallback_api_analysis(changes, consumers)
-            
-            # Step 8: Risk Scoring
-            print("Step 7/7: Calculating risk score...")
+            stages = await pipeline.run()
+            changes = stages["classify"]
+            endpoints_in_diff = stages["changes"]["endpoints_in_diff"]
+            consumers = stages["consumers"]
+            ai_insights = stages["ai"]
+            risk_score = stages["risk"]
             breaking_changes = [c for c in changes if c.change_type == 'BREAKING']
             consumer_count = sum(len(cons) for cons in consumers.values())
-            risk_score = self._calculate_api_risk_score(breaking_changes, consumer_count, ai_insights)
             
             # Filter consumers to only show consumers for endpoints that were actually changed
             # This prevents showing consumers for unrelated endpoints in the same file
@@ -203,6 +154,7 @@ class APIContractOrchestrator:
                 commit_message,
                 endpoints_in_diff
             )
+            result["metadata"].update(pipeline.get_metadata())
             
             duration = (datetime.now() - start_time).total_seconds()
             print(f"\n{'='*60}")
@@ -210,14 +162,148 @@ class APIContractOrchestrator:
             print(f"   Changes Detected: {len(changes)} ({len(breaking_changes)} breaking)")
             print(f"   Consumers Affected: {consumer_count}")
             print(f"   Risk Score: {risk_score['score']}/10 - {risk_score['level']}")
+            print(f"   Critical Path: {' -> '.join(result['metadata']['critical_path'])}")
             print(f"{'='*60}\n")
             
+            progress_broker.publish(analysis_id, "complete", result)
             return result
             
         except Exception as e:
             print(f"\n❌ API Contract Analysis failed: {str(e)}")
+            progress_broker.publish(analysis_id, "failed", {"error": str(e)})
             raise
     
+    @staticmethod
+    async def _run_step(message: str, step):
+        """Log a pipeline stage as it starts and await it"""
+        print(message)
+        return await step
+    
+    async def _detect_changes(
+        self,
+        file_path: str,
+        code_diff: str,
+        after_contracts: List[Dict],
+        before_contracts: Optional[List[Dict]]
+    ) -> Dict:
+        """
+        Pipeline stage: compare the previous and current contracts
+
+        Returns:
+            {"changes", "endpoints_in_diff", "before_contracts"}
+        """
+        # Identify which endpoints are actually in the diff
+        endpoints_in_diff = self._identify_endpoints_in_diff(code_diff, after_contracts) if code_diff else set()
+        if endpoints_in_diff:
+            print(f"   🔍 Endpoints found in diff: {endpoints_in_diff}")
+        
+        # If no Neo4j data, try to extract from code diff
+        if not before_contracts and code_diff:
+            print("   🔍 Attempting to extract 'before' contracts from code diff...")
+            before_contracts = await self._extract_contracts_from_diff(code_diff, file_path)
+            if before_contracts:
+                print(f"   ✅ Successfully extracted {len(before_contracts)} 'before' contracts from diff")
+        
+        # If still no data, use empty list (all will be marked as ADDED)
+        # But only show warning if we couldn't extract from diff AND endpoints_in_diff is empty
+        if not before_contracts:
+            before_contracts = []
+            # Only show warning if we don't know which endpoints changed
+            if not endpoints_in_diff:
+                print("   ⚠️ No previous contracts found - all changes will be marked as ADDED")
+                print("   Note: For breaking change detection, provide 'before' contracts via Neo4j or git")
+        
+        # Compare contracts to detect changes
+        print("Step 3/7: Comparing API contracts...")
+        changes = self.api_analyzer.compare_contracts(before_contracts, after_contracts)
+        
+        # Filter changes to only include endpoints that were actually changed (in diff)
+        # This prevents showing all endpoints when only one was modified
+        if endpoints_in_diff:
+            print(f"   🔍 Filtering to {len(endpoints_in_diff)} endpoints found in diff...")
+            filtered_changes = []
+            for change in changes:
+                api_key = f"{change.method} {change.endpoint}"
+                # Include if it's in the diff, has consumers, or is breaking
+                if api_key in endpoints_in_diff:
+                    filtered_changes.append(change)
+                elif change.change_type == 'BREAKING':
+                    # Include breaking changes even if not explicitly in diff (might be path changes)
+                    # But check if endpoint path is mentioned in diff
+                    endpoint_mentioned = (
+                        change.endpoint.lower() in code_diff.lower() or 
+                        change.endpoint.split('/')[-1] in code_diff.lower() or
+                        change.method.lower() in code_diff.lower()
+                    ) if code_diff else True
+                    if endpoint_mentioned:
+                        filtered_changes.append(change)
+                else:
+                    # Check if any endpoint path matches (for path changes)
+                    endpoint_in_diff = any(
+                        ep.split()[-1] in change.endpoint or change.endpoint in ep.split()[-1]
+                        for ep in endpoints_in_diff
+                    )
+                    if endpoint_in_diff:
+                        filtered_changes.append(change)
+            
+            if filtered_changes:
+                changes = filtered_changes
+                print(f"   ✅ Filtered to {len(changes)} relevant changes")
+        
+        return {"changes": changes, "endpoints_in_diff": endpoints_in_diff, "before_contracts": before_contracts}
+    
+    async def _classify_changes(
+        self,
+        code_diff: str,
+        commit_message: str,
+        detected: Dict,
+        consumers: Dict[str, List[Dict]]
+    ) -> List[APIContractChange]:
+        """Pipeline stage: flag breaking changes from the diff and consumer usage"""
+        changes = detected["changes"]
+        endpoints_in_diff = detected["endpoints_in_diff"]
+        
+        # Enhance based on diff analysis to detect breaking changes
+        # This helps detect breaking changes even when before state is unknown
+        # We analyze the diff directly, not relying on commit message keywords
+        if not detected["before_contracts"] and code_diff:
+            print("   🔍 Analyzing diff for breaking change indicators...")
+            changes = self._enhance_breaking_changes_from_diff(changes, code_diff, endpoints_in_diff, commit_message)
+        
+        # Also check if endpoints with consumers have response type changes (even if before contracts exist)
+        # This catches cases where response type changed but before/after comparison didn't catch it
+        if code_diff:
+            changes = self._enhance_breaking_changes_from_response_type(changes, code_diff, consumers, endpoints_in_diff)
+        
+        return changes
+    
+    async def _run_ai_analysis(
+        self,
+        file_path: str,
+        code_diff: str,
+        changes: List[APIContractChange],
+        consumers: Dict[str, List[Dict]],
+        repo_path: Optional[str],
+        bypass_ai_cache: bool = False,
+        on_token=None
+    ) -> Dict:
+        """Pipeline stage: AI analysis (non-blocking - falls back if it fails)"""
+        print("Step 6/7: Running AI analysis...")
+        try:
+            return await self.ai_analyzer.analyze_api_contract_impact(
+                file_path, code_diff, changes, consumers, repository_path=repo_path,
+                bypass_cache=bypass_ai_cache, on_token=on_token
+            )
+        except Exception as ai_error:
+            print(f"⚠️ AI analysis failed (non-blocking): {ai_error}")
+            return self._fallback_api_analysis(changes, consumers)
+    
+    async def _score_risk(self, changes: List[APIContractChange], consumers: Dict[str, List[Dict]], ai_insights: Dict) -> Dict:
+        """Pipeline stage: risk scoring"""
+        breaking_changes = [c for c in changes if c.change_type == 'BREAKING']
+        consumer_count = sum(len(cons) for cons in consumers.values())
+        return self._calculate_api_risk_score(breaking_changes, consumer_count, ai_insights)
+    
     async def _get_repository_path(self, repository: str, github_repo_url: Optional[str], github_branch: str) -> Optional[str]:
         """Get repository path (local or cloned from GitHub)"""
         if github_repo_url:
@@ -935,43 +1021,45 @@ class APIContractOrchestrator:
     async def _store_api_contracts_in_neo4j(self, contracts: List[Dict], file_path: str, consumers: Dict[str, List[Dict]]):
         """Store API contracts and consumer relationships in Neo4j"""
         try:
-            for contract in contracts:
-                endpoint = contract['path']
-                method = contract['method']
-                
-                # Create API endpoint node
-                await neo4j_client.create_api_endpoint_node(
-                    endpoint=endpoint,
-                    method=method,
-                    file_path=file_path,
-                    properties={
-                        'framework': contract.get('framework', 'unknown'),
-                        'parameters': contract.get('parameters', []),
-                        'return_type': contract.get('return_type'),
-                        'line_number': contract.get('line_number', 0)
-                    }
-                )
-                
-                # Create consumer relationships
-                key = f"{method} {endpoint}"
-                for consumer in consumers.get(key, []):
-                    consumer_file = consumer['file_path'].split('/')[-1]
+            # One transaction for the whole storage phase; a failure leaves nothing half-written
+            async with neo4j_client.unit_of_work():
+                for contract in contracts:
+                    endpoint = contract['path']
+                    method = contract['method']
                     
-                    # Ensure module node exists
-                    await neo4j_client.create_module_node(
-                        name=consumer_file,
-                        properties={'path': consumer['file_path']}
+                    # Create API endpoint node
+                    await neo4j_client.create_api_endpoint_node(
+                        endpoint=endpoint,
+                        method=method,
+                        file_path=file_path,
+                        properties={
+                            'framework': contract.get('framework', 'unknown'),
+                            'parameters': contract.get('parameters', []),
+                            'return_type': contract.get('return_type'),
+                            'line_number': contract.get('line_number', 0)
+                        }
                     )
                     
-                    # Create CONSUMES_API relationship
-                    await neo4j_client.create_api_consumer_relationship(
-                        consumer_file=consumer_file,
-                        api_endpoint=endpoint,
-                        api_method=method,
-                        line_number=consumer.get('line_number', 0)
-                    )
-            
-            print("   ✅ API contracts stored in Neo4j")
+                    # Create consumer relationships
+                    key = f"{method} {endpoint}"
+                    for consumer in consumers.get(key, []):
+                        consumer_file = consumer['file_path'].split('/')[-1]
+                        
+                        # Ensure module node exists
+                        await neo4j_client.create_module_node(
+                            name=consumer_file,
+                            properties={'path': consumer['file_path']}
+                        )
+                        
+                        # Create CONSUMES_API relationship
+                        await neo4j_client.create_api_consumer_relationship(
+                            consumer_file=consumer_file,
+                            api_endpoint=endpoint,
+                            api_method=method,
+                            line_number=consumer.get('line_number', 0)
+                        )
+                
+                print("   ✅ API contracts stored in Neo4j")
             
         except Exception as e:
             print(f"   ⚠️ Neo4j storage failed: {e}")
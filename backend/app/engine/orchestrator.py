@@ -3,7 +3,8 @@ Main orchestration engine - ties everything together
 """
 
 import asyncio
-from typing import Dict
+import os
+from typing import Dict, List
 from datetime import datetime
 import uuid
 
@@ -11,7 +12,10 @@ from app.services.depends_wrapper import DependsAnalyzer
 from app.services.sql_extractor import SQLExtractor
 from app.engine.ai_analyzer import AIAnalyzer
 from app.engine.risk_scorer import RiskScorer
+from app.engine.stage_pipeline import StagePipeline
 from app.utils.neo4j_client import neo4j_client
+from app.utils.progress import progress_broker
+from app.utils.file_store import file_store
 
 class AnalysisOrchestrator:
     def __init__(self):
@@ -26,7 +30,9 @@ class AnalysisOrchestrator:
         code_diff: str,
         commit_sha: str,
         repository: str,
-        commit_message: str = ""
+        commit_message: str = "",
+        bypass_ai_cache: bool = False,
+        analysis_id: str = None
     ) -> Dict:
         """
         Main orchestration method
@@ -37,11 +43,13 @@ class AnalysisOrchestrator:
             code_diff: Git diff
             commit_sha: Commit SHA
             repository: Repository name
+            bypass_ai_cache: Call the AI model even if an identical prompt was cached
+            analysis_id: Pre-assigned ID (so clients can subscribe to progress events first)
         
         Returns:
             Complete analysis result
         """
-        analysis_id = str(uuid.uuid4())
+        analysis_id = analysis_id or str(uuid.uuid4())
         start_time = datetime.now()
         
         print(f"\n{'='*60}")
@@ -50,50 +58,47 @@ class AnalysisOrchestrator:
         print(f"   Commit: {commit_sha[:8]}")
         print(f"{'='*60}\n")
         
+        progress_broker.publish(analysis_id, "started", {
+            "type": "code_change", "file_path": file_path, "repository": repository
+        }, commit_sha=commit_sha)
+        
         try:
-            # Step 1: Dependency Analysis (using DEPENDS)
-            print("Step 1/6: Analyzing code dependencies...")
-            dependencies = await self._analyze_dependencies(file_path)
-            
-            # Step 1.5: Database Dependency Analysis (NEW)
-            print("Step 2/6: Analyzing database dependencies...")
-            database_dependencies = await self._analyze_database_dependencies(file_path)
-            
-            # Step 2: Store in Neo4j
-            print("Step 3/6: Storing dependency graph...")
-            await self._store_in_neo4j(file_path, dependencies, database_dependencies)
-            
-            # Step 3: AI Analysis (non-blocking - continue even if it fails)
-            print("Step 4/6: Running AI analysis...")
-            try:
-                # Get repository path for code snippet extraction
-                import os
-                repo_path = None
-                possible_paths = [
-                    "/sample-repo",
-                    os.path.join(os.getcwd(), "sample-repo"),
-                    os.path.join("/app", "sample-repo"),
-                    "sample-repo"
-                ]
-                for path in possible_paths:
-                    if os.path.exists(path):
-                        repo_path = path
-                        break
-                
-                ai_insights = await self.ai_analyzer.analyze_impact(
-                    file_path, code_diff, dependencies, database_dependencies, repository_path=repo_path
+            # Independent stages run concurrently:
+            #   dependencies ─┬─> store ─┬─> risk
+            #   database ─────┴─> ai ────┘
+            # Risk scoring waits for the store so the blast-radius index
+            # already includes this change's edges.
+            pipeline = StagePipeline("code_change", on_stage_complete=progress_broker.stage_reporter(analysis_id, commit_sha))
+            pipeline.add("dependencies", lambda r: self._run_step(
+                "Step 1/6: Analyzing code dependencies...", self._analyze_dependencies(file_path)))
+            pipeline.add("database", lambda r: self._run_step(
+                "Step 2/6: Analyzing database dependencies...", self._analyze_database_dependencies(file_path)))
+            pipeline.add("store", lambda r: self._run_step(
+                "Step 3/6: Storing dependency graph...",
+                self._store_in_neo4j(file_path, r["dependencies"], r["database"])
+            ), after=("dependencies", "database"))
+            pipeline.add("ai", lambda r: self._run_step(
+                "Step 4/6: Running AI analysis...",
+                self._run_ai_analysis(
+                    file_path, code_diff, r["dependencies"], r["database"], bypass_ai_cache,
+                    on_token=progress_broker.token_reporter(analysis_id, commit_sha)
+                )
+            ), after=("dependencies", "database"))
+            pipeline.add("risk", lambda r: self._run_step(
+                "Step 5/6: Calculating risk score...",
+                asyncio.to_thread(
+                    self.risk_scorer.calculate_risk,
+                    file_path, r["dependencies"], r["ai"], r["database"]
                 )
-            except Exception as ai_error:
-                print(f"⚠️ AI analysis failed (non-blocking): {ai_error}")
-                ai_insights = self.ai_analyzer._fallback_analysis()
+            ), after=("store", "ai"))
             
-            # Step 4: Risk Scoring
-            print("Step 5/6: Calculating risk score...")
-            risk_score = self.risk_scorer.calculate_risk(
-                file_path, dependencies, ai_insights, database_dependencies
-            )
+            stages = await pipeline.run()
+            dependencies = stages["dependencies"]
+            database_dependencies = stages["database"]
+            ai_insights = stages["ai"]
+            risk_score = stages["risk"]
             
-            # Step 5: Compile Results
+            # Compile Results
             print("Step 6/6: Compiling results...")
             result = self._compile_results(
                 analysis_id,
@@ -107,6 +112,7 @@ class AnalysisOrchestrator:
                 start_time,
                 commit_message
             )
+            result["metadata"].update(pipeline.get_metadata())
             
             duration = (datetime.now() - start_time).total_seconds()
             print(f"\n{'='*60}")
@@ -114,14 +120,190 @@ class AnalysisOrchestrator:
             print(f"   Risk Score: {risk_score['score']}/10 - {risk_score['level']}")
             print(f"   Code Dependencies: {len(dependencies.get('direct_dependencies', []))} direct")
             print(f"   Database Dependencies: {len(database_dependencies.get('tables', []))} tables")
+            print(f"   Critical Path: {' -> '.join(result['metadata']['critical_path'])}")
             print(f"{'='*60}\n")
             
+            progress_broker.publish(analysis_id, "complete", result)
             return result
             
         except Exception as e:
             print(f"\n❌ Analysis failed: {str(e)}")
+            progress_broker.publish(analysis_id, "failed", {"error": str(e)})
+            raise
+    
+    async def analyze_commit(
+        self,
+        files: List[Dict],
+        commit_sha: str,
+        repository: str,
+        commit_message: str = "",
+        bypass_ai_cache: bool = False,
+        analysis_id: str = None
+    ) -> Dict:
+        """
+        Analyze every changed file of a commit as one analysis
+        
+        Work is shared across files: one DEPENDS pass per source root, one
+        Neo4j transaction and one batched AI call, so a 30-file commit costs
+        about as much as a single-file analysis.
+        
+        Args:
+            files: Changed files as {"file_path", "code_diff"} dicts
+            commit_sha: Commit SHA
+            repository: Repository name
+            commit_message: Commit message
+            bypass_ai_cache: Call the AI model even if an identical prompt was cached
+            analysis_id: Pre-assigned ID (so clients can subscribe to progress events first)
+        
+        Returns:
+            Commit result shaped like a code change result (dependencies,
+            tables and modules merged), plus per-file results under "files"
+        """
+        analysis_id = analysis_id or str(uuid.uuid4())
+        start_time = datetime.now()
+        file_paths = [f["file_path"] for f in files]
+        diffs = {f["file_path"]: f.get("code_diff") or "" for f in files}
+        
+        print(f"\n{'='*60}")
+        print(f"🚀 Starting Commit Analysis: {analysis_id}")
+        print(f"   Files: {len(file_paths)}")
+        print(f"   Commit: {commit_sha[:8]}")
+        print(f"{'='*60}\n")
+        
+        progress_broker.publish(analysis_id, "started", {
+            "type": "commit_change", "file_paths": file_paths, "repository": repository
+        }, commit_sha=commit_sha)
+        
+        try:
+            # Same stage graph as analyze_change, each stage covering every file
+            pipeline = StagePipeline("commit_change", on_stage_complete=progress_broker.stage_reporter(analysis_id, commit_sha))
+            pipeline.add("dependencies", lambda r: self._run_step(
+                "Step 1/6: Analyzing code dependencies (one pass per source root)...",
+                self._analyze_commit_dependencies(file_paths)))
+            pipeline.add("database", lambda r: self._run_step(
+                "Step 2/6: Analyzing database dependencies...",
+                asyncio.to_thread(lambda: {path: self._extract_database_dependencies(path) for path in file_paths})))
+            pipeline.add("store", lambda r: self._run_step(
+                "Step 3/6: Storing dependency graph (single transaction)...",
+                self._store_graph(
+                    [(path, r["dependencies"][0][path], r["database"][path]) for path in file_paths],
+                    r["dependencies"][1]
+                )
+            ), after=("dependencies", "database"))
+            pipeline.add("ai", lambda r: self._run_step(
+                "Step 4/6: Running AI analysis (one call for all files)...",
+                self._run_commit_ai_analysis(
+                    [
+                        {
+                            "file_path": path,
+                            "code_diff": diffs[path],
+                            "dependencies": r["dependencies"][0][path],
+                            "database_dependencies": r["database"][path]
+                        }
+                        for path in file_paths
+                    ],
+                    commit_message, bypass_ai_cache,
+                    on_token=progress_broker.token_reporter(analysis_id, commit_sha)
+                )
+            ), after=("dependencies", "database"))
+            pipeline.add("risk", lambda r: self._run_step(
+                "Step 5/6: Calculating risk scores...",
+                asyncio.to_thread(self._score_commit_risk, file_paths, r["dependencies"][0], r["ai"], r["database"])
+            ), after=("store", "ai"))
+            
+            stages = await pipeline.run()
+            file_dependencies, _ = stages["dependencies"]
+            database_dependencies = stages["database"]
+            ai_insights = stages["ai"]
+            file_risks, risk_score = stages["risk"]
+            
+            print("Step 6/6: Compiling results...")
+            file_results = [
+                self._compile_results(
+                    analysis_id, path, commit_sha, repository,
+                    file_dependencies[path], database_dependencies[path],
+                    ai_insights["files"][path], file_risks[path], start_time, commit_message
+                )
+                for path in file_paths
+            ]
+            result = self._compile_commit_results(
+                analysis_id, file_results, risk_score, ai_insights["commit"], start_time
+            )
+            result["metadata"].update(pipeline.get_metadata())
+            
+            duration = (datetime.now() - start_time).total_seconds()
+            print(f"\n{'='*60}")
+            print(f"✅ Commit Analysis Complete in {duration:.1f}s ({len(file_paths)} files)")
+            print(f"   Risk Score: {risk_score['score']}/10 - {risk_score['level']}")
+            print(f"   Riskiest File: {risk_score['factors']['riskiest_file']}")
+            print(f"   Critical Path: {' -> '.join(result['metadata']['critical_path'])}")
+            print(f"{'='*60}\n")
+            
+            progress_broker.publish(analysis_id, "complete", result)
+            return result
+            
+        except Exception as e:
+            print(f"\n❌ Commit analysis failed: {str(e)}")
+            progress_broker.publish(analysis_id, "failed", {"error": str(e)})
             raise
     
+    @staticmethod
+    async def _run_step(message: str, step):
+        """Log a pipeline stage as it starts and await it"""
+        print(message)
+        return await step
+    
+    async def _run_ai_analysis(
+        self,
+        file_path: str,
+        code_diff: str,
+        dependencies: Dict,
+        database_dependencies: Dict,
+        bypass_ai_cache: bool = False,
+        on_token=None
+    ) -> Dict:
+        """AI analysis (non-blocking - falls back to a canned analysis if it fails)"""
+        try:
+            return await self.ai_analyzer.analyze_impact(
+                file_path, code_diff, dependencies, database_dependencies, repository_path=self._find_repository_path(),
+                bypass_cache=bypass_ai_cache, on_token=on_token
+            )
+        except Exception as ai_error:
+            print(f"⚠️ AI analysis failed (non-blocking): {ai_error}")
+            return self.ai_analyzer._fallback_analysis()
+    
+    async def _run_commit_ai_analysis(
+        self,
+        files: List[Dict],
+        commit_message: str,
+        bypass_ai_cache: bool = False,
+        on_token=None
+    ) -> Dict:
+        """Batched AI analysis of a commit (non-blocking - falls back per file if it fails)"""
+        try:
+            return await self.ai_analyzer.analyze_commit_impact(
+                files, commit_message, repository_path=self._find_repository_path(),
+                bypass_cache=bypass_ai_cache, on_token=on_token
+            )
+        except Exception as ai_error:
+            print(f"⚠️ Commit AI analysis failed (non-blocking): {ai_error}")
+            fallback = self.ai_analyzer._fallback_analysis()
+            return {"commit": fallback, "files": {f["file_path"]: fallback for f in files}}
+    
+    @staticmethod
+    def _find_repository_path():
+        """Repository path for code snippet extraction (Docker mount or local checkout)"""
+        possible_paths = [
+            "/sample-repo",
+            os.path.join(os.getcwd(), "sample-repo"),
+            os.path.join("/app", "sample-repo"),
+            "sample-repo"
+        ]
+        for path in possible_paths:
+            if os.path.exists(path):
+                return path
+        return None
+    
     async def _analyze_dependencies(self, file_path: str) -> Dict:
         """Run DEPENDS analysis"""
         # Get directory containing the file
@@ -130,16 +312,46 @@ class AnalysisOrchestrator:
         if not directory:
             directory = "sample-repo/banking-app/src"  # Default for demo
         
-        # Run in thread pool (DEPENDS is blocking)
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
+        # Run on the DEPENDS worker pool (DEPENDS is blocking)
+        result = await self.depends.pool.submit(
             self.depends.analyze_single_file,
             file_path
         )
         
         return result
     
+    async def _analyze_commit_dependencies(self, file_paths: List[str]):
+        """
+        Run one DEPENDS pass per source root touched by the commit (roots in parallel)
+        
+        Returns:
+            tuple: (file path -> dependencies, removed edges across all roots)
+        """
+        groups = self.depends.group_by_source_root(file_paths)
+        print(f"   {len(file_paths)} file(s) in {len(groups)} source root(s)")
+        
+        root_results = await asyncio.gather(*(
+            self.depends.pool.submit(self.depends.analyze_files_in_root, directory, language, paths)
+            for (directory, language), paths in groups.items()
+        ))
+        
+        file_dependencies = {}
+        removed_dependencies = []
+        for per_file, removed in root_results:
+            file_dependencies.update(per_file)
+            removed_dependencies.extend(removed)
+        return file_dependencies, removed_dependencies
+    
+    def _score_commit_risk(self, file_paths: List[str], file_dependencies: Dict, ai_insights: Dict, database_dependencies: Dict):
+        """Per-file risk scores and the aggregated commit score"""
+        file_risks = {
+            path: self.risk_scorer.calculate_risk(
+                path, file_dependencies[path], ai_insights["files"][path], database_dependencies[path]
+            )
+            for path in file_paths
+        }
+        return file_risks, self.risk_scorer.calculate_commit_risk(file_risks)
+    
     async def _analyze_database_dependencies(self, file_path: str) -> Dict:
         """
         Analyze database table/column usage in the changed file
@@ -147,8 +359,12 @@ class AnalysisOrchestrator:
         Returns:
             Dictionary with tables and their usage details
         """
-        import os
-        
+        # File reads and SQL extraction are blocking; keep them off the event
+        # loop so they overlap with the DEPENDS run
+        return await asyncio.to_thread(self._extract_database_dependencies, file_path)
+    
+    def _extract_database_dependencies(self, file_path: str) -> Dict:
+        """Blocking part of _analyze_database_dependencies"""
         # File path might already include "sample-repo" or might not
         # Handle both cases - normalize the path
         normalized_path = file_path
@@ -169,22 +385,17 @@ class AnalysisOrchestrator:
             file_path,  # Original path (fallback)
         ]
         
-        full_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                full_path = path
-                break
-        
-        if not full_path:
+        source = file_store.find(possible_paths)
+        if source is None:
             print(f"   ⚠️ File not found: {file_path} (tried: {possible_paths[:3]})")
             return {"tables": [], "total_usages": 0}
         
         try:
-            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            # Extract table usage
-            table_usage = self.sql_extractor.extract_table_usage(file_path, content)
+            # Extract table usage (once per file version, shared with later analyses)
+            table_usage = source.result(
+                ("table_usage", file_path),
+                lambda loaded: self.sql_extractor.extract_table_usage(file_path, loaded.text)
+            )
             
             # Convert to list format
             tables = []
@@ -213,130 +424,94 @@ class AnalysisOrchestrator:
             return {"tables": [], "total_usages": 0}
     
     async def _store_in_neo4j(self, file_path: str, dependencies: Dict, database_dependencies: Dict = None):
-        """Store dependency graph in Neo4j (forward and reverse)"""
+        """Store dependency graph in Neo4j (forward and reverse) in one batched transaction"""
+        await self._store_graph(
+            [(file_path, dependencies, database_dependencies)],
+            # Drop edges that disappeared since the previous analysis
+            dependencies.get("removed_dependencies", [])
+        )
+    
+    async def _store_graph(self, files: List[tuple], removed_dependencies: List[Dict]):
+        """
+        Store the dependency graph of one or more analyzed files in a single transaction
+        
+        Args:
+            files: (file_path, dependencies, database_dependencies) per analyzed file
+            removed_dependencies: Edges that disappeared since the previous analysis
+        """
         try:
-            # Create or update module node
-            file_name = file_path.split("/")[-1]
-            
-            await neo4j_client.create_module_node(
-                name=file_name,
-                properties={
+            # Analyzed files first so their properties win over neighbour placeholders
+            modules = {}
+            for file_path, dependencies, _ in files:
+                modules[file_path.split("/")[-1]] = {
                     "path": file_path,
                     "last_analyzed": datetime.now().isoformat(),
                     "dependency_count": len(dependencies.get("direct_dependencies", []))
                 }
-            )
-            
-            # Store forward dependencies (this file depends on others)
-            # Direct dependencies
-            for dep in dependencies.get("direct_dependencies", []):
-                target_name = dep.get("target", "Unknown")
-                await neo4j_client.create_module_node(
-                    name=target_name,
-                    properties={"path": f"unknown/{target_name}"}
-                )
-                line_nums = dep.get("line_numbers", [])
-                code_refs = dep.get("code_references", [])
-                line_num_str = ",".join(map(str, line_nums)) if line_nums else str(dep.get("line", 0))
-                code_ref_str = " | ".join(code_refs[:3]) if code_refs else dep.get("code_reference", "")
-                
-                await neo4j_client.create_dependency(
-                    source=file_name,
-                    target=target_name,
-                    rel_type=dep.get("type", "DEPENDS_ON"),
-                    line_number=line_num_str,
-                    code_reference=code_ref_str
-                )
+            edges = []
+            tables = {}
+            table_usages = []
             
-            # Indirect dependencies
-            for dep in dependencies.get("indirect_dependencies", []):
-                target_name = dep.get("target", "Unknown")
-                await neo4j_client.create_module_node(
-                    name=target_name,
-                    properties={"path": f"unknown/{target_name}"}
-                )
-                line_nums = dep.get("line_numbers", [])
-                code_refs = dep.get("code_references", [])
-                line_num_str = ",".join(map(str, line_nums)) if line_nums else str(dep.get("line", 0))
-                code_ref_str = " | ".join(code_refs[:3]) if code_refs else dep.get("code_reference", "")
+            for file_path, dependencies, database_dependencies in files:
+                file_name = file_path.split("/")[-1]
                 
-                await neo4j_client.create_dependency(
-                    source=file_name,
-                    target=target_name,
-                    rel_type=dep.get("type", "DEPENDS_ON"),
-                    line_number=line_num_str,
-                    code_reference=code_ref_str
-                )
-            
-            # Store reverse dependencies (others depend on this file)
-            # Direct reverse dependencies
-            for dep in dependencies.get("reverse_direct_dependencies", []):
-                source_name = dep.get("source", "Unknown")
-                await neo4j_client.create_module_node(
-                    name=source_name,
-                    properties={"path": f"unknown/{source_name}"}
-                )
-                line_nums = dep.get("line_numbers", [])
-                code_refs = dep.get("code_references", [])
-                line_num_str = ",".join(map(str, line_nums)) if line_nums else str(dep.get("line", 0))
-                code_ref_str = " | ".join(code_refs[:3]) if code_refs else dep.get("code_reference", "")
+                # Forward dependencies (this file depends on others)
+                for dep in dependencies.get("direct_dependencies", []) + dependencies.get("indirect_dependencies", []):
+                    target_name = dep.get("target", "Unknown")
+                    modules.setdefault(target_name, {"path": f"unknown/{target_name}"})
+                    edges.append(self._edge_record(file_name, target_name, dep))
                 
-                await neo4j_client.create_dependency(
-                    source=source_name,
-                    target=file_name,
-                    rel_type=dep.get("type", "DEPENDS_ON"),
-                    line_number=line_num_str,
-                    code_reference=code_ref_str
-                )
-            
-            # Indirect reverse dependencies
-            for dep in dependencies.get("reverse_indirect_dependencies", []):
-                source_name = dep.get("source", "Unknown")
-                await neo4j_client.create_module_node(
-                    name=source_name,
-                    properties={"path": f"unknown/{source_name}"}
-                )
-                line_nums = dep.get("line_numbers", [])
-                code_refs = dep.get("code_references", [])
-                line_num_str = ",".join(map(str, line_nums)) if line_nums else str(dep.get("line", 0))
-                code_ref_str = " | ".join(code_refs[:3]) if code_refs else dep.get("code_reference", "")
+                # Reverse dependencies (others depend on this file)
+                for dep in dependencies.get("reverse_direct_dependencies", []) + dependencies.get("reverse_indirect_dependencies", []):
+                    source_name = dep.get("source", "Unknown")
+                    modules.setdefault(source_name, {"path": f"unknown/{source_name}"})
+                    edges.append(self._edge_record(source_name, file_name, dep))
                 
-                await neo4j_client.create_dependency(
-                    source=source_name,
-                    target=file_name,
-                    rel_type=dep.get("type", "DEPENDS_ON"),
-                    line_number=line_num_str,
-                    code_reference=code_ref_str
-                )
+                # Database dependencies (code file USES database tables)
+                if database_dependencies:
+                    for table_info in database_dependencies.get("tables", []):
+                        tables.setdefault(table_info["table_name"], {
+                            "name": table_info["table_name"],
+                            "database": "banking_db",  # Default database name
+                            "properties": {}
+                        })
+                        table_usages.append({
+                            "source_file": file_name,
+                            "target_table": table_info["table_name"],
+                            "database": "banking_db",
+                            "usage_count": table_info["usage_count"],
+                            "column_name": ""  # Could be enhanced to track specific columns
+                        })
             
-            # Store database dependencies (code file USES database tables)
-            if database_dependencies:
-                for table_info in database_dependencies.get("tables", []):
-                    table_name = table_info["table_name"]
-                    usage_count = table_info["usage_count"]
-                    
-                    # Create table node if it doesn't exist
-                    await neo4j_client.create_table_node(
-                        name=table_name,
-                        database="banking_db",  # Default database name
-                        properties={}
-                    )
-                    
-                    # Create USES_TABLE relationship
-                    await neo4j_client.create_table_usage(
-                        source_file=file_name,
-                        target_table=table_name,
-                        database="banking_db",
-                        usage_count=usage_count,
-                        column_name=""  # Could be enhanced to track specific columns
-                    )
+            counts = await neo4j_client.store_dependency_graph(
+                modules=[{"name": name, "properties": props} for name, props in modules.items()],
+                dependencies=edges,
+                removed_dependencies=removed_dependencies,
+                tables=list(tables.values()),
+                table_usages=table_usages
+            )
             
-            print("   ✅ Graph updated in Neo4j")
+            if counts["dependencies_deleted"]:
+                print(f"🗑️ Removed {counts['dependencies_deleted']} stale dependency edge(s)")
+            print(f"   ✅ Graph updated in Neo4j ({counts['dependencies_written']} edges, {counts['table_usages_written']} table usages)")
             
         except Exception as e:
             print(f"   ⚠️ Neo4j update failed: {e}")
             # Don't fail entire analysis if Neo4j fails
     
+    @staticmethod
+    def _edge_record(source: str, target: str, dep: Dict) -> Dict:
+        """Flatten a dependency into the properties stored on its relationship"""
+        line_nums = dep.get("line_numbers") or ([dep["line"]] if dep.get("line") else [])
+        code_refs = dep.get("code_references") or ([dep["code_reference"]] if dep.get("code_reference") else [])
+        return {
+            "source": source,
+            "target": target,
+            "type": dep.get("type", "DEPENDS_ON"),
+            "line_numbers": list(line_nums),
+            "code_references": list(code_refs)
+        }
+    
     def _compile_results(
         self,
         analysis_id: str,
@@ -414,4 +589,76 @@ class AnalysisOrchestrator:
             }
         }
         
-        return result
\ No newline at end of file
+        return result
+    
+    def _compile_commit_results(
+        self,
+        analysis_id: str,
+        file_results: List[Dict],
+        risk_score: Dict,
+        ai_insights: Dict,
+        start_time: datetime
+    ) -> Dict:
+        """Merge per-file results into one commit result (shaped like a code change result)"""
+        riskiest = risk_score["factors"]["riskiest_file"]
+        top = next(r for r in file_results if r["file_path"] == riskiest)
+        
+        dependencies = {kind: [] for kind in ("direct", "indirect", "reverse_direct", "reverse_indirect")}
+        tables = {}
+        total_usages = 0
+        for file_result in file_results:
+            for kind in dependencies:
+                dependencies[kind].extend(file_result["dependencies"][kind])
+            for table_info in file_result["database_dependencies"].get("tables", []):
+                tables.setdefault(table_info["table_name"], table_info)
+            total_usages += file_result["database_dependencies"].get("total_usages", 0)
+        dependencies["count"] = {kind: len(deps) for kind, deps in dependencies.items()}
+        dependencies["count"]["total"] = sum(dependencies["count"].values())
+        
+        analyzed_files = {r["file_path"].split("/")[-1] for r in file_results}
+        affected_modules = {
+            module for r in file_results for module in r["affected_modules"]
+        } - analyzed_files
+        affected_tables = {table for r in file_results for table in r["affected_tables"]}
+        
+        return {
+            "id": analysis_id,
+            "type": "commit_change",
+            "timestamp": datetime.now().isoformat(),
+            "duration_seconds": (datetime.now() - start_time).total_seconds(),
+            "commit_sha": top["commit_sha"],
+            "commit_message": top["commit_message"],
+            "repository": top["repository"],
+            # The riskiest file stands in for the commit in single-file views
+            "file_path": riskiest,
+            "file_paths": [r["file_path"] for r in file_results],
+            "risk_score": risk_score,
+            "dependencies": dependencies,
+            "database_dependencies": {"tables": list(tables.values()), "total_usages": total_usages},
+            "ai_insights": ai_insights,
+            "affected_modules": sorted(m for m in affected_modules if m),
+            "affected_tables": sorted(affected_tables),
+            "summary": {
+                "files_analyzed": len(file_results),
+                "code_files_affected": len(affected_modules),
+                "database_tables_affected": len(affected_tables),
+                "total_code_dependencies": dependencies["count"]["total"],
+                "total_database_usages": total_usages
+            },
+            "files": [
+                {
+                    "file_path": r["file_path"],
+                    "risk_score": r["risk_score"],
+                    "dependencies": {"count": r["dependencies"]["count"]},
+                    "affected_modules": r["affected_modules"],
+                    "affected_tables": r["affected_tables"],
+                    "ai_insights": r["ai_insights"],
+                    "summary": r["summary"]
+                }
+                for r in sorted(file_results, key=lambda r: r["risk_score"]["score"], reverse=True)
+            ],
+            "metadata": {
+                "analyzer_version": "1.0.0",
+                "analysis_type": "commit"
+            }
+        }
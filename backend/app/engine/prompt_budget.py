@@ -0,0 +1,213 @@
+"""
+Prompt budgeting for AI analysis
+Estimates prompt size in tokens and packs the variable context (diff hunks,
+dependency lists, code snippets, table usages) into a fixed token budget,
+most relevant pieces first, so large changes still produce bounded prompts
+"""
+
+import os
+import re
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Rough chars-per-token ratio for English text and source code
+CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "4"))
+
+# Prompt size histogram bucket upper bounds (tokens); the last bucket is open-ended
+HISTOGRAM_BUCKETS = (1000, 2000, 4000, 8000, 16000, 32000)
+
+CRITICAL_KEYWORDS = (
+    "payment", "transaction", "fraud", "balance", "account",
+    "transfer", "regulatory", "compliance", "audit", "security", "auth"
+)
+
+_HUNK_START = re.compile(r"^(?:@@|diff --git )", re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt fragment"""
+    if not text:
+        return 0
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def relevance_score(distance: int = 1, usage_count: int = 1, name: str = "") -> float:
+    """
+    Rank a context piece: closer, more used and banking-critical pieces first
+
+    Args:
+        distance: Hops from the changed file / table (1 = direct)
+        usage_count: How often the dependency is used
+        name: File, module or table name checked for critical keywords
+    """
+    score = (1.0 + math.log1p(max(usage_count, 1))) / max(distance, 1)
+    name = (name or "").lower()
+    if any(keyword in name for keyword in CRITICAL_KEYWORDS):
+        score *= 2.0
+    return score
+
+
+@dataclass
+class ContextPiece:
+    """One droppable fragment of prompt context"""
+    section: str
+    text: str
+    relevance: float
+    tokens: int = field(init=False)
+
+    def __post_init__(self):
+        # +1 for the joining newline
+        self.tokens = estimate_tokens(self.text) + 1
+
+
+class PromptBudgeter:
+    """Token budget for prompts plus a histogram of the prompts actually sent"""
+
+    def __init__(self, max_tokens: Optional[int] = None, diff_share: Optional[float] = None):
+        """
+        Initialize budgeter
+
+        Args:
+            max_tokens: Token budget per prompt (default: $PROMPT_TOKEN_BUDGET or 12000)
+            diff_share: Share of the free budget reserved for the diff before
+                context is packed (default: $PROMPT_DIFF_SHARE or 0.5)
+        """
+        self.max_tokens = max_tokens or int(os.getenv("PROMPT_TOKEN_BUDGET", "12000"))
+        self.diff_share = diff_share or float(os.getenv("PROMPT_DIFF_SHARE", "0.5"))
+        self._lock = threading.Lock()
+        # kind -> {"prompts", "total_tokens", "max_tokens", "pieces_packed", "pieces_dropped", "diffs_trimmed", "buckets"}
+        self._kinds: Dict[str, Dict] = {}
+
+    def _counters(self, kind: str) -> Dict:
+        counters = self._kinds.get(kind)
+        if counters is None:
+            counters = {
+                "prompts": 0, "total_tokens": 0, "max_tokens": 0,
+                "pieces_packed": 0, "pieces_dropped": 0, "diffs_trimmed": 0,
+                "buckets": [0] * (len(HISTOGRAM_BUCKETS) + 1)
+            }
+            self._kinds[kind] = counters
+        return counters
+
+    def available(self, fixed_text: str) -> int:
+        """Tokens left for variable content once the fixed template is counted"""
+        return max(0, self.max_tokens - estimate_tokens(fixed_text))
+
+    def split_budget(self, available: int, diff: str) -> int:
+        """Tokens reserved for the diff; context may use the rest"""
+        return min(estimate_tokens(diff), int(available * self.diff_share))
+
+    def pack(self, pieces: Iterable[ContextPiece], max_tokens: int, kind: str = "default") -> Tuple[Dict[str, List[str]], int]:
+        """
+        Greedily keep the most relevant pieces that fit
+
+        Args:
+            pieces: Candidate pieces in their natural display order
+            max_tokens: Token budget for all pieces together
+            kind: Prompt kind the counters are recorded under
+
+        Returns:
+            (section -> kept texts in their original order, tokens used)
+        """
+        pieces = list(pieces)
+        ranked = sorted(range(len(pieces)), key=lambda i: (-pieces[i].relevance, i))
+
+        kept = set()
+        used = 0
+        for i in ranked:
+            if used + pieces[i].tokens <= max_tokens:
+                kept.add(i)
+                used += pieces[i].tokens
+
+        sections: Dict[str, List[str]] = {}
+        for i, piece in enumerate(pieces):
+            if i in kept:
+                sections.setdefault(piece.section, []).append(piece.text)
+
+        with self._lock:
+            counters = self._counters(kind)
+            counters["pieces_packed"] += len(kept)
+            counters["pieces_dropped"] += len(pieces) - len(kept)
+
+        return sections, used
+
+    def fit_diff(self, diff: str, max_tokens: int, kind: str = "default") -> str:
+        """
+        Trim a diff to the budget, keeping whole hunks in order
+
+        Hunks that do not fit are replaced by a one-line note; a single hunk
+        larger than the budget is cut at a line boundary.
+        """
+        if not diff or estimate_tokens(diff) <= max_tokens:
+            return diff
+
+        starts = [m.start() for m in _HUNK_START.finditer(diff)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        hunks = [diff[start:end] for start, end in zip(starts, starts[1:] + [len(diff)])]
+
+        kept = []
+        used = 0
+        for hunk in hunks:
+            tokens = estimate_tokens(hunk)
+            if used + tokens > max_tokens:
+                break
+            kept.append(hunk)
+            used += tokens
+
+        if not kept:
+            # First hunk alone is over budget: keep its leading lines
+            lines = []
+            for line in hunks[0].splitlines(keepends=True):
+                tokens = estimate_tokens(line)
+                if used + tokens > max_tokens:
+                    break
+                lines.append(line)
+                used += tokens
+            kept = ["".join(lines)]
+
+        omitted_lines = diff.count("\n") - "".join(kept).count("\n")
+        with self._lock:
+            self._counters(kind)["diffs_trimmed"] += 1
+        return "".join(kept).rstrip("\n") + f"\n... diff truncated to fit the prompt budget ({omitted_lines} more lines omitted)"
+
+    def record(self, kind: str, prompt: str) -> int:
+        """Record the size of a prompt about to be sent"""
+        tokens = estimate_tokens(prompt)
+        bucket = next((i for i, bound in enumerate(HISTOGRAM_BUCKETS) if tokens <= bound), len(HISTOGRAM_BUCKETS))
+        with self._lock:
+            counters = self._counters(kind)
+            counters["prompts"] += 1
+            counters["total_tokens"] += tokens
+            counters["max_tokens"] = max(counters["max_tokens"], tokens)
+            counters["buckets"][bucket] += 1
+        return tokens
+
+    def get_stats(self) -> Dict:
+        """Get prompt size statistics"""
+        labels = [f"<={bound}" for bound in HISTOGRAM_BUCKETS] + [f">{HISTOGRAM_BUCKETS[-1]}"]
+        kinds = {}
+        with self._lock:
+            for kind, counters in self._kinds.items():
+                prompts = counters["prompts"]
+                kinds[kind] = {
+                    "prompts": prompts,
+                    "avg_tokens": round(counters["total_tokens"] / prompts, 1) if prompts else 0.0,
+                    "max_tokens": counters["max_tokens"],
+                    "pieces_packed": counters["pieces_packed"],
+                    "pieces_dropped": counters["pieces_dropped"],
+                    "diffs_trimmed": counters["diffs_trimmed"],
+                    "histogram": dict(zip(labels, counters["buckets"]))
+                }
+        return {
+            "token_budget": self.max_tokens,
+            "diff_share": self.diff_share,
+            "chars_per_token": CHARS_PER_TOKEN,
+            "kinds": kinds
+        }
+
+
+# Global prompt budgeter shared by every AIAnalyzer
+prompt_budgeter = PromptBudgeter()
@@ -2,9 +2,12 @@
 Risk scoring algorithm for code changes
 """
 
+import os
 from typing import Dict, List
 from datetime import datetime
 
+from app.utils.blast_radius_index import blast_radius_index
+
 
 class RiskScorer:
     def __init__(self):
@@ -71,7 +74,7 @@ class RiskScorer:
             },
             "factors": {
                 "dependency_count": len(dependencies.get("direct_dependencies", [])),
-                "critical_modules": self._count_critical_modules(dependencies),
+                "critical_modules": self._count_critical_modules(dependencies, file_path),
                 "file_criticality": self._assess_file_criticality(file_path)
             }
         }
@@ -81,6 +84,72 @@ class RiskScorer:
         return result
 
 
+    def calculate_commit_risk(self, file_risks: Dict[str, Dict]) -> Dict:
+        """
+        Aggregate per-file risk scores into one commit risk score
+
+        The commit is at least as risky as its riskiest file; every other
+        MEDIUM-or-higher file adds a little (capped), since wide changes are
+        harder to review and roll back.
+
+        Args:
+            file_risks: File path -> calculate_risk() result
+
+        Returns:
+            Risk score object (breakdown of the riskiest file) plus per-file scores
+        """
+        if not file_risks:
+            level, color = self._determine_risk_level(0.0)
+            return {"score": 0.0, "level": level, "color": color, "breakdown": {}, "explanations": {}, "factors": {}, "files": []}
+
+        ranked = sorted(file_risks.items(), key=lambda item: item[1]["score"], reverse=True)
+        top_path, top_risk = ranked[0]
+
+        elevated = [path for path, risk in ranked[1:] if risk["score"] >= 3.5]
+        breadth_score = min(0.3 * len(elevated), 1.5)
+        final_score = min(top_risk["score"] + breadth_score, 10.0)
+        risk_level, color = self._determine_risk_level(final_score)
+
+        level_counts: Dict[str, int] = {}
+        for _, risk in ranked:
+            level_counts[risk["level"]] = level_counts.get(risk["level"], 0) + 1
+
+        breadth_details = (
+            [f"{len(elevated)} other file(s) at MEDIUM risk or above add {breadth_score:.1f} points"]
+            if elevated else ["No other file at MEDIUM risk or above"]
+        )
+
+        result = {
+            "score": round(final_score, 1),
+            "level": risk_level,
+            "color": color,
+            "breakdown": {**top_risk.get("breakdown", {}), "commit_breadth": round(breadth_score, 1)},
+            "explanations": {
+                **top_risk.get("explanations", {}),
+                "commit_breadth": {
+                    "score": round(breadth_score, 1),
+                    "max_score": 1.5,
+                    "factors": [f"Files analyzed: {len(ranked)}", f"Riskiest file: {top_path}"],
+                    "details": breadth_details,
+                    "description": "Commit Breadth Risk starts from the riskiest file in the commit and adds weight for every other file that is independently risky."
+                }
+            },
+            "factors": {
+                **top_risk.get("factors", {}),
+                "files_analyzed": len(ranked),
+                "riskiest_file": top_path,
+                "files_by_level": level_counts
+            },
+            "files": [
+                {"file_path": path, "score": risk["score"], "level": risk["level"], "color": risk["color"]}
+                for path, risk in ranked
+            ]
+        }
+
+        print(f"✅ Commit Risk Score: {result['score']}/10 - {risk_level} ({len(ranked)} files)")
+
+        return result
+
     def _calculate_technical_risk(self, dependencies: Dict, metrics: Dict) -> Dict:
         """Calculate technical complexity risk (0-4 points) with explanation"""
         score = 0.0
@@ -163,7 +232,7 @@ class RiskScorer:
                 break
 
         # Check affected dependencies for critical modules
-        critical_count = self._count_critical_modules(dependencies)
+        critical_count = self._count_critical_modules(dependencies, file_path)
         factors.append(f"Critical modules affected: {critical_count}")
 
         if critical_count >= 3:
@@ -293,9 +362,10 @@ class RiskScorer:
 
         return {"multiplier": final_multiplier, "explanation": explanation}
 
-    def _count_critical_modules(self, dependencies: Dict) -> int:
-        """Count how many critical modules are affected"""
+    def _count_critical_modules(self, dependencies: Dict, file_path: str = None) -> int:
+        """Count how many critical modules are affected (including transitive dependants)"""
         critical_count = 0
+        counted = set()
 
         all_deps = (
             dependencies.get("direct_dependencies", []) +
@@ -307,8 +377,20 @@ class RiskScorer:
             for keyword in self.critical_keywords:
                 if keyword in target:
                     critical_count += 1
+                    counted.add(target)
                     break
 
+        # Modules that transitively depend on the changed file, from the
+        # materialized blast-radius index (None until it is loaded)
+        dependants = blast_radius_index.module_dependants(os.path.basename(file_path)) if file_path else None
+        for dependant in dependants or []:
+            name = dependant["name"].lower()
+            if dependant["kind"] != "module" or name in counted:
+                continue
+            if any(keyword in name for keyword in self.critical_keywords):
+                critical_count += 1
+                counted.add(name)
+
         return critical_count
 
     def _assess_file_criticality(self, file_path: str) -> str:
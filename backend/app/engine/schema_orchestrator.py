@@ -14,7 +14,10 @@ from app.services.mongodb_schema_analyzer import MongoDBSchemaAnalyzer, MongoSch
 from app.services.sql_extractor import SQLExtractor
 from app.engine.ai_analyzer import AIAnalyzer
 from app.engine.risk_scorer import RiskScorer
+from app.engine.stage_pipeline import StagePipeline
 from app.utils.neo4j_client import neo4j_client
+from app.utils.progress import progress_broker
+from app.services.table_index import table_usage_index
 
 # Try to import psycopg2 for direct PostgreSQL queries
 try:
@@ -67,7 +70,8 @@ class SchemaChangeOrchestrator:
         repository: str = None,
         database_type: str = None,
         github_repo_url: str = None,
-        github_branch: str = "main"
+        github_branch: str = "main",
+        bypass_ai_cache: bool = False
     ) -> Dict:
         """
         Analyze impact of a database schema change
@@ -77,6 +81,7 @@ class SchemaChangeOrchestrator:
             database_name: Name of the database
             change_id: Optional change identifier
             repository: Repository name
+            bypass_ai_cache: Call the AI model even if an identical prompt was cached
         
         Returns:
             Complete analysis result
@@ -93,106 +98,60 @@ class SchemaChangeOrchestrator:
         print(f"   Operation: {sql_statement[:100]}...")
         print(f"{'='*60}\n")
         
+        progress_broker.publish(analysis_id, "started", {
+            "type": "schema_change", "database": database_name, "database_type": db_type
+        })
+        
         # Route to MongoDB or PostgreSQL analyzer
         if db_type == "mongodb":
             return await self._analyze_mongodb_schema_change(
-                sql_statement, database_name, change_id, repository, analysis_id, github_repo_url, github_branch
+                sql_statement, database_name, change_id, repository, analysis_id, github_repo_url, github_branch,
+                bypass_ai_cache=bypass_ai_cache
             )
         
         # PostgreSQL analysis (existing code)
         try:
-            # Step 1: Parse schema change
-            print("Step 1/6: Parsing schema change...")
-            schema_change = self.schema_analyzer.parse_schema_change(sql_statement)
-            
-            if not schema_change:
-                # If we can't parse, try to extract at least the table name
-                import re
-                table_match = re.search(r'ALTER\s+TABLE\s+(?:`?(\w+)`?\.)?`?(\w+)`?', sql_statement.upper(), re.IGNORECASE)
-                if table_match:
-                    schema = table_match.group(1)
-                    table_name = table_match.group(2)
-                    schema_change = SchemaChange(
-                        change_type="ALTER_TABLE",  # Generic - operation unknown
-                        table_name=table_name.upper() if table_name else "UNKNOWN",
-                        sql_statement=sql_statement
-                    )
-                    print(f"   ⚠️  Could not fully parse SQL, using generic ALTER_TABLE")
-                else:
-                    raise ValueError(f"Could not parse schema change from SQL statement: {sql_statement[:100]}")
-            
-            # If we have a generic ALTER_TABLE, try to query PostgreSQL for actual change details
-            if schema_change.change_type == "ALTER_TABLE" and not schema_change.column_name:
-                schema_change = await self._enhance_schema_change_from_db(schema_change, database_name)
-            
-            print(f"   ✅ Change Type: {schema_change.change_type}")
-            print(f"   ✅ Table: {schema_change.table_name}")
-            if schema_change.column_name:
-                print(f"   ✅ Column: {schema_change.column_name}")
-            if schema_change.old_value:
-                print(f"   ✅ Old Value: {schema_change.old_value}")
-            if schema_change.new_value:
-                print(f"   ✅ New Value: {schema_change.new_value}")
-            if schema_change.change_type == "ALTER_TABLE" and not schema_change.column_name:
-                print(f"   ⚠️  Operation details not available (incomplete SQL from event trigger)")
-            
-            # Step 2: Find code files that use this table/column
-            print("Step 2/6: Finding code dependencies...")
             # Get GitHub repo URL from parameter, environment, or repository parameter
             # Priority: github_repo_url parameter > GITHUB_REPO_URL_POSTGRESQL env > repository parameter
             final_github_repo_url = github_repo_url or os.getenv("GITHUB_REPO_URL_POSTGRESQL") or repository
             final_github_branch = github_branch or os.getenv("GITHUB_BRANCH", "main")
             
-            code_dependencies, repo_path = await self._find_code_dependencies(
-                schema_change.table_name,
-                schema_change.column_name,
+            # parse ─┬─> code_dependencies ─┬─> store
+            #        └─> relationships ─────┴─> ai ─> risk
+            pipeline = StagePipeline("schema_change", on_stage_complete=progress_broker.stage_reporter(analysis_id))
+            pipeline.add("parse", lambda r: self._parse_postgres_change(sql_statement, database_name))
+            pipeline.add("code_dependencies", lambda r: self._find_code_dependencies_step(
+                r["parse"].table_name,
+                r["parse"].column_name,
                 database_type="postgresql",
                 github_repo_url=final_github_repo_url if final_github_repo_url and ("github.com" in final_github_repo_url or "/" in final_github_repo_url) else None,
                 github_branch=final_github_branch
-            )
-            
-            print(f"   ✅ Found {len(code_dependencies)} code files using this table")
-            
-            # Step 3: Get database relationships
-            print("Step 3/6: Analyzing database relationships...")
-            db_relationships = await self._get_database_relationships(
-                schema_change.table_name,
-                database_name
-            )
-            
-            print(f"   ✅ Found {len(db_relationships.get('forward', []))} forward relationships")
-            print(f"   ✅ Found {len(db_relationships.get('reverse', []))} reverse relationships")
-            
-            # Step 4: Store in Neo4j
-            print("Step 4/6: Storing in dependency graph...")
-            await self._store_schema_in_neo4j(
-                schema_change,
-                database_name,
-                code_dependencies,
-                db_relationships
-            )
-            
-            # Step 5: AI Analysis
-            print("Step 5/6: Running AI analysis...")
-            try:
-                ai_insights = await self.ai_analyzer.analyze_schema_impact(
-                    schema_change,
-                    code_dependencies,
-                    db_relationships,
-                    repository_path=repo_path
+            ), after=("parse",))
+            pipeline.add("relationships", lambda r: self._get_relationships_step(
+                self._get_database_relationships(r["parse"].table_name, database_name)
+            ), after=("parse",))
+            pipeline.add("store", lambda r: self._run_step(
+                "Step 4/6: Storing in dependency graph...",
+                self._store_schema_in_neo4j(r["parse"], database_name, r["code_dependencies"][0], r["relationships"])
+            ), after=("code_dependencies", "relationships"))
+            pipeline.add("ai", lambda r: self._run_ai_analysis(
+                r["parse"], r["code_dependencies"][0], r["relationships"], r["code_dependencies"][1], bypass_ai_cache,
+                on_token=progress_broker.token_reporter(analysis_id)
+            ), after=("code_dependencies", "relationships"))
+            pipeline.add("risk", lambda r: self._run_step(
+                "Step 6/6: Calculating risk score...",
+                asyncio.to_thread(
+                    self.risk_scorer.calculate_schema_risk,
+                    r["parse"], r["code_dependencies"][0], r["relationships"], r["ai"]
                 )
-            except Exception as ai_error:
-                print(f"⚠️ AI analysis failed (non-blocking): {ai_error}")
-                ai_insights = self._fallback_schema_analysis()
+            ), after=("ai",))
             
-            # Step 6: Risk Scoring
-            print("Step 6/6: Calculating risk score...")
-            risk_score = self.risk_scorer.calculate_schema_risk(
-                schema_change,
-                code_dependencies,
-                db_relationships,
-                ai_insights
-            )
+            stages = await pipeline.run()
+            schema_change = stages["parse"]
+            code_dependencies = stages["code_dependencies"][0]
+            db_relationships = stages["relationships"]
+            ai_insights = stages["ai"]
+            risk_score = stages["risk"]
             
             # Compile results
             result = self._compile_results(
@@ -208,22 +167,110 @@ class SchemaChangeOrchestrator:
                 sql_statement,
                 database_type="postgresql"
             )
+            result["metadata"].update(pipeline.get_metadata())
             
             duration = (datetime.now() - start_time).total_seconds()
             print(f"\n{'='*60}")
             print(f"✅ Schema Analysis Complete in {duration:.1f}s")
             print(f"   Risk Score: {risk_score['score']}/10 - {risk_score['level']}")
             print(f"   Affected Code Files: {len(code_dependencies)}")
+            print(f"   Critical Path: {' -> '.join(result['metadata']['critical_path'])}")
             print(f"{'='*60}\n")
             
+            progress_broker.publish(analysis_id, "complete", result)
             return result
             
         except Exception as e:
             print(f"\n❌ Schema analysis failed: {str(e)}")
+            progress_broker.publish(analysis_id, "failed", {"error": str(e)})
             import traceback
             traceback.print_exc()
             raise
     
+    @staticmethod
+    async def _run_step(message: str, step):
+        """Log a pipeline stage as it starts and await it"""
+        print(message)
+        return await step
+    
+    async def _parse_postgres_change(self, sql_statement: str, database_name: str) -> SchemaChange:
+        """Pipeline stage: parse the DDL, enriching generic ALTER TABLEs from PostgreSQL"""
+        # Step 1: Parse schema change
+        print("Step 1/6: Parsing schema change...")
+        schema_change = self.schema_analyzer.parse_schema_change(sql_statement)
+        
+        if not schema_change:
+            # If we can't parse, try to extract at least the table name
+            import re
+            table_match = re.search(r'ALTER\s+TABLE\s+(?:`?(\w+)`?\.)?`?(\w+)`?', sql_statement.upper(), re.IGNORECASE)
+            if table_match:
+                schema = table_match.group(1)
+                table_name = table_match.group(2)
+                schema_change = SchemaChange(
+                    change_type="ALTER_TABLE",  # Generic - operation unknown
+                    table_name=table_name.upper() if table_name else "UNKNOWN",
+                    sql_statement=sql_statement
+                )
+                print(f"   ⚠️  Could not fully parse SQL, using generic ALTER_TABLE")
+            else:
+                raise ValueError(f"Could not parse schema change from SQL statement: {sql_statement[:100]}")
+        
+        # If we have a generic ALTER_TABLE, try to query PostgreSQL for actual change details
+        if schema_change.change_type == "ALTER_TABLE" and not schema_change.column_name:
+            schema_change = await self._enhance_schema_change_from_db(schema_change, database_name)
+        
+        print(f"   ✅ Change Type: {schema_change.change_type}")
+        print(f"   ✅ Table: {schema_change.table_name}")
+        if schema_change.column_name:
+            print(f"   ✅ Column: {schema_change.column_name}")
+        if schema_change.old_value:
+            print(f"   ✅ Old Value: {schema_change.old_value}")
+        if schema_change.new_value:
+            print(f"   ✅ New Value: {schema_change.new_value}")
+        if schema_change.change_type == "ALTER_TABLE" and not schema_change.column_name:
+            print(f"   ⚠️  Operation details not available (incomplete SQL from event trigger)")
+        
+        return schema_change
+    
+    async def _find_code_dependencies_step(self, table_name: str, column_name: str = None, **kwargs) -> Tuple[List[Dict], str]:
+        """Pipeline stage: find code files that use the table/column or collection"""
+        print("Step 2/6: Finding code dependencies...")
+        code_dependencies, repo_path = await self._find_code_dependencies(table_name, column_name, **kwargs)
+        print(f"   ✅ Found {len(code_dependencies)} code files using this table/collection")
+        return code_dependencies, repo_path
+    
+    async def _get_relationships_step(self, lookup) -> Dict:
+        """Pipeline stage: get database relationships"""
+        print("Step 3/6: Analyzing database relationships...")
+        db_relationships = await lookup
+        print(f"   ✅ Found {len(db_relationships.get('forward', []))} forward relationships")
+        print(f"   ✅ Found {len(db_relationships.get('reverse', []))} reverse relationships")
+        return db_relationships
+    
+    async def _run_ai_analysis(
+        self,
+        schema_change: SchemaChange,
+        code_dependencies: List[Dict],
+        db_relationships: Dict,
+        repo_path: str = None,
+        bypass_ai_cache: bool = False,
+        on_token=None
+    ) -> Dict:
+        """Pipeline stage: AI analysis (non-blocking - falls back if it fails)"""
+        print("Step 5/6: Running AI analysis...")
+        try:
+            return await self.ai_analyzer.analyze_schema_impact(
+                schema_change,
+                code_dependencies,
+                db_relationships,
+                repository_path=repo_path,
+                bypass_cache=bypass_ai_cache,
+                on_token=on_token
+            )
+        except Exception as ai_error:
+            print(f"⚠️ AI analysis failed (non-blocking): {ai_error}")
+            return self._fallback_schema_analysis()
+    
     async def _find_code_dependencies(
         self,
         table_name: str,
@@ -231,6 +278,21 @@ class SchemaChangeOrchestrator:
         database_type: str = "postgresql",
         github_repo_url: str = None,
         github_branch: str = "main"
+    ) -> Tuple[List[Dict], str]:
+        """Find all code files that reference this table/column or collection (see _scan_code_dependencies)"""
+        # The repository walk is blocking; run it off the event loop so it
+        # overlaps with the relationship lookup
+        return await asyncio.to_thread(
+            self._scan_code_dependencies, table_name, column_name, database_type, github_repo_url, github_branch
+        )
+    
+    def _scan_code_dependencies(
+        self,
+        table_name: str,
+        column_name: str = None,
+        database_type: str = "postgresql",
+        github_repo_url: str = None,
+        github_branch: str = "main"
     ) -> Tuple[List[Dict], str]:
         """Find all code files that reference this table/column or collection
         
@@ -299,89 +361,34 @@ class SchemaChangeOrchestrator:
         else:
             search_folders = ["banking-app", "python-analytics"]
         
-        # Walk through repository, but only in relevant folders
-        for root, dirs, files in os.walk(repo_path):
-            # Skip hidden directories and common ignore patterns
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__']]
-            
-            # Check if we're in a relevant folder
-            relative_root = os.path.relpath(root, repo_path)
-            
-            # At root level, filter directories to only search in relevant folders
-            if relative_root == ".":
-                dirs[:] = [d for d in dirs if d in search_folders]
-            else:
-                # Check if current path is in a relevant folder
-                path_parts = relative_root.split(os.sep)
-                # Check if any of the search folders is in the path
-                if not any(folder in path_parts for folder in search_folders):
-                    # Skip this directory tree
-                    dirs[:] = []
-                    continue
-            
-            for file in files:
-                # For MongoDB: exclude SQL files (they're PostgreSQL-specific)
-                # For PostgreSQL: include SQL files
-                if database_type == "mongodb" and file.endswith('.sql'):
-                    continue
-                
-                # Only process code files
-                if not file.endswith(('.java', '.py', '.js', '.ts', '.sql')):
-                    continue
-                
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, repo_path)
-                
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    # Extract table/collection usage based on database type
+        # Files that mention the table come from the inverted index (refreshed
+        # for files changed since the last lookup) instead of a full scan
+        for relative_path, usages in table_usage_index.lookup(repo_path, search_folders, database_type, table_name):
+            # Filter by column/field if specified
+            if column_name:
+                filtered_usages = []
+                for usage in usages:
+                    # For MongoDB, check field_name; for PostgreSQL, check columns
                     if database_type == "mongodb":
-                        # For MongoDB: only look for MongoDB collection patterns
-                        table_usage = self.sql_extractor.extract_mongodb_usage_only(relative_path, content, table_name)
+                        # MongoDB: check if field is mentioned in context
+                        context = usage.get('context', '').lower()
+                        if column_name.lower() in context or column_name.lower() in usage.get('full_query', '').lower():
+                            filtered_usages.append(usage)
                     else:
-                        # For PostgreSQL: use full extraction (SQL + ORM + heuristics)
-                        table_usage = self.sql_extractor.extract_table_usage(relative_path, content)
-                    
-                    if table_name.lower() in [t.lower() for t in table_usage.keys()]:
-                        usages = table_usage.get(table_name, [])
-                        if not usages:
-                            # Try case-insensitive match
-                            for key, value in table_usage.items():
-                                if key.lower() == table_name.lower():
-                                    usages = value
-                                    break
-                        
-                        # Filter by column/field if specified
-                        if column_name:
-                            filtered_usages = []
-                            for usage in usages:
-                                # For MongoDB, check field_name; for PostgreSQL, check columns
-                                if database_type == "mongodb":
-                                    # MongoDB: check if field is mentioned in context
-                                    context = usage.get('context', '').lower()
-                                    if column_name.lower() in context or column_name.lower() in usage.get('full_query', '').lower():
-                                        filtered_usages.append(usage)
-                                else:
-                                    # PostgreSQL: check columns list
-                                    if column_name.lower() in [c.lower() for c in usage.get('columns', [])]:
-                                        filtered_usages.append(usage)
-                            usages = filtered_usages
-                        
-                        if usages:
-                            code_dependencies.append({
-                                "file_path": relative_path,
-                                "table": table_name,
-                                "column": column_name,
-                                "usages": usages,
-                                "usage_count": len(usages),
-                                "database_type": database_type
-                            })
-                
-                except Exception as e:
-                    print(f"⚠️ Error reading {file_path}: {e}")
-                    continue
+                        # PostgreSQL: check columns list
+                        if column_name.lower() in [c.lower() for c in usage.get('columns', [])]:
+                            filtered_usages.append(usage)
+                usages = filtered_usages
+            
+            if usages:
+                code_dependencies.append({
+                    "file_path": relative_path,
+                    "table": table_name,
+                    "column": column_name,
+                    "usages": usages,
+                    "usage_count": len(usages),
+                    "database_type": database_type
+                })
         
         return code_dependencies, repo_path
     
@@ -687,119 +694,8 @@ class SchemaChangeOrchestrator:
             print(f"   ⚠️ psycopg2 not available, using Neo4j fallback")
         else:
             try:
-                # Get connection details from environment or use defaults
-                # For Docker containers, use host.docker.internal to reach host PostgreSQL
-                db_name = os.getenv("POSTGRES_DB", database_name)  # Use database_name parameter if env not set
-                db_host = os.getenv("POSTGRES_HOST", "host.docker.internal")  # Docker-friendly default
-                db_port = os.getenv("POSTGRES_PORT", "5432")
-                db_user = os.getenv("POSTGRES_USER", "postgres")
-                db_password = os.getenv("POSTGRES_PASSWORD", "sabari")
-                
-                print(f"   🔌 Connecting to PostgreSQL: {db_host}:{db_port}/{db_name}")
-                
-                conn = psycopg2.connect(
-                    host=db_host,
-                    port=db_port,
-                    database=db_name,
-                    user=db_user,
-                    password=db_password,
-                    connect_timeout=5  # 5 second timeout
-                )
-
-                
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    # Get foreign keys (forward: tables this table references)
-                    cursor.execute("""
-                    SELECT 
-                        c.conname AS constraint_name,
-                        t2.relname AS referenced_table,
-                        a2.attname AS referenced_column,
-                        a1.attname AS local_column
-                    FROM pg_constraint c
-                    JOIN pg_class t1 ON c.conrelid = t1.oid
-                    JOIN pg_class t2 ON c.confrelid = t2.oid
-                    JOIN pg_attribute a1 ON a1.attrelid = t1.oid AND a1.attnum = ANY(c.conkey)
-                    JOIN pg_attribute a2 ON a2.attrelid = t2.oid AND a2.attnum = ANY(c.confkey)
-                    WHERE t1.relname = %s
-                    AND c.contype = 'f'
-                    """, (table_name.lower(),))
-                    
-                    for row in cursor.fetchall():
-                        relationships["forward"].append({
-                            "type": "FOREIGN_KEY",
-                            "target_table": row["referenced_table"].upper(),
-                            "local_column": row["local_column"],
-                            "referenced_column": row["referenced_column"],
-                            "constraint_name": row["constraint_name"]
-                        })
-                    
-                    # Get reverse foreign keys (tables that reference this table)
-                    cursor.execute("""
-                    SELECT 
-                        c.conname AS constraint_name,
-                        t1.relname AS referencing_table,
-                        a1.attname AS referencing_column,
-                        a2.attname AS referenced_column
-                    FROM pg_constraint c
-                    JOIN pg_class t1 ON c.conrelid = t1.oid
-                    JOIN pg_class t2 ON c.confrelid = t2.oid
-                    JOIN pg_attribute a1 ON a1.attrelid = t1.oid AND a1.attnum = ANY(c.conkey)
-                    JOIN pg_attribute a2 ON a2.attrelid = t2.oid AND a2.attnum = ANY(c.confkey)
-                    WHERE t2.relname = %s
-                    AND c.contype = 'f'
-                    """, (table_name.lower(),))
-                    
-                    for row in cursor.fetchall():
-                        relationships["reverse"].append({
-                            "type": "REFERENCED_BY",
-                            "source_table": row["referencing_table"].upper(),
-                            "referencing_column": row["referencing_column"],
-                            "referenced_column": row["referenced_column"],
-                            "constraint_name": row["constraint_name"]
-                        })
-                    
-                    # Get views that depend on this table
-                    # Use pg_get_viewdef function to get view definition
-                    cursor.execute("""
-                    SELECT DISTINCT
-                        v.viewname AS view_name,
-                        pg_get_viewdef(c.oid) AS view_definition
-                    FROM pg_views v
-                    JOIN pg_class c ON c.relname = v.viewname
-                    WHERE v.schemaname = 'public'
-                    AND pg_get_viewdef(c.oid) LIKE %s
-                    """, (f'%{table_name.lower()}%',))
-                    
-                    for row in cursor.fetchall():
-                        relationships["reverse"].append({
-                            "type": "VIEW",
-                            "source_table": row["view_name"].upper(),  # View name
-                            "target_table": table_name.upper(),  # Table the view depends on
-                            "description": "View depends on this table",
-                            "view_definition": row["view_definition"][:200] if row["view_definition"] else ""  # Truncated for display
-                        })
-                    
-                    # Get triggers on this table
-                    cursor.execute("""
-                    SELECT 
-                        t.tgname AS trigger_name,
-                        p.proname AS function_name
-                    FROM pg_trigger t
-                    JOIN pg_class c ON t.tgrelid = c.oid
-                    JOIN pg_proc p ON t.tgfoid = p.oid
-                    WHERE c.relname = %s
-                    AND NOT t.tgisinternal
-                    """, (table_name.lower(),))
-                    
-                    for row in cursor.fetchall():
-                        relationships["reverse"].append({
-                            "type": "TRIGGER",
-                            "source_table": table_name.upper(),
-                            "trigger_name": row["trigger_name"],
-                            "function_name": row["function_name"]
-                        })
-                
-                conn.close()
+                # psycopg2 is blocking; query in a thread so the code search runs meanwhile
+                relationships = await asyncio.to_thread(self._query_postgres_relationships, table_name, database_name)
                 
                 print(f"   ✅ Found {len(relationships['forward'])} forward relationships from PostgreSQL")
                 print(f"   ✅ Found {len(relationships['reverse'])} reverse relationships from PostgreSQL")
@@ -835,6 +731,126 @@ class SchemaChangeOrchestrator:
         
         return relationships
     
+    def _query_postgres_relationships(self, table_name: str, database_name: str) -> Dict:
+        """Query PostgreSQL for foreign keys, views and triggers (blocking; raises on connection errors)"""
+        relationships = {"forward": [], "reverse": []}
+        
+        # Get connection details from environment or use defaults
+        # For Docker containers, use host.docker.internal to reach host PostgreSQL
+        db_name = os.getenv("POSTGRES_DB", database_name)  # Use database_name parameter if env not set
+        db_host = os.getenv("POSTGRES_HOST", "host.docker.internal")  # Docker-friendly default
+        db_port = os.getenv("POSTGRES_PORT", "5432")
+        db_user = os.getenv("POSTGRES_USER", "postgres")
+        db_password = os.getenv("POSTGRES_PASSWORD", "sabari")
+        
+        print(f"   🔌 Connecting to PostgreSQL: {db_host}:{db_port}/{db_name}")
+        
+        conn = psycopg2.connect(
+            host=db_host,
+            port=db_port,
+            database=db_name,
+            user=db_user,
+            password=db_password,
+            connect_timeout=5  # 5 second timeout
+        )
+
+        
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            # Get foreign keys (forward: tables this table references)
+            cursor.execute("""
+            SELECT 
+                c.conname AS constraint_name,
+                t2.relname AS referenced_table,
+                a2.attname AS referenced_column,
+                a1.attname AS local_column
+            FROM pg_constraint c
+            JOIN pg_class t1 ON c.conrelid = t1.oid
+            JOIN pg_class t2 ON c.confrelid = t2.oid
+            JOIN pg_attribute a1 ON a1.attrelid = t1.oid AND a1.attnum = ANY(c.conkey)
+            JOIN pg_attribute a2 ON a2.attrelid = t2.oid AND a2.attnum = ANY(c.confkey)
+            WHERE t1.relname = %s
+            AND c.contype = 'f'
+            """, (table_name.lower(),))
+            
+            for row in cursor.fetchall():
+                relationships["forward"].append({
+                    "type": "FOREIGN_KEY",
+                    "target_table": row["referenced_table"].upper(),
+                    "local_column": row["local_column"],
+                    "referenced_column": row["referenced_column"],
+                    "constraint_name": row["constraint_name"]
+                })
+            
+            # Get reverse foreign keys (tables that reference this table)
+            cursor.execute("""
+            SELECT 
+                c.conname AS constraint_name,
+                t1.relname AS referencing_table,
+                a1.attname AS referencing_column,
+                a2.attname AS referenced_column
+            FROM pg_constraint c
+            JOIN pg_class t1 ON c.conrelid = t1.oid
+            JOIN pg_class t2 ON c.confrelid = t2.oid
+            JOIN pg_attribute a1 ON a1.attrelid = t1.oid AND a1.attnum = ANY(c.conkey)
+            JOIN pg_attribute a2 ON a2.attrelid = t2.oid AND a2.attnum = ANY(c.confkey)
+            WHERE t2.relname = %s
+            AND c.contype = 'f'
+            """, (table_name.lower(),))
+            
+            for row in cursor.fetchall():
+                relationships["reverse"].append({
+                    "type": "REFERENCED_BY",
+                    "source_table": row["referencing_table"].upper(),
+                    "referencing_column": row["referencing_column"],
+                    "referenced_column": row["referenced_column"],
+                    "constraint_name": row["constraint_name"]
+                })
+            
+            # Get views that depend on this table
+            # Use pg_get_viewdef function to get view definition
+            cursor.execute("""
+            SELECT DISTINCT
+                v.viewname AS view_name,
+                pg_get_viewdef(c.oid) AS view_definition
+            FROM pg_views v
+            JOIN pg_class c ON c.relname = v.viewname
+            WHERE v.schemaname = 'public'
+            AND pg_get_viewdef(c.oid) LIKE %s
+            """, (f'%{table_name.lower()}%',))
+            
+            for row in cursor.fetchall():
+                relationships["reverse"].append({
+                    "type": "VIEW",
+                    "source_table": row["view_name"].upper(),  # View name
+                    "target_table": table_name.upper(),  # Table the view depends on
+                    "description": "View depends on this table",
+                    "view_definition": row["view_definition"][:200] if row["view_definition"] else ""  # Truncated for display
+                })
+            
+            # Get triggers on this table
+            cursor.execute("""
+            SELECT 
+                t.tgname AS trigger_name,
+                p.proname AS function_name
+            FROM pg_trigger t
+            JOIN pg_class c ON t.tgrelid = c.oid
+            JOIN pg_proc p ON t.tgfoid = p.oid
+            WHERE c.relname = %s
+            AND NOT t.tgisinternal
+            """, (table_name.lower(),))
+            
+            for row in cursor.fetchall():
+                relationships["reverse"].append({
+                    "type": "TRIGGER",
+                    "source_table": table_name.upper(),
+                    "trigger_name": row["trigger_name"],
+                    "function_name": row["function_name"]
+                })
+        
+        conn.close()
+        
+        return relationships
+    
     async def _store_schema_in_neo4j(
         self,
         schema_change: SchemaChange,
@@ -844,64 +860,66 @@ class SchemaChangeOrchestrator:
     ):
         """Store schema change and relationships in Neo4j"""
         try:
-            # Create database node
-            await neo4j_client.create_database_node(
-                name=database_name,
-                properties={"type": "database"}
-            )
-            
-            # Create table node
-            await neo4j_client.create_table_node(
-                name=schema_change.table_name,
-                database=database_name,
-                properties={
-                    "change_type": schema_change.change_type,
-                    "column_name": schema_change.column_name or "",
-                    "last_modified": datetime.now().isoformat()
-                }
-            )
-            
-            # Store code dependencies (code files that use this table)
-            for dep in code_dependencies:
-                file_name = dep["file_path"].split("/")[-1]
-                
-                # Create module node for code file
-                await neo4j_client.create_module_node(
-                    name=file_name,
-                    properties={"path": dep["file_path"]}
+            # One transaction for the whole storage phase; a failure leaves nothing half-written
+            async with neo4j_client.unit_of_work():
+                # Create database node
+                await neo4j_client.create_database_node(
+                    name=database_name,
+                    properties={"type": "database"}
                 )
                 
-                # Create relationship: Code file USES Table
-                await neo4j_client.create_table_usage(
-                    source_file=file_name,
-                    target_table=schema_change.table_name,
+                # Create table node
+                await neo4j_client.create_table_node(
+                    name=schema_change.table_name,
                     database=database_name,
-                    usage_count=dep["usage_count"],
-                    column_name=schema_change.column_name or ""
+                    properties={
+                        "change_type": schema_change.change_type,
+                        "column_name": schema_change.column_name or "",
+                        "last_modified": datetime.now().isoformat()
+                    }
                 )
-            
-            # Store database relationships
-            for rel in db_relationships.get("forward", []):
-                if rel.get("target_table"):
-                    await neo4j_client.create_table_relationship(
-                        source_table=schema_change.table_name,
-                        target_table=rel["target_table"],
-                        database=database_name,
-                        relationship_type=rel.get("type", "FOREIGN_KEY"),
-                        properties=rel
+                
+                # Store code dependencies (code files that use this table)
+                for dep in code_dependencies:
+                    file_name = dep["file_path"].split("/")[-1]
+                    
+                    # Create module node for code file
+                    await neo4j_client.create_module_node(
+                        name=file_name,
+                        properties={"path": dep["file_path"]}
                     )
-            
-            for rel in db_relationships.get("reverse", []):
-                if rel.get("source_table"):
-                    await neo4j_client.create_table_relationship(
-                        source_table=rel["source_table"],
+                    
+                    # Create relationship: Code file USES Table
+                    await neo4j_client.create_table_usage(
+                        source_file=file_name,
                         target_table=schema_change.table_name,
                         database=database_name,
-                        relationship_type=rel.get("type", "REFERENCED_BY"),
-                        properties=rel
+                        usage_count=dep["usage_count"],
+                        column_name=schema_change.column_name or ""
                     )
-            
-            print("   ✅ Schema stored in Neo4j")
+                
+                # Store database relationships
+                for rel in db_relationships.get("forward", []):
+                    if rel.get("target_table"):
+                        await neo4j_client.create_table_relationship(
+                            source_table=schema_change.table_name,
+                            target_table=rel["target_table"],
+                            database=database_name,
+                            relationship_type=rel.get("type", "FOREIGN_KEY"),
+                            properties=rel
+                        )
+                
+                for rel in db_relationships.get("reverse", []):
+                    if rel.get("source_table"):
+                        await neo4j_client.create_table_relationship(
+                            source_table=rel["source_table"],
+                            target_table=schema_change.table_name,
+                            database=database_name,
+                            relationship_type=rel.get("type", "REFERENCED_BY"),
+                            properties=rel
+                        )
+                
+                print("   ✅ Schema stored in Neo4j")
             
         except Exception as e:
             print(f"   ⚠️ Neo4j storage failed: {e}")
@@ -934,112 +952,56 @@ class SchemaChangeOrchestrator:
         repository: str,
         analysis_id: str,
         github_repo_url: str = None,
-        github_branch: str = "main"
+        github_branch: str = "main",
+        bypass_ai_cache: bool = False
     ) -> Dict:
         """Analyze MongoDB schema change (similar to PostgreSQL but for MongoDB)"""
         start_time = datetime.now()
         
         try:
-            # Step 1: Parse MongoDB schema change
-            print("Step 1/6: Parsing MongoDB schema change...")
-            mongo_change = self.mongodb_analyzer.parse_schema_change(operation_statement)
-            
-            if not mongo_change:
-                # Try to extract collection name
-                import re
-                coll_match = re.search(r'\b(\w+)\b', operation_statement)
-                if coll_match:
-                    collection_name = coll_match.group(1)
-                    mongo_change = MongoSchemaChange(
-                        change_type="MODIFY_COLLECTION",
-                        collection_name=collection_name.upper(),
-                        operation_statement=operation_statement
-                    )
-                    print(f"   ⚠️  Could not fully parse MongoDB operation, using generic MODIFY_COLLECTION")
-                else:
-                    raise ValueError(f"Could not parse MongoDB schema change: {operation_statement[:100]}")
-            
-            print(f"   ✅ Change Type: {mongo_change.change_type}")
-            print(f"   ✅ Collection: {mongo_change.collection_name}")
-            if mongo_change.index_name:
-                print(f"   ✅ Index: {mongo_change.index_name}")
-            if mongo_change.field_name:
-                print(f"   ✅ Field: {mongo_change.field_name}")
-            
-            # Step 2: Find code files that use this collection
-            print("Step 2/6: Finding code dependencies...")
             # Get GitHub repo URL from parameter, environment, or repository parameter
             # Priority: github_repo_url parameter > GITHUB_REPO_URL_MONGODB env > repository parameter
             final_github_repo_url = github_repo_url or os.getenv("GITHUB_REPO_URL_MONGODB") or repository
             final_github_branch = github_branch or os.getenv("GITHUB_BRANCH", "main")
             
-            code_dependencies, repo_path = await self._find_code_dependencies(
-                mongo_change.collection_name,  # Use collection name as table name for code search
-                mongo_change.field_name,
+            # Same DAG as PostgreSQL: parse, then code search and relationships
+            # in parallel, then store and AI in parallel, then risk
+            pipeline = StagePipeline("mongodb_schema_change", on_stage_complete=progress_broker.stage_reporter(analysis_id))
+            pipeline.add("parse", lambda r: self._parse_mongodb_change(operation_statement))
+            pipeline.add("code_dependencies", lambda r: self._find_code_dependencies_step(
+                r["parse"].collection_name,  # Use collection name as table name for code search
+                r["parse"].field_name,
                 database_type="mongodb",  # Only look for MongoDB patterns, exclude SQL files
                 github_repo_url=final_github_repo_url if final_github_repo_url and ("github.com" in final_github_repo_url or "/" in final_github_repo_url) else None,
                 github_branch=final_github_branch
-            )
-            print(f"   ✅ Found {len(code_dependencies)} code files using this collection")
-            
-            # Step 3: Get MongoDB relationships
-            print("Step 3/6: Analyzing MongoDB relationships...")
-            db_relationships = await self._get_mongodb_relationships(
-                mongo_change.collection_name,
-                database_name
-            )
-            print(f"   ✅ Found {len(db_relationships.get('forward', []))} forward relationships")
-            print(f"   ✅ Found {len(db_relationships.get('reverse', []))} reverse relationships")
-            
-            # Step 4: Store in Neo4j
-            print("Step 4/6: Storing in dependency graph...")
-            await self._store_mongodb_schema_in_neo4j(
-                mongo_change,
-                database_name,
-                code_dependencies,
-                db_relationships
-            )
-            print(f"   ✅ Schema stored in Neo4j")
-            
-            # Step 5: AI Analysis
-            print("Step 5/6: Running AI analysis...")
-            try:
-                # Convert MongoDB change to schema change format for AI analyzer
-                schema_change_like = SchemaChange(
-                    change_type=mongo_change.change_type,
-                    table_name=mongo_change.collection_name,
-                    column_name=mongo_change.field_name or mongo_change.index_name,
-                    old_value=mongo_change.old_value,
-                    new_value=mongo_change.new_value,
-                    sql_statement=mongo_change.operation_statement
-                )
-                
-                ai_insights = await self.ai_analyzer.analyze_schema_impact(
-                    schema_change_like,
-                    code_dependencies,
-                    db_relationships,
-                    repository_path=repo_path
+            ), after=("parse",))
+            pipeline.add("relationships", lambda r: self._get_relationships_step(
+                self._get_mongodb_relationships(r["parse"].collection_name, database_name)
+            ), after=("parse",))
+            pipeline.add("store", lambda r: self._run_step(
+                "Step 4/6: Storing in dependency graph...",
+                self._store_mongodb_schema_in_neo4j(r["parse"], database_name, r["code_dependencies"][0], r["relationships"])
+            ), after=("code_dependencies", "relationships"))
+            # Convert MongoDB change to schema change format for AI analyzer
+            pipeline.add("ai", lambda r: self._run_ai_analysis(
+                self._to_schema_change(r["parse"]), r["code_dependencies"][0], r["relationships"],
+                r["code_dependencies"][1], bypass_ai_cache,
+                on_token=progress_broker.token_reporter(analysis_id)
+            ), after=("code_dependencies", "relationships"))
+            pipeline.add("risk", lambda r: self._run_step(
+                "Step 6/6: Calculating risk score...",
+                asyncio.to_thread(
+                    self.risk_scorer.calculate_schema_risk,
+                    self._to_schema_change(r["parse"]), r["code_dependencies"][0], r["relationships"], r["ai"]
                 )
-            except Exception as ai_error:
-                print(f"⚠️ AI analysis failed (non-blocking): {ai_error}")
-                ai_insights = self._fallback_schema_analysis()
+            ), after=("ai",))
             
-            # Step 6: Risk Scoring
-            print("Step 6/6: Calculating risk score...")
-            schema_change_like = SchemaChange(
-                change_type=mongo_change.change_type,
-                table_name=mongo_change.collection_name,
-                column_name=mongo_change.field_name or mongo_change.index_name,
-                old_value=mongo_change.old_value,
-                new_value=mongo_change.new_value,
-                sql_statement=mongo_change.operation_statement
-            )
-            risk_score = self.risk_scorer.calculate_schema_risk(
-                schema_change_like,
-                code_dependencies,
-                db_relationships,
-                ai_insights
-            )
+            stages = await pipeline.run()
+            schema_change_like = self._to_schema_change(stages["parse"])
+            code_dependencies = stages["code_dependencies"][0]
+            db_relationships = stages["relationships"]
+            ai_insights = stages["ai"]
+            risk_score = stages["risk"]
             
             # Compile results
             result = self._compile_results(
@@ -1055,28 +1017,82 @@ class SchemaChangeOrchestrator:
                 operation_statement,
                 database_type="mongodb"
             )
+            result["metadata"].update(pipeline.get_metadata())
             
             duration = (datetime.now() - start_time).total_seconds()
             print(f"\n{'='*60}")
             print(f"✅ MongoDB Schema Analysis Complete in {duration:.1f}s")
             print(f"   Risk Score: {risk_score['score']}/10 - {risk_score['level']}")
             print(f"   Affected Code Files: {len(code_dependencies)}")
+            print(f"   Critical Path: {' -> '.join(result['metadata']['critical_path'])}")
             print(f"{'='*60}\n")
             
+            progress_broker.publish(analysis_id, "complete", result)
             return result
             
         except Exception as e:
             print(f"\n❌ MongoDB schema analysis failed: {str(e)}")
+            progress_broker.publish(analysis_id, "failed", {"error": str(e)})
             import traceback
             traceback.print_exc()
             raise
     
+    async def _parse_mongodb_change(self, operation_statement: str) -> MongoSchemaChange:
+        """Pipeline stage: parse a MongoDB schema operation"""
+        # Step 1: Parse MongoDB schema change
+        print("Step 1/6: Parsing MongoDB schema change...")
+        mongo_change = self.mongodb_analyzer.parse_schema_change(operation_statement)
+        
+        if not mongo_change:
+            # Try to extract collection name
+            import re
+            coll_match = re.search(r'\b(\w+)\b', operation_statement)
+            if coll_match:
+                collection_name = coll_match.group(1)
+                mongo_change = MongoSchemaChange(
+                    change_type="MODIFY_COLLECTION",
+                    collection_name=collection_name.upper(),
+                    operation_statement=operation_statement
+                )
+                print(f"   ⚠️  Could not fully parse MongoDB operation, using generic MODIFY_COLLECTION")
+            else:
+                raise ValueError(f"Could not parse MongoDB schema change: {operation_statement[:100]}")
+        
+        print(f"   ✅ Change Type: {mongo_change.change_type}")
+        print(f"   ✅ Collection: {mongo_change.collection_name}")
+        if mongo_change.index_name:
+            print(f"   ✅ Index: {mongo_change.index_name}")
+        if mongo_change.field_name:
+            print(f"   ✅ Field: {mongo_change.field_name}")
+        
+        return mongo_change
+    
+    @staticmethod
+    def _to_schema_change(mongo_change: MongoSchemaChange) -> SchemaChange:
+        """View a MongoDB change as a SchemaChange for the AI analyzer and risk scorer"""
+        return SchemaChange(
+            change_type=mongo_change.change_type,
+            table_name=mongo_change.collection_name,
+            column_name=mongo_change.field_name or mongo_change.index_name,
+            old_value=mongo_change.old_value,
+            new_value=mongo_change.new_value,
+            sql_statement=mongo_change.operation_statement
+        )
+    
     async def _get_mongodb_relationships(
         self,
         collection_name: str,
         database_name: str
     ) -> Dict:
-        """Get MongoDB collection relationships"""
+        """Get MongoDB collection relationships (pymongo is blocking, so in a thread)"""
+        return await asyncio.to_thread(self._query_mongodb_relationships, collection_name, database_name)
+    
+    def _query_mongodb_relationships(
+        self,
+        collection_name: str,
+        database_name: str
+    ) -> Dict:
+        """Blocking part of _get_mongodb_relationships"""
         relationships = {"forward": [], "reverse": []}
         
         if not PYMONGO_AVAILABLE:
@@ -1149,75 +1165,77 @@ class SchemaChangeOrchestrator:
     ):
         """Store MongoDB schema change in Neo4j"""
         try:
-            # Create database node
-            await neo4j_client.create_database_node(
-                name=database_name,
-                properties={"type": "mongodb"}
-            )
-            
-            # Create collection node (using correct parameter names)
-            await neo4j_client.create_table_node(
-                name=mongo_change.collection_name,
-                database=database_name,
-                properties={"type": "collection", "change_type": mongo_change.change_type}
-            )
-            
-            # Create relationships to code files (using USES_COLLECTION)
-            for dep in code_dependencies:
-                file_name = dep["file_path"].split("/")[-1]
-                
-                # Create module node for code file
-                await neo4j_client.create_module_node(
-                    name=file_name,
-                    properties={"path": dep["file_path"]}
+            # One transaction for the whole storage phase; a failure leaves nothing half-written
+            async with neo4j_client.unit_of_work():
+                # Create database node
+                await neo4j_client.create_database_node(
+                    name=database_name,
+                    properties={"type": "mongodb"}
                 )
                 
-                # Create relationship: Code file USES Collection (MongoDB-specific)
-                await neo4j_client.create_collection_usage(
-                    source_file=file_name,
-                    target_collection=mongo_change.collection_name,
+                # Create collection node (using correct parameter names)
+                await neo4j_client.create_table_node(
+                    name=mongo_change.collection_name,
                     database=database_name,
-                    usage_count=dep["usage_count"],
-                    field_name=mongo_change.field_name or ""
+                    properties={"type": "collection", "change_type": mongo_change.change_type}
                 )
-            
-            # Create database relationships (using create_table_relationship)
-            # First, ensure all related collections exist as nodes in Neo4j
-            for rel in db_relationships.get("forward", []):
-                target = rel.get("target_table") or rel.get("target_collection", "")
-                if target:
-                    # Create node for target collection if it doesn't exist
-                    await neo4j_client.create_table_node(
-                        name=target,
-                        database=database_name,
-                        properties={"type": "collection"}
-                    )
-                    await neo4j_client.create_table_relationship(
-                        source_table=mongo_change.collection_name,
-                        target_table=target,
-                        database=database_name,
-                        relationship_type=rel.get("type", "REFERENCE"),
-                        properties={"field": rel.get("field", "")}
-                    )
-            
-            for rel in db_relationships.get("reverse", []):
-                source = rel.get("source_table") or rel.get("source_collection", "")
-                if source:
-                    # Create node for source collection if it doesn't exist (e.g., BALANCE_HISTORY)
-                    await neo4j_client.create_table_node(
-                        name=source,
-                        database=database_name,
-                        properties={"type": "collection"}
+                
+                # Create relationships to code files (using USES_COLLECTION)
+                for dep in code_dependencies:
+                    file_name = dep["file_path"].split("/")[-1]
+                    
+                    # Create module node for code file
+                    await neo4j_client.create_module_node(
+                        name=file_name,
+                        properties={"path": dep["file_path"]}
                     )
-                    await neo4j_client.create_table_relationship(
-                        source_table=source,
-                        target_table=mongo_change.collection_name,
+                    
+                    # Create relationship: Code file USES Collection (MongoDB-specific)
+                    await neo4j_client.create_collection_usage(
+                        source_file=file_name,
+                        target_collection=mongo_change.collection_name,
                         database=database_name,
-                        relationship_type=rel.get("type", "REFERENCED_BY"),
-                        properties={"field": rel.get("field", "")}
+                        usage_count=dep["usage_count"],
+                        field_name=mongo_change.field_name or ""
                     )
-            
-            print("   ✅ Schema stored in Neo4j")
+                
+                # Create database relationships (using create_table_relationship)
+                # First, ensure all related collections exist as nodes in Neo4j
+                for rel in db_relationships.get("forward", []):
+                    target = rel.get("target_table") or rel.get("target_collection", "")
+                    if target:
+                        # Create node for target collection if it doesn't exist
+                        await neo4j_client.create_table_node(
+                            name=target,
+                            database=database_name,
+                            properties={"type": "collection"}
+                        )
+                        await neo4j_client.create_table_relationship(
+                            source_table=mongo_change.collection_name,
+                            target_table=target,
+                            database=database_name,
+                            relationship_type=rel.get("type", "REFERENCE"),
+                            properties={"field": rel.get("field", "")}
+                        )
+                
+                for rel in db_relationships.get("reverse", []):
+                    source = rel.get("source_table") or rel.get("source_collection", "")
+                    if source:
+                        # Create node for source collection if it doesn't exist (e.g., BALANCE_HISTORY)
+                        await neo4j_client.create_table_node(
+                            name=source,
+                            database=database_name,
+                            properties={"type": "collection"}
+                        )
+                        await neo4j_client.create_table_relationship(
+                            source_table=source,
+                            target_table=mongo_change.collection_name,
+                            database=database_name,
+                            relationship_type=rel.get("type", "REFERENCED_BY"),
+                            properties={"field": rel.get("field", "")}
+                        )
+                
+                print("   ✅ Schema stored in Neo4j")
         
         except Exception as e:
             print(f"   ⚠️ Could not store MongoDB schema in Neo4j: {e}")
@@ -0,0 +1,134 @@
+"""
+Stage DAG for analysis orchestrators
+Each stage declares the stages it needs; stages whose inputs are ready run
+concurrently, so an analysis takes roughly as long as its critical path
+instead of the sum of all steps
+"""
+
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# A stage receives the results of every finished stage, keyed by stage name
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StagePipeline:
+    """Runs async stages as soon as the stages they depend on have finished"""
+
+    def __init__(self, name: str, on_stage_complete: Optional[Callable[[str, Any, Dict], None]] = None):
+        """
+        Initialize pipeline
+
+        Args:
+            name: Pipeline name used in log messages
+            on_stage_complete: Called with (stage, result, timing) as each stage succeeds
+        """
+        self.name = name
+        self.on_stage_complete = on_stage_complete
+        self._stages: Dict[str, Dict] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def add(self, name: str, fn: StageFn, after: Iterable[str] = ()) -> "StagePipeline":
+        """
+        Register a stage
+
+        Args:
+            name: Unique stage name; its return value is stored under it
+            fn: Async callable taking the results dict
+            after: Stages that must finish first (must already be registered)
+
+        Returns:
+            self, for chaining
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already registered in {self.name}")
+        after = tuple(after)
+        unknown = [dependency for dependency in after if dependency not in self._stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unregistered stage(s): {', '.join(unknown)}")
+        self._stages[name] = {"fn": fn, "after": after}
+        return self
+
+    async def _run_stage(self, name: str, tasks: Dict[str, asyncio.Task]):
+        stage = self._stages[name]
+        if stage["after"]:
+            await asyncio.gather(*(tasks[dependency] for dependency in stage["after"]))
+
+        started = time.perf_counter()
+        try:
+            self.results[name] = await stage["fn"](self.results)
+        finally:
+            finished = time.perf_counter()
+            self.timings[name] = {
+                "start_ms": round((started - self._started_at) * 1000, 1),
+                "duration_ms": round((finished - started) * 1000, 1)
+            }
+
+        if self.on_stage_complete is not None:
+            try:
+                self.on_stage_complete(name, self.results[name], self.timings[name])
+            except Exception as e:
+                # Progress reporting must never fail the analysis
+                print(f"⚠️ {self.name}: stage '{name}' listener failed: {e}")
+        return self.results[name]
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every stage
+
+        Returns:
+            Stage name -> stage result
+
+        Raises:
+            The first stage error; stages still running are cancelled
+        """
+        self._started_at = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        # Registration order is a topological order (dependencies must exist first)
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(self._run_stage(name, tasks))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self._finished_at = time.perf_counter()
+
+        return self.results
+
+    def _critical_path(self) -> List[str]:
+        """Chain of stages that determined the total latency"""
+        path = []
+        current = max(self.timings, key=lambda name: self.timings[name]["start_ms"] + self.timings[name]["duration_ms"], default=None)
+        while current is not None:
+            path.append(current)
+            finished = [dependency for dependency in self._stages[current]["after"] if dependency in self.timings]
+            current = max(
+                finished,
+                key=lambda name: self.timings[name]["start_ms"] + self.timings[name]["duration_ms"],
+                default=None
+            )
+        return list(reversed(path))
+
+    def get_metadata(self) -> Dict:
+        """Per-stage timings for the result metadata"""
+        total_ms = 0.0
+        if self._started_at is not None and self._finished_at is not None:
+            total_ms = round((self._finished_at - self._started_at) * 1000, 1)
+        return {
+            "stage_timings": {
+                name: {**timing, "after": list(self._stages[name]["after"])}
+                for name, timing in self.timings.items()
+            },
+            "critical_path": self._critical_path(),
+            "total_stage_ms": total_ms,
+            "sequential_stage_ms": round(sum(timing["duration_ms"] for timing in self.timings.values()), 1)
+        }
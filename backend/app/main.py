@@ -7,6 +7,18 @@ import uvicorn
 from contextlib import asynccontextmanager
 from app.utils.logger import request_logger
 from app.api import api_contract
+from app.services.depends_wrapper import depends_cache
+from app.services.depends_pool import shutdown_worker_pools, get_worker_pool_stats
+from app.services.incremental_graph import incremental_graph
+from app.services.python_dependency_extractor import python_extractor
+from app.utils.blast_radius_index import blast_radius_index
+from app.engine.ai_analyzer import ai_response_cache
+from app.services.llm_dispatcher import llm_dispatcher
+from app.engine.prompt_budget import prompt_budgeter
+from app.utils.progress import progress_broker
+from app.services.table_index import table_usage_index
+from app.utils.file_store import file_store
+from app.services.parallel_scanner import parallel_scanner
 
 
 # Define the lifespan event handler
@@ -21,6 +33,10 @@ async def lifespan(app: FastAPI):
 
     # Code to run on shutdown
     print("👋 CodeFlow Catalyst Backend Shutting Down...")
+    shutdown_worker_pools()
+    python_extractor.shutdown()
+    llm_dispatcher.shutdown()
+    parallel_scanner.shutdown()
     await neo4j_client.close()
 
 
@@ -69,11 +85,13 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
+    schema_status = None
     try:
         # A simple check to see if the driver is initialized
         if neo4j_client.driver:
             await neo4j_client.driver.verify_connectivity()
             db_status = "connected"
+            schema_status = await neo4j_client.get_schema_status()
         else:
             db_status = "disconnected"
     except Exception as e:
@@ -83,6 +101,7 @@ async def health_check():
     return {
         "status": "ok",
         "database": db_status,
+        "schema": schema_status,
         "ai_service": "connected"  # Placeholder
     }
 
@@ -119,6 +138,72 @@ async def get_request_stats():
     """Get API statistics"""
     return request_logger.get_stats()
 
+
+@app.get("/api/v1/monitoring/depends-cache")
+async def get_depends_cache_stats():
+    """Get DEPENDS result cache statistics"""
+    return depends_cache.get_stats()
+
+
+@app.get("/api/v1/monitoring/ai-cache")
+async def get_ai_cache_stats():
+    """Get AI response cache statistics"""
+    return ai_response_cache.get_stats()
+
+
+@app.get("/api/v1/monitoring/llm")
+async def get_llm_dispatcher_stats():
+    """Get LLM dispatcher queue, rate-limit and retry statistics"""
+    return llm_dispatcher.get_stats()
+
+
+@app.get("/api/v1/monitoring/prompts")
+async def get_prompt_stats():
+    """Get prompt size histogram and context packing statistics"""
+    return prompt_budgeter.get_stats()
+
+
+@app.get("/api/v1/monitoring/table-index")
+async def get_table_index_stats():
+    """Get table -> file inverted index statistics"""
+    return table_usage_index.get_stats()
+
+
+@app.get("/api/v1/monitoring/file-store")
+async def get_file_store_stats():
+    """Get shared source file store statistics"""
+    return file_store.get_stats()
+
+
+@app.get("/api/v1/monitoring/progress")
+async def get_progress_stats():
+    """Get progress event broker statistics (tracked analyses, SSE subscribers)"""
+    return progress_broker.get_stats()
+
+
+@app.get("/api/v1/monitoring/depends-incremental")
+async def get_depends_incremental_stats():
+    """Get incremental DEPENDS graph statistics"""
+    return incremental_graph.get_stats()
+
+
+@app.get("/api/v1/monitoring/depends-pool")
+async def get_depends_pool_stats():
+    """Get DEPENDS worker pool statistics"""
+    return get_worker_pool_stats()
+
+
+@app.get("/api/v1/monitoring/neo4j-pool")
+async def get_neo4j_pool_stats():
+    """Get Neo4j connection pool and unit-of-work statistics"""
+    return neo4j_client.get_pool_stats()
+
+
+@app.get("/api/v1/monitoring/blast-radius")
+async def get_blast_radius_stats():
+    """Get blast-radius index statistics"""
+    return blast_radius_index.get_stats()
+
 # Include API routers
 app.include_router(webhooks.router, prefix="/api/v1", tags=["webhooks"])
 app.include_router(analysis.router, prefix="/api/v1", tags=["analysis"])
@@ -91,6 +91,22 @@ class AnalysisRequest(BaseModel):
     diff: Optional[str] = Field(None, description="Code diff (optional)")
     commit_sha: Optional[str] = Field(None, description="Commit SHA")
     commit_message: Optional[str] = Field(None, description="Commit message")
+    bypass_ai_cache: bool = Field(False, description="Call the AI model even if an identical analysis was cached")
+
+
+class CommitFileDiff(BaseModel):
+    """One changed file of a commit analysis request"""
+    file_path: str = Field(..., description="Path to changed file")
+    diff: Optional[str] = Field(None, description="Code diff of this file (optional)")
+
+
+class CommitAnalysisRequest(BaseModel):
+    """Manual whole-commit analysis request"""
+    files: List[CommitFileDiff] = Field(..., min_length=1, description="Changed files")
+    repository: str = Field(..., description="Repository name")
+    commit_sha: Optional[str] = Field(None, description="Commit SHA")
+    commit_message: Optional[str] = Field(None, description="Commit message")
+    bypass_ai_cache: bool = Field(False, description="Call the AI model even if an identical analysis was cached")
 
 
 class SchemaChangeRequest(BaseModel):
@@ -102,6 +118,7 @@ class SchemaChangeRequest(BaseModel):
     database_type: Optional[str] = Field(None, description="Database type: 'postgresql', 'mongodb', or None (auto-detect)")
     github_repo_url: Optional[str] = Field(None, description="GitHub repository URL (e.g., 'owner/repo' or 'https://github.com/owner/repo'). If provided, code will be fetched from GitHub instead of local folder.")
     github_branch: Optional[str] = Field("main", description="GitHub branch to use (default: main)")
+    bypass_ai_cache: bool = Field(False, description="Call the AI model even if an identical analysis was cached")
     
     class Config:
         json_schema_extra = {
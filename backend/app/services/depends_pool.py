@@ -0,0 +1,321 @@
+"""
+Resident worker pool for DEPENDS runs
+Keeps a bounded set of warm worker slots so commit bursts don't pay
+JVM cold starts and temp-dir churn one analysis at a time
+"""
+
+import os
+import json
+import queue
+import shutil
+import signal
+import asyncio
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+
+class DependsWorkerCrashed(Exception):
+    """Raised when a DEPENDS process dies without producing output"""
+
+
+class DependsWorker:
+    """A single worker slot with its own scratch directory and JVM settings"""
+
+    # DEPENDS always writes its JSON matrix under this name in the output dir
+    OUTPUT_FILE_NAME = "-file.json"
+
+    def __init__(self, slot_id: int, depends_jar: str, work_root: str, jvm_options: List[str], class_archive: str):
+        self.slot_id = slot_id
+        self.depends_jar = depends_jar
+        self.work_dir = os.path.join(work_root, f"worker-{slot_id}")
+        self.jvm_options = jvm_options
+        # One archive per slot so concurrent first runs never write the same file
+        self.class_archive = f"{os.path.splitext(class_archive)[0]}-{slot_id}.jsa" if class_archive else ""
+        self.jobs_completed = 0
+        self.restarts = 0
+        self.process: Optional[subprocess.Popen] = None
+        self._prepare_work_dir()
+
+    def _prepare_work_dir(self):
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def restart(self):
+        """Reset the slot after a crash: kill leftovers and recreate scratch space"""
+        self.kill()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        self._prepare_work_dir()
+        self.restarts += 1
+        print(f"♻️ DEPENDS worker {self.slot_id} restarted")
+
+    def kill(self):
+        """Kill the running JVM (and its process group) if any"""
+        if self.process and self.process.poll() is None:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (OSError, AttributeError):
+                self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def _build_command(self, code_path: str, language: str) -> List[str]:
+        cmd = ["java"] + self.jvm_options
+
+        # Application class-data sharing: the first run dumps the loaded classes,
+        # later runs map the archive instead of re-parsing depends.jar
+        if self.class_archive:
+            if os.path.exists(self.class_archive):
+                cmd.append(f"-XX:SharedArchiveFile={self.class_archive}")
+            else:
+                cmd.append(f"-XX:ArchiveClassesAtExit={self.class_archive}")
+
+        cmd += [
+            "-jar", self.depends_jar,
+            language,
+            code_path,
+            "-s", "./",
+            "-f", "json",
+            "-d", self.work_dir,
+            "--auto-include"
+        ]
+        return cmd
+
+    def run(self, code_path: str, language: str, timeout: float) -> Dict:
+        """
+        Run one DEPENDS job in this slot
+
+        Returns:
+            Raw DEPENDS JSON output
+        """
+        output_file = os.path.join(self.work_dir, self.OUTPUT_FILE_NAME)
+        if os.path.exists(output_file):
+            os.remove(output_file)
+
+        cmd = self._build_command(code_path, language)
+        print(f"Running command (worker {self.slot_id}): {' '.join(cmd)}")
+
+        self.process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            start_new_session=True
+        )
+        try:
+            stdout, stderr = self.process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.kill()
+            raise TimeoutError(f"DEPENDS analysis timed out (>{timeout:.0f}s)")
+
+        return_code = self.process.returncode
+        self.process = None
+
+        if stderr:
+            print(f"Subprocess stderr: {stderr}")
+
+        if not os.path.exists(output_file) or os.path.getsize(output_file) == 0:
+            if stdout:
+                print(f"Subprocess stdout: {stdout}")
+            if return_code != 0:
+                raise DependsWorkerCrashed(
+                    f"DEPENDS exited with code {return_code}. Stderr: {stderr or 'None'}")
+            raise Exception(f"DEPENDS did not produce valid output. Stderr: {stderr or 'None'}")
+
+        with open(output_file, 'r') as f:
+            raw_data = json.load(f)
+
+        self.jobs_completed += 1
+        return raw_data
+
+
+class DependsWorkerPool:
+    """Bounded pool of DEPENDS worker slots with per-job timeouts and crash recovery"""
+
+    def __init__(self, depends_jar: str, size: Optional[int] = None, job_timeout: Optional[float] = None):
+        """
+        Initialize worker pool
+
+        Args:
+            depends_jar: Path to depends.jar
+            size: Number of concurrent DEPENDS jobs (default: $DEPENDS_POOL_SIZE or 2)
+            job_timeout: Per-job timeout in seconds (default: $DEPENDS_JOB_TIMEOUT or 60)
+        """
+        self.size = size or int(os.getenv("DEPENDS_POOL_SIZE", "2"))
+        self.job_timeout = job_timeout or float(os.getenv("DEPENDS_JOB_TIMEOUT", "60"))
+        self.work_root = os.getenv("DEPENDS_WORK_DIR", "/tmp/depends_workers")
+
+        # Fast-start JVM flags; unknown flags are ignored on older JVMs
+        default_jvm_opts = "-XX:+IgnoreUnrecognizedVMOptions -XX:TieredStopAtLevel=1 -XX:+UseSerialGC -Xshare:auto"
+        jvm_options = os.getenv("DEPENDS_JVM_OPTS", default_jvm_opts).split()
+        class_archive = os.getenv("DEPENDS_CDS_ARCHIVE", os.path.join(self.work_root, "depends.jsa"))
+
+        os.makedirs(self.work_root, exist_ok=True)
+
+        self._idle_workers: "queue.Queue[DependsWorker]" = queue.Queue()
+        self._workers = [
+            DependsWorker(i, depends_jar, self.work_root, jvm_options, class_archive)
+            for i in range(self.size)
+        ]
+        for worker in self._workers:
+            self._idle_workers.put(worker)
+
+        # Callers block in these threads while waiting for a worker slot,
+        # so the event loop and the default executor stay free
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(self.size * 4, 8),
+            thread_name_prefix="depends-job"
+        )
+
+        # Identical in-flight jobs (same tree + language) share one JVM run
+        self._inflight: Dict[tuple, "_InflightJob"] = {}
+        self._inflight_lock = threading.Lock()
+
+        self.jobs_submitted = 0
+        self.jobs_deduplicated = 0
+        self.jobs_failed = 0
+        self.total_wait_seconds = 0.0
+
+    async def submit(self, fn, *args):
+        """Run a blocking DEPENDS-backed callable on the pool's executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def run(self, code_path: str, language: str) -> Dict:
+        """
+        Run DEPENDS through a pooled worker (blocking)
+
+        Concurrent requests for the same tree are coalesced; a crashed
+        worker is restarted and the job retried once.
+
+        Returns:
+            Raw DEPENDS JSON output
+        """
+        job_key = (os.path.abspath(code_path), language)
+
+        with self._inflight_lock:
+            self.jobs_submitted += 1
+            job = self._inflight.get(job_key)
+            if job:
+                self.jobs_deduplicated += 1
+                owner = False
+            else:
+                job = _InflightJob()
+                self._inflight[job_key] = job
+                owner = True
+
+        if not owner:
+            return job.wait()
+
+        try:
+            result = self._run_on_worker(code_path, language)
+            job.set_result(result)
+            return result
+        except Exception as e:
+            job.set_error(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(job_key, None)
+
+    def _run_on_worker(self, code_path: str, language: str) -> Dict:
+        wait_start = time.monotonic()
+        worker = self._idle_workers.get()
+        self.total_wait_seconds += time.monotonic() - wait_start
+
+        try:
+            try:
+                return worker.run(code_path, language, self.job_timeout)
+            except DependsWorkerCrashed as e:
+                print(f"⚠️ DEPENDS worker {worker.slot_id} crashed: {e}")
+                worker.restart()
+                return worker.run(code_path, language, self.job_timeout)
+        except Exception:
+            self.jobs_failed += 1
+            raise
+        finally:
+            self._idle_workers.put(worker)
+
+    def shutdown(self):
+        """Kill running jobs and stop the executor"""
+        for worker in self._workers:
+            worker.kill()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        """Get pool statistics"""
+        busy = self.size - self._idle_workers.qsize()
+        return {
+            "size": self.size,
+            "busy_workers": busy,
+            "idle_workers": self.size - busy,
+            "job_timeout_seconds": self.job_timeout,
+            "jobs_submitted": self.jobs_submitted,
+            "jobs_deduplicated": self.jobs_deduplicated,
+            "jobs_failed": self.jobs_failed,
+            "jobs_inflight": len(self._inflight),
+            "avg_wait_ms": round(
+                self.total_wait_seconds * 1000 / max(self.jobs_submitted - self.jobs_deduplicated, 1), 2
+            ),
+            "workers": [
+                {
+                    "slot": w.slot_id,
+                    "jobs_completed": w.jobs_completed,
+                    "restarts": w.restarts
+                }
+                for w in self._workers
+            ]
+        }
+
+
+class _InflightJob:
+    """Result holder shared by callers waiting on the same DEPENDS run"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def set_result(self, result: Dict):
+        self._result = result
+        self._done.set()
+
+    def set_error(self, error: Exception):
+        self._error = error
+        self._done.set()
+
+    def wait(self) -> Dict:
+        self._done.wait()
+        if self._error:
+            raise self._error
+        return self._result
+
+
+# Process-wide pools keyed by jar path so every DependsAnalyzer shares the same bound
+_worker_pools: Dict[str, DependsWorkerPool] = {}
+_worker_pools_lock = threading.Lock()
+
+
+def get_worker_pool(depends_jar: str) -> DependsWorkerPool:
+    """Get (or lazily create) the shared worker pool for a DEPENDS jar"""
+    with _worker_pools_lock:
+        pool = _worker_pools.get(depends_jar)
+        if pool is None:
+            pool = DependsWorkerPool(depends_jar)
+            _worker_pools[depends_jar] = pool
+        return pool
+
+
+def shutdown_worker_pools():
+    """Shut down all shared worker pools"""
+    with _worker_pools_lock:
+        for pool in _worker_pools.values():
+            pool.shutdown()
+        _worker_pools.clear()
+
+
+def get_worker_pool_stats() -> Dict:
+    """Get statistics for all shared worker pools"""
+    with _worker_pools_lock:
+        return {jar: pool.get_stats() for jar, pool in _worker_pools.items()}
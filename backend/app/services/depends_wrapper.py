@@ -3,13 +3,42 @@ Wrapper for DEPENDS dependency analysis tool
 Parses output and transforms to our format
 """
 
-import subprocess
 import json
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-import tempfile
-import shutil
+import hashlib
+
+from app.services.depends_pool import get_worker_pool
+from app.services.incremental_graph import incremental_graph
+from app.services.python_dependency_extractor import python_extractor
+from app.services.reference_indexer import CodeReferenceIndex, reference_index_for
+from app.utils.disk_cache import DiskCache
+
+# Bump when the transformed output format changes so stale entries are ignored
+DEPENDS_CACHE_VERSION = 2
+
+# Source extensions DEPENDS reads for each language mode
+LANGUAGE_EXTENSIONS = {
+    'java': ('.java',),
+    'python': ('.py',),
+    'cpp': ('.cpp', '.cc', '.cxx', '.c', '.h', '.hpp'),
+    'c': ('.c', '.h'),
+    'javascript': ('.js', '.jsx'),
+    'typescript': ('.ts', '.tsx')
+}
+
+# Patch the last full matrix per root instead of re-running DEPENDS on every file
+INCREMENTAL_ENABLED = os.getenv("DEPENDS_INCREMENTAL", "true").lower() == "true"
+
+# Resolve Python dependencies with the stdlib ast module instead of the JVM
+PYTHON_AST_ENABLED = os.getenv("PYTHON_AST_EXTRACTOR", "true").lower() == "true"
+
+# Relationship types reported as direct dependencies; everything else is indirect
+DIRECT_DEPENDENCY_TYPES = ("CALL", "USE", "IMPORT", "CREATE", "EXTEND", "IMPLEMENT")
+
+# Global cache for transformed DEPENDS results
+depends_cache = DiskCache("depends")
 
 class DependsAnalyzer:
     def __init__(self):
@@ -29,78 +58,129 @@ class DependsAnalyzer:
             raise FileNotFoundError(
                 f"DEPENDS jar not found at {self.depends_jar}")
 
-    def analyze_code(self, code_path: str, language: str = "java") -> Dict:
+        self.cache = depends_cache
+        self.pool = get_worker_pool(self.depends_jar)
+
+    def tool_marker(self) -> str:
+        """Identify the extractor version and DEPENDS jar build for cache invalidation"""
+        python_mode = "ast" if PYTHON_AST_ENABLED else "depends"
+        try:
+            jar_stat = os.stat(self.depends_jar)
+            return f"v{DEPENDS_CACHE_VERSION}:{python_mode}:{jar_stat.st_size}:{jar_stat.st_mtime_ns}"
+        except OSError:
+            return f"v{DEPENDS_CACHE_VERSION}:{python_mode}:missing"
+
+    def snapshot_tree(self, code_path: str, language: str) -> Dict[str, List[int]]:
+        """
+        Stat every source file DEPENDS would read
+
+        Args:
+            code_path: Path to code directory
+            language: Programming language (java, python, cpp, etc.)
+
+        Returns:
+            Mapping of relative file path -> [mtime_ns, size], in walk order
+        """
+        extensions = LANGUAGE_EXTENSIONS.get(language, ())
+        snapshot = {}
+
+        for root, dirs, files in os.walk(code_path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for file in sorted(files):
+                if extensions and not file.endswith(extensions):
+                    continue
+                full_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                relative_path = os.path.relpath(full_path, code_path)
+                snapshot[relative_path] = [stat.st_mtime_ns, stat.st_size]
+
+        return snapshot
+
+    def compute_tree_fingerprint(self, code_path: str, language: str, snapshot: Optional[Dict] = None) -> str:
+        """
+        Hash the source tree DEPENDS would read
+
+        The fingerprint covers every relative file path with its mtime and size,
+        the language mode and the DEPENDS jar itself, so any edit, add, delete
+        or tool upgrade produces a new key.
+
+        Args:
+            code_path: Path to code directory
+            language: Programming language (java, python, cpp, etc.)
+            snapshot: Pre-computed snapshot_tree() result, if the caller has one
+
+        Returns:
+            Hex digest identifying the current tree contents
+        """
+        if snapshot is None:
+            snapshot = self.snapshot_tree(code_path, language)
+
+        digest = hashlib.sha256()
+        digest.update(f"{language}|{self.tool_marker()}\n".encode("utf-8"))
+
+        for relative_path, (mtime_ns, size) in snapshot.items():
+            digest.update(f"{relative_path}|{mtime_ns}|{size}\n".encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def analyze_code(self, code_path: str, language: str = "java", snapshot: Optional[Dict] = None) -> Dict:
         """
         Run DEPENDS analysis on code
 
         Args:
             code_path: Path to code directory
             language: Programming language (java, python, cpp, etc.)
+            snapshot: Pre-computed snapshot_tree() result, if the caller has one
 
         Returns:
             Parsed dependency data
         """
-        print(f"🔍 Running DEPENDS analysis on {code_path}...")
+        # Unchanged trees are served from the content-addressed cache
+        cache_key = self.compute_tree_fingerprint(code_path, language, snapshot=snapshot)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            print(f"✅ DEPENDS cache hit for {code_path} ({len(cached['modules'])} modules)")
+            return cached
 
-        # --- FIX: Create a temporary DIRECTORY ---
-        temp_dir = tempfile.mkdtemp()
-        # The file depends.jar will create, based on our debug logs
-        output_file_name = "-file.json" 
-        expected_output_file = os.path.join(temp_dir, output_file_name)
-        # ----------------------------------------
-
-        # Build command
-        cmd = [
-            "java", "-jar", self.depends_jar,
-            language,
-            code_path,
-            "-s", "./", # This seems to be relative to the code_path
-            "-f", "json",
-            "-d", temp_dir, # Pass the DIRECTORY
-            "--auto-include"
-        ]
+        print(f"🔍 Running DEPENDS analysis on {code_path}...")
 
         try:
-            print(f"Running command: {' '.join(cmd)}")
-            # Run DEPENDS
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=60  # 60 second timeout
-            )
-
-            if result.stderr:
-                print(f"Subprocess stderr: {result.stderr}")
-            
-            # Read output
-            if not os.path.exists(expected_output_file) or os.path.getsize(expected_output_file) == 0:
-                print(f"❌ DEPENDS did not create output file or file is empty.")
-                print(f"Expected file at: {expected_output_file}")
-                if result.stdout:
-                    print(f"Subprocess stdout: {result.stdout}")
-                raise Exception(f"DEPENDS did not produce valid output. Stderr: {result.stderr or 'None'}")
-            
-            with open(expected_output_file, 'r') as f:
-                raw_data = json.load(f)
-
-            # Transform to our format
-            transformed = self.transform_depends_output(raw_data, code_path)
+            transformed = self.run_analysis(code_path, language)
 
             print(
                 f"✅ Analysis complete: {len(transformed['modules'])} modules found")
 
+            self.cache.set(cache_key, transformed)
+
             return transformed
 
-        except subprocess.TimeoutExpired:
-            raise Exception("DEPENDS analysis timed out (>60s)")
         except Exception as e:
             raise Exception(f"DEPENDS analysis failed: {str(e)}")
-        finally:
-            # Clean up the temporary directory
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
 
+    def run_analysis(self, code_path: str, language: str) -> Dict:
+        """
+        Build the dependency matrix for a directory (uncached)
+
+        Python trees are parsed in-process with the ast extractor; other
+        languages go through a pooled DEPENDS worker.
+
+        Returns:
+            Parsed dependency data
+        """
+        if language == 'python' and PYTHON_AST_ENABLED:
+            try:
+                return python_extractor.analyze_directory(code_path)
+            except Exception as e:
+                print(f"⚠️ Python AST extraction failed, falling back to DEPENDS: {e}")
+
+        # Run DEPENDS on a warm pooled worker (bounded concurrency, per-job timeout)
+        raw_data = self.pool.run(code_path, language)
+
+        # Transform to our format
+        return self.transform_depends_output(raw_data, code_path)
 
     def transform_depends_output(self, raw_data: Dict, base_path: str) -> Dict:
         """Transform DEPENDS output to our schema"""
@@ -134,6 +214,7 @@ class DependsAnalyzer:
             })
 
         # 2. Parse the 'cells' array to find relationships
+        reference_indexes: Dict[str, CodeReferenceIndex] = {}
         for cell in raw_data.get("cells", []):
             try:
                 # Get the source and destination file names using the index
@@ -145,12 +226,16 @@ class DependsAnalyzer:
                 # Get full paths for source file to extract line numbers
                 source_full_path = raw_data.get("variables", [])[source_idx] if source_idx < len(raw_data.get("variables", [])) else None
 
+                # Each source file is read and tokenized once for all of its cells
+                reference_index = reference_indexes.get(source_full_path)
+                if reference_index is None:
+                    reference_index = reference_index_for(source_full_path)
+                    reference_indexes[source_full_path] = reference_index
+
                 # 'values' is a dictionary of relationship types
                 for rel_type, count in cell.get("values", {}).items():
                     # Extract line numbers and code references from source file
-                    line_numbers, code_references = self._extract_code_references(
-                        source_full_path, target_name, rel_type.upper(), base_path
-                    )
+                    line_numbers, code_references = reference_index.find(target_name, rel_type.upper())
                     
                     # Create a dependency object for each type
                     dep = {
@@ -165,7 +250,7 @@ class DependsAnalyzer:
                     }
                     
                     # Categorize as direct or indirect
-                    if dep["type"] in ["CALL", "USE", "IMPORT", "CREATE", "EXTEND", "IMPLEMENT"]:
+                    if dep["type"] in DIRECT_DEPENDENCY_TYPES:
                         result["dependencies"]["direct"].append(dep)
                     else:
                         # "Contain" and other types
@@ -194,125 +279,21 @@ class DependsAnalyzer:
         """
         Extract line numbers and code references from source file
         Supports both Java and Python files
-        
+
+        Uses the file store's index of the file, shared with transform_depends_output.
+
         Returns:
             tuple: (list of line_numbers, list of code_references)
         """
-        line_numbers = []
-        code_references = []
-        
-        if not source_file_path or not os.path.exists(source_file_path):
-            return line_numbers, code_references
-        
-        try:
-            # Detect file type
-            is_python = source_file_path.endswith('.py')
-            
-            # Get target class/module name
-            if is_python:
-                target_class = target_name.replace('.py', '').split('/')[-1]
-                target_module = target_name.replace('.py', '').replace('/', '.').replace('\\', '.')
-            else:
-                target_class = target_name.replace('.java', '').split('/')[-1]
-                target_module = target_name.replace('.java', '').replace('/', '.').lower()
-            
-            with open(source_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-            
-            for line_num, line in enumerate(lines, start=1):
-                line_stripped = line.strip()
-                if not line_stripped:
-                    continue
-                
-                # Skip comments
-                if is_python:
-                    if line_stripped.startswith('#'):
-                        continue
-                else:
-                    if line_stripped.startswith('//'):
-                        continue
-                
-                found = False
-                
-                if rel_type == "IMPORT":
-                    if is_python:
-                        # Python: import module or from module import class
-                        if (line_stripped.startswith("import ") and target_class in line_stripped) or \
-                           (line_stripped.startswith("from ") and target_module in line_stripped):
-                            found = True
-                    else:
-                        # Java: import statements
-                        if line_stripped.startswith("import") and target_class in line_stripped:
-                            found = True
-                elif rel_type == "CALL":
-                    if is_python:
-                        # Python: method calls - object.method( or Class.method(
-                        if target_class in line_stripped and '.' in line_stripped and '(' in line_stripped:
-                            found = True
-                    else:
-                        # Java: method calls
-                        if target_class in line_stripped and '.' in line_stripped and '(' in line_stripped:
-                            found = True
-                elif rel_type == "USE":
-                    if is_python:
-                        # Python: variable/attribute usage
-                        if target_class in line_stripped:
-                            if not line_stripped.startswith("import") and not line_stripped.startswith("from") and \
-                               not line_stripped.startswith("class") and not line_stripped.startswith("def"):
-                                found = True
-                    else:
-                        # Java: variable/field usage
-                        if target_class in line_stripped:
-                            if not line_stripped.startswith("import") and not line_stripped.startswith("package"):
-                                found = True
-                elif rel_type == "CREATE":
-                    if is_python:
-                        # Python: object instantiation - Class( or Class()
-                        if target_class in line_stripped and '(' in line_stripped:
-                            # Check if it's not a function definition
-                            if not line_stripped.startswith("def ") and not line_stripped.startswith("class "):
-                                found = True
-                    else:
-                        # Java: object instantiation (new keyword)
-                        if "new " in line_stripped and target_class in line_stripped:
-                            found = True
-                elif rel_type == "CONTAIN":
-                    if is_python:
-                        # Python: class definitions, inheritance
-                        if (f"class {target_class}" in line_stripped) or \
-                           (f"({target_class}" in line_stripped and "class" in lines[max(0, line_num-2):line_num]):
-                            found = True
-                    else:
-                        # Java: class declarations, extends, implements
-                        if (f"class " in line_stripped and target_class in line_stripped) or \
-                           (f"extends {target_class}" in line_stripped) or \
-                           (f"implements {target_class}" in line_stripped):
-                            found = True
-                
-                if found:
-                    line_numbers.append(line_num)
-                    # Get context (2 lines before, current line, 2 lines after)
-                    context_start = max(0, line_num - 3)
-                    context_end = min(len(lines), line_num + 2)
-                    context_lines = lines[context_start:context_end]
-                    context = ''.join(context_lines)
-                    code_references.append(context.strip())
-                    
-                    # Limit to first 5 occurrences to avoid too much data
-                    if len(line_numbers) >= 5:
-                        break
-        
-        except Exception as e:
-            print(f"⚠️ Error extracting code references from {source_file_path}: {e}")
-        
-        return line_numbers, code_references
+        return reference_index_for(source_file_path).find(target_name, rel_type)
 
-    def analyze_single_file(self, file_path: str) -> Dict:
+    def resolve_source_root(self, file_path: str) -> Tuple[str, str]:
         """
-        Analyze dependencies for a single file.
-        This now scans the entire 'src' root to build a full graph.
+        Find the directory DEPENDS scans for a file and the file's language
+
+        Returns:
+            tuple: (absolute directory to scan, language)
         """
-        
         # Detect language from file extension
         file_ext = Path(file_path).suffix.lower()
         language_map = {
@@ -361,52 +342,95 @@ class DependsAnalyzer:
              directory_to_scan = "/" + directory_to_scan
         # ----------------------------------------------------
 
+        return directory_to_scan, language
+
+    def group_by_source_root(self, file_paths: List[str]) -> Dict[Tuple[str, str], List[str]]:
+        """
+        Group changed files by the (directory, language) DEPENDS pass that covers them
+
+        Returns:
+            (directory, language) -> files in that root, in input order
+        """
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        for file_path in file_paths:
+            groups.setdefault(self.resolve_source_root(file_path), []).append(file_path)
+        return groups
+
+    def _analyze_root(self, directory_to_scan: str, language: str, changed_files: List[str]) -> Tuple[Dict, List[Dict]]:
+        """Full dependency matrix for a root plus the edges that disappeared since the last run"""
+        if INCREMENTAL_ENABLED:
+            return incremental_graph.analyze(self, directory_to_scan, language, changed_files)
+        return self.analyze_code(directory_to_scan, language=language), []
+
+    def analyze_single_file(self, file_path: str, changed_files: Optional[List[str]] = None) -> Dict:
+        """
+        Analyze dependencies for a single file.
+        The 'src' root's full graph is kept incrementally: only the
+        changed files' neighbourhood is re-run through DEPENDS.
+
+        Args:
+            file_path: File to analyze
+            changed_files: All files touched by the commit (defaults to file_path)
+        """
+        directory_to_scan, language = self.resolve_source_root(file_path)
+
         # Run full analysis on the directory with detected language
         print(f"🔍 Detected language: {language} for file: {file_path}")
-        full_analysis = self.analyze_code(directory_to_scan, language=language)
+        full_analysis, removed_dependencies = self._analyze_root(
+            directory_to_scan, language, changed_files or [file_path]
+        )
+
+        file_deps = self._filter_file_dependencies(full_analysis, file_path, _EdgeIndex(full_analysis))
+
+        # Edges that vanished since the last analysis of this root, so the
+        # stored graph can drop them
+        file_deps["removed_dependencies"] = removed_dependencies
+
+        return file_deps
+
+    def analyze_files_in_root(self, directory_to_scan: str, language: str, file_paths: List[str]) -> Tuple[Dict[str, Dict], List[Dict]]:
+        """
+        Analyze every changed file of one source root with a single DEPENDS pass
 
+        Args:
+            directory_to_scan: Root from resolve_source_root / group_by_source_root
+            language: Language of the root
+            file_paths: Changed files inside the root
+
+        Returns:
+            tuple: (file path -> same shape as analyze_single_file without
+            removed_dependencies, edges that disappeared from the root)
+        """
+        print(f"🔍 Analyzing {len(file_paths)} {language} file(s) in {directory_to_scan}")
+        full_analysis, removed_dependencies = self._analyze_root(directory_to_scan, language, file_paths)
+
+        index = _EdgeIndex(full_analysis)
+        per_file = {
+            file_path: self._filter_file_dependencies(full_analysis, file_path, index)
+            for file_path in file_paths
+        }
+        return per_file, removed_dependencies
+
+    @staticmethod
+    def _filter_file_dependencies(full_analysis: Dict, file_path: str, index: "_EdgeIndex") -> Dict:
+        """Forward and reverse dependencies of one file in a root's matrix"""
         # Filter to just this file
         file_name = os.path.basename(file_path)
 
         # The 'modules' list from transform_depends_output is already
         # just the filenames. We need to filter the dependencies.
-        
         file_deps = {
             "modules": full_analysis.get("modules", []),
             "statistics": full_analysis.get("statistics", {}),
-            "direct_dependencies": [],
-            "indirect_dependencies": []
+            # Dependencies originating from the changed file
+            "direct_dependencies": list(index.outgoing["direct"].get(file_name, [])),
+            "indirect_dependencies": list(index.outgoing["indirect"].get(file_name, []))
         }
 
-        # Filter dependencies to only those originating from the changed file
-        for dep in full_analysis["dependencies"]["direct"]:
-            if file_name == dep["source"]:
-                file_deps["direct_dependencies"].append(dep)
-
-        for dep in full_analysis["dependencies"]["indirect"]:
-            if file_name == dep["source"]:
-                file_deps["indirect_dependencies"].append(dep)
-        
-        # NEW: Find reverse dependencies (files that depend on this file)
-        reverse_direct = []
-        reverse_indirect = []
-        
-        for dep in full_analysis["dependencies"]["direct"]:
-            if file_name == dep["target"]:  # This file is the target
-                reverse_direct.append({
-                    "source": dep["source"],  # File that depends on us
-                    "target": file_name,
-                    "type": dep["type"],
-                    "file": dep["source"],
-                    "line": dep.get("line", 0),
-                    "line_numbers": dep.get("line_numbers", []),
-                    "code_reference": dep.get("code_reference", ""),
-                    "code_references": dep.get("code_references", [])
-                })
-        
-        for dep in full_analysis["dependencies"]["indirect"]:
-            if file_name == dep["target"]:  # This file is the target
-                reverse_indirect.append({
+        # Reverse dependencies (files that depend on this file)
+        for kind in ("direct", "indirect"):
+            file_deps[f"reverse_{kind}_dependencies"] = [
+                {
                     "source": dep["source"],  # File that depends on us
                     "target": file_name,
                     "type": dep["type"],
@@ -415,10 +439,24 @@ class DependsAnalyzer:
                     "line_numbers": dep.get("line_numbers", []),
                     "code_reference": dep.get("code_reference", ""),
                     "code_references": dep.get("code_references", [])
-                })
-        
-        file_deps["reverse_direct_dependencies"] = reverse_direct
-        file_deps["reverse_indirect_dependencies"] = reverse_indirect
+                }
+                for dep in index.incoming[kind].get(file_name, [])
+            ]
 
         return file_deps
 
+
+class _EdgeIndex:
+    """A root's dependency edges keyed by source and by target file name"""
+
+    def __init__(self, full_analysis: Dict):
+        self.outgoing: Dict[str, Dict[str, List[Dict]]] = {}
+        self.incoming: Dict[str, Dict[str, List[Dict]]] = {}
+        for kind in ("direct", "indirect"):
+            outgoing: Dict[str, List[Dict]] = {}
+            incoming: Dict[str, List[Dict]] = {}
+            for dep in full_analysis["dependencies"][kind]:
+                outgoing.setdefault(dep["source"], []).append(dep)
+                incoming.setdefault(dep["target"], []).append(dep)
+            self.outgoing[kind] = outgoing
+            self.incoming[kind] = incoming
@@ -0,0 +1,299 @@
+"""
+Incremental DEPENDS graph maintenance
+Keeps the last full dependency matrix per source root and patches it
+with a DEPENDS run over the changed files' neighbourhood only
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.utils.disk_cache import DiskCache
+
+# Java / Python import statements used to pull referenced files into the neighbourhood
+JAVA_IMPORT_PATTERN = re.compile(r'^\s*import\s+(?:static\s+)?([\w.]+)\s*;', re.MULTILINE)
+PYTHON_IMPORT_PATTERN = re.compile(r'^\s*(?:from\s+([\w.]+)\s+import\s+([\w, ]+)|import\s+([\w., ]+))', re.MULTILINE)
+
+
+def _edge_key(dep: Dict) -> Tuple[str, str, str]:
+    return (dep["source"], dep["target"], dep["type"])
+
+
+class IncrementalDependencyGraph:
+    """Per-root baseline matrices updated from the changed file set"""
+
+    def __init__(self):
+        # Beyond this share of the tree a partial run costs about as much as a full one
+        self.max_neighbourhood_ratio = float(os.getenv("DEPENDS_INCREMENTAL_MAX_RATIO", "0.5"))
+        self.baseline_store = DiskCache("depends_baseline")
+        self._baselines: Dict[str, Dict] = {}
+        self._root_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        self.full_runs = 0
+        self.incremental_runs = 0
+        self.unchanged_runs = 0
+        self.files_reanalyzed = 0
+        self.edges_removed = 0
+
+    def _root_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._root_locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._root_locks[key] = lock
+            return lock
+
+    def _load_baseline(self, key: str) -> Optional[Dict]:
+        baseline = self._baselines.get(key)
+        if baseline is None:
+            baseline = self.baseline_store.get(key)
+            if baseline is not None:
+                self._baselines[key] = baseline
+        return baseline
+
+    def _save_baseline(self, key: str, baseline: Dict):
+        self._baselines[key] = baseline
+        self.baseline_store.set(key, baseline)
+
+    def analyze(self, analyzer, code_path: str, language: str, changed_files: Optional[List[str]] = None) -> Tuple[Dict, List[Dict]]:
+        """
+        Get the dependency matrix for a source root, recomputing only what changed
+
+        Args:
+            analyzer: DependsAnalyzer used to run DEPENDS
+            code_path: Absolute path to the source root
+            language: Programming language (java, python, cpp, etc.)
+            changed_files: Files touched by the commit (absolute, repo-relative or root-relative)
+
+        Returns:
+            tuple: (full transformed analysis, dependencies that disappeared since the baseline)
+        """
+        root = os.path.abspath(code_path)
+        key = DiskCache.make_key(root, language)
+
+        with self._root_lock(key):
+            snapshot = analyzer.snapshot_tree(root, language)
+            fingerprint = analyzer.compute_tree_fingerprint(root, language, snapshot=snapshot)
+            baseline = self._load_baseline(key)
+
+            if baseline is None or baseline.get("tool") != analyzer.tool_marker():
+                return self._full_run(analyzer, key, root, language, snapshot), []
+
+            if baseline["fingerprint"] == fingerprint:
+                self.unchanged_runs += 1
+                return baseline["analysis"], []
+
+            previous_files = baseline["files"]
+            dirty = {
+                path for path, stat in snapshot.items()
+                if previous_files.get(path) != stat
+            }
+            dirty |= {path for path in previous_files if path not in snapshot}
+            dirty |= self._resolve_changed_files(root, changed_files or [], snapshot)
+
+            if not dirty:
+                self.unchanged_runs += 1
+                baseline["fingerprint"] = fingerprint
+                baseline["files"] = snapshot
+                return baseline["analysis"], []
+
+            neighbourhood = self._neighbourhood(root, language, dirty, snapshot, baseline["analysis"])
+            if len(neighbourhood) > self.max_neighbourhood_ratio * max(len(snapshot), 1):
+                print(f"🔍 {len(dirty)} changed file(s) touch {len(neighbourhood)}/{len(snapshot)} files, running full DEPENDS analysis")
+                analysis = self._full_run(analyzer, key, root, language, snapshot)
+                removed = self._removed_edges(baseline["analysis"], analysis)
+                self.edges_removed += len(removed)
+                return analysis, removed
+
+            print(f"🔍 Incremental DEPENDS analysis: {len(dirty)} changed, {len(neighbourhood)} in neighbourhood of {len(snapshot)} files")
+            partial = self._run_partial(analyzer, root, language, neighbourhood)
+
+            analysis, removed = self._merge(baseline["analysis"], partial, dirty, snapshot)
+
+            self._save_baseline(key, {
+                "fingerprint": fingerprint,
+                "tool": baseline["tool"],
+                "files": snapshot,
+                "analysis": analysis
+            })
+            # Later identical-tree lookups skip straight to the content cache
+            analyzer.cache.set(fingerprint, analysis)
+
+            self.incremental_runs += 1
+            self.files_reanalyzed += len(neighbourhood)
+            self.edges_removed += len(removed)
+            return analysis, removed
+
+    def _full_run(self, analyzer, key: str, root: str, language: str, snapshot: Dict) -> Dict:
+        analysis = analyzer.analyze_code(root, language=language, snapshot=snapshot)
+        self._save_baseline(key, {
+            "fingerprint": analyzer.compute_tree_fingerprint(root, language, snapshot=snapshot),
+            "tool": analyzer.tool_marker(),
+            "files": snapshot,
+            "analysis": analysis
+        })
+        self.full_runs += 1
+        return analysis
+
+    def _removed_edges(self, previous: Dict, current: Dict) -> List[Dict]:
+        """Dependencies of the previous matrix that are missing from the current one"""
+        current_keys = {
+            _edge_key(dep)
+            for dep in current["dependencies"]["direct"] + current["dependencies"]["indirect"]
+        }
+        return [
+            {"source": dep["source"], "target": dep["target"], "type": dep["type"]}
+            for dep in previous["dependencies"]["direct"] + previous["dependencies"]["indirect"]
+            if _edge_key(dep) not in current_keys
+        ]
+
+    def _resolve_changed_files(self, root: str, changed_files: List[str], snapshot: Dict) -> Set[str]:
+        """Map commit paths (any prefix) onto snapshot-relative paths"""
+        resolved = set()
+        for changed in changed_files:
+            normalized = changed.replace('\\', '/').lstrip('/')
+            absolute = os.path.abspath(changed)
+            if absolute.startswith(root + os.sep):
+                relative = os.path.relpath(absolute, root)
+                if relative in snapshot:
+                    resolved.add(relative)
+                    continue
+            for relative in snapshot:
+                if normalized == relative or normalized.endswith('/' + relative):
+                    resolved.add(relative)
+                    break
+        return resolved
+
+    def _neighbourhood(self, root: str, language: str, dirty: Set[str], snapshot: Dict, previous: Dict) -> Set[str]:
+        """
+        Files DEPENDS must see to re-resolve the dirty files' edges:
+        the dirty files, their previous neighbours, same-package siblings and imported files
+        """
+        by_name: Dict[str, List[str]] = {}
+        for relative in snapshot:
+            by_name.setdefault(os.path.basename(relative), []).append(relative)
+
+        dirty_names = {os.path.basename(path) for path in dirty}
+        neighbour_names = set()
+        for dep in previous["dependencies"]["direct"] + previous["dependencies"]["indirect"]:
+            if dep["source"] in dirty_names:
+                neighbour_names.add(dep["target"])
+            if dep["target"] in dirty_names:
+                neighbour_names.add(dep["source"])
+
+        neighbourhood = {path for path in dirty if path in snapshot}
+        dirty_dirs = {os.path.dirname(path) for path in dirty}
+
+        for relative in snapshot:
+            if os.path.dirname(relative) in dirty_dirs:
+                neighbourhood.add(relative)
+
+        for name in neighbour_names | self._imported_names(root, language, dirty, snapshot):
+            neighbourhood.update(by_name.get(name, []))
+
+        return neighbourhood
+
+    def _imported_names(self, root: str, language: str, dirty: Set[str], snapshot: Dict) -> Set[str]:
+        names = set()
+        extension = '.py' if language == 'python' else '.java'
+        for relative in dirty:
+            if relative not in snapshot:
+                continue
+            try:
+                with open(os.path.join(root, relative), 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read()
+            except OSError:
+                continue
+
+            if language == 'python':
+                for from_module, imported, plain in PYTHON_IMPORT_PATTERN.findall(content):
+                    modules = [from_module] if from_module else [m.strip() for m in plain.split(',')]
+                    for module in modules:
+                        if module:
+                            names.add(module.split('.')[-1] + extension)
+                    for item in imported.split(','):
+                        if item.strip():
+                            names.add(item.strip().split(' ')[0] + extension)
+            else:
+                for imported in JAVA_IMPORT_PATTERN.findall(content):
+                    names.add(imported.split('.')[-1] + extension)
+        return names
+
+    def _run_partial(self, analyzer, root: str, language: str, neighbourhood: Set[str]) -> Dict:
+        """Analyze a symlinked view holding only the neighbourhood files"""
+        view_root = tempfile.mkdtemp(prefix="depends-incremental-", dir=analyzer.pool.work_root)
+        try:
+            for relative in neighbourhood:
+                link_path = os.path.join(view_root, relative)
+                os.makedirs(os.path.dirname(link_path), exist_ok=True)
+                os.symlink(os.path.join(root, relative), link_path)
+
+            # Code references are read through the links, so transform before cleanup
+            return analyzer.run_analysis(view_root, language)
+        except Exception as e:
+            raise Exception(f"DEPENDS analysis failed: {str(e)}")
+        finally:
+            shutil.rmtree(view_root, ignore_errors=True)
+
+    def _merge(self, previous: Dict, partial: Dict, dirty: Set[str], snapshot: Dict) -> Tuple[Dict, List[Dict]]:
+        """Replace the dirty files' edges in the baseline with freshly computed ones"""
+        dirty_names = {os.path.basename(path) for path in dirty}
+
+        def touches_dirty(dep: Dict) -> bool:
+            return dep["source"] in dirty_names or dep["target"] in dirty_names
+
+        fresh_direct = [d for d in partial["dependencies"]["direct"] if touches_dirty(d)]
+        fresh_indirect = [d for d in partial["dependencies"]["indirect"] if touches_dirty(d)]
+        fresh_keys = {_edge_key(d) for d in fresh_direct + fresh_indirect}
+
+        removed = []
+        result = {
+            "modules": [],
+            "dependencies": {"direct": [], "indirect": []},
+            "statistics": {}
+        }
+        for category, fresh in (("direct", fresh_direct), ("indirect", fresh_indirect)):
+            for dep in previous["dependencies"][category]:
+                if not touches_dirty(dep):
+                    result["dependencies"][category].append(dep)
+                elif _edge_key(dep) not in fresh_keys:
+                    removed.append({"source": dep["source"], "target": dep["target"], "type": dep["type"]})
+            result["dependencies"][category].extend(fresh)
+
+        current_names = {os.path.basename(path) for path in snapshot}
+        seen = set()
+        for module in previous["modules"] + partial["modules"]:
+            if module["name"] in current_names and module["name"] not in seen:
+                seen.add(module["name"])
+                result["modules"].append(module)
+
+        result["statistics"] = {
+            "total_modules": len(result["modules"]),
+            "direct_dependencies": len(result["dependencies"]["direct"]),
+            "indirect_dependencies": len(result["dependencies"]["indirect"]),
+            "total_dependencies": (
+                len(result["dependencies"]["direct"]) +
+                len(result["dependencies"]["indirect"])
+            )
+        }
+        return result, removed
+
+    def get_stats(self) -> Dict:
+        """Get incremental analysis statistics"""
+        return {
+            "tracked_roots": len(self._baselines),
+            "full_runs": self.full_runs,
+            "incremental_runs": self.incremental_runs,
+            "unchanged_runs": self.unchanged_runs,
+            "files_reanalyzed": self.files_reanalyzed,
+            "edges_removed": self.edges_removed,
+            "max_neighbourhood_ratio": self.max_neighbourhood_ratio
+        }
+
+
+# Global incremental graph shared by every DependsAnalyzer
+incremental_graph = IncrementalDependencyGraph()
@@ -0,0 +1,278 @@
+"""
+Central dispatcher for LLM calls
+Runs every model call on a bounded thread pool behind a requests-per-minute
+token bucket, hands free slots and tokens to the most urgent lane first and retries
+quota / transient errors with jittered exponential backoff
+"""
+
+import os
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Priority lanes (lower runs first)
+PRIORITY_SCHEMA = 0
+PRIORITY_API_CONTRACT = 1
+PRIORITY_CODE = 2
+
+LANE_NAMES = {
+    PRIORITY_SCHEMA: "schema",
+    PRIORITY_API_CONTRACT: "api_contract",
+    PRIORITY_CODE: "code",
+}
+
+# Errors worth retrying: quota / rate limits and transient server failures
+RETRYABLE_ERRORS = (
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "DeadlineExceeded", "Aborted",
+)
+RETRYABLE_MESSAGES = ("429", "quota", "rate limit", "503", "unavailable", "overloaded")
+
+
+class LLMDispatcher:
+    """Rate-limited, prioritized executor for blocking LLM client calls"""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None
+    ):
+        """
+        Initialize dispatcher
+
+        Args:
+            max_concurrency: Calls in flight at once (default: $LLM_MAX_CONCURRENCY or 4)
+            requests_per_minute: Sustained call rate (default: $LLM_REQUESTS_PER_MINUTE or 60)
+            burst: Calls allowed back-to-back after idling (default: $LLM_BURST or max_concurrency)
+            max_retries: Retries per call on retryable errors (default: $LLM_MAX_RETRIES or 3)
+            retry_base_delay: First backoff delay in seconds (default: $LLM_RETRY_BASE_DELAY or 2)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+        self.requests_per_minute = requests_per_minute or float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+        self.burst = burst or int(os.getenv("LLM_BURST", str(self.max_concurrency)))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.retry_base_delay = retry_base_delay or float(os.getenv("LLM_RETRY_BASE_DELAY", "2"))
+        self.retry_max_delay = float(os.getenv("LLM_RETRY_MAX_DELAY", "30"))
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="llm-call"
+        )
+
+        # Token bucket; tokens go to waiting slot holders in priority order
+        # (one refill timer), not to whichever sleeper wakes first
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._token_waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._token_timer: Optional[asyncio.TimerHandle] = None
+
+        # Slots are held from dispatch until the worker thread returns, even
+        # if the caller timed out, so the pool bound is never exceeded
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        self.calls_submitted = 0
+        self.calls_succeeded = 0
+        self.calls_failed = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.total_throttle_seconds = 0.0
+        self._lanes: Dict[int, Dict[str, float]] = {}
+
+    def _lane(self, priority: int) -> Dict[str, float]:
+        lane = self._lanes.get(priority)
+        if lane is None:
+            lane = {"submitted": 0, "started": 0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            self._lanes[priority] = lane
+        return lane
+
+    async def _acquire_slot(self, priority: int):
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the cancellation
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        self._in_flight -= 1
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            waiter.set_result(None)
+            break
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop):
+        try:
+            loop.call_soon_threadsafe(self._release_slot)
+        except RuntimeError:
+            # Event loop closed while the call was running
+            pass
+
+    async def _take_token(self, priority: int):
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._token_waiters, (priority, next(self._sequence), waiter))
+        self._serve_tokens()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The token was handed over just before the cancellation
+                self._tokens = min(self._tokens + 1, float(self.burst))
+                self._serve_tokens()
+            raise
+
+    def _on_token_timer(self):
+        self._token_timer = None
+        self._serve_tokens()
+
+    def _serve_tokens(self):
+        """Hand available tokens to the most urgent waiters, then wait for the next refill"""
+        rate = self.requests_per_minute / 60.0
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+
+        while self._token_waiters and self._tokens >= 1:
+            _, _, waiter = heapq.heappop(self._token_waiters)
+            if waiter.done():
+                continue
+            self._tokens -= 1
+            waiter.set_result(None)
+
+        while self._token_waiters and self._token_waiters[0][2].done():
+            heapq.heappop(self._token_waiters)
+        if self._token_waiters and self._token_timer is None:
+            delay = (1 - self._tokens) / rate
+            self.total_throttle_seconds += delay
+            self._token_timer = asyncio.get_running_loop().call_later(delay, self._on_token_timer)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if type(error).__name__ in RETRYABLE_ERRORS:
+            return True
+        message = str(error).lower()
+        return any(marker in message for marker in RETRYABLE_MESSAGES)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+
+    async def submit(self, fn: Callable, *args, priority: int = PRIORITY_CODE, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking LLM call through the dispatcher
+
+        Args:
+            fn: Blocking callable (e.g. model.generate_content)
+            priority: Lane (PRIORITY_SCHEMA / PRIORITY_API_CONTRACT / PRIORITY_CODE)
+            timeout: Seconds allowed per attempt once the call is running (queueing excluded)
+
+        Returns:
+            fn's return value
+
+        Raises:
+            asyncio.TimeoutError if an attempt runs past timeout; the last error once retries are exhausted
+        """
+        loop = asyncio.get_running_loop()
+        lane = self._lane(priority)
+        lane["submitted"] += 1
+        self.calls_submitted += 1
+        call = functools.partial(fn, *args, **kwargs)
+
+        attempt = 0
+        while True:
+            queued_at = time.monotonic()
+            await self._acquire_slot(priority)
+            try:
+                await self._take_token(priority)
+            except BaseException:
+                self._release_slot()
+                raise
+
+            waited = time.monotonic() - queued_at
+            lane["started"] += 1
+            lane["total_wait_seconds"] += waited
+            lane["max_wait_seconds"] = max(lane["max_wait_seconds"], waited)
+
+            try:
+                future = self._executor.submit(call)
+            except RuntimeError:
+                # Executor already shut down
+                self._release_slot()
+                raise
+            future.add_done_callback(lambda _: self._release_from_thread(loop))
+
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+                self.calls_succeeded += 1
+                return result
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self.calls_failed += 1
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self.calls_failed += 1
+                    raise
+                delay = self._backoff_delay(attempt)
+                attempt += 1
+                self.retries += 1
+                print(f"⚠️ LLM call failed ({type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def shutdown(self):
+        """Stop the worker threads (running calls finish in the background)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict:
+        """Get dispatcher statistics"""
+        lanes = {}
+        queued: Dict[int, int] = {}
+        for priority, _, waiter in self._waiters:
+            if not waiter.done():
+                queued[priority] = queued.get(priority, 0) + 1
+        for priority, lane in sorted(self._lanes.items()):
+            started = lane["started"]
+            lanes[LANE_NAMES.get(priority, str(priority))] = {
+                "submitted": int(lane["submitted"]),
+                "queued": queued.get(priority, 0),
+                "avg_wait_ms": round(lane["total_wait_seconds"] * 1000 / started, 2) if started else 0.0,
+                "max_wait_ms": round(lane["max_wait_seconds"] * 1000, 2)
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+            "burst": self.burst,
+            "in_flight": self._in_flight,
+            "queue_depth": sum(queued.values()),
+            "available_tokens": round(self._tokens, 2),
+            "calls_submitted": self.calls_submitted,
+            "calls_succeeded": self.calls_succeeded,
+            "calls_failed": self.calls_failed,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "throttled_seconds": round(self.total_throttle_seconds, 2),
+            "lanes": lanes
+        }
+
+
+# Global dispatcher shared by every AIAnalyzer
+llm_dispatcher = LLMDispatcher()
@@ -0,0 +1,208 @@
+"""
+Parallel SQL / MongoDB usage scanning
+Fans batches of files out to a process pool (the SQLExtractor regexes are
+CPU-bound and would otherwise hold the GIL) and yields each batch's results
+as soon as it finishes, so callers can merge partial results while the rest
+of the repository is still being scanned
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.services.sql_extractor import SQLExtractor
+from app.utils.file_store import file_store, read_source_file
+
+# Per-process extractor (created on first use in each worker)
+_extractor: Optional[SQLExtractor] = None
+
+
+def extract_file_usage(repo_path: str, relative_path: str, database_type: str,
+                       sql_extractor: Optional[SQLExtractor] = None, use_store: bool = True) -> Dict[str, List[Dict]]:
+    """
+    Table usage of one file, keyed by lower-cased table name
+
+    Module-level so it can run in a worker process.
+
+    Args:
+        repo_path: Repository root
+        relative_path: File path relative to repo_path
+        database_type: "mongodb" (collection patterns only) or "postgresql" (SQL + ORM + heuristics)
+        sql_extractor: Extractor to use (default: this process's shared one)
+        use_store: Read through the process-wide file store and keep the extraction
+            with the file (off in workers, which see each file once)
+    """
+    global _extractor
+    if sql_extractor is None:
+        if _extractor is None:
+            _extractor = SQLExtractor()
+        sql_extractor = _extractor
+
+    full_path = os.path.join(repo_path, relative_path)
+    source = file_store.get(full_path) if use_store else read_source_file(full_path)
+    if source is None:
+        print(f"⚠️ Error reading {relative_path}: not a readable file")
+        return {}
+
+    if database_type == "mongodb":
+        # Only MongoDB collection patterns (avoids false positives from SQL code)
+        table_usage = source.result(
+            ("mongodb_usage", relative_path),
+            lambda loaded: sql_extractor.extract_mongodb_usage(relative_path, loaded.text)
+        )
+    else:
+        # Full extraction (SQL + ORM + heuristics)
+        table_usage = source.result(
+            ("table_usage", relative_path),
+            lambda loaded: sql_extractor.extract_table_usage(relative_path, loaded.text)
+        )
+
+    usage_by_table: Dict[str, List[Dict]] = {}
+    for table, usages in table_usage.items():
+        usage_by_table.setdefault(table.lower(), []).extend(usages)
+    return usage_by_table
+
+
+def extract_usage_batch(repo_path: str, relative_paths: List[str], database_type: str) -> List[Tuple[str, Dict[str, List[Dict]]]]:
+    """Worker entry point: extract_file_usage for a batch of files"""
+    return [(path, extract_file_usage(repo_path, path, database_type, use_store=False)) for path in relative_paths]
+
+
+class ParallelScanner:
+    """Process-pool scan engine with bounded batches and in-flight bytes"""
+
+    def __init__(self):
+        # Below this many files, process start-up costs more than it saves
+        self.parallel_threshold = int(os.getenv("TABLE_SCAN_PARALLEL_THRESHOLD", "64"))
+        self.max_workers = int(os.getenv("TABLE_SCAN_WORKERS", str(os.cpu_count() or 2)))
+        # A batch closes at this many source bytes or files, whichever comes first
+        self.batch_bytes = int(os.getenv("TABLE_SCAN_BATCH_BYTES", str(2 * 1024 * 1024)))
+        self.batch_files = int(os.getenv("TABLE_SCAN_BATCH_FILES", "128"))
+        # Memory ceiling: source bytes of submitted batches whose results were not merged yet
+        self.max_inflight_bytes = int(os.getenv("TABLE_SCAN_MAX_INFLIGHT_BYTES", str(64 * 1024 * 1024)))
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        self.scans = 0
+        self.parallel_scans = 0
+        self.batches = 0
+        self.files_scanned = 0
+        self.bytes_scanned = 0
+        self.peak_inflight_bytes = 0
+        self.pool_failures = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: callers run on worker threads, where fork is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _make_batches(self, files: Dict[str, int]) -> List[Tuple[List[str], int]]:
+        """Split files into (paths, total bytes) batches, largest files spread first"""
+        # Enough batches to keep every worker busy even for small trees
+        target_bytes = min(self.batch_bytes, max(1, sum(files.values()) // (self.max_workers * 4) + 1))
+        batches = []
+        paths: List[str] = []
+        size = 0
+        for path, file_size in sorted(files.items(), key=lambda item: item[1], reverse=True):
+            if paths and (size + file_size > target_bytes or len(paths) >= self.batch_files):
+                batches.append((paths, size))
+                paths, size = [], 0
+            paths.append(path)
+            size += file_size
+        if paths:
+            batches.append((paths, size))
+        return batches
+
+    def scan(self, repo_path: str, files: Dict[str, int], database_type: str) -> Iterator[Tuple[str, Dict[str, List[Dict]]]]:
+        """
+        Extract table usage from files, yielding results as batches complete
+
+        Args:
+            repo_path: Repository root
+            files: Relative path -> size in bytes
+            database_type: "postgresql" or "mongodb"
+
+        Yields:
+            (relative path, lower-cased table -> usages), in completion order
+        """
+        self.scans += 1
+        self.files_scanned += len(files)
+        self.bytes_scanned += sum(files.values())
+
+        if len(files) < self.parallel_threshold or self.max_workers < 2:
+            for path in files:
+                yield path, extract_file_usage(repo_path, path, database_type)
+            return
+
+        self.parallel_scans += 1
+        pending = self._make_batches(files)
+        pending.reverse()  # pop() from the end keeps the largest-first order
+        print(f"   ⚡ Scanning {len(files)} files in {len(pending)} batches on {self.max_workers} worker processes")
+
+        executor = self._get_executor()
+        running: Dict = {}
+        inflight_bytes = 0
+        try:
+            while pending or running:
+                # Submit while under the memory ceiling (always keep one batch going)
+                while pending and (not running or inflight_bytes + pending[-1][1] <= self.max_inflight_bytes):
+                    paths, size = pending.pop()
+                    running[executor.submit(extract_usage_batch, repo_path, paths, database_type)] = (paths, size)
+                    inflight_bytes += size
+                    self.batches += 1
+                self.peak_inflight_bytes = max(self.peak_inflight_bytes, inflight_bytes)
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    # Read before popping so a broken pool leaves the batch for the fallback
+                    results = future.result()
+                    _, size = running.pop(future)
+                    inflight_bytes -= size
+                    yield from results
+        except BrokenProcessPool as e:
+            print(f"⚠️ Table scan pool broke, scanning the rest in-process: {e}")
+            self.pool_failures += 1
+            self.shutdown()
+            leftover = [path for paths, _ in list(running.values()) + pending for path in paths]
+            for path in leftover:
+                yield path, extract_file_usage(repo_path, path, database_type)
+        finally:
+            for future in running:
+                future.cancel()
+
+    def get_stats(self) -> Dict:
+        """Get scanner statistics"""
+        return {
+            "max_workers": self.max_workers,
+            "parallel_threshold": self.parallel_threshold,
+            "batch_bytes": self.batch_bytes,
+            "max_inflight_bytes": self.max_inflight_bytes,
+            "pool_running": self._executor is not None,
+            "scans": self.scans,
+            "parallel_scans": self.parallel_scans,
+            "batches": self.batches,
+            "files_scanned": self.files_scanned,
+            "bytes_scanned": self.bytes_scanned,
+            "peak_inflight_bytes": self.peak_inflight_bytes,
+            "pool_failures": self.pool_failures
+        }
+
+
+# Global scanner shared by the table index
+parallel_scanner = ParallelScanner()
@@ -0,0 +1,337 @@
+"""
+Native Python dependency extraction
+Resolves imports, calls and class usage with the stdlib ast module and
+emits the same shape as DependsAnalyzer.transform_depends_output
+"""
+
+import os
+import ast
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+# Relationship types reported as direct dependencies (mirrors depends_wrapper)
+DIRECT_TYPES = ("CALL", "USE", "IMPORT", "CREATE", "EXTEND", "IMPLEMENT")
+
+# Keep at most this many line numbers / code references per edge
+MAX_REFERENCES_PER_EDGE = 5
+
+
+def build_module_index(relative_paths: List[str]) -> Dict[str, str]:
+    """
+    Map importable dotted names onto source files
+
+    'pkg/sub/mod.py' is reachable as 'pkg.sub.mod', 'sub.mod' and 'mod'
+    (flat script directories import siblings by bare name). Full names win
+    over suffixes when two files collide.
+    """
+    full_names = {}
+    suffix_names = {}
+    for relative in relative_paths:
+        parts = relative[:-3].replace(os.sep, '/').split('/')
+        if parts[-1] == '__init__':
+            parts = parts[:-1]
+        if not parts:
+            continue
+        full_names['.'.join(parts)] = relative
+        for i in range(1, len(parts)):
+            suffix_names.setdefault('.'.join(parts[i:]), relative)
+
+    suffix_names.update(full_names)
+    return suffix_names
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    """'a.b.c' for Name/Attribute chains, None for anything else"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return '.'.join(reversed(parts))
+    return None
+
+
+def _chain_nodes(node: ast.AST) -> List[ast.AST]:
+    nodes = [node]
+    while isinstance(node, ast.Attribute):
+        node = node.value
+        nodes.append(node)
+    return nodes
+
+
+class _FileVisitor:
+    """Collects (target file, relationship type) -> line numbers for one module"""
+
+    def __init__(self, relative_path: str, module_index: Dict[str, str]):
+        self.relative_path = relative_path
+        self.module_index = module_index
+        self.package = relative_path.replace(os.sep, '/').split('/')[:-1]
+        # Local name -> (target file, imported symbol or None for a module)
+        self.bindings: Dict[str, Tuple[str, Optional[str]]] = {}
+        # self.<attr> -> target file, for instances created in methods
+        self.attribute_types: Dict[str, str] = {}
+        self.edges: Dict[Tuple[str, str], List[int]] = {}
+
+    def add_edge(self, target: str, rel_type: str, line: int):
+        if target == self.relative_path:
+            return
+        lines = self.edges.setdefault((target, rel_type), [])
+        if line not in lines:
+            lines.append(line)
+
+    def _resolve_module(self, module: str) -> Optional[str]:
+        return self.module_index.get(module)
+
+    def _resolve_binding(self, dotted: str) -> Optional[Tuple[str, Optional[str], str]]:
+        """Longest bound prefix of a dotted name -> (target, symbol, remaining attribute)"""
+        parts = dotted.split('.')
+        for end in range(len(parts), 0, -1):
+            prefix = '.'.join(parts[:end])
+            if prefix in self.bindings:
+                target, symbol = self.bindings[prefix]
+                remainder = parts[end] if end < len(parts) else ''
+                return target, symbol, remainder
+        return None
+
+    def collect_imports(self, tree: ast.AST):
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    target = self._resolve_module(alias.name)
+                    if target:
+                        self.bindings[alias.asname or alias.name] = (target, None)
+                        self.add_edge(target, "IMPORT", node.lineno)
+            elif isinstance(node, ast.ImportFrom):
+                base_parts = self.package[:len(self.package) - node.level + 1] if node.level else []
+                base = '.'.join(base_parts + ([node.module] if node.module else []))
+                for alias in node.names:
+                    submodule = self._resolve_module(f"{base}.{alias.name}" if base else alias.name)
+                    if submodule:
+                        self.bindings[alias.asname or alias.name] = (submodule, None)
+                        self.add_edge(submodule, "IMPORT", node.lineno)
+                        continue
+                    target = self._resolve_module(base) if base else None
+                    if target:
+                        if alias.name != '*':
+                            self.bindings[alias.asname or alias.name] = (target, alias.name)
+                        self.add_edge(target, "IMPORT", node.lineno)
+
+    def _call_type(self, symbol: Optional[str], remainder: str) -> str:
+        name = remainder or symbol or ''
+        # Classes are CapWords by convention; calling one creates an instance
+        return "CREATE" if name[:1].isupper() else "CALL"
+
+    def collect_usage(self, tree: ast.AST):
+        consumed = set()
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                for base in node.bases:
+                    dotted = _dotted_name(base)
+                    resolved = self._resolve_binding(dotted) if dotted else None
+                    if resolved:
+                        self.add_edge(resolved[0], "EXTEND", node.lineno)
+                        consumed.update(id(n) for n in _chain_nodes(base))
+                self._collect_contained(node)
+
+            elif isinstance(node, ast.Call):
+                dotted = _dotted_name(node.func)
+                if not dotted:
+                    continue
+                resolved = self._resolve_binding(dotted)
+                if resolved:
+                    target, symbol, remainder = resolved
+                    self.add_edge(target, self._call_type(symbol, remainder), node.lineno)
+                    consumed.update(id(n) for n in _chain_nodes(node.func))
+                elif dotted.startswith('self.'):
+                    # self.monitor.check(...) where self.monitor = TransactionMonitor(...)
+                    attribute = dotted.split('.')[1]
+                    if attribute in self.attribute_types and dotted.count('.') >= 2:
+                        self.add_edge(self.attribute_types[attribute], "CALL", node.lineno)
+                        consumed.update(id(n) for n in _chain_nodes(node.func))
+
+            elif isinstance(node, (ast.Attribute, ast.Name)) and id(node) not in consumed:
+                if isinstance(getattr(node, 'ctx', None), ast.Store):
+                    continue
+                dotted = _dotted_name(node)
+                consumed.update(id(n) for n in _chain_nodes(node))
+                resolved = self._resolve_binding(dotted) if dotted else None
+                if resolved:
+                    self.add_edge(resolved[0], "USE", node.lineno)
+
+    def _collect_contained(self, class_node: ast.ClassDef):
+        """Fields holding instances of other modules' classes: self.x = Target(...) / x: Target"""
+        for node in ast.walk(class_node):
+            value = None
+            targets = []
+            if isinstance(node, ast.Assign):
+                value, targets = node.value, node.targets
+            elif isinstance(node, ast.AnnAssign):
+                value, targets = node.annotation, [node.target]
+
+            if value is None:
+                continue
+            type_node = value.func if isinstance(value, ast.Call) else value
+            dotted = _dotted_name(type_node)
+            resolved = self._resolve_binding(dotted) if dotted else None
+            if not resolved:
+                continue
+
+            for target_node in targets:
+                attribute = _dotted_name(target_node)
+                if attribute and attribute.startswith('self.') and attribute.count('.') == 1:
+                    self.attribute_types[attribute.split('.')[1]] = resolved[0]
+                    self.add_edge(resolved[0], "CONTAIN", node.lineno)
+                elif isinstance(node, ast.AnnAssign) and isinstance(target_node, ast.Name):
+                    self.add_edge(resolved[0], "CONTAIN", node.lineno)
+
+
+def extract_file_dependencies(code_path: str, relative_path: str, module_index: Dict[str, str]) -> List[Dict]:
+    """
+    Extract outgoing dependencies of one Python file
+
+    Module-level so it can run in a worker process.
+
+    Returns:
+        Dependency dicts in transform_depends_output format
+    """
+    full_path = os.path.join(code_path, relative_path)
+    try:
+        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+            source = f.read()
+        tree = ast.parse(source, filename=full_path)
+    except (OSError, SyntaxError, ValueError) as e:
+        print(f"⚠️ Could not parse {full_path}: {e}")
+        return []
+
+    visitor = _FileVisitor(relative_path, module_index)
+    visitor.collect_imports(tree)
+    visitor.collect_usage(tree)
+
+    lines = source.splitlines(keepends=True)
+    source_name = os.path.basename(relative_path)
+    dependencies = []
+
+    for (target, rel_type), line_numbers in visitor.edges.items():
+        line_numbers = sorted(line_numbers)[:MAX_REFERENCES_PER_EDGE]
+        # Same context window as DependsAnalyzer._extract_code_references
+        code_references = [
+            ''.join(lines[max(0, line - 3):min(len(lines), line + 2)]).strip()
+            for line in line_numbers
+        ]
+        target_name = os.path.basename(target)
+        dependencies.append({
+            "source": source_name,
+            "target": target_name,
+            "type": rel_type,
+            "file": source_name,
+            "line": line_numbers[0] if line_numbers else 0,
+            "line_numbers": line_numbers,
+            "code_reference": code_references[0] if code_references else "",
+            "code_references": code_references
+        })
+
+    return dependencies
+
+
+class PythonDependencyExtractor:
+    """Pure-Python replacement for DEPENDS' python mode"""
+
+    def __init__(self):
+        # Below this many files, process start-up costs more than it saves
+        self.parallel_threshold = int(os.getenv("PYTHON_EXTRACTOR_PARALLEL_THRESHOLD", "32"))
+        self.max_workers = int(os.getenv("PYTHON_EXTRACTOR_WORKERS", str(os.cpu_count() or 2)))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: callers run on worker threads, where fork is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def analyze_directory(self, code_path: str) -> Dict:
+        """
+        Extract the dependency matrix for every .py file under code_path
+
+        Args:
+            code_path: Path to code directory
+
+        Returns:
+            Parsed dependency data (same format as transform_depends_output)
+        """
+        relative_paths = []
+        for root, dirs, files in os.walk(code_path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for file in sorted(files):
+                if file.endswith('.py'):
+                    relative_paths.append(os.path.relpath(os.path.join(root, file), code_path))
+
+        module_index = build_module_index(relative_paths)
+
+        per_file = None
+        if len(relative_paths) >= self.parallel_threshold:
+            executor = self._get_executor()
+            chunksize = max(1, len(relative_paths) // (self.max_workers * 4))
+            try:
+                per_file = list(executor.map(
+                    extract_file_dependencies,
+                    [code_path] * len(relative_paths),
+                    relative_paths,
+                    [module_index] * len(relative_paths),
+                    chunksize=chunksize
+                ))
+            except BrokenProcessPool as e:
+                print(f"⚠️ Python extractor pool broke, parsing in-process: {e}")
+                self.shutdown()
+
+        if per_file is None:
+            per_file = [extract_file_dependencies(code_path, p, module_index) for p in relative_paths]
+
+        result = {
+            "modules": [
+                {"name": os.path.basename(p), "type": "file", "relations_count": 0}
+                for p in relative_paths
+            ],
+            "dependencies": {
+                "direct": [],
+                "indirect": []
+            },
+            "statistics": {}
+        }
+
+        for dependencies in per_file:
+            for dep in dependencies:
+                category = "direct" if dep["type"] in DIRECT_TYPES else "indirect"
+                result["dependencies"][category].append(dep)
+
+        result["statistics"] = {
+            "total_modules": len(result["modules"]),
+            "direct_dependencies": len(result["dependencies"]["direct"]),
+            "indirect_dependencies": len(result["dependencies"]["indirect"]),
+            "total_dependencies": (
+                len(result["dependencies"]["direct"]) +
+                len(result["dependencies"]["indirect"])
+            )
+        }
+
+        return result
+
+
+# Global extractor (shares one process pool)
+python_extractor = PythonDependencyExtractor()
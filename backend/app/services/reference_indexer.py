@@ -0,0 +1,170 @@
+"""
+Per-file code reference index
+Reads and tokenizes a source file once so every (target, relationship type)
+lookup made while transforming a DEPENDS matrix is answered from memory
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.file_store import SourceFile, file_store
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+# Keep at most this many occurrences per (target, relationship type)
+MAX_REFERENCES = 5
+
+
+class CodeReferenceIndex:
+    """Token -> line index over one Java or Python source file"""
+
+    def __init__(self, file_path: str, source: Optional[SourceFile] = None):
+        """
+        Build the index in a single pass over the file
+
+        Args:
+            file_path: Source file to index (unreadable files give an empty index)
+            source: Already loaded content of file_path (default: read through the file store)
+        """
+        self.file_path = file_path
+        self.is_python = bool(file_path) and file_path.endswith('.py')
+        self.lines: List[str] = []
+        self._stripped: List[str] = []
+        self._token_lines: Dict[str, List[int]] = {}
+        self._substring_tokens: Dict[str, List[str]] = {}
+
+        if source is None and file_path:
+            source = file_store.get(file_path)
+        if source is None:
+            return
+        self.lines = source.lines()
+
+        comment_prefix = '#' if self.is_python else '//'
+        for index, line in enumerate(self.lines):
+            stripped = line.strip()
+            self._stripped.append(stripped)
+            if not stripped or stripped.startswith(comment_prefix):
+                continue
+            for token in set(IDENTIFIER_PATTERN.findall(stripped)):
+                self._token_lines.setdefault(token, []).append(index)
+
+    def _lines_containing(self, needle: str) -> List[int]:
+        """Indexed lines containing needle as a substring (same semantics as `needle in line`)"""
+        if not needle:
+            return []
+
+        if not IDENTIFIER_PATTERN.fullmatch(needle):
+            # Needle spans non-identifier characters, so tokens can't answer it
+            return sorted({i for ids in self._token_lines.values() for i in ids if needle in self._stripped[i]})
+
+        tokens = self._substring_tokens.get(needle)
+        if tokens is None:
+            # Identifier needles can only occur inside identifier tokens
+            tokens = [token for token in self._token_lines if needle in token]
+            self._substring_tokens[needle] = tokens
+
+        matched = set()
+        for token in tokens:
+            matched.update(self._token_lines[token])
+        return sorted(matched)
+
+    def _matches(self, line: str, line_num: int, target_class: str, target_module: str, rel_type: str) -> bool:
+        """Relationship-specific check for one candidate line"""
+        is_python = self.is_python
+
+        if rel_type == "IMPORT":
+            if is_python:
+                # Python: import module or from module import class
+                return (line.startswith("import ") and target_class in line) or \
+                       (line.startswith("from ") and target_module in line)
+            # Java: import statements
+            return line.startswith("import") and target_class in line
+
+        if rel_type == "CALL":
+            # Method calls - object.method( or Class.method(
+            return target_class in line and '.' in line and '(' in line
+
+        if rel_type == "USE":
+            if target_class not in line:
+                return False
+            if is_python:
+                # Python: variable/attribute usage
+                return not line.startswith("import") and not line.startswith("from") and \
+                       not line.startswith("class") and not line.startswith("def")
+            # Java: variable/field usage
+            return not line.startswith("import") and not line.startswith("package")
+
+        if rel_type == "CREATE":
+            if is_python:
+                # Python: object instantiation - Class( or Class(), not a definition
+                return target_class in line and '(' in line and \
+                       not line.startswith("def ") and not line.startswith("class ")
+            # Java: object instantiation (new keyword)
+            return "new " in line and target_class in line
+
+        if rel_type == "CONTAIN":
+            if is_python:
+                # Python: class definitions, inheritance
+                return (f"class {target_class}" in line) or \
+                       (f"({target_class}" in line and "class" in self.lines[max(0, line_num - 2):line_num])
+            # Java: class declarations, extends, implements
+            return ("class " in line and target_class in line) or \
+                   (f"extends {target_class}" in line) or \
+                   (f"implements {target_class}" in line)
+
+        return False
+
+    def find(self, target_name: str, rel_type: str) -> Tuple[List[int], List[str]]:
+        """
+        Find where this file references target_name
+
+        Args:
+            target_name: Target file name (e.g. Payment.java, reporting.py)
+            rel_type: Relationship type (IMPORT, CALL, USE, CREATE, CONTAIN)
+
+        Returns:
+            tuple: (list of line_numbers, list of code_references)
+        """
+        line_numbers = []
+        code_references = []
+
+        if self.is_python:
+            target_class = target_name.replace('.py', '').split('/')[-1]
+            target_module = target_name.replace('.py', '').replace('/', '.').replace('\\', '.')
+        else:
+            target_class = target_name.replace('.java', '').split('/')[-1]
+            target_module = target_name.replace('.java', '').replace('/', '.').lower()
+
+        candidates = self._lines_containing(target_class)
+        if rel_type == "IMPORT" and self.is_python and target_module != target_class:
+            candidates = sorted(set(candidates) | set(self._lines_containing(target_module)))
+
+        for index in candidates:
+            line_num = index + 1
+            if not self._matches(self._stripped[index], line_num, target_class, target_module, rel_type):
+                continue
+
+            line_numbers.append(line_num)
+            # Get context (2 lines before, current line, 2 lines after)
+            context_start = max(0, line_num - 3)
+            context_end = min(len(self.lines), line_num + 2)
+            code_references.append(''.join(self.lines[context_start:context_end]).strip())
+
+            # Limit to first occurrences to avoid too much data
+            if len(line_numbers) >= MAX_REFERENCES:
+                break
+
+        return line_numbers, code_references
+
+
+def reference_index_for(file_path: str) -> CodeReferenceIndex:
+    """
+    Reference index of a file, built once per file version
+
+    The index is kept with the file in the shared file store, so every
+    DEPENDS run over an unchanged file reuses it.
+    """
+    source = file_store.get(file_path) if file_path else None
+    if source is None:
+        return CodeReferenceIndex(file_path)
+    return source.result("reference_index", lambda loaded: CodeReferenceIndex(file_path, loaded))
@@ -1,23 +1,145 @@
 """
 SQL Query Extractor
 Extracts table and column usage from code files
+
+All patterns are compiled once at import. Each extractor has a trigger
+pattern of literal words that every one of its matches contains; triggers
+run over the whole file at C speed and only the lines they hit are handed
+to the (slower) per-line extraction patterns, in a single pass over the file.
 """
 
 import re
-from typing import Dict, List, Set, Tuple
+from typing import Dict, Iterator, List, Set, Tuple
 from pathlib import Path
 
+from app.services.string_literals import extract_string_literals, literal_language
+
+# Common SQL keywords
+SQL_KEYWORDS = (
+    'SELECT', 'FROM', 'INSERT', 'UPDATE', 'DELETE', 'JOIN',
+    'INNER JOIN', 'LEFT JOIN', 'RIGHT JOIN', 'WHERE', 'INTO',
+    'SET', 'VALUES', 'CREATE', 'ALTER', 'DROP', 'TABLE'
+)
+# Trigger for SQL lines, matched against upper-cased text (same as `keyword in line.upper()`);
+# the multi-word keywords are covered by JOIN
+SQL_KEYWORD_PATTERN = re.compile('|'.join(keyword for keyword in SQL_KEYWORDS if ' ' not in keyword))
+
+# The other triggers are lower-case literals matched against case-folded text.
+# Besides what str.lower() maps, re.IGNORECASE equates these with ASCII letters.
+IGNORECASE_EXTRAS = str.maketrans({'\u0130': 'i', '\u0131': 'i', '\u017f': 's'})
+
+# Quote characters not escaped by a preceding backslash
+QUOTE_PATTERN = re.compile(r'(?<!\\)["\'`]')
+
+# String literal with SQL
+SQL_STRING_PATTERN = re.compile(r'["\']([^"\']*(?:SELECT|INSERT|UPDATE|DELETE|CREATE|ALTER)[^"\']*)["\']', re.IGNORECASE)
+
+SQL_QUERY_PREFIXES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CREATE', 'ALTER', 'DROP')
+
+# Table clauses
+FROM_PATTERN = re.compile(r'FROM\s+(?:`)?(\w+)(?:`)?(?:\s|,|$|WHERE|JOIN)', re.IGNORECASE)
+JOIN_PATTERN = re.compile(r'JOIN\s+(?:`)?(\w+)(?:`)?\s+', re.IGNORECASE)
+INSERT_PATTERN = re.compile(r'INSERT\s+INTO\s+(?:`)?(\w+)(?:`)?', re.IGNORECASE)
+UPDATE_PATTERN = re.compile(r'UPDATE\s+(?:`)?(\w+)(?:`)?', re.IGNORECASE)
+DELETE_PATTERN = re.compile(r'DELETE\s+FROM\s+(?:`)?(\w+)(?:`)?', re.IGNORECASE)
+
+# Column clauses
+SELECT_COLUMNS_PATTERN = re.compile(r'SELECT\s+(.*?)\s+FROM', re.IGNORECASE | re.DOTALL)
+WHERE_CLAUSE_PATTERN = re.compile(r'WHERE\s+(.*?)(?:\s+(?:GROUP|ORDER|LIMIT|JOIN|$))', re.IGNORECASE | re.DOTALL)
+WHERE_COLUMN_PATTERN = re.compile(r'(?:`)?(\w+)(?:`)?\s*[=<>!]')
+SET_CLAUSE_PATTERN = re.compile(r'SET\s+(.*?)(?:\s+WHERE|$)', re.IGNORECASE | re.DOTALL)
+SET_COLUMN_PATTERN = re.compile(r'(?:`)?(\w+)(?:`)?\s*=')
+
+# Java JPA/Hibernate patterns
+# @Entity(name = "transactions")
+# @Table(name = "transactions")
+# Python SQLAlchemy patterns
+# __tablename__ = "transactions"
+ORM_PATTERNS = (
+    re.compile(r'@(?:Entity|Table)\s*\([^)]*name\s*=\s*["\'](\w+)["\']'),
+    re.compile(r'@Table\s*\([^)]*name\s*=\s*["\'](\w+)["\']'),
+    re.compile(r'__tablename__\s*=\s*["\'](\w+)["\']'),
+)
+ORM_TRIGGER = re.compile(r'@entity|@table|__tablename__')
+
+# Heuristic class-to-table mappings
+# AccountBalance, AccountDAO, AccountService -> accounts
+# TransactionDAO, TransactionService -> transactions
+# CustomerDAO, CustomerService -> customers
+# FraudAlert, FraudDetection -> fraud_alerts
+NAME_MAPPINGS = (
+    ('account', 'accounts'),
+    ('transaction', 'transactions'),
+    ('customer', 'customers'),
+    ('fraud', 'fraud_alerts'),
+    ('fraudalert', 'fraud_alerts'),
+    ('transfer', 'transfer_records'),
+    ('balance', 'account_balances'),
+)
+CLASS_PATTERN = re.compile(r'class\s+(\w+)', re.IGNORECASE)
+CLASS_TRIGGER = re.compile(r'class')
+# Variable/field names that suggest table usage
+# e.g., private AccountBalance, AccountBalance accountBalance, transactionDAO
+FIELD_PATTERN = re.compile(
+    r'(?:private|public|protected|final)?\s+(\w*(?:Account|Transaction|Customer|Fraud|Transfer|Balance)\w*)',
+    re.IGNORECASE
+)
+# Same captures as FIELD_PATTERN on lower-cased ASCII lines (the optional modifier and
+# extra whitespace never change the captured name) without IGNORECASE backtracking
+ASCII_FIELD_PATTERN = re.compile(r'\s(\w*(?:account|transaction|customer|fraud|transfer|balance)\w*)')
+FIELD_TRIGGER = re.compile(r'account|transaction|customer|fraud|transfer|balance')
+
+# MongoDB patterns:
+# db.collection_name.find() / insertOne() / updateMany() / aggregate() ...
+# "collection_name".find()
+# getCollection("collection_name")
+MONGO_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'db\.(\w+)\.(?:find|insertOne|insertMany|updateOne|updateMany|deleteOne|deleteMany|aggregate|findOne|count|distinct|createIndex|dropIndex)',
+    r'["\'](\w+)["\']\.(?:find|insertOne|insertMany|updateOne|updateMany|deleteOne|deleteMany|aggregate|findOne)',
+    r'getCollection\s*\(["\'](\w+)["\']',
+    r'collection\s*=\s*["\'](\w+)["\']',
+    r'["\']collection["\']\s*:\s*["\'](\w+)["\']',
+    r'\.collection\s*\(["\'](\w+)["\']',
+))
+MONGO_TRIGGER = re.compile(r'db\.|collection|["\']\.(?:find|insert|update|delete|aggregate)')
+# Skip common non-collection names
+NON_COLLECTION_NAMES = frozenset(['db', 'client', 'database', 'mongo', 'mongodb'])
+
+
+def _iter_line_matches(pattern: "re.Pattern", text: str) -> Iterator[Tuple[int, "re.Match"]]:
+    """Yield (0-based line index, match) for every match of pattern in text"""
+    line = 0
+    position = 0
+    for match in pattern.finditer(text):
+        start = match.start()
+        line += text.count('\n', position, start)
+        position = start
+        yield line, match
+
+
+def _fold_case(text: str) -> str:
+    """Lower-case text so literal triggers find everything re.IGNORECASE would"""
+    if not text.isascii():
+        text = text.translate(IGNORECASE_EXTRAS)
+    return text.lower()
+
+
+def _trigger_lines(pattern: "re.Pattern", text: str) -> Set[int]:
+    """
+    0-based indices of the lines containing a match of pattern
+    
+    Triggers are newline-free literals, so whole-text matches never span
+    lines and hit exactly the lines a per-line search would.
+    """
+    return {line for line, _ in _iter_line_matches(pattern, text)}
+
 
 class SQLExtractor:
     """Extracts SQL queries and table/column references from code"""
     
     def __init__(self):
         # Common SQL keywords
-        self.sql_keywords = {
-            'SELECT', 'FROM', 'INSERT', 'UPDATE', 'DELETE', 'JOIN',
-            'INNER JOIN', 'LEFT JOIN', 'RIGHT JOIN', 'WHERE', 'INTO',
-            'SET', 'VALUES', 'CREATE', 'ALTER', 'DROP', 'TABLE'
-        }
+        self.sql_keywords = set(SQL_KEYWORDS)
     
     def extract_table_usage(self, file_path: str, file_content: str) -> Dict[str, List[Dict]]:
         """
@@ -31,13 +153,15 @@ class SQLExtractor:
             Dictionary mapping table_name -> list of usage contexts
         """
         table_usage = {}
-        
-        # Extract SQL queries (both raw SQL and ORM queries)
-        sql_queries = self._extract_sql_queries(file_content)
-        
-        for query, line_num, context in sql_queries:
-            tables = self._extract_tables_from_query(query)
-            columns = self._extract_columns_from_query(query, tables)
+        found = self._scan(file_content, file_path=file_path)
+        
+        # SQL queries (both raw SQL and ORM queries); repeated queries are parsed once
+        parsed = {}
+        for query, line_num, context in found["sql"]:
+            if query not in parsed:
+                tables = self._extract_tables_from_query(query)
+                parsed[query] = (tables, self._extract_columns_from_query(query, tables), self._get_query_type(query))
+            tables, columns, query_type = parsed[query]
             
             for table in tables:
                 if table not in table_usage:
@@ -45,15 +169,14 @@ class SQLExtractor:
                 
                 table_usage[table].append({
                     "line_number": line_num,
-                    "query_type": self._get_query_type(query),
-                    "columns": columns.get(table, []),
+                    "query_type": query_type,
+                    "columns": list(columns.get(table, [])),
                     "context": context[:100] if context else "",  # First 100 chars
                     "full_query": query[:200]  # First 200 chars
                 })
         
-        # Also check for ORM model references (JPA, Hibernate, SQLAlchemy)
-        orm_tables = self._extract_orm_tables(file_content, file_path)
-        for table, line_num in orm_tables:
+        # ORM model references (JPA, Hibernate, SQLAlchemy)
+        for table, line_num in found["orm"]:
             if table not in table_usage:
                 table_usage[table] = []
             
@@ -65,10 +188,9 @@ class SQLExtractor:
                 "full_query": ""
             })
         
-        # Also check for heuristic class-to-table mappings
+        # Heuristic class-to-table mappings
         # e.g., AccountBalance -> accounts, TransactionDAO -> transactions
-        heuristic_tables = self._extract_heuristic_tables(file_content, file_path)
-        for table, line_num in heuristic_tables:
+        for table, line_num in found["classes"] + found["fields"]:
             if table not in table_usage:
                 table_usage[table] = []
             
@@ -80,10 +202,9 @@ class SQLExtractor:
                 "full_query": ""
             })
         
-        # Also check for MongoDB collection usage patterns
+        # MongoDB collection usage patterns
         # e.g., db.transactions.find(), collection.insertOne(), etc.
-        mongo_collections = self._extract_mongodb_collections(file_content)
-        for collection, line_num, context in mongo_collections:
+        for collection, line_num, context in found["mongo"]:
             if collection not in table_usage:
                 table_usage[collection] = []
             
@@ -97,102 +218,131 @@ class SQLExtractor:
         
         return table_usage
     
-    def _extract_sql_queries(self, content: str) -> List[Tuple[str, int, str]]:
-        """Extract SQL queries from code"""
-        queries = []
-        lines = content.split('\n')
+    def _scan(self, content: str, sql: bool = True, orm: bool = True, heuristics: bool = True, mongo: bool = True,
+              file_path: str = "") -> Dict[str, List[Tuple]]:
+        """
+        Walk the file once, feeding every enabled extractor the lines its trigger hit
+        
+        SQL in Java / Python / JS files comes from whole string expressions
+        (see string_literals); other files fall back to single-line literals.
+        
+        Returns:
+            Matches per extractor: "sql" (query, line, context), "orm" /
+            "classes" / "fields" (table, line) and "mongo" (collection, line, context)
+        """
+        found = {"sql": [], "orm": [], "classes": [], "fields": [], "mongo": []}
+        
+        # Line indices each extractor has to look at
+        # (case mapping never creates newlines, so line indices line up)
+        sql_lines = _trigger_lines(SQL_KEYWORD_PATTERN, content.upper()) if sql else set()
+        language = literal_language(file_path) if sql_lines else None
+        if language is not None:
+            found["sql"] = [
+                expression for expression in extract_string_literals(content, language)
+                if self._is_sql_query(expression[0])
+            ]
+            sql_lines = set()
+        folded = _fold_case(content) if orm or heuristics or mongo else ""
+        orm_lines = _trigger_lines(ORM_TRIGGER, folded) if orm else set()
+        class_lines = _trigger_lines(CLASS_TRIGGER, folded) if heuristics else set()
+        field_lines = _trigger_lines(FIELD_TRIGGER, folded) if heuristics else set()
+        mongo_lines = _trigger_lines(MONGO_TRIGGER, folded) if mongo else set()
+        
+        candidates = sql_lines | orm_lines | class_lines | field_lines | mongo_lines
+        if not candidates:
+            return found
         
-        current_query = ""
-        query_start_line = 0
+        lines = content.split('\n')
+        sql_queries = found["sql"]
         in_string = False
         string_char = None
+        # String boundaries only matter on SQL lines, so quotes are consumed lazily up to each one
+        quotes = _iter_line_matches(QUOTE_PATTERN, content) if sql_lines else iter(())
+        next_quote = next(quotes, None)
         
-        for line_num, line in enumerate(lines, 1):
-            # Track string boundaries
-            i = 0
-            while i < len(line):
-                char = line[i]
-                
-                if char in ['"', "'", '`'] and (i == 0 or line[i-1] != '\\'):
+        for index in sorted(candidates):
+            line = lines[index]
+            line_num = index + 1
+            
+            if index in sql_lines:
+                # Track string boundaries
+                while next_quote is not None and next_quote[0] <= index:
+                    char = next_quote[1].group()
                     if not in_string:
                         in_string = True
                         string_char = char
                     elif char == string_char:
                         in_string = False
                         string_char = None
+                    next_quote = next(quotes, None)
                 
-                i += 1
+                if not in_string:
+                    # String literal with SQL
+                    for match in SQL_STRING_PATTERN.finditer(line):
+                        query = match.group(1)
+                        if self._is_sql_query(query):
+                            sql_queries.append((query, line_num, line.strip()))
             
-            # Check if line contains SQL keywords
-            line_upper = line.upper()
-            has_sql = any(keyword in line_upper for keyword in self.sql_keywords)
+            if index in orm_lines:
+                for pattern in ORM_PATTERNS:
+                    for match in pattern.finditer(line):
+                        found["orm"].append((match.group(1), line_num))
             
-            if has_sql and not in_string:
-                # Check for SQL string patterns
-                # Pattern 1: String literal with SQL
-                sql_string_pattern = r'["\']([^"\']*(?:SELECT|INSERT|UPDATE|DELETE|CREATE|ALTER)[^"\']*)["\']'
-                matches = re.finditer(sql_string_pattern, line, re.IGNORECASE)
-                
-                for match in matches:
-                    query = match.group(1)
-                    if self._is_sql_query(query):
-                        queries.append((query, line_num, line.strip()))
-                
-                # Pattern 2: Multi-line SQL strings (Java/Python)
-                if '"""' in line or "'''" in line or '"""' in line:
-                    # Start of multi-line string
-                    if current_query == "":
-                        query_start_line = line_num
-                    current_query += line + "\n"
-                elif current_query and ('"""' in line or "'''" in line):
-                    # End of multi-line string
-                    current_query += line
-                    if self._is_sql_query(current_query):
-                        queries.append((current_query, query_start_line, current_query[:100]))
-                    current_query = ""
-                elif current_query:
-                    current_query += line + "\n"
-        
-        return queries
+            if index in class_lines:
+                # Check for class names that suggest table usage
+                class_match = CLASS_PATTERN.search(line)
+                if class_match:
+                    class_name = class_match.group(1).lower()
+                    for keyword, table_name in NAME_MAPPINGS:
+                        if keyword in class_name:
+                            found["classes"].append((table_name, line_num))
+                            break
+            
+            if index in field_lines:
+                if line.isascii():
+                    var_names = ASCII_FIELD_PATTERN.findall(line.lower())
+                else:
+                    var_names = [match.group(1).lower() for match in FIELD_PATTERN.finditer(line)]
+                for var_name in var_names:
+                    for keyword, table_name in NAME_MAPPINGS:
+                        if keyword in var_name:
+                            found["fields"].append((table_name, line_num))
+                            break
+            
+            if index in mongo_lines:
+                for pattern in MONGO_PATTERNS:
+                    for match in pattern.finditer(line):
+                        collection_name = match.group(1)
+                        if collection_name.lower() not in NON_COLLECTION_NAMES:
+                            found["mongo"].append((collection_name, line_num, line.strip()))
+        
+        return found
+    
+    def _extract_sql_queries(self, content: str, file_path: str = "") -> List[Tuple[str, int, str]]:
+        """Extract SQL queries from code"""
+        return self._scan(content, orm=False, heuristics=False, mongo=False, file_path=file_path)["sql"]
     
     def _is_sql_query(self, text: str) -> bool:
         """Check if text looks like a SQL query"""
-        text_upper = text.upper().strip()
-        return any(text_upper.startswith(kw) for kw in ['SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CREATE', 'ALTER', 'DROP'])
+        return text.upper().strip().startswith(SQL_QUERY_PREFIXES)
     
     def _extract_tables_from_query(self, query: str) -> Set[str]:
         """Extract table names from SQL query"""
         tables = set()
         
         # FROM clause
-        from_pattern = r'FROM\s+(?:`)?(\w+)(?:`)?(?:\s|,|$|WHERE|JOIN)'
-        from_matches = re.finditer(from_pattern, query, re.IGNORECASE)
-        for match in from_matches:
+        for match in FROM_PATTERN.finditer(query):
             tables.add(match.group(1))
         
         # JOIN clauses
-        join_pattern = r'JOIN\s+(?:`)?(\w+)(?:`)?\s+'
-        join_matches = re.finditer(join_pattern, query, re.IGNORECASE)
-        for match in join_matches:
+        for match in JOIN_PATTERN.finditer(query):
             tables.add(match.group(1))
         
-        # INSERT INTO
-        insert_pattern = r'INSERT\s+INTO\s+(?:`)?(\w+)(?:`)?'
-        insert_match = re.search(insert_pattern, query, re.IGNORECASE)
-        if insert_match:
-            tables.add(insert_match.group(1))
-        
-        # UPDATE
-        update_pattern = r'UPDATE\s+(?:`)?(\w+)(?:`)?'
-        update_match = re.search(update_pattern, query, re.IGNORECASE)
-        if update_match:
-            tables.add(update_match.group(1))
-        
-        # DELETE FROM
-        delete_pattern = r'DELETE\s+FROM\s+(?:`)?(\w+)(?:`)?'
-        delete_match = re.search(delete_pattern, query, re.IGNORECASE)
-        if delete_match:
-            tables.add(delete_match.group(1))
+        # INSERT INTO / UPDATE / DELETE FROM
+        for pattern in (INSERT_PATTERN, UPDATE_PATTERN, DELETE_PATTERN):
+            match = pattern.search(query)
+            if match:
+                tables.add(match.group(1))
         
         return tables
     
@@ -201,8 +351,7 @@ class SQLExtractor:
         columns_by_table = {table: [] for table in tables}
         
         # SELECT columns
-        select_pattern = r'SELECT\s+(.*?)\s+FROM'
-        select_match = re.search(select_pattern, query, re.IGNORECASE | re.DOTALL)
+        select_match = SELECT_COLUMNS_PATTERN.search(query)
         if select_match:
             columns_str = select_match.group(1)
             # Split by comma, handle table.column format
@@ -231,24 +380,18 @@ class SQLExtractor:
                                 columns_by_table[table].append(col)
         
         # WHERE clause columns
-        where_pattern = r'WHERE\s+(.*?)(?:\s+(?:GROUP|ORDER|LIMIT|JOIN|$))'
-        where_match = re.search(where_pattern, query, re.IGNORECASE | re.DOTALL)
+        where_match = WHERE_CLAUSE_PATTERN.search(query)
         if where_match:
-            where_clause = where_match.group(1)
-            # Extract column names from WHERE clause
-            col_pattern = r'(?:`)?(\w+)(?:`)?\s*[=<>!]'
-            for match in re.finditer(col_pattern, where_clause):
+            for match in WHERE_COLUMN_PATTERN.finditer(where_match.group(1)):
                 col = match.group(1)
                 for table in columns_by_table:
                     if col not in columns_by_table[table]:
                         columns_by_table[table].append(col)
         
         # SET clause (UPDATE)
-        set_pattern = r'SET\s+(.*?)(?:\s+WHERE|$)'
-        set_match = re.search(set_pattern, query, re.IGNORECASE | re.DOTALL)
+        set_match = SET_CLAUSE_PATTERN.search(query)
         if set_match:
-            set_clause = set_match.group(1)
-            for col_match in re.finditer(r'(?:`)?(\w+)(?:`)?\s*=', set_clause):
+            for col_match in SET_COLUMN_PATTERN.finditer(set_match.group(1)):
                 col = col_match.group(1)
                 for table in columns_by_table:
                     if col not in columns_by_table[table]:
@@ -259,141 +402,50 @@ class SQLExtractor:
     def _get_query_type(self, query: str) -> str:
         """Determine the type of SQL query"""
         query_upper = query.upper().strip()
-        if query_upper.startswith('SELECT'):
-            return 'SELECT'
-        elif query_upper.startswith('INSERT'):
-            return 'INSERT'
-        elif query_upper.startswith('UPDATE'):
-            return 'UPDATE'
-        elif query_upper.startswith('DELETE'):
-            return 'DELETE'
-        elif query_upper.startswith('CREATE'):
-            return 'CREATE'
-        elif query_upper.startswith('ALTER'):
-            return 'ALTER'
-        else:
-            return 'UNKNOWN'
+        for query_type in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CREATE', 'ALTER'):
+            if query_upper.startswith(query_type):
+                return query_type
+        return 'UNKNOWN'
     
     def _extract_orm_tables(self, content: str, file_path: str) -> List[Tuple[str, int]]:
         """Extract table names from ORM annotations/classes"""
-        tables = []
-        lines = content.split('\n')
-        
-        # Java JPA/Hibernate patterns
-        # @Entity(name = "transactions")
-        # @Table(name = "transactions")
-        entity_pattern = r'@(?:Entity|Table)\s*\([^)]*name\s*=\s*["\'](\w+)["\']'
-        table_pattern = r'@Table\s*\([^)]*name\s*=\s*["\'](\w+)["\']'
-        
-        # Python SQLAlchemy patterns
-        # __tablename__ = "transactions"
-        sqlalchemy_pattern = r'__tablename__\s*=\s*["\'](\w+)["\']'
-        
-        for line_num, line in enumerate(lines, 1):
-            # Check Java annotations
-            for match in re.finditer(entity_pattern, line):
-                tables.append((match.group(1), line_num))
-            
-            for match in re.finditer(table_pattern, line):
-                tables.append((match.group(1), line_num))
-            
-            # Check Python SQLAlchemy
-            for match in re.finditer(sqlalchemy_pattern, line):
-                tables.append((match.group(1), line_num))
-        
-        return tables
+        return self._scan(content, sql=False, heuristics=False, mongo=False)["orm"]
     
     def _extract_heuristic_tables(self, content: str, file_path: str) -> List[Tuple[str, int]]:
         """Extract table names using heuristics (class names, DAO names, etc.)"""
-        tables = []
-        lines = content.split('\n')
-        
-        # Common class-to-table mappings
-        # AccountBalance, AccountDAO, AccountService -> accounts
-        # TransactionDAO, TransactionService -> transactions
-        # CustomerDAO, CustomerService -> customers
-        # FraudAlert, FraudDetection -> fraud_alerts
-        
-        # Pattern: class AccountBalance, AccountDAO, etc.
-        # Match: class AccountBalance, class TransactionDAO, etc.
-        class_pattern = r'class\s+(\w+)(?:DAO|Service|Manager|Balance|Alert|Detection|Processor)?'
-        
-        # Common mappings
-        name_mappings = {
-            'account': 'accounts',
-            'transaction': 'transactions',
-            'customer': 'customers',
-            'fraud': 'fraud_alerts',
-            'fraudalert': 'fraud_alerts',
-            'transfer': 'transfer_records',
-            'balance': 'account_balances'
-        }
-        
-        for line_num, line in enumerate(lines, 1):
-            # Check for class names that suggest table usage
-            # Match: class AccountBalance, class TransactionDAO, etc.
-            class_match = re.search(r'class\s+(\w+)', line, re.IGNORECASE)
-            if class_match:
-                class_name = class_match.group(1).lower()
-                
-                # Check if class name contains table-related keywords
-                for keyword, table_name in name_mappings.items():
-                    if keyword in class_name:
-                        tables.append((table_name, line_num))
-                        break
-        
-        # Also check for variable/field names that suggest table usage
-        # e.g., accountBalance, transactionDAO, customerService
-        # Pattern: private AccountBalance, AccountBalance accountBalance, etc.
-        var_pattern = r'(?:private|public|protected|final)?\s+(\w*(?:Account|Transaction|Customer|Fraud|Transfer|Balance)\w*)'
-        for line_num, line in enumerate(lines, 1):
-            var_matches = re.finditer(var_pattern, line, re.IGNORECASE)
-            for match in var_matches:
-                var_name = match.group(1).lower() if match.group(1) else ""
-                for keyword, table_name in name_mappings.items():
-                    if keyword in var_name:
-                        tables.append((table_name, line_num))
-                        break
-        
-        return tables
+        found = self._scan(content, sql=False, orm=False, mongo=False)
+        return found["classes"] + found["fields"]
     
     def _extract_mongodb_collections(self, content: str) -> List[Tuple[str, int, str]]:
         """Extract MongoDB collection names from code"""
-        collections = []
-        lines = content.split('\n')
+        return self._scan(content, sql=False, orm=False, heuristics=False)["mongo"]
+    
+    def extract_mongodb_usage(self, file_path: str, file_content: str) -> Dict[str, List[Dict]]:
+        """
+        Extract usage of every MongoDB collection (no SQL, no ORM, no heuristics)
         
-        # MongoDB patterns:
-        # db.collection_name.find()
-        # db.collection_name.insertOne()
-        # db.collection_name.insertMany()
-        # db.collection_name.updateOne()
-        # db.collection_name.updateMany()
-        # db.collection_name.deleteOne()
-        # db.collection_name.deleteMany()
-        # db.collection_name.aggregate()
-        # db.collection_name.findOne()
-        # collection_name.find()
-        # getCollection("collection_name")
+        Args:
+            file_path: Path to the file
+            file_content: Content of the file
         
-        mongo_patterns = [
-            r'db\.(\w+)\.(?:find|insertOne|insertMany|updateOne|updateMany|deleteOne|deleteMany|aggregate|findOne|count|distinct|createIndex|dropIndex)',
-            r'["\'](\w+)["\']\.(?:find|insertOne|insertMany|updateOne|updateMany|deleteOne|deleteMany|aggregate|findOne)',
-            r'getCollection\s*\(["\'](\w+)["\']',
-            r'collection\s*=\s*["\'](\w+)["\']',
-            r'["\']collection["\']\s*:\s*["\'](\w+)["\']',
-            r'\.collection\s*\(["\'](\w+)["\']',
-        ]
+        Returns:
+            Dictionary mapping collection_name -> list of usage contexts
+        """
+        table_usage = {}
         
-        for line_num, line in enumerate(lines, 1):
-            for pattern in mongo_patterns:
-                matches = re.finditer(pattern, line, re.IGNORECASE)
-                for match in matches:
-                    collection_name = match.group(1)
-                    # Skip common non-collection names
-                    if collection_name.lower() not in ['db', 'client', 'database', 'mongo', 'mongodb']:
-                        collections.append((collection_name, line_num, line.strip()))
+        for collection, line_num, context in self._extract_mongodb_collections(file_content):
+            if collection not in table_usage:
+                table_usage[collection] = []
+            
+            table_usage[collection].append({
+                "line_number": line_num,
+                "query_type": "MONGO_OPERATION",
+                "columns": [],  # MongoDB doesn't have strict columns
+                "context": context[:100] if context else "",
+                "full_query": ""
+            })
         
-        return collections
+        return table_usage
     
     def extract_mongodb_usage_only(self, file_path: str, file_content: str, collection_name: str) -> Dict[str, List[Dict]]:
         """
@@ -408,25 +460,11 @@ class SQLExtractor:
         Returns:
             Dictionary mapping collection_name -> list of usage contexts
         """
-        table_usage = {}
-        
-        # Only extract MongoDB collection patterns
-        mongo_collections = self._extract_mongodb_collections(file_content)
-        
         # Filter to only the collection we're looking for
         target_collection_lower = collection_name.lower()
-        for collection, line_num, context in mongo_collections:
-            if collection.lower() == target_collection_lower:
-                if collection not in table_usage:
-                    table_usage[collection] = []
-                
-                table_usage[collection].append({
-                    "line_number": line_num,
-                    "query_type": "MONGO_OPERATION",
-                    "columns": [],  # MongoDB doesn't have strict columns
-                    "context": context[:100] if context else "",
-                    "full_query": ""
-                })
-        
-        return table_usage
+        return {
+            collection: usages
+            for collection, usages in self.extract_mongodb_usage(file_path, file_content).items()
+            if collection.lower() == target_collection_lower
+        }
 
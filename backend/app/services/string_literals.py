@@ -0,0 +1,198 @@
+"""
+String literal extraction for Java, Python and JavaScript/TypeScript
+A small lexer that walks a file once, recognising only string literals and
+comments, and reassembles the string expressions code builds queries from:
+Java text blocks, Python triple-quoted and implicitly concatenated strings,
+JS template literals and `+` concatenation across lines. Non-literal
+operands inside a concatenation become a "?" placeholder, so
+"... WHERE id = " + id reads as "... WHERE id = ?".
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+# Stands in for every non-literal part of a string expression
+PLACEHOLDER = "?"
+
+LANGUAGE_EXTENSIONS = {
+    '.java': 'java',
+    '.py': 'python',
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'javascript', '.tsx': 'javascript',
+}
+
+# Comments and string literals per language; everything else is skipped by the scan.
+# Unterminated single-line literals end at the line break so one bad quote cannot
+# swallow the rest of the file.
+# Bodies are written as unrolled loops (x*(?:y x*)*) and each pattern opens with a
+# lookahead on the first character, which re scans much faster than a lazy
+# per-character alternation tried at every position.
+_C_COMMENT = r'(?P<comment>//[^\n]*|/\*[^*]*(?:\*+[^*/][^*]*)*(?:\*+/|\**\Z))'
+_DOUBLE = r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"?'
+_SINGLE = r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'?"
+_TRIPLE_DOUBLE = r'"""[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*(?:"""|\Z)'
+_TRIPLE_SINGLE = r"'''[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*(?:'''|\Z)"
+TOKEN_PATTERNS = {
+    'java': re.compile(
+        r'(?=[/"\'])(?:' + _C_COMMENT + r'|(?P<string>' + _TRIPLE_DOUBLE + r'|' + _DOUBLE + r'|' + _SINGLE + r'))'
+    ),
+    'python': re.compile(
+        r'(?=[#"\'])(?:(?P<comment>#[^\n]*)'
+        r'|(?P<string>' + _TRIPLE_DOUBLE + r'|' + _TRIPLE_SINGLE +
+        # A backslash continues a Python string onto the next line
+        r'|"[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"?'
+        r"|'[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*'?))"
+    ),
+    'javascript': re.compile(
+        r'(?=[/"\'`])(?:' + _C_COMMENT + r'|(?P<string>`[^`\\]*(?:\\[\s\S][^`\\]*)*`?|' + _DOUBLE + r'|' + _SINGLE + r'))'
+    ),
+}
+
+# A simple expression between two `+`: name, attribute access, call or index
+# without nested literals, e.g. tableName, this.schema, cfg.get(KEY), ids[0]
+_OPERAND = r'[\w$]+(?:\s*(?:\.\s*[\w$]+|\([^()"\'`]*\)|\[[^\[\]"\'`]*\]))*'
+# Whitespace including Python's backslash line continuation
+_SPACE = r'(?:\s|\\\r?\n)*'
+CONCAT_GAP = re.compile(_SPACE + r'\+' + _SPACE)
+OPERAND_GAP = re.compile(_SPACE + r'\+' + _SPACE + _OPERAND + _SPACE + r'\+' + _SPACE)
+OPERAND_TAIL = re.compile(_SPACE + r'\+' + _SPACE + _OPERAND)
+OPERAND_HEAD = re.compile(r'\+' + _SPACE + r'$')
+# Python joins adjacent literals ("a" "b") on one line or across backslash
+# continuations; across plain line breaks only inside brackets, where a line
+# break does not end the statement
+IMPLICIT_GAP = re.compile(r'(?:[ \t]|\\\r?\n)*')
+BRACKETED_IMPLICIT_GAP = re.compile(_SPACE)
+
+# String prefix (r, b, u, f and pairs) right before a Python quote; looked up
+# backwards so the token scan can start at quote characters only
+PYTHON_PREFIX = re.compile(r'(?<![\w])[rRbBuUfF]{1,2}$')
+
+ESCAPE_PATTERN = re.compile(r'\\([\s\S])')
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '\n': ''}
+# f-string / template substitutions (one level of nested braces)
+PYTHON_FIELD = re.compile(r'\{\{|\}\}|\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}')
+TEMPLATE_FIELD = re.compile(r'\$\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}')
+
+
+def literal_language(file_path: str) -> Optional[str]:
+    """Lexer language for a file ("java", "python", "javascript"), None if unsupported"""
+    dot = file_path.rfind('.')
+    return LANGUAGE_EXTENSIONS.get(file_path[dot:].lower()) if dot != -1 else None
+
+
+def _unescape(body: str) -> str:
+    if '\\' not in body:
+        return body
+    return ESCAPE_PATTERN.sub(lambda match: ESCAPES.get(match.group(1), match.group(1)), body)
+
+
+def _python_field(match: "re.Match") -> str:
+    text = match.group()
+    if text == '{{':
+        return '{'
+    if text == '}}':
+        return '}'
+    return PLACEHOLDER
+
+
+def literal_value(token: str, language: str, prefix: str = '') -> str:
+    """
+    Runtime text of a single literal token (escapes decoded, substitutions -> placeholder)
+
+    Args:
+        token: Literal source text from its opening to its closing quote
+        language: "java", "python" or "javascript"
+        prefix: Lower-cased Python string prefix ("r", "f", "rb", ...)
+    """
+    quote = token[:3] if token[:3] in ('"""', "'''") else token[0]
+    body = token[len(quote):]
+    if body.endswith(quote) and len(body) >= len(quote):
+        body = body[:-len(quote)]
+
+    if quote == '"""' and language == 'java':
+        # Text block content starts after the line break following the opening quotes
+        body = body.split('\n', 1)[1] if '\n' in body else body
+    if quote == '`':
+        body = TEMPLATE_FIELD.sub(PLACEHOLDER, body)
+    if 'f' in prefix:
+        body = PYTHON_FIELD.sub(_python_field, body)
+    if 'r' in prefix:
+        return body
+    return _unescape(body)
+
+
+def extract_string_literals(content: str, language: str) -> List[Tuple[str, int, str]]:
+    """
+    Reassembled string expressions of a file, in source order
+
+    Args:
+        content: File content
+        language: "java", "python" or "javascript"
+
+    Returns:
+        List of (text, line number of the first literal, stripped source line)
+    """
+    token_pattern = TOKEN_PATTERNS[language]
+    implicit = language == 'python'
+    expressions = []
+
+    parts: List[str] = []
+    start = 0
+    end = 0
+    gap: List[str] = []
+    line = 1
+    counted = 0
+    # Python bracket nesting after the previous literal (gaps hold no strings or comments)
+    depth = 0
+
+    def finish():
+        if not parts:
+            return
+        if OPERAND_TAIL.match(content, end):
+            parts.append(PLACEHOLDER)
+        line_start = content.rfind('\n', 0, start) + 1
+        line_end = content.find('\n', start)
+        context = content[line_start:line_end if line_end != -1 else len(content)].strip()
+        expressions.append((''.join(parts), line, context))
+
+    position = 0
+    for match in token_pattern.finditer(content):
+        gap.append(content[position:match.start()])
+        position = match.end()
+        if match.lastgroup == 'comment':
+            gap.append(' ')
+            continue
+
+        between = ''.join(gap)
+        gap = []
+        prefix = ''
+        implicit_gap = None
+        if implicit:
+            implicit_gap = BRACKETED_IMPLICIT_GAP if depth > 0 else IMPLICIT_GAP
+            depth = max(0, depth + sum(map(between.count, '([{')) - sum(map(between.count, ')]}')))
+            prefix_match = PYTHON_PREFIX.search(content, max(0, match.start() - 3), match.start())
+            if prefix_match:
+                prefix = prefix_match.group().lower()
+                between = between[:-len(prefix)]
+        value = literal_value(match.group(), language, prefix)
+        if parts:
+            if CONCAT_GAP.fullmatch(between) or (implicit_gap and implicit_gap.fullmatch(between)):
+                parts.append(value)
+                end = position
+                continue
+            if OPERAND_GAP.fullmatch(between):
+                parts.append(PLACEHOLDER)
+                parts.append(value)
+                end = position
+                continue
+            finish()
+
+        # New expression; one continuing a non-literal operand starts with the placeholder
+        start = match.start()
+        end = position
+        line += content.count('\n', counted, start)
+        counted = start
+        parts = [PLACEHOLDER, value] if OPERAND_HEAD.search(between) else [value]
+
+    finish()
+    return expressions
@@ -0,0 +1,166 @@
+"""
+Persistent table -> file inverted index
+Maps every table / collection referenced in a repository to the files and
+usages (line numbers, query types, columns) that reference it, so schema
+change analysis resolves its code dependencies with a lookup instead of
+re-reading and re-parsing the whole repository on every DDL event.
+
+The index is keyed by repository path and scan scope, stored on disk and
+refreshed from a stat walk on each lookup: only files whose mtime / size
+changed since the last lookup are re-extracted.
+"""
+
+import os
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+from app.services.parallel_scanner import parallel_scanner
+from app.utils.disk_cache import DiskCache
+
+# Bump when the stored index layout or the extractor output changes
+TABLE_INDEX_VERSION = 3
+
+CODE_EXTENSIONS = ('.java', '.py', '.js', '.ts', '.sql')
+IGNORED_DIRS = ('node_modules', '__pycache__')
+
+
+class TableUsageIndex:
+    """Inverted index of table / collection usage per repository scope"""
+
+    def __init__(self):
+        self.store = DiskCache("table_index")
+        self._indexes: Dict[str, Dict] = {}
+        self._scope_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+        self.lookups = 0
+        self.full_builds = 0
+        self.incremental_updates = 0
+        self.files_indexed = 0
+
+    def _scope_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._scope_locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._scope_locks[key] = lock
+            return lock
+
+    def snapshot_files(self, repo_path: str, search_folders: Sequence[str], database_type: str) -> Dict[str, List[int]]:
+        """
+        Stat every code file in scope
+
+        Args:
+            repo_path: Repository root
+            search_folders: Top-level folders to index
+            database_type: "mongodb" skips .sql files
+
+        Returns:
+            Mapping of repo-relative path -> [mtime_ns, size]
+        """
+        snapshot = {}
+        for root, dirs, files in os.walk(repo_path):
+            # Skip hidden directories and common ignore patterns
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d not in IGNORED_DIRS)
+
+            relative_root = os.path.relpath(root, repo_path)
+            if relative_root == ".":
+                # At root level, only descend into the relevant folders
+                dirs[:] = [d for d in dirs if d in search_folders]
+            elif not any(folder in relative_root.split(os.sep) for folder in search_folders):
+                dirs[:] = []
+                continue
+
+            for file in sorted(files):
+                # SQL files are PostgreSQL-specific
+                if database_type == "mongodb" and file.endswith('.sql'):
+                    continue
+                if not file.endswith(CODE_EXTENSIONS):
+                    continue
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                snapshot[os.path.relpath(file_path, repo_path)] = [stat.st_mtime_ns, stat.st_size]
+        return snapshot
+
+    def _refresh(self, key: str, repo_path: str, search_folders: Sequence[str], database_type: str) -> Dict:
+        """Bring the scope's index up to date with the files on disk"""
+        snapshot = self.snapshot_files(repo_path, search_folders, database_type)
+        index = self._indexes.get(key)
+        if index is None:
+            index = self.store.get(key)
+        if index is None or index.get("version") != TABLE_INDEX_VERSION:
+            index = {"version": TABLE_INDEX_VERSION, "files": {}, "file_tables": {}, "postings": {}}
+            self.full_builds += 1
+            print(f"   🗂️  Building table index for {repo_path} ({len(snapshot)} files)")
+
+        previous = index["files"]
+        stale = [path for path in previous if path not in snapshot]
+        dirty = [path for path, stat in snapshot.items() if previous.get(path) != stat]
+
+        if stale or dirty:
+            postings = index["postings"]
+            for path in stale + dirty:
+                for table in index["file_tables"].pop(path, []):
+                    files = postings.get(table)
+                    if files is not None:
+                        files.pop(path, None)
+                        if not files:
+                            del postings[table]
+            # Cold builds and large updates fan out to worker processes;
+            # batches are merged as they complete
+            dirty_sizes = {path: snapshot[path][1] for path in dirty}
+            for path, usage_by_table in parallel_scanner.scan(repo_path, dirty_sizes, database_type):
+                index["file_tables"][path] = list(usage_by_table)
+                for table, usages in usage_by_table.items():
+                    postings.setdefault(table, {})[path] = usages
+
+            index["files"] = snapshot
+            self.store.set(key, index)
+            self.files_indexed += len(dirty)
+            if previous:
+                self.incremental_updates += 1
+                print(f"   🗂️  Table index updated: {len(dirty)} changed, {len(stale)} removed file(s)")
+
+        self._indexes[key] = index
+        return index
+
+    def lookup(self, repo_path: str, search_folders: Sequence[str], database_type: str, table_name: str) -> List[Tuple[str, List[Dict]]]:
+        """
+        Files that reference a table / collection
+
+        Args:
+            repo_path: Repository root
+            search_folders: Top-level folders in scope
+            database_type: "postgresql" or "mongodb" (selects the extraction patterns)
+            table_name: Table or collection name (case-insensitive)
+
+        Returns:
+            (repo-relative path, usages) pairs, ordered by path
+        """
+        key = DiskCache.make_key(os.path.abspath(repo_path), sorted(search_folders), database_type)
+        with self._scope_lock(key):
+            index = self._refresh(key, repo_path, search_folders, database_type)
+            files = index["postings"].get(table_name.lower(), {})
+            self.lookups += 1
+            return [(path, list(files[path])) for path in sorted(files)]
+
+    def get_stats(self) -> Dict:
+        """Get index statistics"""
+        return {
+            "scopes_loaded": len(self._indexes),
+            "files_tracked": sum(len(index["files"]) for index in self._indexes.values()),
+            "tables_indexed": sum(len(index["postings"]) for index in self._indexes.values()),
+            "lookups": self.lookups,
+            "full_builds": self.full_builds,
+            "incremental_updates": self.incremental_updates,
+            "files_indexed": self.files_indexed,
+            "scanner": parallel_scanner.get_stats(),
+            "store": self.store.get_stats()
+        }
+
+
+# Global index shared by schema analyses
+table_usage_index = TableUsageIndex()
@@ -0,0 +1,201 @@
+"""
+Materialized blast-radius index
+Keeps every Module / Table / APIEndpoint's reverse dependants (up to a fixed
+depth) in memory, so impact lookups return a stored result instead of
+running a multi-hop traversal per request. Edge writes patch only the
+entries whose reachable set can change.
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.utils.graph_cache import module_tag, table_tag, api_tag
+
+# (dependant key, dependency key, relationship type): dependant -[type]-> dependency
+Edge = Tuple[str, str, str]
+
+
+class BlastRadiusIndex:
+    """Reverse reachability of graph nodes up to max_depth hops"""
+
+    def __init__(self, max_depth: Optional[int] = None):
+        """
+        Initialize blast-radius index
+
+        Args:
+            max_depth: Hops kept per node (default: $BLAST_RADIUS_DEPTH or 3)
+        """
+        self.max_depth = max_depth or int(os.getenv("BLAST_RADIUS_DEPTH", "3"))
+        # node -> {direct dependant: relationship types}
+        self._dependants: Dict[str, Dict[str, Set[str]]] = {}
+        # Materialized results: node -> {dependant: (distance, relationship type)}, in BFS order
+        self._reach: Dict[str, Dict[str, Tuple[int, str]]] = {}
+        # dependant -> nodes whose materialized result contains it
+        self._reached_by: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        # False until loaded from Neo4j; callers fall back to traversals meanwhile
+        self.ready = False
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def load(self, edges: Iterable[Edge]):
+        """Replace the whole graph (materialized results are rebuilt lazily)"""
+        with self._lock:
+            self._dependants = {}
+            self._reach = {}
+            self._reached_by = {}
+            for dependant, dependency, rel_type in edges:
+                self._dependants.setdefault(dependency, {}).setdefault(dependant, set()).add(rel_type)
+            self.ready = True
+
+    def update(self, added: Iterable[Edge] = (), removed: Iterable[Edge] = ()):
+        """
+        Apply edge changes and refresh the affected materialized results
+
+        Adding or removing dependant -> dependency can only change the result
+        of the dependency itself and of nodes that already reach it below
+        max_depth, so only those are recomputed.
+        """
+        with self._lock:
+            if not self.ready:
+                return
+            touched = set()
+            for dependant, dependency, rel_type in removed:
+                rel_types = self._dependants.get(dependency, {}).get(dependant)
+                if rel_types is None or rel_type not in rel_types:
+                    continue
+                rel_types.discard(rel_type)
+                if not rel_types:
+                    del self._dependants[dependency][dependant]
+                touched.add(dependency)
+            for dependant, dependency, rel_type in added:
+                if dependant == dependency:
+                    continue
+                rel_types = self._dependants.setdefault(dependency, {}).setdefault(dependant, set())
+                if rel_type not in rel_types:
+                    rel_types.add(rel_type)
+                    touched.add(dependency)
+
+            stale = set()
+            for node in touched:
+                if node in self._reach:
+                    stale.add(node)
+                for origin in self._reached_by.get(node, ()):
+                    if self._reach[origin][node][0] < self.max_depth:
+                        stale.add(origin)
+
+            for origin in stale:
+                self._materialize(origin)
+            self.refreshes += len(stale)
+
+    def _expand(self, node: str) -> Dict[str, Tuple[int, str]]:
+        """Breadth-first walk over dependants, keeping the first (shortest) hit"""
+        reach: Dict[str, Tuple[int, str]] = {}
+        frontier = [node]
+        for distance in range(1, self.max_depth + 1):
+            next_frontier = []
+            for current in frontier:
+                for dependant, rel_types in self._dependants.get(current, {}).items():
+                    if dependant == node or dependant in reach:
+                        continue
+                    reach[dependant] = (distance, min(rel_types))
+                    next_frontier.append(dependant)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return reach
+
+    def _materialize(self, node: str) -> Dict[str, Tuple[int, str]]:
+        for dependant in self._reach.get(node, ()):
+            origins = self._reached_by.get(dependant)
+            if origins is not None:
+                origins.discard(node)
+                if not origins:
+                    del self._reached_by[dependant]
+
+        reach = self._expand(node)
+        self._reach[node] = reach
+        for dependant in reach:
+            self._reached_by.setdefault(dependant, set()).add(node)
+        return reach
+
+    def get_dependants(self, node: str, max_depth: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Get everything that transitively depends on a node
+
+        Args:
+            node: Node key (module_tag / table_tag / api_tag)
+            max_depth: Hops to include (capped at self.max_depth)
+
+        Returns:
+            List of {"key", "kind", "name", "distance", "relationship"} ordered by
+            distance, or None while the index is not loaded
+        """
+        with self._lock:
+            if not self.ready:
+                return None
+            reach = self._reach.get(node)
+            if reach is None:
+                self.misses += 1
+                reach = self._materialize(node)
+            else:
+                self.hits += 1
+
+            limit = min(max_depth or self.max_depth, self.max_depth)
+            dependants = []
+            for key, (distance, rel_type) in reach.items():
+                # Insertion order is BFS order, so stop at the first deeper entry
+                if distance > limit:
+                    break
+                kind, _, name = key.partition(":")
+                dependants.append({
+                    "key": key,
+                    "kind": kind,
+                    "name": name.split(":")[-1],
+                    "distance": distance,
+                    "relationship": rel_type
+                })
+            return dependants
+
+    def module_dependants(self, module_name: str, max_depth: Optional[int] = None) -> Optional[List[Dict]]:
+        """Dependants of a Module node"""
+        return self.get_dependants(module_tag(module_name), max_depth)
+
+    def table_dependants(self, table_name: str, database: str, max_depth: Optional[int] = None) -> Optional[List[Dict]]:
+        """Dependants of a Table node"""
+        return self.get_dependants(table_tag(table_name, database), max_depth)
+
+    def api_dependants(self, endpoint: str, method: str, max_depth: Optional[int] = None) -> Optional[List[Dict]]:
+        """Dependants of an APIEndpoint node"""
+        return self.get_dependants(api_tag(endpoint, method), max_depth)
+
+    def clear(self):
+        """Forget everything until the next load"""
+        with self._lock:
+            self._dependants = {}
+            self._reach = {}
+            self._reached_by = {}
+            self.ready = False
+
+    def get_stats(self) -> Dict:
+        """Get index statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "ready": self.ready,
+            "max_depth": self.max_depth,
+            "nodes_with_dependants": len(self._dependants),
+            "edges": sum(len(dependants) for dependants in self._dependants.values()),
+            "materialized": len(self._reach),
+            "materialized_entries": sum(len(reach) for reach in self._reach.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "refreshes": self.refreshes
+        }
+
+
+# Global blast-radius index, maintained by Neo4jClient writes
+blast_radius_index = BlastRadiusIndex()
@@ -1,60 +1,172 @@
 """
 Simple in-memory cache for API responses
+Bounded by entry count and an approximate byte budget (LRU eviction),
+with per-entry TTL and per-namespace counters
 """
 
-from typing import Dict, Optional, Any
-from datetime import datetime, timedelta
+import os
+import sys
+import time
 import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any
+
 
 class SimpleCache:
-    def __init__(self):
-        self.cache: Dict[str, Dict[str, Any]] = {}
-        self.ttl_seconds = 3600  # 1 hour default TTL
-    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        sweep_interval: Optional[float] = None
+    ):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Max cached entries (default: $CACHE_MAX_ENTRIES or 1000)
+            max_bytes: Approximate size budget (default: $CACHE_MAX_BYTES or 64 MB)
+            ttl_seconds: Default TTL (default: $CACHE_TTL_SECONDS or 1 hour)
+            sweep_interval: Seconds between full expiry sweeps (default: $CACHE_SWEEP_INTERVAL or 60)
+        """
+        self.max_entries = max_entries or int(os.getenv("CACHE_MAX_ENTRIES", "1000"))
+        self.max_bytes = max_bytes or int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("CACHE_TTL_SECONDS", "3600"))
+        self.sweep_interval = sweep_interval or float(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
+
+        # key -> {"value", "expires_at", "size", "namespace"}, least recently used first
+        self.cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+        self._namespaces: Dict[str, Dict[str, int]] = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        """'analysis:<id>' -> 'analysis'"""
+        return key.split(":", 1)[0] if ":" in key else "default"
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """Approximate memory footprint via the serialized size"""
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return sys.getsizeof(value)
+
+    def _counters(self, namespace: str) -> Dict[str, int]:
+        counters = self._namespaces.get(namespace)
+        if counters is None:
+            counters = {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+            self._namespaces[namespace] = counters
+        return counters
+
+    def _remove(self, key: str, reason: Optional[str] = None):
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return
+        self.total_bytes -= entry["size"]
+        counters = self._counters(entry["namespace"])
+        counters["entries"] -= 1
+        counters["bytes"] -= entry["size"]
+        if reason:
+            counters[reason] += 1
+
+    def _maybe_sweep(self, now: float):
+        """Drop every expired entry at most once per sweep_interval"""
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        for key in [key for key, entry in self.cache.items() if entry["expires_at"] <= now]:
+            self._remove(key, "expirations")
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
-        if key not in self.cache:
-            return None
-        
-        entry = self.cache[key]
-        
-        # Check if expired
-        if datetime.now() > entry["expires_at"]:
-            del self.cache[key]
-            return None
-        
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_sweep(now)
+            counters = self._counters(self._namespace(key))
+
+            entry = self.cache.get(key)
+            if entry is None:
+                counters["misses"] += 1
+                return None
+
+            # Check if expired
+            if entry["expires_at"] <= now:
+                self._remove(key, "expirations")
+                counters["misses"] += 1
+                return None
+
+            self.cache.move_to_end(key)
+            counters["hits"] += 1
+
         print(f"✅ Cache hit: {key}")
         return entry["value"]
-    
+
     def set(self, key: str, value: Any, ttl_seconds: Optional[int] = None):
         """Set value in cache"""
         ttl = ttl_seconds or self.ttl_seconds
-        
-        self.cache[key] = {
-            "value": value,
-            "created_at": datetime.now(),
-            "expires_at": datetime.now() + timedelta(seconds=ttl)
-        }
-        
+        size = self._estimate_size(value)
+        namespace = self._namespace(key)
+
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_sweep(now)
+            self._remove(key)
+
+            if size > self.max_bytes:
+                print(f"⚠️ Not caching {key}: {size} bytes exceeds the {self.max_bytes} byte budget")
+                return
+
+            self.cache[key] = {
+                "value": value,
+                "expires_at": now + ttl,
+                "size": size,
+                "namespace": namespace
+            }
+            self.total_bytes += size
+            counters = self._counters(namespace)
+            counters["entries"] += 1
+            counters["bytes"] += size
+
+            # Evict least recently used entries until both budgets hold
+            while len(self.cache) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.cache))
+                self._remove(oldest, "evictions")
+
         print(f"💾 Cached: {key} (TTL: {ttl}s)")
 
     def delete(self, key: str):
         """Delete value from cache"""
-        if key in self.cache:
-            del self.cache[key]
-            print(f"🗑️ Deleted from cache: {key}")
+        with self._lock:
+            if key not in self.cache:
+                return
+            self._remove(key)
+        print(f"🗑️ Deleted from cache: {key}")
 
     def clear(self):
         """Clear all cache"""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
+            self.total_bytes = 0
+            for counters in self._namespaces.values():
+                counters["entries"] = 0
+                counters["bytes"] = 0
         print("🗑️ Cache cleared")
 
     def get_stats(self) -> Dict:
         """Get cache statistics"""
-        return {
-            "total_entries": len(self.cache),
-            "entries": list(self.cache.keys())
-        }
-    
+        with self._lock:
+            return {
+                "total_entries": len(self.cache),
+                "total_bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "namespaces": {name: dict(counters) for name, counters in self._namespaces.items()}
+            }
+
 # Global cache instance
-cache = SimpleCache()
\ No newline at end of file
+cache = SimpleCache()
@@ -0,0 +1,177 @@
+"""
+Persistent on-disk cache for expensive analysis results
+Entries are JSON files named by a content hash key
+"""
+
+import os
+import time
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+
+class DiskCache:
+    """Content-addressed JSON cache stored in a directory"""
+
+    def __init__(self, name: str, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None):
+        """
+        Initialize disk cache
+
+        Args:
+            name: Cache namespace (used as sub-directory name)
+            cache_dir: Base directory for cache files (default: $ANALYSIS_CACHE_DIR or /tmp/codeflow_cache)
+            max_bytes: Approximate size budget; oldest entries are evicted beyond it
+            ttl_seconds: Optional lifetime of an entry from when it was written (None: never expires)
+        """
+        base_dir = cache_dir or os.getenv("ANALYSIS_CACHE_DIR", "/tmp/codeflow_cache")
+        self.name = name
+        self.cache_dir = Path(base_dir) / name
+        self.max_bytes = max_bytes or int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            print(f"⚠️ Could not create cache directory {self.cache_dir}: {e}")
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a cache key from arbitrary JSON-serializable parts"""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from cache, None on miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if self.ttl_seconds:
+            # Entries of expiring caches carry their write time (mtime is reset on every hit)
+            if not isinstance(value, dict) or time.time() - value.get("written_at", 0) > self.ttl_seconds:
+                self.delete(key)
+                with self._lock:
+                    self.misses += 1
+                    self.expirations += 1
+                return None
+            value = value.get("value")
+
+        # Touch the entry so eviction keeps recently used results
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store value in cache (atomic write)"""
+        path = self._entry_path(key)
+        if self.ttl_seconds:
+            value = {"written_at": time.time(), "value": value}
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Could not write {self.name} cache entry: {e}")
+            return
+
+        with self._lock:
+            self.writes += 1
+        self._evict_if_needed()
+
+    def delete(self, key: str):
+        """Delete a single entry"""
+        try:
+            self._entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove all entries"""
+        for entry in self._list_entries():
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
+    def _list_entries(self):
+        try:
+            return [p for p in self.cache_dir.iterdir() if p.suffix == ".json"]
+        except OSError:
+            return []
+
+    def _evict_if_needed(self):
+        """Evict least recently used entries while over the size budget"""
+        entries = []
+        total = 0
+        for entry in self._list_entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+            except OSError:
+                continue
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        entries = self._list_entries()
+        size_bytes = 0
+        for entry in entries:
+            try:
+                size_bytes += entry.stat().st_size
+            except OSError:
+                continue
+
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "cache_dir": str(self.cache_dir),
+            "entries": len(entries),
+            "size_bytes": size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "ttl_seconds": self.ttl_seconds
+        }
@@ -0,0 +1,365 @@
+"""
+Process-wide source file store
+Extractors, the DEPENDS reference indexer and the AI snippet builders all
+read the same handful of files per analysis. The store reads each version of
+a file (identified by path + mtime + size) from disk once and hands out its
+decoded text, line views and cached extractor results. Memory is bounded by
+an LRU over decoded text and cached results; large files stay memory-mapped
+and only the line windows asked for are decoded.
+"""
+
+import os
+import re
+import mmap
+import stat as stat_module
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Line breaks as text-mode open() sees them (universal newlines)
+_BYTE_LINE_BREAK = re.compile(rb'\r\n?|\n')
+
+
+def decode_source(data: bytes) -> str:
+    """Same text open(path, 'r', encoding='utf-8', errors='ignore').read() returns"""
+    text = data.decode('utf-8', errors='ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def split_lines(text: str) -> List[str]:
+    """Same list readlines() returns for already decoded text"""
+    lines = text.split('\n')
+    last = lines.pop()
+    lines = [line + '\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+class SourceFile:
+    """One version of a file: decoded text plus views derived from it on first use"""
+
+    def __init__(self, path: str, mtime_ns: int, size: int, text: Optional[str] = None, mapping: Optional[mmap.mmap] = None):
+        """
+        Args:
+            path: Absolute path
+            mtime_ns: Modification time the content was read at
+            size: File size in bytes
+            text: Decoded content (small files)
+            mapping: Read-only memory map of the content (large files)
+        """
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self._text = text
+        self._mapping = mapping
+        self._lines: Optional[List[str]] = None
+        self._line_offsets: Optional[List[int]] = None
+        self._results: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+        # Set by the owning FileStore to re-charge the entry when results are added
+        self._on_result: Optional[Callable[["SourceFile"], None]] = None
+
+    @property
+    def is_mapped(self) -> bool:
+        return self._mapping is not None
+
+    @property
+    def text(self) -> str:
+        """Decoded content (decoded on every access for memory-mapped files)"""
+        if self._text is not None:
+            return self._text
+        return decode_source(self._mapping[:])
+
+    def lines(self) -> List[str]:
+        """All lines with their line breaks, like readlines() (treat as read-only)"""
+        if self._lines is None:
+            if self.is_mapped:
+                return split_lines(self.text)
+            self._lines = split_lines(self._text)
+        return self._lines
+
+    def _offsets(self) -> List[int]:
+        """Start offset of every line (characters, or bytes for mapped files)"""
+        if self._line_offsets is None:
+            if self.is_mapped:
+                offsets = [0] + [match.end() for match in _BYTE_LINE_BREAK.finditer(self._mapping)]
+                end = len(self._mapping)
+                if not end:
+                    return []
+            else:
+                offsets = [0] + [match.end() for match in re.finditer('\n', self._text)]
+                end = len(self._text)
+            if offsets[-1] == end or (self.is_mapped and not decode_source(self._mapping[offsets[-1]:])):
+                # A trailing line break does not start another line (nor do
+                # trailing bytes that decode to nothing)
+                offsets.pop()
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    @property
+    def line_count(self) -> int:
+        if self._lines is not None:
+            return len(self._lines)
+        return len(self._offsets())
+
+    def line_number_at(self, offset: int) -> int:
+        """1-based line number of a character offset (byte offset for mapped files)"""
+        return bisect.bisect_right(self._offsets(), offset)
+
+    def window(self, start: int, end: int) -> List[str]:
+        """
+        Lines [start, end) (0-based), same as readlines()[start:end]
+
+        Mapped files are split on their raw line breaks, so a file with invalid
+        UTF-8 bytes between a CR and an LF counts one line more than readlines().
+        """
+        if not self.is_mapped:
+            return self.lines()[start:end]
+
+        offsets = self._offsets()
+        start = max(0, start)
+        end = min(len(offsets), end)
+        if start >= end:
+            return []
+        stop = offsets[end] if end < len(offsets) else len(self._mapping)
+        return split_lines(decode_source(self._mapping[offsets[start]:stop]))
+
+    def result(self, key: Any, compute: Callable[["SourceFile"], Any]) -> Any:
+        """
+        Extractor output for this file version, computed once
+
+        Args:
+            key: Result name (e.g. "table_usage")
+            compute: Called with this file on the first request
+
+        Returns:
+            The cached value (shared between callers, treat as read-only)
+        """
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+        value = compute(self)
+        with self._lock:
+            added = key not in self._results
+            value = self._results.setdefault(key, value)
+        if added and self._on_result is not None:
+            self._on_result(self)
+        return value
+
+    @property
+    def memory_cost(self) -> int:
+        """Bytes charged against the store budget (decoded text and lines, cached results)"""
+        # Mapped pages belong to the OS page cache and line offset tables are not
+        # counted; each cached result is estimated at one copy of the file
+        text_cost = 0 if self.is_mapped else 2 * self.size
+        return text_cost + self.size * len(self._results)
+
+
+def read_source_file(path: str, mmap_threshold: Optional[int] = None) -> Optional[SourceFile]:
+    """
+    Read a file without caching it
+
+    Args:
+        path: File path
+        mmap_threshold: Map files at least this large instead of decoding them (None: never)
+
+    Returns:
+        SourceFile, or None if the path is not a readable file
+    """
+    path = os.path.abspath(path)
+    try:
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if mmap_threshold is not None and stat.st_size >= mmap_threshold:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                return SourceFile(path, stat.st_mtime_ns, stat.st_size, mapping=mapping)
+            return SourceFile(path, stat.st_mtime_ns, stat.st_size, text=decode_source(f.read()))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Error reading {path}: {e}")
+        return None
+
+
+class FileStore:
+    """Bounded LRU of SourceFile, validated against the file's mtime and size"""
+
+    def __init__(self, max_bytes: Optional[int] = None, mmap_threshold: Optional[int] = None, max_mapped: Optional[int] = None):
+        """
+        Initialize file store
+
+        Args:
+            max_bytes: Memory budget for decoded files and their results (default: $FILE_STORE_MAX_BYTES or 128 MB)
+            mmap_threshold: Files at least this large are memory-mapped (default: $FILE_STORE_MMAP_BYTES or 4 MB)
+            max_mapped: Max memory-mapped files kept open (default: $FILE_STORE_MAX_MAPPED or 32)
+        """
+        self.max_bytes = max_bytes or int(os.getenv("FILE_STORE_MAX_BYTES", str(128 * 1024 * 1024)))
+        self.mmap_threshold = mmap_threshold or int(os.getenv("FILE_STORE_MMAP_BYTES", str(4 * 1024 * 1024)))
+        self.max_mapped = max_mapped or int(os.getenv("FILE_STORE_MAX_MAPPED", "32"))
+
+        self._files: "OrderedDict[str, SourceFile]" = OrderedDict()
+        self._bytes = 0
+        # Cost each entry was charged, so removal subtracts exactly what was added
+        self._charged: Dict[str, int] = {}
+        self._mapped = 0
+        # Candidate path lists (Docker / local fallbacks) -> the path that existed
+        self._resolved: Dict[Tuple[str, ...], str] = {}
+        self._lock = threading.Lock()
+        # Striped so concurrent requests for one file read it once without a lock per path
+        self._read_locks = [threading.Lock() for _ in range(64)]
+
+        self.hits = 0
+        self.reads = 0
+        self.reloads = 0
+        self.evictions = 0
+        self.bytes_read = 0
+
+    def get(self, path: str) -> Optional[SourceFile]:
+        """
+        Current version of a file
+
+        Args:
+            path: File path (relative paths are resolved against the working directory)
+
+        Returns:
+            SourceFile, or None if the path is not a readable file
+        """
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not stat_module.S_ISREG(stat.st_mode):
+            return None
+
+        source = self._lookup(path, stat)
+        if source is not None:
+            return source
+
+        with self._read_locks[hash(path) % len(self._read_locks)]:
+            # Another thread may have read it while we waited
+            source = self._lookup(path, stat, count=False)
+            if source is not None:
+                return source
+
+            source = read_source_file(path, self.mmap_threshold)
+            if source is None:
+                return None
+            self._insert(source)
+            return source
+
+    def _lookup(self, path: str, stat: os.stat_result, count: bool = True) -> Optional[SourceFile]:
+        with self._lock:
+            source = self._files.get(path)
+            if source is None:
+                return None
+            if source.mtime_ns != stat.st_mtime_ns or source.size != stat.st_size:
+                # File changed on disk; the next read replaces this version
+                return None
+            self._files.move_to_end(path)
+            if count:
+                self.hits += 1
+            return source
+
+    def _insert(self, source: SourceFile):
+        with self._lock:
+            self.reads += 1
+            self.bytes_read += source.size
+            if self._remove(source.path):
+                self.reloads += 1
+            self._files[source.path] = source
+            self._charged[source.path] = source.memory_cost
+            self._bytes += self._charged[source.path]
+            self._mapped += source.is_mapped
+            source._on_result = self._recharge
+            self._evict()
+
+    def _recharge(self, source: SourceFile):
+        """Update an entry's charge after an extractor result was cached on it"""
+        with self._lock:
+            if self._files.get(source.path) is not source:
+                # Evicted or replaced meanwhile; its charge is already gone
+                return
+            cost = source.memory_cost
+            self._bytes += cost - self._charged[source.path]
+            self._charged[source.path] = cost
+            self._evict()
+
+    def _evict(self):
+        while len(self._files) > 1 and (self._bytes > self.max_bytes or self._mapped > self.max_mapped):
+            # Mapped files are not closed explicitly: callers may still hold
+            # them, and the map is released once the last reference goes
+            self._remove(next(iter(self._files)))
+            self.evictions += 1
+
+    def _remove(self, path: str) -> bool:
+        source = self._files.pop(path, None)
+        if source is None:
+            return False
+        self._bytes -= self._charged.pop(path)
+        self._mapped -= source.is_mapped
+        return True
+
+    def find(self, candidates: Iterable[str]) -> Optional[SourceFile]:
+        """
+        First candidate path that is a readable file
+
+        The winning path is remembered per candidate list, so repeated
+        lookups stat one path instead of probing every fallback.
+        """
+        candidates = tuple(path for path in candidates if path)
+        resolved = self._resolved.get(candidates)
+        if resolved is not None:
+            source = self.get(resolved)
+            if source is not None:
+                return source
+
+        for path in candidates:
+            source = self.get(path)
+            if source is not None:
+                with self._lock:
+                    if len(self._resolved) >= 4096:
+                        self._resolved.clear()
+                    self._resolved[candidates] = path
+                return source
+        return None
+
+    def read_text(self, path: str) -> Optional[str]:
+        """Decoded content of a file, or None if it can't be read"""
+        source = self.get(path)
+        return source.text if source is not None else None
+
+    def clear(self):
+        """Drop every cached file"""
+        with self._lock:
+            self._files.clear()
+            self._charged.clear()
+            self._resolved.clear()
+            self._bytes = 0
+            self._mapped = 0
+
+    def get_stats(self) -> Dict:
+        """Get store statistics"""
+        lookups = self.hits + self.reads
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "mapped_files": self._mapped,
+                "memory_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "mmap_threshold": self.mmap_threshold,
+                "hits": self.hits,
+                "reads": self.reads,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "bytes_read": self.bytes_read
+            }
+
+
+# Global file store shared by extractors and AI snippet builders
+file_store = FileStore()
@@ -0,0 +1,132 @@
+"""
+In-process cache for Neo4j graph queries
+Entries are tagged with the nodes they were built from and dropped when a
+write touches one of those nodes, instead of expiring on a timer
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+# Returned by get() on a miss (cached results may legitimately be empty or None)
+MISS = object()
+
+
+def module_tag(name: str) -> str:
+    """Invalidation tag for a Module node"""
+    return f"module:{name}"
+
+
+def table_tag(name: str, database: str) -> str:
+    """Invalidation tag for a Table node"""
+    return f"table:{database}:{name}"
+
+
+def api_tag(endpoint: str, method: str) -> str:
+    """Invalidation tag for an APIEndpoint node"""
+    return f"api:{method}:{endpoint}"
+
+
+class GraphQueryCache:
+    """Bounded LRU of graph query results with tag-based invalidation"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Initialize graph cache
+
+        Args:
+            max_entries: Max cached query results (default: $GRAPH_CACHE_MAX_ENTRIES or 512)
+        """
+        self.max_entries = max_entries or int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", "512"))
+        self._entries: "OrderedDict[Tuple, Tuple[Any, Set[str]]]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so reads that raced a write aren't stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Any:
+        """Get cached value, or MISS"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Tuple, value: Any, tags: Iterable[str], generation: int):
+        """
+        Store a query result
+
+        Args:
+            key: Query identity (method name + arguments)
+            value: Query result
+            tags: Node tags the result depends on
+            generation: self.generation read before the query ran; the value
+                is dropped if a write invalidated anything since
+        """
+        tags = set(tags)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._remove(key)
+            self._entries[key] = (value, tags)
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def invalidate(self, tags: Iterable[str]):
+        """Drop every entry built from any of the given nodes"""
+        with self._lock:
+            self.generation += 1
+            for tag in set(tags):
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def get_stats(self) -> Dict:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "tracked_tags": len(self._keys_by_tag),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions
+        }
+
+
+# Global graph query cache
+graph_cache = GraphQueryCache()
@@ -1,6 +1,52 @@
 from neo4j import AsyncGraphDatabase
 import os
-from typing import Optional, Dict, List
+import re
+import copy
+import json
+import time
+import base64
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, List, Callable
+
+from app.utils.graph_cache import graph_cache, module_tag, table_tag, api_tag, MISS
+from app.utils.blast_radius_index import blast_radius_index
+
+# Relationship types are interpolated into Cypher, so they must be plain identifiers
+REL_TYPE_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Uniqueness constraints backing every MERGE/MATCH key: (name, label, properties)
+SCHEMA_CONSTRAINTS = [
+    ("module_name_unique", "Module", ("name",)),
+    ("database_name_unique", "Database", ("name",)),
+    ("table_name_database_unique", "Table", ("name", "database")),
+    ("api_endpoint_method_unique", "APIEndpoint", ("endpoint", "method")),
+    ("code_reference_edge_key_unique", "CodeReference", ("edge_key",)),
+]
+
+# Extra indexes for lookups that don't use a full constraint key
+SCHEMA_INDEXES = [
+    ("table_database_index", "Table", ("database",)),
+]
+
+
+class UnitOfWork:
+    """One session and explicit transaction shared by every write in a storage phase"""
+
+    def __init__(self, tx):
+        self.tx = tx
+        # Run after commit (cache / index maintenance for the written nodes)
+        self.after_commit: List[Callable[[], None]] = []
+        # Run after commit or rollback
+        self.after_close: List[Callable[[], None]] = []
+        self.writes = 0
+
+
+# Unit of work of the current task, if any. Tasks started inside a unit inherit it,
+# so don't fan queries out concurrently there: a transaction runs one query at a time.
+_current_unit: ContextVar[Optional[UnitOfWork]] = ContextVar("neo4j_unit_of_work", default=None)
+
 
 class Neo4jClient:
     """Neo4j database client"""
@@ -10,13 +56,36 @@ class Neo4jClient:
         self.uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
         self.user = os.getenv("NEO4J_USER", "neo4j")
         self.password = os.getenv("NEO4J_PASSWORD", "codeflow123")
+        # Max distinct neighbours returned per direction by blast-radius queries
+        self.dependency_node_budget = int(os.getenv("NEO4J_DEPENDENCY_NODE_BUDGET", "500"))
+        # Detected on first traversal; None until known
+        self._apoc_available: Optional[bool] = None
+
+        # Connection pool sizing; sessions are gated at the same size so
+        # waiting for a connection is measured here rather than hidden in the driver
+        self.max_pool_size = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+        self.acquisition_timeout = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+        self._pool_gate = asyncio.Semaphore(self.max_pool_size)
+        self._pool_stats = {
+            "in_use": 0,
+            "waiting": 0,
+            "acquisitions": 0,
+            "acquisition_timeouts": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "units_active": 0,
+            "units_committed": 0,
+            "units_rolled_back": 0
+        }
     
     async def connect(self):
         """Initialize Neo4j connection"""
         try:
             self.driver = AsyncGraphDatabase.driver(
                 self.uri,
-                auth=(self.user, self.password)
+                auth=(self.user, self.password),
+                max_connection_pool_size=self.max_pool_size,
+                connection_acquisition_timeout=self.acquisition_timeout
             )
             # Test connection
             async with self.driver.session() as session:
@@ -26,184 +95,929 @@ class Neo4jClient:
         except Exception as e:
             print(f"❌ Neo4j connection failed: {e}")
             raise
+
+        # Decided up front so traversals inside a unit of work never probe for it
+        await self._check_apoc()
+
+        if os.getenv("NEO4J_ENSURE_SCHEMA", "true").lower() == "true":
+            await self.ensure_schema()
+
+        if os.getenv("BLAST_RADIUS_INDEX", "true").lower() == "true":
+            await self.load_blast_radius_index()
+
+    async def ensure_schema(self):
+        """
+        Idempotently create the constraints and indexes graph writes rely on
+
+        A constraint that can't be created (e.g. existing duplicate nodes)
+        falls back to a plain index on the same properties so lookups stay indexed.
+        """
+        async with self._session() as session:
+            for name, label, properties in SCHEMA_CONSTRAINTS:
+                keys = ", ".join(f"n.{prop}" for prop in properties)
+                try:
+                    result = await session.run(
+                        f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE ({keys}) IS UNIQUE"
+                    )
+                    await result.consume()
+                except Exception as e:
+                    print(f"⚠️ Could not create constraint {name}, falling back to an index: {e}")
+                    try:
+                        result = await session.run(f"CREATE INDEX {name}_index IF NOT EXISTS FOR (n:{label}) ON ({keys})")
+                        await result.consume()
+                    except Exception as index_error:
+                        print(f"⚠️ Could not create index {name}_index: {index_error}")
+
+            for name, label, properties in SCHEMA_INDEXES:
+                keys = ", ".join(f"n.{prop}" for prop in properties)
+                try:
+                    result = await session.run(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON ({keys})")
+                    await result.consume()
+                except Exception as e:
+                    print(f"⚠️ Could not create index {name}: {e}")
+
+        print("✅ Neo4j schema constraints and indexes ensured")
+
+    async def load_blast_radius_index(self):
+        """Load every dependency edge into the in-process blast-radius index"""
+        query = """
+        MATCH (a)-[r]->(b)
+        WHERE (a:Module AND (b:Module OR b:Table OR b:APIEndpoint)) OR (a:Table AND b:Table)
+        RETURN CASE WHEN a:Module THEN 'module:' + a.name
+                    ELSE 'table:' + a.database + ':' + a.name END as dependant,
+               CASE WHEN b:Module THEN 'module:' + b.name
+                    WHEN b:Table THEN 'table:' + b.database + ':' + b.name
+                    ELSE 'api:' + b.method + ':' + b.endpoint END as dependency,
+               type(r) as rel_type
+        """
+        try:
+            edges = []
+            async with self._session() as session:
+                result = await session.run(query)
+                async for record in result:
+                    if record["dependant"] and record["dependency"]:
+                        edges.append((record["dependant"], record["dependency"], record["rel_type"]))
+            blast_radius_index.load(edges)
+            print(f"✅ Blast-radius index loaded ({len(edges)} edges, depth {blast_radius_index.max_depth})")
+        except Exception as e:
+            # Impact queries fall back to graph traversals
+            blast_radius_index.clear()
+            print(f"⚠️ Could not load blast-radius index: {e}")
+
+    async def migrate_edge_properties(self, batch_size: int = 1000) -> int:
+        """
+        One-shot migration of legacy dependency edges
+
+        Converts comma-joined `line_number` strings to native `line_numbers`
+        lists and moves " | "-joined `code_reference` strings to CodeReference
+        nodes. Runs in batches until no legacy edge is left; safe to re-run.
+
+        Returns:
+            Number of edges migrated
+        """
+        query = """
+        MATCH (source:Module)-[r]->(target:Module)
+        WHERE r.line_number IS NOT NULL OR r.code_reference IS NOT NULL
+        WITH source, r, target LIMIT $batch_size
+        WITH source, r, target,
+             [x IN split(toString(coalesce(r.line_number, '')), ',')
+                WHERE trim(x) =~ '[0-9]+' AND toInteger(trim(x)) > 0 | toInteger(trim(x))] AS line_numbers,
+             [x IN split(coalesce(r.code_reference, ''), ' | ') WHERE trim(x) <> '' | trim(x)] AS references
+        MERGE (c:CodeReference {edge_key: source.name + '|' + type(r) + '|' + target.name})
+        SET c.references = references,
+            r.line_numbers = line_numbers
+        REMOVE r.line_number, r.code_reference
+        RETURN count(r) AS migrated
+        """
+        total = 0
+        async with self._session() as session:
+            while True:
+                result = await session.run(query, batch_size=batch_size)
+                record = await result.single()
+                migrated = record["migrated"] if record else 0
+                if not migrated:
+                    break
+                total += migrated
+                print(f"   Migrated {total} dependency edges...")
+        graph_cache.clear()
+        print(f"✅ Edge property migration complete ({total} edges)")
+        return total
+
+    async def get_schema_status(self) -> Dict:
+        """Get population state of the graph's indexes (constraint-backed ones included)"""
+        async with self._session() as session:
+            result = await session.run("""
+            SHOW INDEXES
+            YIELD name, type, labelsOrTypes, properties, state, populationPercent, owningConstraint
+            WHERE type <> 'LOOKUP'
+            RETURN name, type, labelsOrTypes, properties, state, populationPercent, owningConstraint
+            ORDER BY name
+            """)
+            indexes = [
+                {
+                    "name": record["name"],
+                    "type": record["type"],
+                    "labels": record["labelsOrTypes"],
+                    "properties": record["properties"],
+                    "state": record["state"],
+                    "population_percent": record["populationPercent"],
+                    "constraint": record["owningConstraint"]
+                }
+                async for record in result
+            ]
+
+        return {
+            "ready": all(index["state"] == "ONLINE" for index in indexes),
+            "indexes": indexes
+        }
     
     async def close(self):
         """Close Neo4j connection"""
         if self.driver:
             await self.driver.close()
             print("👋 Neo4j connection closed")
+
+    @asynccontextmanager
+    async def _acquire(self):
+        """Hold one of max_pool_size connection slots, recording how long it took"""
+        stats = self._pool_stats
+        stats["waiting"] += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._pool_gate.acquire(), timeout=self.acquisition_timeout)
+        except asyncio.TimeoutError:
+            stats["acquisition_timeouts"] += 1
+            raise TimeoutError(
+                f"Timed out after {self.acquisition_timeout}s waiting for a Neo4j connection "
+                f"({stats['in_use']}/{self.max_pool_size} in use)"
+            )
+        finally:
+            stats["waiting"] -= 1
+
+        wait_ms = (time.perf_counter() - started) * 1000
+        stats["acquisitions"] += 1
+        stats["total_wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        stats["in_use"] += 1
+        try:
+            yield
+        finally:
+            stats["in_use"] -= 1
+            self._pool_gate.release()
+
+    @asynccontextmanager
+    async def _pooled_session(self):
+        """A new session holding one connection slot"""
+        async with self._acquire():
+            async with self.driver.session() as session:
+                yield session
+
+    @asynccontextmanager
+    async def _session(self):
+        """
+        Session for reads: the current unit-of-work transaction, or a pooled session
+
+        Reads inside a unit see its uncommitted writes and don't take a second
+        connection slot while the unit holds one.
+        """
+        unit = _current_unit.get()
+        if unit is not None:
+            yield unit.tx
+            return
+        async with self._pooled_session() as session:
+            yield session
+
+    @asynccontextmanager
+    async def _write_session(self):
+        """The current unit-of-work transaction, or a pooled auto-commit session"""
+        unit = _current_unit.get()
+        if unit is not None:
+            unit.writes += 1
+            yield unit.tx
+            return
+        async with self._pooled_session() as session:
+            yield session
+
+    async def _execute_write(self, work, *args):
+        """Run a transaction function in the current unit of work, or in its own managed transaction"""
+        unit = _current_unit.get()
+        if unit is not None:
+            unit.writes += 1
+            return await work(unit.tx, *args)
+        async with self._pooled_session() as session:
+            return await session.execute_write(work, *args)
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        """
+        Run every query in the block on one session and one transaction
+
+        Reads join the transaction too, so they see the block's own writes.
+        Cache invalidation and blast-radius updates for the written nodes are
+        applied once, after commit; an exception rolls everything back.
+        Nested units join the outer one.
+
+        Usage:
+            async with neo4j_client.unit_of_work():
+                await neo4j_client.create_table_node(...)
+                await neo4j_client.create_table_usage(...)
+        """
+        unit = _current_unit.get()
+        if unit is not None:
+            yield unit
+            return
+
+        stats = self._pool_stats
+        async with self._pooled_session() as session:
+            tx = await session.begin_transaction()
+            unit = UnitOfWork(tx)
+            token = _current_unit.set(unit)
+            stats["units_active"] += 1
+            try:
+                yield unit
+                await tx.commit()
+            except BaseException:
+                await tx.rollback()
+                stats["units_rolled_back"] += 1
+                raise
+            else:
+                stats["units_committed"] += 1
+                for callback in unit.after_commit:
+                    callback()
+            finally:
+                stats["units_active"] -= 1
+                _current_unit.reset(token)
+                for callback in unit.after_close:
+                    callback()
+
+    def get_pool_stats(self) -> Dict:
+        """Get connection pool and unit-of-work statistics"""
+        stats = self._pool_stats
+        acquisitions = stats["acquisitions"]
+        return {
+            "max_pool_size": self.max_pool_size,
+            "acquisition_timeout": self.acquisition_timeout,
+            "in_use": stats["in_use"],
+            "idle": self.max_pool_size - stats["in_use"],
+            "waiting": stats["waiting"],
+            "utilization": round(stats["in_use"] / self.max_pool_size, 3) if self.max_pool_size else 0.0,
+            "acquisitions": acquisitions,
+            "acquisition_timeouts": stats["acquisition_timeouts"],
+            "avg_wait_ms": round(stats["total_wait_ms"] / acquisitions, 2) if acquisitions else 0.0,
+            "max_wait_ms": round(stats["max_wait_ms"], 2),
+            "units_of_work": {
+                "active": stats["units_active"],
+                "committed": stats["units_committed"],
+                "rolled_back": stats["units_rolled_back"]
+            }
+        }
     
     async def create_module_node(self, name: str, properties: dict):
         """Create a module node"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = """
             MERGE (m:Module {name: $name})
             SET m += $properties
             RETURN m
             """
             result = await session.run(query, name=name, properties=properties)
-            return await result.single()
+            record = await result.single()
+            self._invalidate_graph(modules=[name])
+            return record
     
     async def create_dependency(self, source: str, target: str, rel_type: str, line_number: str = "0", code_reference: str = ""):
         """Create dependency relationship with line number and code reference"""
-        async with self.driver.session() as session:
+        return await self.create_dependencies([{
+            "source": source,
+            "target": target,
+            "type": rel_type,
+            "line_numbers": [ln for ln in self._parse_line_numbers(line_number) if ln > 0],
+            "code_references": [code_reference] if code_reference else []
+        }])
+    
+    @staticmethod
+    def edge_key(source: str, rel_type: str, target: str) -> str:
+        """Key linking a dependency edge to its CodeReference node"""
+        return f"{source}|{rel_type}|{target}"
+
+    @staticmethod
+    def _edge_endpoints(dependencies: List[Dict]) -> List[str]:
+        return [dep["source"] for dep in dependencies] + [dep["target"] for dep in dependencies]
+
+    def _invalidate_graph(self, modules: List[str] = (), tables: List[tuple] = ()):
+        """Drop cached graph reads that include any of the written nodes (deferred inside a unit of work)"""
+        tags = [module_tag(name) for name in modules] + [table_tag(name, database) for name, database in tables]
+        unit = _current_unit.get()
+        if unit is not None:
+            unit.after_close.append(lambda: graph_cache.invalidate(tags))
+            return
+        graph_cache.invalidate(tags)
+
+    def _update_blast_radius(self, added: List[tuple] = (), removed: List[tuple] = ()):
+        """Apply edge changes to the blast-radius index (after commit inside a unit of work)"""
+        unit = _current_unit.get()
+        if unit is not None:
+            unit.after_commit.append(lambda: blast_radius_index.update(added=added, removed=removed))
+            return
+        blast_radius_index.update(added=added, removed=removed)
+
+    @staticmethod
+    def _cache_get(key: tuple):
+        """Cached graph read, or MISS inside a unit of work (its reads may see uncommitted writes)"""
+        if _current_unit.get() is not None:
+            return MISS
+        return graph_cache.get(key)
+
+    @staticmethod
+    def _cache_set(key: tuple, value, tags: List[str], generation: int):
+        """Cache a graph read, unless it was made inside a unit of work"""
+        if _current_unit.get() is not None:
+            return
+        graph_cache.set(key, value, tags, generation)
+
+    @staticmethod
+    def _module_edges(dependencies: List[Dict]) -> List[tuple]:
+        """Module dependency dicts as blast-radius index edges"""
+        return [
+            (module_tag(dep["source"]), module_tag(dep["target"]), dep.get("type", ""))
+            for dep in dependencies
+        ]
+
+    @staticmethod
+    def _usage_edges(usages: List[Dict]) -> List[tuple]:
+        """USES_TABLE usage dicts as blast-radius index edges"""
+        return [
+            (module_tag(usage["source_file"]), table_tag(usage["target_table"], usage["database"]), "USES_TABLE")
+            for usage in usages
+        ]
+
+    @staticmethod
+    def _group_by_rel_type(dependencies: List[Dict], fields: tuple) -> Dict[str, List[Dict]]:
+        """Group edges by relationship type, dropping types that are not safe to interpolate"""
+        grouped: Dict[str, List[Dict]] = {}
+        for dep in dependencies:
+            rel_type = dep.get("type", "")
+            if not REL_TYPE_PATTERN.fullmatch(rel_type):
+                print(f"⚠️ Skipping dependency with invalid type: {rel_type}")
+                continue
+            grouped.setdefault(rel_type, []).append({field: dep.get(field) for field in fields})
+        return grouped
+
+    @staticmethod
+    async def _merge_modules_tx(tx, modules: List[Dict]) -> int:
+        query = """
+        UNWIND $modules AS module
+        MERGE (m:Module {name: module.name})
+        SET m += module.properties
+        """
+        result = await tx.run(query, modules=modules)
+        summary = await result.consume()
+        return summary.counters.nodes_created
+
+    @classmethod
+    async def _merge_dependencies_tx(cls, tx, dependencies: List[Dict]) -> List[Dict]:
+        """Merge dependency edges; returns the edges actually written (both endpoints existed)"""
+        grouped = cls._group_by_rel_type(dependencies, ("source", "target", "line_numbers", "code_references"))
+        written = []
+        for rel_type, edges in grouped.items():
+            for edge in edges:
+                edge["edge_key"] = cls.edge_key(edge["source"], rel_type, edge["target"])
+                edge["line_numbers"] = edge["line_numbers"] or []
+                edge["code_references"] = edge["code_references"] or []
+            # Edges carry only small native properties; code bodies live on
+            # CodeReference nodes that traversals never touch
             query = f"""
-            MATCH (source:Module {{name: $source}})
-            MATCH (target:Module {{name: $target}})
+            UNWIND $edges AS edge
+            MATCH (source:Module {{name: edge.source}})
+            MATCH (target:Module {{name: edge.target}})
             MERGE (source)-[r:{rel_type}]->(target)
-            SET r.line_number = $line_number,
-                r.code_reference = $code_reference,
+            SET r.line_numbers = edge.line_numbers,
                 r.last_updated = datetime()
-            RETURN r
+            REMOVE r.line_number, r.code_reference
+            MERGE (c:CodeReference {{edge_key: edge.edge_key}})
+            SET c.references = edge.code_references
+            RETURN edge.source AS source, edge.target AS target
             """
+            result = await tx.run(query, edges=edges)
+            written.extend([
+                {"source": record["source"], "target": record["target"], "type": rel_type}
+                async for record in result
+            ])
+        return written
+
+    @classmethod
+    async def _delete_dependencies_tx(cls, tx, dependencies: List[Dict]) -> List[Dict]:
+        """Delete dependency edges; returns the edges that existed and were deleted"""
+        grouped = cls._group_by_rel_type(dependencies, ("source", "target"))
+        deleted = []
+        for rel_type, pairs in grouped.items():
+            query = f"""
+            UNWIND $pairs AS pair
+            MATCH (:Module {{name: pair.source}})-[r:{rel_type}]->(:Module {{name: pair.target}})
+            DELETE r
+            RETURN pair.source AS source, pair.target AS target
+            """
+            result = await tx.run(query, pairs=pairs)
+            deleted.extend([
+                {"source": record["source"], "target": record["target"], "type": rel_type}
+                async for record in result
+            ])
+
+            keys = [cls.edge_key(pair["source"], rel_type, pair["target"]) for pair in pairs]
+            result = await tx.run(
+                "UNWIND $keys AS key MATCH (c:CodeReference {edge_key: key}) DELETE c",
+                keys=keys
+            )
+            await result.consume()
+        return deleted
+
+    @staticmethod
+    async def _merge_tables_tx(tx, tables: List[Dict]) -> int:
+        query = """
+        UNWIND $tables AS tbl
+        MATCH (db:Database {name: tbl.database})
+        MERGE (t:Table {name: tbl.name, database: tbl.database})
+        SET t += tbl.properties
+        MERGE (t)-[:BELONGS_TO]->(db)
+        RETURN count(t) as written
+        """
+        result = await tx.run(query, tables=tables)
+        record = await result.single()
+        return record["written"] if record else 0
+
+    @staticmethod
+    async def _merge_table_usages_tx(tx, usages: List[Dict]) -> List[Dict]:
+        """Merge USES_TABLE edges; returns the usages actually written (module and table existed)"""
+        query = """
+        UNWIND $usages AS usage
+        MATCH (m:Module {name: usage.source_file})
+        MATCH (t:Table {name: usage.target_table, database: usage.database})
+        MERGE (m)-[r:USES_TABLE]->(t)
+        SET r.usage_count = usage.usage_count,
+            r.column_name = usage.column_name,
+            r.last_updated = datetime()
+        RETURN usage.source_file AS source_file, usage.target_table AS target_table, usage.database AS database
+        """
+        result = await tx.run(query, usages=usages)
+        return [record.data() async for record in result]
+
+    async def create_module_nodes(self, modules: List[Dict]) -> int:
+        """
+        Create or update many module nodes in one write
+
+        Args:
+            modules: List of {"name": str, "properties": dict}
+
+        Returns:
+            Number of nodes created
+        """
+        if not modules:
+            return 0
+        created = await self._execute_write(self._merge_modules_tx, modules)
+        self._invalidate_graph(modules=[module["name"] for module in modules])
+        return created
+
+    async def create_dependencies(self, dependencies: List[Dict]) -> int:
+        """
+        Create or update many dependency relationships, one UNWIND per relationship type
+
+        Args:
+            dependencies: List of {"source", "target", "type", "line_numbers", "code_references"}
+
+        Returns:
+            Number of relationships written
+        """
+        if not dependencies:
+            return 0
+        written = await self._execute_write(self._merge_dependencies_tx, dependencies)
+        self._invalidate_graph(modules=self._edge_endpoints(dependencies))
+        # Only edges that reached the graph; skipped types and missing endpoints stay out
+        self._update_blast_radius(added=self._module_edges(written))
+        return len(written)
+
+    async def delete_dependencies(self, dependencies: List[Dict]) -> int:
+        """Delete dependency relationships that no longer exist in the code"""
+        if not dependencies:
+            return 0
+        deleted = await self._execute_write(self._delete_dependencies_tx, dependencies)
+        self._invalidate_graph(modules=self._edge_endpoints(dependencies))
+        self._update_blast_radius(removed=self._module_edges(deleted))
+        return len(deleted)
+
+    async def create_table_usages(self, usages: List[Dict]) -> int:
+        """
+        Create or update many Module -USES_TABLE-> Table relationships
+
+        Args:
+            usages: List of {"source_file", "target_table", "database", "usage_count", "column_name"}
+
+        Returns:
+            Number of relationships written
+        """
+        if not usages:
+            return 0
+        written = await self._execute_write(self._merge_table_usages_tx, usages)
+        self._invalidate_graph(
+            modules=[usage["source_file"] for usage in usages],
+            tables=[(usage["target_table"], usage["database"]) for usage in usages]
+        )
+        self._update_blast_radius(added=self._usage_edges(written))
+        return len(written)
+
+    async def store_dependency_graph(
+        self,
+        modules: List[Dict],
+        dependencies: List[Dict],
+        removed_dependencies: List[Dict] = None,
+        tables: List[Dict] = None,
+        table_usages: List[Dict] = None
+    ) -> Dict[str, int]:
+        """
+        Write one analysis' graph changes in a single transaction
+
+        Args:
+            modules: Module nodes, as for create_module_nodes
+            dependencies: Dependency edges, as for create_dependencies
+            removed_dependencies: Edges to delete ({"source", "target", "type"})
+            tables: Table nodes ({"name", "database", "properties"})
+            table_usages: USES_TABLE edges, as for create_table_usages
+
+        Returns:
+            Counts of written / deleted items
+        """
+        # Edges the transaction actually wrote, for the blast-radius index
+        written_edges: Dict[str, List[tuple]] = {}
+
+        async def write_graph(tx):
+            # Reset on every attempt: the driver may retry the whole function
+            written_edges.update(added=[], removed=[])
+            counts = {"modules_created": 0, "dependencies_written": 0, "dependencies_deleted": 0,
+                      "tables_written": 0, "table_usages_written": 0}
+            if modules:
+                counts["modules_created"] = await self._merge_modules_tx(tx, modules)
+            if removed_dependencies:
+                deleted = await self._delete_dependencies_tx(tx, removed_dependencies)
+                counts["dependencies_deleted"] = len(deleted)
+                written_edges["removed"] = self._module_edges(deleted)
+            if dependencies:
+                written = await self._merge_dependencies_tx(tx, dependencies)
+                counts["dependencies_written"] = len(written)
+                written_edges["added"] += self._module_edges(written)
+            if tables:
+                counts["tables_written"] = await self._merge_tables_tx(tx, tables)
+            if table_usages:
+                written = await self._merge_table_usages_tx(tx, table_usages)
+                counts["table_usages_written"] = len(written)
+                written_edges["added"] += self._usage_edges(written)
+            return counts
+
+        counts = await self._execute_write(write_graph)
+
+        # Only after commit: cached reads built from these nodes are now stale
+        self._invalidate_graph(
+            modules=[module["name"] for module in modules or []]
+            + self._edge_endpoints(dependencies or [])
+            + self._edge_endpoints(removed_dependencies or []),
+            tables=[(table["name"], table["database"]) for table in tables or []]
+            + [(usage["target_table"], usage["database"]) for usage in table_usages or []]
+        )
+        self._update_blast_radius(added=written_edges["added"], removed=written_edges["removed"])
+        return counts
+
+    @staticmethod
+    def _parse_line_numbers(value) -> List[int]:
+        """Parse legacy comma-separated line numbers like "7,73,118" """
+        if value is None:
+            return []
+        if isinstance(value, int):
+            return [value]
+        return [int(x.strip()) for x in str(value).split(',') if x.strip().isdigit()]
+
+    async def get_code_references(self, edge_keys: List[str]) -> Dict[str, List[str]]:
+        """
+        Fetch code reference bodies for many edges in one round-trip
+
+        Args:
+            edge_keys: Keys from edge_key(source, rel_type, target)
+
+        Returns:
+            Mapping of edge key -> code references
+        """
+        if not edge_keys:
+            return {}
+        async with self._session() as session:
             result = await session.run(
-                query,
-                source=source,
-                target=target,
-                line_number=str(line_number),
-                code_reference=str(code_reference) if code_reference else ""
+                """
+                UNWIND $keys AS key
+                MATCH (c:CodeReference {edge_key: key})
+                RETURN key, c.references AS references
+                """,
+                keys=list(set(edge_keys))
             )
-            return await result.single()
-    
-    async def get_dependencies(self, module_name: str, max_depth: int = 3):
-        """Get all dependencies for a module (forward and reverse)"""
+            return {record["key"]: record["references"] or [] async for record in result}
+
+    @staticmethod
+    def encode_cursor(direction: str, distance: int, module: str) -> str:
+        """Opaque keyset cursor for get_dependencies_page"""
+        payload = json.dumps([direction, distance, module])
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[List]:
+        if not cursor:
+            return None
+        try:
+            direction, distance, module = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return [str(direction), int(distance), str(module)]
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    async def get_dependencies(self, module_name: str, max_depth: int = 3, include_code_references: bool = True):
+        """Get all dependencies for a module (forward and reverse), up to the node budget"""
+        graph = await self._load_dependency_graph(module_name, max_depth, None, include_code_references)
+        return graph["dependencies"]
+
+    async def get_dependencies_page(
+        self,
+        module_name: str,
+        max_depth: int = 3,
+        limit: int = 200,
+        cursor: Optional[str] = None,
+        node_budget: Optional[int] = None,
+        include_code_references: bool = True
+    ) -> Dict:
+        """
+        Get distinct forward/reverse neighbours of a module with their minimum distance
+
+        Neighbours are expanded breadth-first (each node visited once) and capped
+        at node_budget per direction, then paged in (direction, distance, module)
+        order, so repeated calls return the same results. The expansion is
+        cached until a write touches one of the returned modules.
+
+        Args:
+            module_name: Module to start from
+            max_depth: Maximum hops in each direction
+            limit: Page size
+            cursor: next_cursor from the previous page
+            node_budget: Max neighbours per direction (default: $NEO4J_DEPENDENCY_NODE_BUDGET or 500)
+            include_code_references: Include code reference bodies
+
+        Returns:
+            {"dependencies": [...], "next_cursor": str or None, "truncated": {"forward": bool, "reverse": bool}}
+        """
+        after = self.decode_cursor(cursor)
+        graph = await self._load_dependency_graph(module_name, max_depth, node_budget, include_code_references)
+
+        remaining = graph["dependencies"]
+        if after:
+            remaining = [
+                dep for dep in remaining
+                if [dep["direction"], dep["distance"], dep["module"]] > after
+            ]
+
+        dependencies = remaining[:limit]
+        next_cursor = None
+        if len(remaining) > limit and dependencies:
+            last = dependencies[-1]
+            next_cursor = self.encode_cursor(last["direction"], last["distance"], last["module"])
+
+        return {"dependencies": dependencies, "next_cursor": next_cursor, "truncated": graph["truncated"]}
+
+    async def _load_dependency_graph(self, module_name: str, max_depth: int, node_budget: Optional[int], include_code_references: bool) -> Dict:
+        """Read-through cache over the full budget-bounded expansion of a module (returns a private copy)"""
+        node_budget = node_budget or self.dependency_node_budget
+        key = ("dependencies", module_name, max_depth, node_budget, include_code_references)
+        cached = self._cache_get(key)
+        if cached is not MISS:
+            return copy.deepcopy(cached)
+
+        generation = graph_cache.generation
+        page = await self._query_dependencies_page(
+            module_name,
+            max_depth=max_depth,
+            # Both directions fit in one page, so this is a single traversal query
+            limit=node_budget * 2,
+            node_budget=node_budget,
+            include_code_references=include_code_references
+        )
+        graph = {"dependencies": page["dependencies"], "truncated": page["truncated"]}
+
+        tags = [module_tag(module_name)] + [module_tag(dep["module"]) for dep in graph["dependencies"]]
+        self._cache_set(key, copy.deepcopy(graph), tags, generation)
+        return graph
+
+    async def _query_dependencies_page(
+        self,
+        module_name: str,
+        max_depth: int = 3,
+        limit: int = 200,
+        cursor: Optional[str] = None,
+        node_budget: Optional[int] = None,
+        include_code_references: bool = True
+    ) -> Dict:
+        """Run the paged neighbour traversal against Neo4j (uncached)"""
         if not self.driver:
             raise Exception("Neo4j driver not connected")
-            
-        async with self.driver.session() as session:
+
+        node_budget = node_budget or self.dependency_node_budget
+        after = self.decode_cursor(cursor)
+
+        async with self._session() as session:
             # Check if module exists
             check_query = "MATCH (m:Module {name: $module_name}) RETURN m"
             check_result = await session.run(check_query, module_name=module_name)
             if not await check_result.single():
                 print(f"⚠️ Module {module_name} not found in Neo4j")
-                return []
-            
-            # Get forward dependencies (this module depends on others)
-            # Use a simpler query that works with any relationship type
-            forward_query = f"""
-            MATCH path = (start:Module {{name: $module_name}})-[*1..{max_depth}]->(end:Module)
-            WHERE start <> end
-            WITH path, end, relationships(path) as rels
-            RETURN 
-                end.name as module,
-                length(path) as distance,
-                [rel in rels | type(rel)] as relationship_types,
-                [rel in rels | rel.line_number] as line_numbers,
-                [rel in rels | rel.code_reference] as code_references
-            ORDER BY distance
-            LIMIT 100
-            """
-            
-            # Get reverse dependencies (others depend on this module)
-            reverse_query = f"""
-            MATCH path = (start:Module)-[*1..{max_depth}]->(end:Module {{name: $module_name}})
-            WHERE start <> end
-            WITH path, start, relationships(path) as rels
-            RETURN 
-                start.name as module,
-                length(path) as distance,
-                [rel in rels | type(rel)] as relationship_types,
-                [rel in rels | rel.line_number] as line_numbers,
-                [rel in rels | rel.code_reference] as code_references
-            ORDER BY distance
-            LIMIT 100
-            """
-            
-            dependencies = []
-            
+                return {"dependencies": [], "next_cursor": None, "truncated": {"forward": False, "reverse": False}}
+
+        if self._apoc_available is None:
+            await self._check_apoc()
+
+        rows = None
+        if self._apoc_available:
             try:
-                # Forward dependencies
-                result = await session.run(forward_query, module_name=module_name)
-                async for record in result:
-                    try:
-                        line_nums = record.get("line_numbers", [])
-                        code_refs = record.get("code_references", [])
-                        # Parse line numbers (can be strings like "7,73,118" or arrays)
-                        line_numbers = []
-                        if line_nums:
-                            for ln in line_nums:
-                                if ln is None:
-                                    continue
-                                if isinstance(ln, str):
-                                    # Parse comma-separated string
-                                    line_numbers.extend([int(x.strip()) for x in ln.split(',') if x.strip().isdigit()])
-                                elif isinstance(ln, int):
-                                    line_numbers.append(ln)
-                        
-                        # Parse code references (can be strings with " | " separator or arrays)
-                        code_references = []
-                        if code_refs:
-                            for cr in code_refs:
-                                if cr is None or not cr:
-                                    continue
-                                if isinstance(cr, str):
-                                    # Split by " | " separator
-                                    code_references.extend([ref.strip() for ref in cr.split(' | ') if ref.strip()])
-                                else:
-                                    code_references.append(str(cr))
-                        
-                        dependencies.append({
-                            "module": record["module"],
-                            "distance": record["distance"],
-                            "relationships": record.get("relationship_types", []),
-                            "line_numbers": line_numbers,
-                            "code_references": code_references,
-                            "direction": "forward"
-                        })
-                    except Exception as e:
-                        print(f"⚠️ Error processing forward dependency record: {e}")
-                        continue
-                
-                # Reverse dependencies
-                result = await session.run(reverse_query, module_name=module_name)
-                async for record in result:
-                    try:
-                        line_nums = record.get("line_numbers", [])
-                        code_refs = record.get("code_references", [])
-                        # Parse line numbers (can be strings like "7,73,118" or arrays)
-                        line_numbers = []
-                        if line_nums:
-                            for ln in line_nums:
-                                if ln is None:
-                                    continue
-                                if isinstance(ln, str):
-                                    # Parse comma-separated string
-                                    line_numbers.extend([int(x.strip()) for x in ln.split(',') if x.strip().isdigit()])
-                                elif isinstance(ln, int):
-                                    line_numbers.append(ln)
-                        
-                        # Parse code references (can be strings with " | " separator or arrays)
-                        code_references = []
-                        if code_refs:
-                            for cr in code_refs:
-                                if cr is None or not cr:
-                                    continue
-                                if isinstance(cr, str):
-                                    # Split by " | " separator
-                                    code_references.extend([ref.strip() for ref in cr.split(' | ') if ref.strip()])
-                                else:
-                                    code_references.append(str(cr))
-                        
-                        dependencies.append({
-                            "module": record["module"],
-                            "distance": record["distance"],
-                            "relationships": record.get("relationship_types", []),
-                            "line_numbers": line_numbers,
-                            "code_references": code_references,
-                            "direction": "reverse"
-                        })
-                    except Exception as e:
-                        print(f"⚠️ Error processing reverse dependency record: {e}")
-                        continue
+                async with self._session() as session:
+                    rows = await self._neighbours_apoc(session, module_name, max_depth, limit, after, node_budget)
             except Exception as e:
-                print(f"❌ Neo4j query error: {e}")
-                raise
-            
-            return dependencies
+                if "apoc" not in str(e).lower() and "ProcedureNotFound" not in str(e):
+                    print(f"❌ Neo4j query error: {e}")
+                    raise
+                print("⚠️ APOC call failed, using level-by-level traversal")
+                self._apoc_available = False
+                if _current_unit.get() is not None:
+                    # The failure aborted the unit's transaction; nothing more can run on it
+                    raise
+
+        if rows is None:
+            # Own session: a failed APOC call aborts the transaction it ran in
+            async with self._session() as session:
+                rows = await self._neighbours_bfs(session, module_name, max_depth, limit, after, node_budget)
+
+        page_rows = rows[:limit]
+        code_references = {}
+        if include_code_references:
+            code_references = await self.get_code_references([
+                self.edge_key(row["rel_source"], row["rel_type"], row["rel_target"]) for row in page_rows
+            ])
+
+        truncated = {"forward": False, "reverse": False}
+        dependencies = []
+        for row in page_rows:
+            truncated[row["direction"]] = truncated[row["direction"]] or row["truncated"]
+            dependencies.append({
+                "module": row["module"],
+                "distance": row["distance"],
+                "relationships": [row["rel_type"]] if row["rel_type"] else [],
+                "line_numbers": row["line_numbers"] or [],
+                "code_references": code_references.get(
+                    self.edge_key(row["rel_source"], row["rel_type"], row["rel_target"]), []
+                ),
+                "direction": row["direction"]
+            })
+
+        next_cursor = None
+        if len(rows) > limit and dependencies:
+            last = dependencies[-1]
+            next_cursor = self.encode_cursor(last["direction"], last["distance"], last["module"])
+
+        return {"dependencies": dependencies, "next_cursor": next_cursor, "truncated": truncated}
+
+    async def _check_apoc(self) -> bool:
+        """
+        Detect apoc.path.spanningTree once
+
+        Runs on its own pooled session, never a unit of work: calling a missing
+        procedure would abort the unit's transaction.
+        """
+        try:
+            async with self._pooled_session() as session:
+                result = await session.run(
+                    "SHOW PROCEDURES YIELD name WHERE name = 'apoc.path.spanningTree' RETURN count(*) > 0 AS available"
+                )
+                record = await result.single()
+            self._apoc_available = bool(record and record["available"])
+        except Exception as e:
+            print(f"⚠️ Could not check for APOC: {e}")
+            self._apoc_available = False
+        if not self._apoc_available:
+            print("⚠️ APOC not available, using level-by-level traversal")
+        return self._apoc_available
+
+    async def _neighbours_apoc(self, session, module_name: str, max_depth: int, limit: int, after: Optional[List], node_budget: int) -> List[Dict]:
+        """Single-query BFS in both directions with apoc.path.spanningTree"""
+        query = """
+        MATCH (start:Module {name: $module_name})
+        CALL {
+            WITH start
+            CALL apoc.path.spanningTree(start, {
+                relationshipFilter: '>', labelFilter: '+Module',
+                maxLevel: $max_depth, bfs: true, limit: $path_limit
+            }) YIELD path
+            RETURN path, 'forward' AS direction
+            UNION
+            WITH start
+            CALL apoc.path.spanningTree(start, {
+                relationshipFilter: '<', labelFilter: '+Module',
+                maxLevel: $max_depth, bfs: true, limit: $path_limit
+            }) YIELD path
+            RETURN path, 'reverse' AS direction
+        }
+        WITH direction, path WHERE length(path) > 0
+        WITH direction, collect(path) AS paths
+        WITH direction, paths[0..$node_budget] AS paths, size(paths) > $node_budget AS truncated
+        UNWIND paths AS path
+        WITH direction, truncated, last(nodes(path)).name AS module, length(path) AS distance,
+             last(relationships(path)) AS rel
+        WHERE $after IS NULL
+           OR direction > $after[0]
+           OR (direction = $after[0] AND (distance > $after[1]
+               OR (distance = $after[1] AND module > $after[2])))
+        RETURN direction, module, distance, truncated,
+               type(rel) AS rel_type, rel.line_numbers AS line_numbers,
+               startNode(rel).name AS rel_source, endNode(rel).name AS rel_target
+        ORDER BY direction, distance, module
+        LIMIT $page_limit
+        """
+        result = await session.run(
+            query,
+            module_name=module_name,
+            max_depth=max_depth,
+            # spanningTree also yields the zero-length start path; one extra detects truncation
+            path_limit=node_budget + 2,
+            node_budget=node_budget,
+            after=after,
+            page_limit=limit + 1
+        )
+        return [record.data() async for record in result]
+
+    async def _neighbours_bfs(self, session, module_name: str, max_depth: int, limit: int, after: Optional[List], node_budget: int) -> List[Dict]:
+        """Fallback without APOC: one distinct-node expansion query per level and direction"""
+        expand_queries = {
+            "forward": """
+            UNWIND $frontier AS name
+            MATCH (:Module {name: name})-[r]->(n:Module)
+            WHERE NOT n.name IN $visited
+            WITH n.name AS module, r ORDER BY module, name, type(r)
+            WITH module, collect(r)[0] AS rel
+            RETURN module, type(rel) AS rel_type, rel.line_numbers AS line_numbers,
+                   startNode(rel).name AS rel_source, endNode(rel).name AS rel_target
+            ORDER BY module
+            LIMIT $remaining
+            """,
+            "reverse": """
+            UNWIND $frontier AS name
+            MATCH (n:Module)-[r]->(:Module {name: name})
+            WHERE NOT n.name IN $visited
+            WITH n.name AS module, r ORDER BY module, name, type(r)
+            WITH module, collect(r)[0] AS rel
+            RETURN module, type(rel) AS rel_type, rel.line_numbers AS line_numbers,
+                   startNode(rel).name AS rel_source, endNode(rel).name AS rel_target
+            ORDER BY module
+            LIMIT $remaining
+            """
+        }
+
+        rows = []
+        for direction in ("forward", "reverse"):
+            visited = [module_name]
+            frontier = [module_name]
+            found = []
+            truncated = False
+            for distance in range(1, max_depth + 1):
+                if not frontier:
+                    break
+                remaining = node_budget - len(found)
+                result = await session.run(
+                    expand_queries[direction],
+                    frontier=frontier,
+                    visited=visited,
+                    remaining=remaining + 1
+                )
+                level = [record.data() async for record in result]
+                if len(level) > remaining:
+                    level = level[:remaining]
+                    truncated = True
+                for row in level:
+                    row["direction"] = direction
+                    row["distance"] = distance
+                found.extend(level)
+                frontier = [row["module"] for row in level]
+                visited.extend(frontier)
+                if truncated:
+                    break
+
+            for row in found:
+                row["truncated"] = truncated
+            rows.extend(found)
+
+        rows.sort(key=lambda row: (row["direction"], row["distance"], row["module"]))
+        if after:
+            rows = [row for row in rows if [row["direction"], row["distance"], row["module"]] > after]
+        return rows[:limit + 1]
     
     async def create_database_node(self, name: str, properties: dict = None):
         """Create a database node"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = """
             MERGE (d:Database {name: $name})
             SET d += $properties
@@ -218,7 +1032,7 @@ class Neo4jClient:
     
     async def create_table_node(self, name: str, database: str, properties: dict = None):
         """Create a table node and link to database"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = """
             MATCH (db:Database {name: $database})
             MERGE (t:Table {name: $name, database: $database})
@@ -232,11 +1046,13 @@ class Neo4jClient:
                 database=database,
                 properties=properties or {}
             )
-            return await result.single()
+            record = await result.single()
+            self._invalidate_graph(tables=[(name, database)])
+            return record
     
     async def create_table_usage(self, source_file: str, target_table: str, database: str, usage_count: int = 1, column_name: str = ""):
         """Create relationship: Code file USES Table"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = """
             MATCH (m:Module {name: $source_file})
             MATCH (t:Table {name: $target_table, database: $database})
@@ -254,11 +1070,15 @@ class Neo4jClient:
                 usage_count=usage_count,
                 column_name=column_name
             )
-            return await result.single()
+            record = await result.single()
+            self._invalidate_graph(modules=[source_file], tables=[(target_table, database)])
+            if record:
+                self._update_blast_radius(added=[(module_tag(source_file), table_tag(target_table, database), "USES_TABLE")])
+            return record
     
     async def create_collection_usage(self, source_file: str, target_collection: str, database: str, usage_count: int = 1, field_name: str = ""):
         """Create relationship: Code file USES Collection (MongoDB)"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = """
             MATCH (m:Module {name: $source_file})
             MATCH (t:Table {name: $target_collection, database: $database})
@@ -276,11 +1096,15 @@ class Neo4jClient:
                 usage_count=usage_count,
                 field_name=field_name
             )
-            return await result.single()
+            record = await result.single()
+            self._invalidate_graph(modules=[source_file], tables=[(target_collection, database)])
+            if record:
+                self._update_blast_radius(added=[(module_tag(source_file), table_tag(target_collection, database), "USES_COLLECTION")])
+            return record
     
     async def create_table_relationship(self, source_table: str, target_table: str, database: str, relationship_type: str, properties: dict = None):
         """Create relationship between tables (foreign key, etc.)"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = f"""
             MATCH (s:Table {{name: $source_table, database: $database}})
             MATCH (t:Table {{name: $target_table, database: $database}})
@@ -296,14 +1120,24 @@ class Neo4jClient:
                 database=database,
                 properties=properties or {}
             )
-            return await result.single()
+            record = await result.single()
+            self._invalidate_graph(tables=[(source_table, database), (target_table, database)])
+            if record:
+                self._update_blast_radius(added=[(table_tag(source_table, database), table_tag(target_table, database), relationship_type)])
+            return record
     
     async def get_table_relationships(self, table_name: str, database_name: str) -> Dict:
-        """Get all relationships for a table"""
+        """Get all relationships for a table (cached until one of the tables is written)"""
         if not self.driver:
             return {"forward": [], "reverse": []}
         
-        async with self.driver.session() as session:
+        key = ("table_relationships", table_name, database_name)
+        cached = self._cache_get(key)
+        if cached is not MISS:
+            return copy.deepcopy(cached)
+        generation = graph_cache.generation
+        
+        async with self._session() as session:
             # Forward: tables this table references
             forward_query = """
             MATCH (t:Table {name: $table_name, database: $database_name})-[r]->(target:Table {database: $database_name})
@@ -343,15 +1177,158 @@ class Neo4jClient:
                     })
             except Exception as e:
                 print(f"⚠️ Error getting table relationships: {e}")
-            
-            return {"forward": forward, "reverse": reverse}
+                return {"forward": forward, "reverse": reverse}
+        
+        relationships = {"forward": forward, "reverse": reverse}
+        tags = [table_tag(table_name, database_name)]
+        tags += [table_tag(rel["target_table"], database_name) for rel in forward]
+        tags += [table_tag(rel["source_table"], database_name) for rel in reverse]
+        self._cache_set(key, copy.deepcopy(relationships), tags, generation)
+        return relationships
     
+    async def get_table_graph(self, table_name: str, database_name: str, max_depth: int = 2) -> Dict:
+        """
+        Get everything the table dependency graph shows in one round-trip
+        (cached until one of the returned nodes is written)
+
+        Args:
+            table_name: Table or collection name
+            database_name: Database name
+            max_depth: Hops of reverse dependants to include per code file
+
+        Returns:
+            {"code_dependencies": [{file_name, file_path, usage_count, column_name,
+              relationship_type, dependants: [{module, distance, rel_type}]}],
+             "relationships": {"forward": [...], "reverse": [...]}}
+        """
+        empty = {"code_dependencies": [], "relationships": {"forward": [], "reverse": []}}
+        if not self.driver:
+            return empty
+        max_depth = max(1, int(max_depth))
+
+        key = ("table_graph", table_name, database_name, max_depth)
+        cached = self._cache_get(key)
+        if cached is not MISS:
+            return copy.deepcopy(cached)
+        generation = graph_cache.generation
+
+        # Dependants come from the blast-radius index when it covers the depth;
+        # otherwise the same query expands them
+        use_index = blast_radius_index.ready and max_depth <= blast_radius_index.max_depth
+        if use_index:
+            dependants_subquery = "RETURN [] AS dependants"
+        else:
+            dependants_subquery = f"""
+                MATCH path = (dependant:Module)-[*1..{max_depth}]->(m)
+                WHERE dependant <> m AND all(n IN nodes(path) WHERE n:Module)
+                WITH dependant.name AS module, length(path) AS distance,
+                     type(relationships(path)[0]) AS rel_type
+                ORDER BY distance, rel_type
+                WITH module, collect({{distance: distance, rel_type: rel_type}})[0] AS best
+                ORDER BY best.distance, module
+                RETURN collect({{module: module, distance: best.distance, rel_type: best.rel_type}})[0..$node_budget] AS dependants
+            """
+
+        query = f"""
+        MATCH (t:Table {{name: $table_name, database: $database_name}})
+        CALL {{
+            WITH t
+            MATCH (m:Module)-[r]->(t)
+            WHERE type(r) IN ['USES_TABLE', 'USES_COLLECTION']
+            CALL {{
+                WITH m
+                {dependants_subquery}
+            }}
+            RETURN collect({{
+                file_name: m.name,
+                file_path: m.path,
+                usage_count: r.usage_count,
+                column_name: COALESCE(r.column_name, r.field_name, ''),
+                relationship_type: type(r),
+                dependants: dependants
+            }}) AS users
+        }}
+        CALL {{
+            WITH t
+            MATCH (t)-[r]->(target:Table {{database: $database_name}})
+            RETURN collect({{type: type(r), target_table: target.name, properties: properties(r)}}) AS forward
+        }}
+        CALL {{
+            WITH t
+            MATCH (source:Table {{database: $database_name}})-[r]->(t)
+            RETURN collect({{type: type(r), source_table: source.name, properties: properties(r)}}) AS reverse
+        }}
+        RETURN users, forward, reverse
+        """
+
+        try:
+            async with self._session() as session:
+                result = await session.run(
+                    query,
+                    table_name=table_name,
+                    database_name=database_name,
+                    node_budget=self.dependency_node_budget
+                )
+                record = await result.single()
+        except Exception as e:
+            print(f"⚠️ Error getting table graph: {e}")
+            return empty
+
+        if record is None:
+            self._cache_set(key, copy.deepcopy(empty), [table_tag(table_name, database_name)], generation)
+            return empty
+
+        code_dependencies = []
+        for user in record["users"]:
+            dependants = user["dependants"]
+            if use_index:
+                dependants = [
+                    {"module": dep["name"], "distance": dep["distance"], "rel_type": dep["relationship"]}
+                    for dep in blast_radius_index.module_dependants(user["file_name"], max_depth) or []
+                    if dep["kind"] == "module"
+                ][:self.dependency_node_budget]
+            code_dependencies.append({
+                "file_name": user["file_name"],
+                "file_path": user["file_path"] or "",
+                "usage_count": user["usage_count"] if user["usage_count"] is not None else 1,
+                "column_name": user["column_name"],
+                "relationship_type": user["relationship_type"],
+                "dependants": dependants
+            })
+
+        relationships = {
+            "forward": [
+                {"type": rel["type"], "target_table": rel["target_table"], **(rel["properties"] or {})}
+                for rel in record["forward"]
+            ],
+            "reverse": [
+                {"type": rel["type"], "source_table": rel["source_table"], **(rel["properties"] or {})}
+                for rel in record["reverse"]
+            ]
+        }
+        graph = {"code_dependencies": code_dependencies, "relationships": relationships}
+
+        tags = [table_tag(table_name, database_name)]
+        tags += [table_tag(rel["target_table"], database_name) for rel in relationships["forward"]]
+        tags += [table_tag(rel["source_table"], database_name) for rel in relationships["reverse"]]
+        for user in code_dependencies:
+            tags.append(module_tag(user["file_name"]))
+            tags += [module_tag(dep["module"]) for dep in user["dependants"]]
+        self._cache_set(key, copy.deepcopy(graph), tags, generation)
+        return graph
+
     async def get_table_code_dependencies(self, table_name: str, database_name: str) -> List[Dict]:
-        """Get all code files that use a table or collection"""
+        """Get all code files that use a table or collection (cached until the table or a user is written)"""
         if not self.driver:
             return []
         
-        async with self.driver.session() as session:
+        key = ("table_code_dependencies", table_name, database_name)
+        cached = self._cache_get(key)
+        if cached is not MISS:
+            return copy.deepcopy(cached)
+        generation = graph_cache.generation
+        
+        async with self._session() as session:
             # Query for both USES_TABLE (PostgreSQL) and USES_COLLECTION (MongoDB)
             query = """
             MATCH (m:Module)-[r]->(t:Table {name: $table_name, database: $database_name})
@@ -377,12 +1354,15 @@ class Neo4jClient:
                     })
             except Exception as e:
                 print(f"⚠️ Error getting table code dependencies: {e}")
-            
-            return dependencies
+                return dependencies
+        
+        tags = [table_tag(table_name, database_name)] + [module_tag(dep["file_name"]) for dep in dependencies]
+        self._cache_set(key, copy.deepcopy(dependencies), tags, generation)
+        return dependencies
     
     async def create_api_endpoint_node(self, endpoint: str, method: str, file_path: str, properties: dict = None):
         """Create an API endpoint node"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = """
             MERGE (api:APIEndpoint {endpoint: $endpoint, method: $method})
             SET api.file_path = $file_path,
@@ -401,7 +1381,7 @@ class Neo4jClient:
     
     async def create_api_consumer_relationship(self, consumer_file: str, api_endpoint: str, api_method: str, line_number: int = 0):
         """Create relationship: Code file CONSUMES API endpoint"""
-        async with self.driver.session() as session:
+        async with self._write_session() as session:
             query = """
             MATCH (m:Module {name: $consumer_file})
             MATCH (api:APIEndpoint {endpoint: $api_endpoint, method: $api_method})
@@ -417,14 +1397,17 @@ class Neo4jClient:
                 api_method=api_method,
                 line_number=line_number
             )
-            return await result.single()
+            record = await result.single()
+            if record:
+                self._update_blast_radius(added=[(module_tag(consumer_file), api_tag(api_endpoint, api_method), "CONSUMES_API")])
+            return record
     
     async def get_api_consumers(self, api_endpoint: str, api_method: str) -> List[Dict]:
         """Get all code files that consume a specific API endpoint"""
         if not self.driver:
             return []
         
-        async with self.driver.session() as session:
+        async with self._session() as session:
             query = """
             MATCH (m:Module)-[r:CONSUMES_API]->(api:APIEndpoint {endpoint: $api_endpoint, method: $api_method})
             RETURN 
@@ -0,0 +1,269 @@
+"""
+Analysis progress events
+In-process pub/sub that orchestrators publish stage completions to and the
+SSE endpoints stream from. Each analysis keeps a bounded event history so
+clients that subscribe late (or reconnect with Last-Event-ID) replay what
+they missed instead of polling for the final result.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+import dataclasses
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# Events that end an analysis stream
+TERMINAL_EVENTS = ("complete", "failed")
+
+# Live-only events: streamed to current subscribers but not kept for replay
+TRANSIENT_EVENTS = ("ai_token",)
+
+# Live events a subscriber may fall behind by before new ones are dropped
+SUBSCRIBER_BACKLOG = 1000
+
+
+def _json_default(value: Any):
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def summarize(value: Any, max_bytes: int) -> Any:
+    """
+    JSON-safe view of a stage result, shrunk to max_bytes
+
+    Small results are sent whole; large dicts keep their scalar fields and
+    replace lists / nested objects by their sizes.
+    """
+    encoded = json.dumps(value, default=_json_default)
+    if len(encoded) <= max_bytes:
+        return json.loads(encoded)
+
+    value = json.loads(encoded)
+    if isinstance(value, dict):
+        summary = {}
+        for key, item in value.items():
+            if isinstance(item, list):
+                summary[key] = {"count": len(item)}
+            elif isinstance(item, dict):
+                summary[key] = {"keys": len(item)}
+            else:
+                summary[key] = item
+        return summary
+    if isinstance(value, list):
+        return {"count": len(value)}
+    return {"truncated": True, "bytes": len(encoded)}
+
+
+class ProgressBroker:
+    """Fan-out of analysis events to SSE subscribers, with replay"""
+
+    def __init__(self, max_analyses: Optional[int] = None, max_events: Optional[int] = None, max_event_bytes: Optional[int] = None):
+        """
+        Initialize broker
+
+        Args:
+            max_analyses: Analyses whose history is kept (default: $PROGRESS_MAX_ANALYSES or 200)
+            max_events: Replayable events kept per analysis (default: $PROGRESS_MAX_EVENTS or 200)
+            max_event_bytes: Size cap for stage payloads (default: $PROGRESS_MAX_EVENT_BYTES or 16 KB)
+        """
+        self.max_analyses = max_analyses or int(os.getenv("PROGRESS_MAX_ANALYSES", "200"))
+        self.max_events = max_events or int(os.getenv("PROGRESS_MAX_EVENTS", "200"))
+        self.max_event_bytes = max_event_bytes or int(os.getenv("PROGRESS_MAX_EVENT_BYTES", str(16 * 1024)))
+
+        # analysis_id -> {"commit_sha", "events": [...], "done": bool}, oldest first
+        self._analyses: "OrderedDict[str, Dict]" = OrderedDict()
+        self._commits: Dict[str, Set[str]] = {}
+        # channel ("analysis:<id>" / "commit:<sha>") -> subscriber queues
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._sequence = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+        self.events_published = 0
+        self.events_dropped = 0
+
+    @staticmethod
+    def _analysis_channel(analysis_id: str) -> str:
+        return f"analysis:{analysis_id}"
+
+    @staticmethod
+    def _commit_channel(commit_sha: str) -> str:
+        return f"commit:{commit_sha}"
+
+    def publish(self, analysis_id: str, event: str, data: Any = None, commit_sha: Optional[str] = None):
+        """
+        Publish an event for an analysis (call from the event loop thread)
+
+        Args:
+            analysis_id: Analysis the event belongs to
+            event: Event name (started, stage, ai_token, complete, failed)
+            data: JSON-serializable payload
+            commit_sha: Commit the analysis belongs to (remembered from the first event)
+        """
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+
+        with self._lock:
+            record = self._analyses.get(analysis_id)
+            if record is None:
+                record = {"commit_sha": commit_sha, "events": [], "done": False}
+                self._analyses[analysis_id] = record
+                while len(self._analyses) > self.max_analyses:
+                    old_id, old = self._analyses.popitem(last=False)
+                    commit_ids = self._commits.get(old["commit_sha"])
+                    if commit_ids is not None:
+                        commit_ids.discard(old_id)
+                        if not commit_ids:
+                            del self._commits[old["commit_sha"]]
+            else:
+                self._analyses.move_to_end(analysis_id)
+                commit_sha = commit_sha or record["commit_sha"]
+                record["commit_sha"] = commit_sha
+            if commit_sha:
+                self._commits.setdefault(commit_sha, set()).add(analysis_id)
+
+            self._sequence += 1
+            message = {
+                "id": self._sequence,
+                "event": event,
+                "analysis_id": analysis_id,
+                "commit_sha": commit_sha,
+                "timestamp": time.time(),
+                "data": data
+            }
+            if event not in TRANSIENT_EVENTS:
+                record["events"].append(message)
+                if len(record["events"]) > self.max_events:
+                    # Keep the first event (analysis metadata) and the most recent ones
+                    del record["events"][1]
+            if event in TERMINAL_EVENTS:
+                record["done"] = True
+
+            queues = set(self._subscribers.get(self._analysis_channel(analysis_id), ()))
+            if commit_sha:
+                queues |= self._subscribers.get(self._commit_channel(commit_sha), set())
+            self.events_published += 1
+
+        for queue in queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client; it still gets the terminal event from the replay on reconnect
+                self.events_dropped += 1
+
+    def publish_threadsafe(self, analysis_id: str, event: str, data: Any = None):
+        """Publish from a worker thread (e.g. streamed AI tokens)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self.publish, analysis_id, event, data)
+        except RuntimeError:
+            # Event loop closed meanwhile
+            pass
+
+    def stage_reporter(self, analysis_id: str, commit_sha: Optional[str] = None) -> Callable[[str, Any, Dict], None]:
+        """StagePipeline on_stage_complete callback publishing "stage" events"""
+        def report(stage: str, result: Any, timing: Dict):
+            self.publish(analysis_id, "stage", {
+                "stage": stage,
+                "duration_ms": timing.get("duration_ms"),
+                "result": summarize(result, self.max_event_bytes)
+            }, commit_sha=commit_sha)
+        return report
+
+    def token_reporter(self, analysis_id: str, commit_sha: Optional[str] = None) -> Optional[Callable[[str], None]]:
+        """
+        Callback for streamed AI text, or None when nobody is listening
+        (so analyses without subscribers keep the non-streaming model call)
+        """
+        with self._lock:
+            listening = bool(self._subscribers.get(self._analysis_channel(analysis_id)))
+            if commit_sha:
+                listening = listening or bool(self._subscribers.get(self._commit_channel(commit_sha)))
+        if not listening:
+            return None
+        return lambda text: self.publish_threadsafe(analysis_id, "ai_token", {"text": text})
+
+    def is_done(self, analysis_id: str) -> bool:
+        record = self._analyses.get(analysis_id)
+        return bool(record and record["done"])
+
+    def knows(self, analysis_id: Optional[str] = None, commit_sha: Optional[str] = None) -> bool:
+        """Whether any event was published for the analysis / commit"""
+        if analysis_id is not None:
+            return analysis_id in self._analyses
+        return commit_sha in self._commits
+
+    def commit_done(self, commit_sha: str) -> bool:
+        """Whether every analysis seen for the commit has finished"""
+        with self._lock:
+            analysis_ids = list(self._commits.get(commit_sha, ()))
+        return bool(analysis_ids) and all(self.is_done(analysis_id) for analysis_id in analysis_ids)
+
+    def subscribe(self, analysis_id: Optional[str] = None, commit_sha: Optional[str] = None, after_id: int = 0) -> asyncio.Queue:
+        """
+        Subscribe to an analysis or to every analysis of a commit
+
+        Args:
+            analysis_id: Analysis to follow
+            commit_sha: Commit to follow (used when analysis_id is None)
+            after_id: Replay stored events with a larger id (Last-Event-ID)
+
+        Returns:
+            Queue receiving replayed and then live events
+        """
+        with self._lock:
+            if analysis_id is not None:
+                channel = self._analysis_channel(analysis_id)
+                analysis_ids = [analysis_id]
+            else:
+                channel = self._commit_channel(commit_sha)
+                analysis_ids = list(self._commits.get(commit_sha, ()))
+
+            history: List[Dict] = []
+            for known_id in analysis_ids:
+                record = self._analyses.get(known_id)
+                if record is not None:
+                    history.extend(event for event in record["events"] if event["id"] > after_id)
+            history.sort(key=lambda event: event["id"])
+            # Room for the whole replay plus a bounded backlog of live events
+            queue: asyncio.Queue = asyncio.Queue(maxsize=len(history) + SUBSCRIBER_BACKLOG)
+            for event in history:
+                queue.put_nowait(event)
+
+            self._subscribers.setdefault(channel, set()).add(queue)
+        queue.channel = channel
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(queue.channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[queue.channel]
+
+    def get_stats(self) -> Dict:
+        """Get broker statistics"""
+        with self._lock:
+            return {
+                "tracked_analyses": len(self._analyses),
+                "running_analyses": sum(1 for record in self._analyses.values() if not record["done"]),
+                "tracked_commits": len(self._commits),
+                "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+                "events_published": self.events_published,
+                "events_dropped": self.events_dropped
+            }
+
+
+# Global progress broker
+progress_broker = ProgressBroker()
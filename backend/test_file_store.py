@@ -0,0 +1,72 @@
+"""Quick test for the shared file store: charged-cost accounting and LRU eviction"""
+import os
+import tempfile
+
+from app.utils.file_store import FileStore
+
+
+def write(root, name, size, mtime_ns=1_000_000_000):
+    path = os.path.join(root, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(("x" * 99 + "\n") * (size // 100))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+def charged_total(store):
+    return sum(store._charged.values())
+
+
+root = tempfile.mkdtemp(prefix="file-store-test-")
+a, b, c = (write(root, name, 1000) for name in ("a.py", "b.py", "c.py"))
+
+# Decoded files cost 2x their size; each cached result one more copy
+store = FileStore(max_bytes=4500, mmap_threshold=1_000_000)
+source_a = store.get(a)
+store.get(b)
+assert store.get_stats()["memory_bytes"] == 4000 == charged_total(store)
+assert store.get(a) is source_a and store.hits == 1
+
+# A cached result pushes the store over budget: the least recently used file (b) goes
+source_a.result("table_usage", lambda loaded: {"orders": []})
+assert source_a.memory_cost == 3000
+stats = store.get_stats()
+print(f"After caching a result: {stats['files']} files, {stats['memory_bytes']} bytes, {stats['evictions']} eviction(s)")
+assert stats["files"] == 1 and stats["evictions"] == 1 and b not in store._files
+assert store.get_stats()["memory_bytes"] == charged_total(store) == 3000
+
+# Results added to an evicted entry don't charge the store again
+store.get(c)
+assert a not in store._files and store.evictions == 2
+before = store.get_stats()["memory_bytes"]
+source_a.result("mongodb_usage", lambda loaded: {})
+assert store.get_stats()["memory_bytes"] == before == charged_total(store)
+
+# Cached results are computed once and shared
+calls = []
+source_c = store.get(c)
+assert source_c.result("k", lambda loaded: calls.append(1) or "v") == "v"
+assert source_c.result("k", lambda loaded: calls.append(1) or "w") == "v" and calls == [1]
+
+# A file changed on disk replaces its entry, releasing exactly what the old one was charged
+write(root, "c.py", 500, mtime_ns=2_000_000_000)
+reloaded = store.get(c)
+assert reloaded is not source_c and reloaded.size == 500 and store.reloads == 1
+assert store.get_stats()["memory_bytes"] == charged_total(store)
+assert store._charged[reloaded.path] == 1000
+
+# Mapped files don't charge their text, only cached results, and their count is bounded
+mapped = FileStore(max_bytes=10_000, mmap_threshold=500, max_mapped=2)
+big = [write(root, f"big{index}.java", 2000) for index in range(3)]
+for path in big:
+    assert mapped.get(path).is_mapped
+stats = mapped.get_stats()
+assert stats["files"] == 2 and stats["mapped_files"] == 2 and stats["memory_bytes"] == 0
+assert mapped.get(big[2]).window(0, 2) == ["x" * 99 + "\n"] * 2
+mapped.get(big[2]).result("table_usage", lambda loaded: {})
+assert mapped.get_stats()["memory_bytes"] == 2000 == charged_total(mapped)
+
+store.clear()
+assert store.get_stats()["memory_bytes"] == 0 and not store._charged
+
+print("✅ File store charges text and cached results and evicts within budget")
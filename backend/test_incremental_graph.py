@@ -0,0 +1,79 @@
+"""Quick test for the incremental DEPENDS graph full-run fallback"""
+import os
+import tempfile
+
+os.environ.setdefault("ANALYSIS_CACHE_DIR", tempfile.mkdtemp(prefix="incremental-graph-test-"))
+
+from app.services.incremental_graph import IncrementalDependencyGraph
+
+
+class FakeAnalyzer:
+    """Stands in for DependsAnalyzer: one IMPORT edge per 'uses X' line"""
+
+    tool = "fake-depends"
+
+    def __init__(self):
+        self.full_runs = 0
+
+    def tool_marker(self):
+        return self.tool
+
+    def snapshot_tree(self, root, language):
+        snapshot = {}
+        for directory, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                snapshot[os.path.relpath(path, root)] = [stat.st_mtime_ns, stat.st_size]
+        return snapshot
+
+    def compute_tree_fingerprint(self, root, language, snapshot=None):
+        return repr(sorted((snapshot or self.snapshot_tree(root, language)).items()))
+
+    def analyze_code(self, root, language="java", snapshot=None):
+        self.full_runs += 1
+        direct = []
+        for relative in snapshot:
+            with open(os.path.join(root, relative), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.startswith("uses "):
+                        direct.append({"source": os.path.basename(relative), "target": line.split()[1], "type": "IMPORT"})
+        return {
+            "modules": [{"name": os.path.basename(relative), "type": "file", "relations_count": 0} for relative in snapshot],
+            "dependencies": {"direct": direct, "indirect": []},
+            "statistics": {}
+        }
+
+
+def write(root, relative, content, mtime_ns):
+    path = os.path.join(root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+root = tempfile.mkdtemp(prefix="incremental-graph-repo-")
+write(root, "app/A.java", "uses B.java\nuses C.java\n", 1_000_000_000)
+write(root, "app/B.java", "uses C.java\n", 1_000_000_000)
+write(root, "app/C.java", "", 1_000_000_000)
+
+graph = IncrementalDependencyGraph()
+analyzer = FakeAnalyzer()
+
+analysis, removed = graph.analyze(analyzer, root, "java")
+print(f"Baseline: {len(analysis['dependencies']['direct'])} edges, {analyzer.full_runs} full run(s)")
+assert removed == []
+
+# A's same-directory siblings make the neighbourhood the whole tree, past the default ratio
+write(root, "app/A.java", "uses B.java\n", 2_000_000_000)
+result = graph.analyze(analyzer, root, "java", changed_files=["app/A.java"])
+
+assert isinstance(result, tuple) and len(result) == 2, f"expected (analysis, removed), got {type(result)}"
+analysis, removed = result
+print(f"Fallback: {len(analysis['dependencies']['direct'])} edges, {analyzer.full_runs} full run(s), removed {removed}")
+assert analyzer.full_runs == 2
+assert removed == [{"source": "A.java", "target": "C.java", "type": "IMPORT"}]
+assert graph.get_stats()["edges_removed"] == 1
+
+print("✅ Full-run fallback returns (analysis, removed)")
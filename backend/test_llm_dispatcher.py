@@ -0,0 +1,89 @@
+"""Quick test for LLM dispatcher priority lanes, timeouts, retries and token refunds"""
+import asyncio
+import threading
+import time
+
+from app.services.llm_dispatcher import LLMDispatcher, PRIORITY_SCHEMA, PRIORITY_CODE
+
+
+async def priority_order():
+    dispatcher = LLMDispatcher(max_concurrency=1, requests_per_minute=6000, burst=10)
+    release = threading.Event()
+    order = []
+
+    blocker = asyncio.create_task(dispatcher.submit(release.wait, 5))
+    await asyncio.sleep(0.05)
+    # Queued while the only slot is busy: the schema lane must go first
+    code = asyncio.create_task(dispatcher.submit(order.append, "code", priority=PRIORITY_CODE))
+    schema = asyncio.create_task(dispatcher.submit(order.append, "schema", priority=PRIORITY_SCHEMA))
+    await asyncio.sleep(0.05)
+    assert dispatcher.get_stats()["queue_depth"] == 2
+
+    release.set()
+    await asyncio.gather(blocker, code, schema)
+    print(f"Order once the slot frees: {order}")
+    assert order == ["schema", "code"], order
+    dispatcher.shutdown()
+
+
+async def timeout_and_retry():
+    dispatcher = LLMDispatcher(max_concurrency=2, requests_per_minute=6000, burst=10, max_retries=3, retry_base_delay=0.01)
+
+    try:
+        await dispatcher.submit(time.sleep, 0.5, timeout=0.05)
+        raise AssertionError("expected a timeout")
+    except asyncio.TimeoutError:
+        pass
+    assert dispatcher.timeouts == 1
+
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Exception("429 quota exceeded")
+        return "ok"
+
+    assert await dispatcher.submit(flaky) == "ok"
+    assert len(attempts) == 3 and dispatcher.retries == 2
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad prompt")
+
+    attempts.clear()
+    try:
+        await dispatcher.submit(broken)
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+    # Not retryable: one attempt only
+    assert len(attempts) == 1 and dispatcher.retries == 2
+    print(f"Stats: {dispatcher.get_stats()}")
+    dispatcher.shutdown()
+
+
+async def cancelled_token_refund():
+    dispatcher = LLMDispatcher(max_concurrency=1, requests_per_minute=60, burst=2)
+    dispatcher._tokens = 0.0
+    waiter = asyncio.create_task(dispatcher._take_token(PRIORITY_CODE))
+    await asyncio.sleep(0)
+
+    # A token is handed over, the bucket refills, then the waiter is cancelled before it runs
+    dispatcher._tokens = 1.0
+    dispatcher._serve_tokens()
+    dispatcher._tokens = float(dispatcher.burst)
+    waiter.cancel()
+    try:
+        await waiter
+    except asyncio.CancelledError:
+        pass
+    assert dispatcher._tokens <= dispatcher.burst, dispatcher._tokens
+    dispatcher.shutdown()
+
+
+asyncio.run(priority_order())
+asyncio.run(timeout_and_retry())
+asyncio.run(cancelled_token_refund())
+
+print("✅ Dispatcher honours priority, timeouts, retries and the burst cap")
@@ -0,0 +1,82 @@
+"""Quick test for the parallel table scan: parity with a serial scan and the broken-pool fallback"""
+import os
+import tempfile
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.parallel_scanner import ParallelScanner, extract_file_usage
+from app.utils.file_store import file_store
+
+
+class BrokenExecutor:
+    """Stands in for a pool whose worker died: every batch fails with BrokenProcessPool"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker exited"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def make_repo(file_count):
+    root = tempfile.mkdtemp(prefix="parallel-scan-repo-")
+    files = {}
+    for index in range(file_count):
+        relative = os.path.join("src", f"Dao{index}.java")
+        path = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(
+                f'class Dao{index} {{\n'
+                f'    String q = "SELECT id, name FROM table_{index % 7} WHERE id = " + id;\n'
+                f'    String u = "UPDATE shared_log SET seen = 1 WHERE dao = {index}";\n'
+                f'}}\n' + "// padding\n" * index
+            )
+        files[relative] = os.path.getsize(path)
+    return root, files
+
+
+def scanner(parallel_threshold, max_workers):
+    scanner = ParallelScanner()
+    scanner.parallel_threshold = parallel_threshold
+    scanner.max_workers = max_workers
+    return scanner
+
+
+if __name__ == "__main__":
+    # Worker processes are spawned and re-import this module, hence the guard
+    root, files = make_repo(40)
+    serial = dict(scanner(parallel_threshold=10_000, max_workers=2).scan(root, files, "postgresql"))
+    assert len(serial) == 40 and "table_3" in serial["src/Dao3.java"]
+
+    parallel_scanner = scanner(parallel_threshold=1, max_workers=2)
+    parallel_scanner.batch_files = 4
+    parallel = list(parallel_scanner.scan(root, files, "postgresql"))
+    parallel_scanner.shutdown()
+    stats = parallel_scanner.get_stats()
+    print(f"Parallel scan: {stats['batches']} batches, peak in-flight {stats['peak_inflight_bytes']} bytes")
+    assert stats["parallel_scans"] == 1 and stats["batches"] >= 10
+    assert len(parallel) == len(files), "every file is yielded exactly once"
+    assert dict(parallel) == serial, "parallel and serial scans disagree"
+
+    # The in-flight ceiling still lets one batch run at a time
+    limited = scanner(parallel_threshold=1, max_workers=2)
+    limited.max_inflight_bytes = 1
+    assert dict(limited.scan(root, files, "mongodb")) == {
+        path: extract_file_usage(root, path, "mongodb") for path in files
+    }
+    assert limited.get_stats()["peak_inflight_bytes"] == max(size for _, size in limited._make_batches(files))
+    limited.shutdown()
+
+    # A broken pool falls back to scanning every unfinished batch in-process
+    file_store.clear()
+    broken = scanner(parallel_threshold=1, max_workers=2)
+    broken._executor = BrokenExecutor()
+    fallback = list(broken.scan(root, files, "postgresql"))
+    print(f"Fallback scan: {len(fallback)} files, {broken.get_stats()['pool_failures']} pool failure(s)")
+    assert broken.pool_failures == 1 and broken._executor is None
+    assert len(fallback) == len(files) and dict(fallback) == serial
+
+    print("✅ Parallel scan matches the serial scan and survives a broken pool")
@@ -0,0 +1,80 @@
+"""Quick test for progress event replay and the SSE endpoints' end-of-stream handling"""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.progress import ProgressBroker, SUBSCRIBER_BACKLOG, progress_broker
+from app.api import analysis
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+async def broker_replay():
+    broker = ProgressBroker(max_events=5000)
+    broker.publish("a1", "queued", {"type": "code_change"}, commit_sha="c1")
+    broker.publish("a1", "started", {}, commit_sha="c1")
+    broker.publish("a1", "ai_token", {"text": "x"})
+    broker.publish("a1", "stage", {"stage": "dependencies"})
+    broker.publish("a2", "started", {}, commit_sha="c1")
+
+    # Replay skips transient events and everything up to after_id
+    events = drain(broker.subscribe(analysis_id="a1"))
+    assert [e["event"] for e in events] == ["queued", "started", "stage"], events
+    after = drain(broker.subscribe(analysis_id="a1", after_id=events[1]["id"]))
+    assert [e["event"] for e in after] == ["stage"], after
+
+    # Commit subscriptions replay every analysis of the commit in publish order
+    commit_events = drain(broker.subscribe(commit_sha="c1"))
+    assert [e["analysis_id"] for e in commit_events] == ["a1", "a1", "a1", "a2"], commit_events
+    assert broker.knows(commit_sha="c1") and not broker.knows(commit_sha="nope")
+
+    broker.publish("a1", "complete", {})
+    assert broker.is_done("a1") and not broker.commit_done("c1")
+    broker.publish("a2", "failed", {"error": "boom"})
+    assert broker.commit_done("c1")
+
+    # A history longer than the live backlog still replays without QueueFull
+    for index in range(SUBSCRIBER_BACKLOG + 10):
+        broker.publish("big", "stage", {"index": index})
+    assert broker.subscribe(analysis_id="big").qsize() == SUBSCRIBER_BACKLOG + 10
+    print("✅ Broker replay honours after_id, skips transient events and never overflows")
+
+
+asyncio.run(broker_replay())
+
+app = FastAPI()
+app.include_router(analysis.router, prefix="/api/v1")
+client = TestClient(app)
+
+progress_broker.publish("done-1", "queued", {}, commit_sha="sha-done")
+progress_broker.publish("done-1", "started", {}, commit_sha="sha-done")
+progress_broker.publish("done-1", "complete", {"id": "done-1"})
+last_id = progress_broker.subscribe(analysis_id="done-1").get_nowait()["id"]
+
+# Finished analysis: a reconnect that missed events gets them and the stream closes
+response = client.get("/api/v1/analysis/done-1/events", headers={"Last-Event-ID": str(last_id)})
+assert response.status_code == 200 and "event: started" in response.text and "event: complete" in response.text
+
+# Finished analysis with nothing missed: 204 so EventSource stops reconnecting
+complete_id = max(e["id"] for e in drain(progress_broker.subscribe(analysis_id="done-1")))
+response = client.get("/api/v1/analysis/done-1/events", headers={"Last-Event-ID": str(complete_id)})
+assert response.status_code == 204, response.status_code
+
+# Commit streams: unknown SHA is a 404, a finished commit with nothing missed a 204
+assert client.get("/api/v1/commits/never-triggered/events").status_code == 404
+assert client.get("/api/v1/commits/sha-done/events", headers={"Last-Event-ID": str(complete_id)}).status_code == 204
+response = client.get("/api/v1/commits/sha-done/events")
+assert response.status_code == 200 and response.text.count("event: ") == 3
+
+# Result known only from storage: sent once, then 204 on reconnect
+analysis.analysis_results["stored-1"] = {"id": "stored-1"}
+assert "event: complete" in client.get("/api/v1/analysis/stored-1/events").text
+assert client.get("/api/v1/analysis/stored-1/events", headers={"Last-Event-ID": "0"}).status_code == 204
+
+print("✅ Event streams close after a finished analysis instead of hanging")
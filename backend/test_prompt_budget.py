@@ -0,0 +1,58 @@
+"""Quick test for prompt budget packing and diff trimming"""
+from app.engine.prompt_budget import PromptBudgeter, ContextPiece, estimate_tokens, relevance_score
+
+assert estimate_tokens("") == 0
+assert estimate_tokens("abcd") == 1 and estimate_tokens("abcde") == 2
+
+# Closer, more used and banking-critical pieces rank first
+assert relevance_score(distance=1) > relevance_score(distance=2)
+assert relevance_score(usage_count=10) > relevance_score(usage_count=1)
+assert relevance_score(name="PaymentService.java") == 2 * relevance_score(name="Helper.java")
+
+budgeter = PromptBudgeter(max_tokens=1000, diff_share=0.5)
+pieces = [
+    ContextPiece("dependencies", "a" * 40, relevance=1.0),   # 11 tokens
+    ContextPiece("dependencies", "b" * 40, relevance=3.0),   # 11 tokens
+    ContextPiece("snippets", "c" * 200, relevance=2.0),      # 51 tokens
+    ContextPiece("tables", "d" * 40, relevance=0.5),         # 11 tokens
+]
+
+# Most relevant pieces win; a big piece that does not fit is skipped, not a stop
+sections, used = budgeter.pack(pieces, max_tokens=35, kind="code")
+print(f"Packed into 35 tokens: {sections} ({used} used)")
+assert sections == {"dependencies": ["a" * 40, "b" * 40], "tables": ["d" * 40]}, sections
+assert used == 33 and used <= 35
+
+# Kept texts keep their display order, whatever their rank
+sections, used = budgeter.pack(pieces, max_tokens=1000, kind="code")
+assert sections["dependencies"] == ["a" * 40, "b" * 40] and used == 84
+
+sections, used = budgeter.pack(pieces, max_tokens=0, kind="code")
+assert sections == {} and used == 0
+
+stats = budgeter.get_stats()["kinds"]["code"]
+assert stats["pieces_packed"] == 7 and stats["pieces_dropped"] == 5, stats
+
+# The diff gets at most its share of the free budget
+assert budgeter.available("x" * 400) == 900
+assert budgeter.split_budget(900, "y" * 4000) == 450
+assert budgeter.split_budget(900, "y" * 40) == 10
+
+# Diffs are trimmed to whole hunks, with a note on what was left out
+hunk = "@@ -1,3 +1,3 @@\n" + "+line\n" * 20
+diff = hunk * 3
+trimmed = budgeter.fit_diff(diff, estimate_tokens(hunk) + 5, kind="code")
+assert trimmed.startswith(hunk.rstrip("\n")) and trimmed.count("@@ -1,3") == 1
+assert "diff truncated" in trimmed and "42 more lines omitted" in trimmed, trimmed.splitlines()[-1]
+assert budgeter.fit_diff(diff, 10_000) == diff
+
+# A single oversized hunk is cut at a line boundary
+trimmed = budgeter.fit_diff(hunk, 10, kind="code")
+assert all(line in ("@@ -1,3 +1,3 @@", "+line") for line in trimmed.splitlines()[:-1])
+assert estimate_tokens("".join(trimmed.splitlines(keepends=True)[:-1])) <= 10
+assert budgeter.get_stats()["kinds"]["code"]["diffs_trimmed"] == 2
+
+budgeter.record("code", "z" * 6000)
+assert budgeter.get_stats()["kinds"]["code"]["histogram"]["<=2000"] == 1
+
+print("✅ Prompt budget packs by relevance within the token limit")
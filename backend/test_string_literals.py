@@ -0,0 +1,62 @@
+"""Quick test for string literal reassembly (concatenation and placeholders)"""
+from app.services.string_literals import extract_string_literals, literal_language, PLACEHOLDER
+
+
+def texts(content, language):
+    return [text for text, _, _ in extract_string_literals(content, language)]
+
+
+assert literal_language("src/Repo.java") == "java"
+assert literal_language("db/query.PY") == "python"
+assert literal_language("README.md") is None
+
+# Java: `+` across lines, non-literal operands become the placeholder
+java = '''
+String sql = "SELECT * FROM orders " +
+    "WHERE id = " + id + " AND status = 'open'";
+String other = "SELECT 1";
+'''
+result = extract_string_literals(java, "java")
+assert [text for text, _, _ in result] == [
+    f"SELECT * FROM orders WHERE id = {PLACEHOLDER} AND status = 'open'", "SELECT 1"
+], result
+assert result[0][1] == 2 and result[1][1] == 4
+print(f"Java: {result[0][0]!r}")
+
+# Java text block: content starts after the opening line break
+assert texts('String q = """\n    SELECT id FROM users\n    """;', "java") == ["    SELECT id FROM users\n    "]
+
+# JavaScript: template substitutions and a trailing operand
+assert texts("const q = `SELECT * FROM ${table} WHERE a = ` + value;", "javascript") == [
+    f"SELECT * FROM {PLACEHOLDER} WHERE a = {PLACEHOLDER}"
+]
+
+# Python: implicit concatenation inside brackets spans lines, comments included
+python_bracketed = '''
+cursor.execute(
+    "SELECT name "  # columns
+    f"FROM {schema}.users "
+    "WHERE id = %s",
+    (user_id,)
+)
+'''
+assert texts(python_bracketed, "python") == [f"SELECT name FROM {PLACEHOLDER}.users WHERE id = %s"]
+
+# Same line and backslash continuations join too; {{ }} are literal braces in f-strings
+assert texts('q = "SELECT " "1"\nr = f"{{x}} {y}" \\\n    "z"\n', "python") == ["SELECT 1", f"{{x}} {PLACEHOLDER}z"]
+
+# Separate statements on separate lines must stay separate
+python_statements = '''
+"""Module docstring"""
+QUERY = "SELECT * FROM accounts"
+"UPDATE audit SET seen = 1"
+OTHER = ("DELETE FROM sessions")
+'''
+result = texts(python_statements, "python")
+print(f"Python statements: {result}")
+assert result == ["Module docstring", "SELECT * FROM accounts", "UPDATE audit SET seen = 1", "DELETE FROM sessions"], result
+
+# Raw strings keep their backslashes
+assert texts(r'p = r"\d+" "\t"', "python") == ["\\d+\t"]
+
+print("✅ String literals reassemble concatenations and placeholders")
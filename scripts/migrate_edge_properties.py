@@ -0,0 +1,35 @@
+"""
+Migrate dependency edges to native list properties
+Converts legacy comma/" | "-joined line_number and code_reference strings
+written by older versions into line_numbers lists and CodeReference nodes.
+Safe to re-run; only edges that still carry legacy properties are touched.
+"""
+
+import os
+import sys
+import asyncio
+
+# Make the backend package importable when run from the repo root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from app.utils.neo4j_client import neo4j_client
+
+BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+
+
+async def main():
+    print("="*60)
+    print("🔧 Dependency Edge Property Migration")
+    print("="*60)
+    print(f"   Neo4j: {neo4j_client.uri}")
+    print(f"   Batch size: {BATCH_SIZE}\n")
+
+    await neo4j_client.connect()
+    try:
+        await neo4j_client.migrate_edge_properties(batch_size=BATCH_SIZE)
+    finally:
+        await neo4j_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())